@@ -11,15 +11,18 @@ from __future__ import annotations
 
 import argparse
 import fcntl
+import hashlib
 import json
 import logging
 import os
+import queue
 import re
 import shlex
 import subprocess
 import sys
 import time
-from dataclasses import asdict, dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, replace
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
@@ -154,6 +157,10 @@ class Config:
     signer_name: str
     signer_email: str
     case_limit: int
+    workers: int
+    worktree_root: Path | None
+    case_cache_dir: Path | None
+    cvekit_version: str
 
 
 def setup_logging() -> None:
@@ -192,6 +199,28 @@ def parse_args() -> argparse.Namespace:
         default="",
         help="从已有 run 目录断点续跑；已成功 checkpoint 的 case 会自动跳过",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="并发评测的 case 数；大于 1 时每个 worker 在 target 仓库的独立 git worktree 中运行",
+    )
+    parser.add_argument(
+        "--worktree-root",
+        default="",
+        help="worker worktree 所在目录；默认 <run 目录>/worktrees",
+    )
+    parser.add_argument(
+        "--case-cache-dir",
+        default="",
+        help="case 结果缓存目录，按 source commit、baseline 和 cvekit 版本寻址；默认 <log-root>/case_cache",
+    )
+    parser.add_argument("--no-case-cache", action="store_true", help="不读取也不写入 case 结果缓存")
+    parser.add_argument(
+        "--cvekit-version",
+        default="",
+        help="参与缓存寻址的 cvekit 版本；默认取 --cvekit-workdir 的 git HEAD，有未提交改动时附加 diff 哈希",
+    )
     parser.add_argument("--eval-name", default=EVAL_NAME)
     parser.add_argument("--source-repo", default="")
     parser.add_argument("--source-branch", default="")
@@ -279,6 +308,12 @@ def build_config(args: argparse.Namespace) -> Config:
     )
     output_dir = Path(args.output_dir).expanduser().resolve()
     log_root = Path(args.log_root).expanduser().resolve()
+    if args.no_case_cache:
+        case_cache_dir = None
+    elif args.case_cache_dir.strip():
+        case_cache_dir = Path(args.case_cache_dir).expanduser().resolve()
+    else:
+        case_cache_dir = log_root / "case_cache"
     recovery_file = (
         Path(args.recovery_file).expanduser().resolve()
         if args.recovery_file
@@ -355,6 +390,14 @@ def build_config(args: argparse.Namespace) -> Config:
         signer_name=args.signer_name.strip(),
         signer_email=args.signer_email.strip(),
         case_limit=max(0, args.case_limit),
+        workers=max(1, args.workers),
+        worktree_root=(
+            Path(args.worktree_root).expanduser().resolve()
+            if args.worktree_root.strip()
+            else None
+        ),
+        case_cache_dir=case_cache_dir,
+        cvekit_version=args.cvekit_version.strip(),
     )
 
 
@@ -1293,7 +1336,7 @@ def current_repo_state(config: Config) -> dict[str, str]:
     }
 
 
-def write_recovery(config: Config, state: dict[str, str]) -> None:
+def write_recovery(config: Config, state: dict[str, Any]) -> None:
     config.recovery_file.write_text(json.dumps(state, indent=2) + "\n", encoding="utf-8")
 
 
@@ -1394,6 +1437,89 @@ def write_case_checkpoint(
         detail_path.unlink(missing_ok=True)
 
 
+def resolve_cvekit_version(config: Config) -> str:
+    if config.cvekit_version:
+        return config.cvekit_version
+    head = git(config.cvekit_workdir, "rev-parse", "HEAD", check=False)
+    if not head:
+        # Not a git checkout: key on the entry point contents instead.
+        return "file:" + hashlib.sha256(config.cvekit.read_bytes()).hexdigest()[:16]
+    digest = hashlib.sha256()
+    dirty = False
+    diff_text = git(config.cvekit_workdir, "diff", "HEAD", "--binary", check=False)
+    if diff_text:
+        dirty = True
+        digest.update(diff_text.encode())
+    # git diff does not see new, not yet committed modules; hash those too.
+    untracked = git(
+        config.cvekit_workdir,
+        "ls-files",
+        "--others",
+        "--exclude-standard",
+        "-z",
+        check=False,
+    )
+    for name in sorted(filter(None, untracked.split("\0"))):
+        path = config.cvekit_workdir / name
+        dirty = True
+        digest.update(b"\0untracked\0" + name.encode() + b"\0")
+        if path.is_file():
+            digest.update(path.read_bytes())
+    if dirty:
+        return f"{head}+dirty.{digest.hexdigest()[:12]}"
+    return head
+
+
+def case_cache_path(config: Config, case: EvalCase) -> Path | None:
+    """Cache entry for a case result.
+
+    Besides (source commit, baseline, cvekit version) the key covers the
+    manual commit and expected behavior the row is compared against, and
+    the LLM model that produced any Mystique patch.
+    """
+    if config.case_cache_dir is None:
+        return None
+    key_data = {
+        "source_commit": case.source.source_commit,
+        "case_baseline": case.case_baseline,
+        "cvekit_version": config.cvekit_version,
+        "manual_commit": case.manual_commit,
+        "expected_behavior": case.expected_behavior,
+        "llm_provider": config.llm_provider,
+        "llm_model_name": config.llm_model_name,
+    }
+    key = hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+    return config.case_cache_dir / key[:2] / f"{key}.json"
+
+
+def load_cached_case(config: Config, case: EvalCase) -> tuple[dict[str, Any], dict[str, Any] | None] | None:
+    path = case_cache_path(config, case)
+    if path is None or not path.exists():
+        return None
+    try:
+        data = read_json(path)
+    except EvalError as exc:
+        LOGGER.warning("ignoring unreadable case cache entry: %s", exc)
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("row"), dict):
+        LOGGER.warning("ignoring malformed case cache entry: %s", path)
+        return None
+    # Excel rows, describe index etc. come from this run's discovery.
+    return {**data["row"], **case_row_fields(case)}, data.get("detail")
+
+
+def store_cached_case(
+    config: Config,
+    case: EvalCase,
+    row: dict[str, Any],
+    detail: dict[str, Any] | None,
+) -> None:
+    path = case_cache_path(config, case)
+    if path is None or row.get("decision") == "failed":
+        return
+    write_json_atomic(path, {"row": row, "detail": detail})
+
+
 def write_run_checkpoint(
     run_dir: Path,
     rows: list[dict[str, Any]],
@@ -1417,12 +1543,13 @@ def write_run_checkpoint(
     )
 
 
-def restore_target(config: Config, state: dict[str, str]) -> None:
+def restore_target(config: Config, state: dict[str, Any]) -> None:
     LOGGER.info(
         "RESTORE: target repository branch=%s head=%s",
         state.get("branch") or "(detached)",
         state["head"],
     )
+    remove_worker_worktrees(config, state)
     git(config.target_repo, "reset", "--hard")
     git(config.target_repo, "clean", "-fd")
     if state.get("branch"):
@@ -1505,6 +1632,93 @@ def reset_case(config: Config, baseline: str) -> None:
         raise EvalError(f"failed to reset target repository to case baseline {baseline}")
 
 
+def create_worker_worktrees(
+    config: Config,
+    worktree_root: Path,
+    count: int,
+    state: dict[str, Any],
+) -> list[Config]:
+    """Give each worker its own worktree and temp branch of the target repository.
+
+    A worker config differs from the run config only in target_repo and
+    temp_branch, so reset_case/run_case work unchanged inside the worktree.
+    The worktrees are recorded in the recovery state before they are
+    created, so an interrupted run removes them on recovery.
+    """
+    workers = []
+    for index in range(1, count + 1):
+        path = worktree_root / f"worker_{index:02d}"
+        workers.append(replace(config, target_repo=path, temp_branch=f"{config.temp_branch}-w{index:02d}"))
+    state["worker_worktrees"] = [str(worker.target_repo) for worker in workers]
+    state["worker_branches"] = [worker.temp_branch for worker in workers]
+    write_recovery(config, state)
+    worktree_root.mkdir(parents=True, exist_ok=True)
+    for worker in workers:
+        LOGGER.info(
+            "WORKSPACE: creating worktree=%s branch=%s at baseline=%s",
+            worker.target_repo,
+            worker.temp_branch,
+            config.pr_baseline,
+        )
+        if worker.target_repo.exists():
+            git(config.target_repo, "worktree", "remove", "--force", str(worker.target_repo), check=False)
+        git(
+            config.target_repo,
+            "worktree",
+            "add",
+            "--force",
+            "-B",
+            worker.temp_branch,
+            str(worker.target_repo),
+            config.pr_baseline,
+        )
+    return workers
+
+
+def prefetch_source_commits(config: Config, cases: list[EvalCase]) -> None:
+    """Make the source commits of pending cases available in the target repository.
+
+    cvekit fetches a missing source commit through an ``upstream`` remote of
+    the target repository. Its lock only covers threads of one process, so
+    concurrent workers would race on creating the remote and writing the
+    shared .git/config. Doing it once here, before the workers start, leaves
+    every worker with the commit already present.
+    """
+    if config.source_repo.resolve() == config.target_repo.resolve():
+        return
+    missing = sorted(
+        {
+            case.source.source_commit
+            for case in cases
+            if not git(
+                config.target_repo,
+                "rev-parse",
+                "--verify",
+                "--quiet",
+                f"{case.source.source_commit}^{{commit}}",
+                check=False,
+            )
+        }
+    )
+    if not missing:
+        return
+    remotes = git(config.target_repo, "remote").split()
+    if "upstream" not in remotes:
+        git(config.target_repo, "remote", "add", "upstream", str(config.source_repo.resolve()))
+    LOGGER.info("WORKSPACE: fetching %d source commits from upstream before starting workers", len(missing))
+    git(config.target_repo, "fetch", "--quiet", "upstream", *missing)
+
+
+def remove_worker_worktrees(config: Config, state: dict[str, Any]) -> None:
+    for path in state.get("worker_worktrees", []):
+        LOGGER.info("RESTORE: removing worker worktree=%s", path)
+        git(config.target_repo, "worktree", "remove", "--force", path, check=False)
+    if state.get("worker_worktrees"):
+        git(config.target_repo, "worktree", "prune", check=False)
+    for branch in state.get("worker_branches", []):
+        git(config.target_repo, "branch", "-D", branch, check=False)
+
+
 def cvekit_command(config: Config, report_or_raw: Path, action: str, apply: str = "") -> list[str]:
     cmd = [
         str(config.cvekit),
@@ -1612,6 +1826,20 @@ def copy_text(path_value: Any) -> str:
     return path.read_text(encoding="utf-8", errors="replace")
 
 
+def case_row_fields(case: EvalCase) -> dict[str, Any]:
+    return {
+        "describe_index": case.source.describe_index,
+        "source_excel_rows": ",".join(map(str, case.source.excel_rows)),
+        "source_commit": case.source.source_commit,
+        "source_title": case.source.source_title,
+        "git_describe": case.source.git_describe,
+        "manual_pr_index": case.manual_pr_index,
+        "manual_commit": case.manual_commit,
+        "case_baseline": case.case_baseline,
+        "expected_behavior": case.expected_behavior,
+    }
+
+
 def run_case(config: Config, case: EvalCase, case_dir: Path) -> tuple[dict[str, Any], dict[str, Any] | None]:
     reset_case(config, case.case_baseline)
     start_head = git(config.target_repo, "rev-parse", "HEAD")
@@ -1742,15 +1970,7 @@ def run_case(config: Config, case: EvalCase, case_dir: Path) -> tuple[dict[str,
         patch_id_match_manual = patch_id(ai_patch) == patch_id(manual_patch)
 
     row = {
-        "describe_index": case.source.describe_index,
-        "source_excel_rows": ",".join(map(str, case.source.excel_rows)),
-        "source_commit": case.source.source_commit,
-        "source_title": case.source.source_title,
-        "git_describe": case.source.git_describe,
-        "manual_pr_index": case.manual_pr_index,
-        "manual_commit": case.manual_commit,
-        "case_baseline": case.case_baseline,
-        "expected_behavior": case.expected_behavior,
+        **case_row_fields(case),
         "initial_merged_in_target": initial_merged,
         "initial_has_conflict": initial_conflict,
         "decision": decision,
@@ -1905,6 +2125,8 @@ def write_workbook(
             f"--commit-sort {SINGLE_CASE_COMMIT_SORT} --backport-engine mystique "
             "--format-mode changed"
         ),
+        "cvekit version": config.cvekit_version,
+        "workers": config.workers,
         "started_at": started_at,
         "ended_at": ended_at,
         "direct apply success rate": ratio(
@@ -1929,6 +2151,78 @@ def write_workbook(
     workbook.save(output_path)
 
 
+def evaluate_case(
+    config: Config,
+    index: int,
+    total: int,
+    case: EvalCase,
+    case_dir: Path,
+) -> tuple[dict[str, Any], dict[str, Any] | None]:
+    LOGGER.info(
+        "case %d/%d source=%s baseline=%s expected=%s",
+        index,
+        total,
+        case.source.source_commit[:12],
+        case.case_baseline[:12],
+        case.expected_behavior,
+    )
+    attempt_dir = next_attempt_dir(case_dir)
+    LOGGER.info(
+        "CASE ATTEMPT: source=%s path=%s target=%s",
+        case.source.source_commit[:12],
+        attempt_dir,
+        config.target_repo,
+    )
+    try:
+        return run_case(config, case, attempt_dir)
+    except Exception as exc:
+        LOGGER.exception("case failed: %s", case.source.source_commit)
+        row = {
+            **case_row_fields(case),
+            "decision": "failed",
+            "execution_status": "failed",
+            "error_summary": str(exc),
+        }
+        return row, None
+
+
+def iter_case_results(
+    workers: list[Config],
+    pending: list[tuple[int, EvalCase, Path]],
+    total: int,
+) -> Any:
+    """Yield ((index, case, case_dir), (row, detail)) as cases finish.
+
+    With one worker cases run in order in the calling thread. Otherwise each
+    case borrows an idle worker (its own worktree) for its whole run, and
+    results are yielded in completion order; the caller merges them by index.
+    """
+    if len(workers) == 1:
+        for item in pending:
+            index, case, case_dir = item
+            yield item, evaluate_case(workers[0], index, total, case, case_dir)
+        return
+    idle: queue.Queue[Config] = queue.Queue()
+    for worker in workers:
+        idle.put(worker)
+
+    def task(item: tuple[int, EvalCase, Path]) -> tuple[dict[str, Any], dict[str, Any] | None]:
+        worker = idle.get()
+        try:
+            index, case, case_dir = item
+            return evaluate_case(worker, index, total, case, case_dir)
+        finally:
+            idle.put(worker)
+
+    executor = ThreadPoolExecutor(max_workers=len(workers), thread_name_prefix="eval-worker")
+    try:
+        futures = {executor.submit(task, item): item for item in pending}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
 def main() -> int:
     setup_logging()
     args = parse_args()
@@ -2045,67 +2339,77 @@ def main() -> int:
                 "run_dir": str(run_dir),
             },
         )
-    rows: list[dict[str, Any]] = []
-    conflicts: list[dict[str, Any]] = []
     selected_cases = cases[: config.case_limit] if config.case_limit else cases
+    config.cvekit_version = resolve_cvekit_version(config)
+    LOGGER.info("CVEKIT VERSION: %s", config.cvekit_version)
+    if config.case_cache_dir is not None:
+        LOGGER.info("CASE CACHE: dir=%s", config.case_cache_dir)
+    # Results are kept by case position so checkpoints and the workbook list
+    # cases in evaluation order no matter which worker finishes first.
+    results: list[tuple[dict[str, Any], dict[str, Any] | None] | None] = [None] * len(selected_cases)
+
+    def write_checkpoints() -> None:
+        finished = [result for result in results if result is not None]
+        rows = [row for row, _ in finished]
+        conflicts = [detail for _, detail in finished if detail]
+        ended_at = datetime.now(timezone.utc).isoformat()
+        write_run_checkpoint(run_dir, rows, len(selected_cases), output_path)
+        write_workbook(config, output_path, rows, conflicts, payload, started_at, ended_at)
+
     try:
-        LOGGER.info("WORKSPACE: creating/resetting temporary branch=%s", config.temp_branch)
-        git(config.target_repo, "switch", "-C", config.temp_branch, config.pr_baseline)
+        pending: list[tuple[int, EvalCase, Path]] = []
         for index, case in enumerate(selected_cases, start=1):
             case_dir = cases_dir / f"{case.source.describe_index:03d}_{safe_name(case.source.source_title)}"
             case_dir.mkdir(parents=True, exist_ok=True)
             completed = load_completed_case(case_dir, case) if resume_mode else None
             if completed:
-                row, detail = completed
-                rows.append(row)
-                if detail:
-                    conflicts.append(detail)
+                results[index - 1] = completed
                 LOGGER.info(
                     "RESUME SKIP: case %d/%d source=%s decision=%s",
                     index,
                     len(selected_cases),
                     case.source.source_commit[:12],
-                    row.get("decision"),
+                    completed[0].get("decision"),
                 )
                 continue
-            LOGGER.info(
-                "case %d/%d source=%s baseline=%s expected=%s",
-                index,
-                len(selected_cases),
-                case.source.source_commit[:12],
-                case.case_baseline[:12],
-                case.expected_behavior,
+            cached = load_cached_case(config, case)
+            if cached:
+                write_case_checkpoint(case_dir, *cached)
+                results[index - 1] = cached
+                LOGGER.info(
+                    "CACHE HIT: case %d/%d source=%s decision=%s",
+                    index,
+                    len(selected_cases),
+                    case.source.source_commit[:12],
+                    cached[0].get("decision"),
+                )
+                continue
+            pending.append((index, case, case_dir))
+
+        workers = [config]
+        if pending and config.workers > 1:
+            prefetch_source_commits(config, [case for _, case, _ in pending])
+            worktree_root = config.worktree_root or run_dir / "worktrees"
+            workers = create_worker_worktrees(
+                config,
+                worktree_root,
+                min(config.workers, len(pending)),
+                state,
             )
-            attempt_dir = next_attempt_dir(case_dir)
-            LOGGER.info("CASE ATTEMPT: source=%s path=%s", case.source.source_commit[:12], attempt_dir)
-            try:
-                row, detail = run_case(config, case, attempt_dir)
-            except Exception as exc:
-                LOGGER.exception("case failed: %s", case.source.source_commit)
-                row = {
-                    **{
-                        "describe_index": case.source.describe_index,
-                        "source_excel_rows": ",".join(map(str, case.source.excel_rows)),
-                        "source_commit": case.source.source_commit,
-                        "source_title": case.source.source_title,
-                        "git_describe": case.source.git_describe,
-                        "manual_pr_index": case.manual_pr_index,
-                        "manual_commit": case.manual_commit,
-                        "case_baseline": case.case_baseline,
-                        "expected_behavior": case.expected_behavior,
-                    },
-                    "decision": "failed",
-                    "execution_status": "failed",
-                    "error_summary": str(exc),
-                }
-                detail = None
+        elif pending:
+            LOGGER.info("WORKSPACE: creating/resetting temporary branch=%s", config.temp_branch)
+            git(config.target_repo, "switch", "-C", config.temp_branch, config.pr_baseline)
+        LOGGER.info(
+            "SCHEDULE: cases=%d pending=%d workers=%d",
+            len(selected_cases),
+            len(pending),
+            len(workers),
+        )
+        for (index, case, case_dir), (row, detail) in iter_case_results(workers, pending, len(selected_cases)):
             write_case_checkpoint(case_dir, row, detail)
-            rows.append(row)
-            if detail:
-                conflicts.append(detail)
-            ended_at = datetime.now(timezone.utc).isoformat()
-            write_run_checkpoint(run_dir, rows, len(selected_cases), output_path)
-            write_workbook(config, output_path, rows, conflicts, payload, started_at, ended_at)
+            store_cached_case(config, case, row, detail)
+            results[index - 1] = (row, detail)
+            write_checkpoints()
             LOGGER.info(
                 "CHECKPOINT: case=%d/%d result=%s workbook=%s",
                 index,
@@ -2113,9 +2417,7 @@ def main() -> int:
                 case_dir / "result.json",
                 output_path,
             )
-        ended_at = datetime.now(timezone.utc).isoformat()
-        write_run_checkpoint(run_dir, rows, len(selected_cases), output_path)
-        write_workbook(config, output_path, rows, conflicts, payload, started_at, ended_at)
+        write_checkpoints()
         LOGGER.info("evaluation workbook written: %s", output_path)
     finally:
         restore_target(config, state)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Microbenchmark Mystique's ASTParser on a large C file.
+
+Three workloads are timed, each against the previous behaviour (a fresh
+``Language``/``Parser`` per ``ASTParser`` and a recompiled query per call):
+
+* repeat: construct ``ASTParser`` for the same file again;
+* edit: change a few lines (as a formatter or LLM pass does) and reparse,
+  which the tree cache turns into an incremental ``edit()`` reparse;
+* query: run the usual method/include/call queries on a parsed file.
+
+Every incremental reparse is checked against a full parse of the same text.
+
+Example:
+    python3 bench_ast_parser.py --file ~/linux/drivers/net/ethernet/intel/e1000e/netdev.c
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import warnings
+from pathlib import Path
+
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR.parent / "src" / "cvekit" / "utils" / "mystique" / "src"))
+
+import ast_parser  # noqa: E402
+from common import Language  # noqa: E402
+from tree_sitter import Language as TSLanguage, Parser  # noqa: E402
+
+QUERIES = (ast_parser.TS_C_METHOD, ast_parser.TS_C_INCLUDE, "(call_expression)@name")
+
+
+def legacy_parse(code: bytes) -> str:
+    return Parser(TSLanguage(ast_parser.tsc.language())).parse(code).root_node
+
+
+def pooled_parse(code: bytes) -> str:
+    return ast_parser.ASTParser(code, Language.C).root
+
+
+def legacy_query(root) -> int:
+    language = TSLanguage(ast_parser.tsc.language())
+    return sum(len(nodes) for query in QUERIES for nodes in language.query(query).captures(root).values())
+
+
+def pooled_query(parser: ast_parser.ASTParser) -> int:
+    return sum(len(parser.query_all(query)) for query in QUERIES)
+
+
+def mutate(code: bytes, rng: random.Random, lines_changed: int) -> bytes:
+    lines = code.split(b"\n")
+    for _ in range(lines_changed):
+        index = rng.randrange(len(lines))
+        lines[index] = lines[index] + b" /* edited */"
+    return b"\n".join(lines)
+
+
+def timed(func, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", required=True, help="large C source file, e.g. from a kernel tree")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--lines-changed", type=int, default=3, help="lines touched per simulated edit")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    code = Path(args.file).read_bytes()
+    rng = random.Random(args.seed)
+    line_count = code.count(b"\n") + 1
+    print(f"file: {args.file} ({len(code)} bytes, {line_count} lines)")
+
+    legacy_repeat = pooled_repeat = 0.0
+    ast_parser.clear_caches()
+    for _ in range(args.iterations):
+        elapsed, expected = timed(legacy_parse, code)
+        legacy_repeat += elapsed
+        elapsed, actual = timed(pooled_parse, code)
+        pooled_repeat += elapsed
+        assert str(actual) == str(expected)
+
+    legacy_edit = pooled_edit = 0.0
+    mismatches = 0
+    current = code
+    for _ in range(args.iterations):
+        current = mutate(current, rng, args.lines_changed)
+        elapsed, expected = timed(legacy_parse, current)
+        legacy_edit += elapsed
+        elapsed, actual = timed(pooled_parse, current)
+        pooled_edit += elapsed
+        if str(actual) != str(expected):
+            mismatches += 1
+
+    parsed = ast_parser.ASTParser(current, Language.C)
+    legacy_queries = pooled_queries = 0.0
+    for _ in range(args.iterations):
+        elapsed, expected = timed(legacy_query, parsed.root)
+        legacy_queries += elapsed
+        elapsed, actual = timed(pooled_query, parsed)
+        pooled_queries += elapsed
+        assert actual == expected
+
+    n = args.iterations
+    for name, legacy, pooled in (
+        ("repeat", legacy_repeat, pooled_repeat),
+        ("edit", legacy_edit, pooled_edit),
+        ("query", legacy_queries, pooled_queries),
+    ):
+        print(
+            f"{name:<7} legacy {legacy / n * 1000:8.2f} ms/iter   "
+            f"pooled {pooled / n * 1000:8.2f} ms/iter   speedup {legacy / max(pooled, 1e-9):6.1f}x"
+        )
+    print(f"incremental reparse mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
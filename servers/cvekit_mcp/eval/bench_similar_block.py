@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Benchmark cvekit's fuzzy hunk locator on real hunks from a kernel tree.
+
+For every C hunk in the selected commits, the hunk's pre-image context is
+located in the parent revision of the file twice: once scanning every window
+(``CVEKIT_SIMILAR_BLOCK_PRUNE=0``) and once with anchor pruning. The script
+reports total time for both modes and every hunk where the results differ.
+
+Example:
+    python3 bench_similar_block.py --repo ~/linux --rev-range v6.6..v6.6.30 --max-hunks 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR.parent / "src"))
+
+from cvekit.utils.tools import utils  # noqa: E402
+
+HUNK_HEADER_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@")
+SOURCE_SUFFIXES = (".c", ".h")
+
+
+def git(repo: str, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", repo, *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        errors="replace",
+    ).stdout
+
+
+def iter_hunks(repo: str, rev_range: str, max_commits: int):
+    """Yield (commit, path, hunk body lines) for C hunks in the range."""
+    commits = git(repo, "rev-list", "--no-merges", f"--max-count={max_commits}", rev_range).split()
+    for commit in commits:
+        diff = git(repo, "show", "--format=", "--no-renames", "-U3", commit)
+        path = None
+        hunk: list[str] | None = None
+        for line in diff.splitlines():
+            if line.startswith("diff --git"):
+                if path and hunk:
+                    yield commit, path, hunk
+                path, hunk = None, None
+            elif line.startswith("--- a/"):
+                name = line[len("--- a/"):]
+                path = name if name.endswith(SOURCE_SUFFIXES) else None
+            elif path and HUNK_HEADER_RE.match(line):
+                if hunk:
+                    yield commit, path, hunk
+                hunk = []
+            elif path and hunk is not None and line[:1] in (" ", "-", "+"):
+                hunk.append(line)
+        if path and hunk:
+            yield commit, path, hunk
+
+
+def timed_locate(pattern: list[str], main: list[str], prune: bool) -> tuple[tuple[int, int], float]:
+    os.environ["CVEKIT_SIMILAR_BLOCK_PRUNE"] = "1" if prune else "0"
+    started = time.perf_counter()
+    result = utils.find_most_similar_block(pattern, main, len(pattern))
+    return result, time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repo", required=True, help="Kernel git repository")
+    parser.add_argument("--rev-range", required=True, help="Commits to take hunks from, e.g. v6.6..v6.6.30")
+    parser.add_argument("--max-commits", type=int, default=200)
+    parser.add_argument("--max-hunks", type=int, default=500)
+    parser.add_argument("--min-file-lines", type=int, default=1000, help="Skip hunks in smaller files")
+    args = parser.parse_args()
+
+    files: dict[tuple[str, str], list[str]] = {}
+    full_total = pruned_total = 0.0
+    hunks = mismatches = 0
+    for commit, path, hunk in iter_hunks(args.repo, args.rev_range, args.max_commits):
+        key = (commit, path)
+        if key not in files:
+            try:
+                files[key] = git(args.repo, "show", f"{commit}^:{path}").splitlines()
+            except subprocess.CalledProcessError:
+                files[key] = []
+        target = files[key]
+        if len(target) < args.min_file_lines:
+            continue
+        pattern, _, _, _ = utils.extract_context(hunk)
+        if not pattern:
+            continue
+
+        full, full_seconds = timed_locate(pattern, target, prune=False)
+        pruned, pruned_seconds = timed_locate(pattern, target, prune=True)
+        full_total += full_seconds
+        pruned_total += pruned_seconds
+        hunks += 1
+        if full != pruned:
+            mismatches += 1
+            print(f"mismatch {commit[:12]} {path}: full={full} pruned={pruned}")
+        if hunks >= args.max_hunks:
+            break
+
+    os.environ.pop("CVEKIT_SIMILAR_BLOCK_PRUNE", None)
+    if not hunks:
+        print("no hunks found")
+        return 1
+    print(f"hunks: {hunks}, files: {len(files)}, mismatches: {mismatches}")
+    print(f"full scan: {full_total:.3f}s ({full_total / hunks * 1000:.2f} ms/hunk)")
+    print(f"anchored:  {pruned_total:.3f}s ({pruned_total / hunks * 1000:.2f} ms/hunk)")
+    print(f"speedup:   {full_total / max(pruned_total, 1e-9):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark batch ``git describe --tags --always`` resolution on a kernel tree.
+
+Samples commits from a revision range and resolves their describe strings
+three ways: one ``git describe`` call for the whole batch (the path the topo
+walk replaces), the topo walk over the commits' full ancestry, and the topo
+walk cut below the nearest tag shared by the batch (the default). The disk
+cache is bypassed. The script reports each mode's time and any commit whose
+result differs from ``git describe``.
+
+Example:
+    python3 bench_tag_describe.py --repo ~/linux --rev-range v6.1..v6.6 --sizes 32 200 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR.parent / "src"))
+
+from cvekit.utils import tag_describe  # noqa: E402
+
+
+def git(repo: str, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", repo, *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        errors="replace",
+    ).stdout
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def walk(repo: str, commits: list[str], bounded: bool) -> dict[str, str]:
+    tags, _ = tag_describe._list_tags(repo)
+    real_boundary = tag_describe._walk_boundary
+    if not bounded:
+        tag_describe._walk_boundary = lambda *args: []
+    try:
+        return tag_describe._describe_by_walk(repo, commits, tags)
+    finally:
+        tag_describe._walk_boundary = real_boundary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="对比 git describe 与拓扑遍历批量求 describe 的耗时")
+    parser.add_argument("--repo", required=True, help="内核等带 tag 的 git 仓库")
+    parser.add_argument("--rev-range", required=True, help="从该范围内抽样 commit，例如 v6.1..v6.6")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 200, 1000], help="每批 commit 数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    repo = str(Path(args.repo).expanduser())
+    pool = git(repo, "rev-list", args.rev_range).split()
+    rng = random.Random(args.seed)
+    print(f"repo: {repo}, range: {args.rev_range}, commits in range: {len(pool)}")
+    for size in args.sizes:
+        commits = rng.sample(pool, min(size, len(pool)))
+        git_seconds, expected = timed(tag_describe._describe_with_git, repo, commits)
+        full_seconds, full = timed(walk, repo, commits, False)
+        bounded_seconds, bounded = timed(walk, repo, commits, True)
+        mismatches = [
+            commit
+            for commit in commits
+            if not (expected.get(commit) == full.get(commit) == bounded.get(commit))
+        ]
+        print(
+            f"batch {len(commits)}\n"
+            f"  git describe  : {git_seconds:.3f}s\n"
+            f"  walk (full)   : {full_seconds:.3f}s\n"
+            f"  walk (bounded): {bounded_seconds:.3f}s\n"
+            f"  mismatches    : {len(mismatches)}"
+        )
+        for commit in mismatches[:10]:
+            print(f"    {commit}: describe={expected.get(commit)} full={full.get(commit)} bounded={bounded.get(commit)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
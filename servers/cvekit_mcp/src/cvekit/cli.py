@@ -4,32 +4,64 @@ import logging
 import os
 import json
 import multiprocessing
-import asyncio
-import git
 from datetime import datetime
+from importlib import import_module
 
 from typing import Optional, Tuple, List, Dict
-from tabulate import tabulate
-from .utils.gitee import parse_gitee_issue_url, setup_repository, get_issue_url_from_cve_id
-from .utils.commits import get_vulnerability_commits, branch_commit_from_upstream
-from .utils.branches import process_branches
-from .utils.apply_patch import apply_patch
-from .utils.create_pr import create_pr
 from .utils.locales import i18n
-from .utils.backporting import run_backport_from_config
-from .utils.backport_batch import (
-    handle_backport_batch,
-    generate_backport_batch_config_from_excel,
-)
-from .utils.package.patch_crawler import PackagePatchCrawler
-from .utils.package.patch_download import download_package_patch
 from .utils.env_loader import get_rpmbuild_path
-from .utils.package.source_repo import get_spec_version_from_branch, sync_rpmbuild_to_repo, cleanup_package
+from .utils import tracing
 
 logger = logging.getLogger(__name__)
 apply_patch_lock = multiprocessing.Lock()
 create_pr_lock = multiprocessing.Lock()
 
+# 各 action 的依赖按需导入：--help、parse-issue、get-commits 这类轻量调用不加载
+# LLM/agent、backport_batch、package crawler 等子系统。handler 开头用 _lazy_import
+# 声明所需名字，导入后写入模块全局，既能在函数里直接引用，也能被 mock.patch.object 替换
+_LAZY_IMPORTS = {
+    "asyncio": ("asyncio", None),
+    "git": ("git", None),
+    "tabulate": ("tabulate", "tabulate"),
+    "parse_gitee_issue_url": (".utils.gitee", "parse_gitee_issue_url"),
+    "setup_repository": (".utils.gitee", "setup_repository"),
+    "get_issue_url_from_cve_id": (".utils.gitee", "get_issue_url_from_cve_id"),
+    "get_vulnerability_commits": (".utils.commits", "get_vulnerability_commits"),
+    "branch_commit_from_upstream": (".utils.commits", "branch_commit_from_upstream"),
+    "process_branches": (".utils.branches", "process_branches"),
+    "apply_patch": (".utils.apply_patch", "apply_patch"),
+    "create_pr": (".utils.create_pr", "create_pr"),
+    "run_backport_from_config": (".utils.backporting", "run_backport_from_config"),
+    "handle_backport_batch": (".utils.backport_batch", "handle_backport_batch"),
+    "generate_backport_batch_config_from_excel": (
+        ".utils.backport_batch",
+        "generate_backport_batch_config_from_excel",
+    ),
+    "PackagePatchCrawler": (".utils.package.patch_crawler", "PackagePatchCrawler"),
+    "download_package_patch": (".utils.package.patch_download", "download_package_patch"),
+    "get_spec_version_from_branch": (".utils.package.source_repo", "get_spec_version_from_branch"),
+    "sync_rpmbuild_to_repo": (".utils.package.source_repo", "sync_rpmbuild_to_repo"),
+    "cleanup_package": (".utils.package.source_repo", "cleanup_package"),
+}
+
+
+def _lazy_import(*names):
+    """导入 _LAZY_IMPORTS 中的名字到模块全局，已存在（包括被测试替换）的保持不变"""
+    module_globals = globals()
+    for name in names:
+        if name in module_globals:
+            continue
+        module_name, attr = _LAZY_IMPORTS[name]
+        module = import_module(module_name, __package__)
+        module_globals[name] = getattr(module, attr) if attr else module
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        _lazy_import(name)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def _build_log_formatter():
     return logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -300,6 +332,19 @@ def main():
         action='store_true',
         help='仅在 backport-batch 下使用：生成/续扫 report 时检测到第一条冲突后停止，后续条目标记为 pending'
     )
+    backport_group.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=None,
+        help='仅在 backport-batch 下使用：并发预检的 worker 数（每个 worker 使用独立 git worktree）；默认读取配置 jobs，未配置时串行'
+    )
+    backport_group.add_argument(
+        '--conflict-check',
+        choices=['merge-tree', 'cherry-pick'],
+        default=None,
+        help='仅在 backport-batch 下使用：冲突检测方式。merge-tree（默认）在对象库中三方合并，不检出工作区；cherry-pick 在工作区中试探 apply/cherry-pick'
+    )
     backport_group.add_argument(
         '--enable-conflict-summary',
         action='store_true',
@@ -407,7 +452,8 @@ def main():
     _setup_logging(args)
 
     try:
-        result = handle_action(args)
+        with tracing.span(f"cvekit.{args.action}"):
+            result = handle_action(args)
         format_output(result, args)
     except Exception as e:
         logger.error(f"执行失败: {str(e)}")
@@ -424,6 +470,7 @@ def main():
 def handle_action(args):
     """路由到不同操作处理器"""
     if args.action == 'setup-env':
+        _lazy_import("setup_repository")
         try:
             repo, repo_path = setup_repository(
                 args.fork_repo_url, args.gitee_token, args.clone_dir,
@@ -448,6 +495,7 @@ def handle_action(args):
             getattr(args, 'preview_commit_message', False),
             getattr(args, 'interactive', False),
         )
+        _lazy_import("handle_backport_batch", "generate_backport_batch_config_from_excel")
         if args.backport_excel:
             return generate_backport_batch_config_from_excel(
                 excel_path=args.backport_excel,
@@ -476,6 +524,7 @@ def handle_action(args):
             raise ValueError("apply-patch 模式需要提供 --cve-id 参数")
         # 尝试获取 issue_url（但不强制要求成功）
         if args.cve_id and not args.issue_url:
+            _lazy_import("get_issue_url_from_cve_id")
             try:
                 args.issue_url = get_issue_url_from_cve_id(args.cve_id, args.gitee_token, package_name = args.package_name)
             except Exception as e:
@@ -483,6 +532,7 @@ def handle_action(args):
         return handle_apply_patch(args.cve_id, args)
 
     if args.cve_id and not args.issue_url:
+        _lazy_import("get_issue_url_from_cve_id")
         args.issue_url = get_issue_url_from_cve_id(args.cve_id, args.gitee_token, package_name = args.package_name)
 
     cve_id = args.cve_id
@@ -513,6 +563,7 @@ def handle_action(args):
 
 def handle_apply_patch(cve_id, args):
     """应用 patch 到本地仓库（可选推送到 fork 分支）"""
+    _lazy_import("apply_patch")
     apply_patch_lock.acquire()
     try:
         # 默认需要人工确认，除非使用 --no-confirm 参数
@@ -545,6 +596,7 @@ def handle_apply_patch(cve_id, args):
 
 def handle_create_pr(cve_id, args):
     """创建pr"""
+    _lazy_import("create_pr", "cleanup_package")
     create_pr_lock.acquire()
     try:
         result = create_pr(
@@ -566,6 +618,7 @@ def handle_create_pr(cve_id, args):
 
 def handle_backport(cve_id, args):
     """处理补丁回移植逻辑"""
+    _lazy_import("get_vulnerability_commits", "branch_commit_from_upstream", "run_backport_from_config")
     # 获取提交信息
     _project_dir = getattr(args, 'project_dir', '') or ''
     _target_path = getattr(args, 'target_path', '') or ''
@@ -677,6 +730,7 @@ def handle_mystique(cve_id, args):
     # 获取修复提交：优先使用 --commit-id，否则从 CVE ID 自动获取
     fixed_commit = args.commit_id or None
     if not fixed_commit and cve_id:
+        _lazy_import("get_vulnerability_commits")
         commits = get_vulnerability_commits(
             cve_id,
             not args.no_cache,
@@ -766,6 +820,7 @@ def handle_mystique(cve_id, args):
 
 def handle_parse_issue(args):
     """处理issue解析逻辑"""
+    _lazy_import("parse_gitee_issue_url")
     issue_data = parse_gitee_issue_url(args.issue_url, args.gitee_token, not args.no_cache)
     return {
         "action": "parse-issue",
@@ -774,6 +829,7 @@ def handle_parse_issue(args):
 
 def handle_get_commits(cve_id, use_cache, clone_dir, project_dir=""):
     """处理提交获取逻辑"""
+    _lazy_import("get_vulnerability_commits")
     introduced, fixed = get_vulnerability_commits(
         cve_id,
         use_cache,
@@ -798,6 +854,7 @@ def handle_get_commits(cve_id, use_cache, clone_dir, project_dir=""):
 
 def fetch_cve_id(issue_url, gitee_token, use_cache):
     """从issue URL自动获取CVE ID"""
+    _lazy_import("parse_gitee_issue_url")
     issue_data = parse_gitee_issue_url(issue_url, gitee_token, use_cache)
     if not issue_data.get('cve_id'):
         raise ValueError(i18n("提供的issue中未找到CVE ID"))
@@ -810,6 +867,7 @@ def handle_analyze_branches(args):
     1. 提供 issue_url：从 issue 获取详细信息并分析分支
     2. 只提供 cve_id：直接使用 cve_id 获取 commit 信息并分析分支
     """
+    _lazy_import("parse_gitee_issue_url", "get_vulnerability_commits", "setup_repository", "process_branches")
     issue_data = {}
     cve_id = args.cve_id
     
@@ -862,6 +920,7 @@ def handle_analyze_branches(args):
 
 def handle_get_commits_package(args) -> Tuple[List[Dict], List[Dict]]:
     """获取指定软件包CVE的提交列表与补丁详情。"""
+    _lazy_import("asyncio", "PackagePatchCrawler")
     ensure_cve_tracking_reuse_path()
     crawler = PackagePatchCrawler()
     # 获取commit链接
@@ -887,6 +946,7 @@ def handle_get_commits_package(args) -> Tuple[List[Dict], List[Dict]]:
 
 def handle_download_patch_package(args):
     """下载指定commit的补丁"""
+    _lazy_import("download_package_patch")
     ensure_cve_tracking_reuse_path()
     commit_out_files, commit_failed = download_package_patch(
         commit_url=args.commit,
@@ -900,12 +960,14 @@ def handle_download_patch_package(args):
 
 def handle_plawright(args):
     """用playwright mcp测试cve"""
+    _lazy_import("asyncio")
     from .utils.package.playwright_for_patch import run_agent
     agent_result = asyncio.run(run_agent(args.sup_url, args.package_name, args.cve_id))
     return agent_result
 
 def handle_apply_patch_to_package(args):
     """通过 cve_tracking 复用模块的 PathApply 应用补丁。"""
+    _lazy_import("sync_rpmbuild_to_repo")
     ensure_cve_tracking_reuse_path()
     from core.verification.apply import PathApply
 
@@ -928,6 +990,7 @@ def handle_apply_patch_to_package(args):
 
 
 def handle_analyze_branch_package(args) -> List[Dict]:
+    _lazy_import("git", "get_spec_version_from_branch")
     repo_path = os.path.join(args.clone_dir, args.package_name)
     if not os.path.exists(repo_path):
         return {
@@ -951,6 +1014,7 @@ def format_output(result, args):
 
 def _display_branch_table(branches):
     """显示分支分析表格"""
+    _lazy_import("tabulate")
     table_data = []
     for branch in branches:
         row = [
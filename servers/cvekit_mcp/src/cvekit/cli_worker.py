@@ -0,0 +1,406 @@
+"""常驻 cvekit CLI worker：只导入一次 cvekit.cli，在进程内逐个执行 ``cvekit`` 命令。
+
+MCP server 每次工具调用都启动一个 ``cvekit --action=... --json`` 子进程，
+大部分耗时花在导入 cvekit.cli（GitPython、langchain、backport_batch、
+package crawler 等）上，进程内的符号表、标题索引缓存和仓库句柄也随进程丢弃。
+worker 进程保持这些模块和缓存，每个请求在进程内以新的 sys.argv 调用
+``cvekit.cli.main``，stdout/stderr/退出码与子进程方式一致。worker 进程 fd 1/2 上的输出
+（git、perl、Joern 等子进程的输出以及解释器致命错误）写入每个 worker 自己的临时日志，
+调用结束后追加到本次调用的 stderr；worker 中途退出时错误信息附带日志末尾。
+
+每次调用前后恢复环境变量、工作目录、sys.argv 和 root logger 的 handler，
+调用之间只共享模块级缓存。worker 执行满 CVEKIT_WORKER_MAX_CALLS 次或
+RSS 超过 CVEKIT_WORKER_MAX_RSS_MB 后回收重启；worker 无法启动时返回 None，
+调用方改用子进程执行。
+
+对比冷启动 CLI 和常驻 worker 的每个 action 耗时::
+
+    python -m cvekit.cli_worker bench "--action=get-commits --cve-id=CVE-2024-26600 --clone-dir=/data --json"
+"""
+from __future__ import annotations
+
+import atexit
+import io
+import json
+import logging
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from importlib import import_module
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENTRY = "cvekit.cli:main"
+# 常驻 worker 的回收策略，按调用次数和常驻内存两项判断
+MAX_CALLS = int(os.environ.get("CVEKIT_WORKER_MAX_CALLS", "50"))
+MAX_RSS_BYTES = int(os.environ.get("CVEKIT_WORKER_MAX_RSS_MB", "2048")) * 1024 * 1024
+# 同时保留的空闲 worker 数；并发调用超过该值时临时拉起的 worker 用完即关闭
+MAX_IDLE_WORKERS = int(os.environ.get("CVEKIT_WORKERS", "2"))
+# worker 异常退出时，错误信息中附带的 stderr 日志末尾长度（字节）
+STDERR_TAIL_BYTES = 4096
+
+# MCP server 各工具对应的 action，bench 默认只做参数校验，衡量的就是启动开销
+_BENCH_DEFAULT_COMMANDS = [
+    "--action=parse-issue --json",
+    "--action=get-commits --json",
+    "--action=analyze-branches --json",
+    "--action=apply-patch --json",
+    "--action=mystique --json",
+]
+
+
+class CvekitWorkerError(RuntimeError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# worker 进程侧
+# ---------------------------------------------------------------------------
+
+def _load_entry(entry: str) -> Callable[[], object]:
+    module_name, _, func_name = entry.partition(":")
+    return getattr(import_module(module_name), func_name or "main")
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _exit_code(code, stderr: io.StringIO) -> int:
+    # 与解释器处理 SystemExit 的方式一致：None 为 0，非整数打印到 stderr 后为 1
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=stderr)
+    return 1
+
+
+def _call(func: Callable[[], object], argv: list[str], env: dict | None, cwd: str | None) -> dict:
+    """在当前进程内执行一次命令，返回退出码和输出，并恢复调用前的进程状态。"""
+    saved_env = dict(os.environ)
+    saved_cwd = os.getcwd()
+    saved_argv = sys.argv
+    saved_streams = (sys.stdin, sys.stdout, sys.stderr)
+    root = logging.getLogger()
+    saved_handlers = root.handlers[:]
+    saved_level = root.level
+    stdout, stderr = io.StringIO(), io.StringIO()
+    returncode = 0
+    started_at = time.perf_counter()
+    try:
+        if env is not None:
+            os.environ.clear()
+            os.environ.update(env)
+        if cwd:
+            os.chdir(cwd)
+        sys.argv = ["cvekit", *argv]
+        sys.stdin, sys.stdout, sys.stderr = io.StringIO(), stdout, stderr
+        try:
+            func()
+        except SystemExit as exc:
+            returncode = _exit_code(exc.code, stderr)
+        except Exception:
+            traceback.print_exc(file=stderr)
+            returncode = 1
+    finally:
+        sys.stdin, sys.stdout, sys.stderr = saved_streams
+        for handler in root.handlers[:]:
+            if handler not in saved_handlers:
+                root.removeHandler(handler)
+                handler.close()
+        for handler in saved_handlers:
+            if handler not in root.handlers:
+                root.addHandler(handler)
+        root.setLevel(saved_level)
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+    # 开启 CVEKIT_TRACE 时每个命令的 trace 单独落盘，避免事件在常驻进程中累积，
+    # worker 被强制结束时也不丢失已完成命令的 trace
+    tracing = sys.modules.get("cvekit.utils.tracing")
+    if tracing is not None and tracing.is_enabled():
+        tracing.flush()
+    return {
+        "returncode": returncode,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "rss_bytes": _rss_bytes(),
+        "seconds": time.perf_counter() - started_at,
+    }
+
+
+def serve(entry: str = DEFAULT_ENTRY) -> int:
+    """worker 主循环：stdin 每行一个 JSON 请求，stdout 每行一个 JSON 响应。"""
+    proto_in = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    proto_out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    # 子进程直接写 fd 0/1 的内容不能混进协议：fd 0 指向 /dev/null，fd 1 并入 stderr，
+    # stderr 由调用方接到 worker 的日志文件
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    os.dup2(2, 1)
+
+    def respond(message: dict) -> None:
+        proto_out.write(json.dumps(message, ensure_ascii=False) + "\n")
+        proto_out.flush()
+
+    try:
+        func = _load_entry(entry)
+    except Exception as exc:  # noqa: BLE001
+        respond({"ready": False, "error": f"{type(exc).__name__}: {exc}"})
+        return 1
+    respond({"ready": True, "pid": os.getpid()})
+    for line in proto_in:
+        request = json.loads(line)
+        respond(_call(func, request["argv"], request.get("env"), request.get("cwd")))
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# 调用方侧
+# ---------------------------------------------------------------------------
+
+class CvekitWorker:
+    """一个已导入 cvekit.cli 的常驻进程，一次执行一个命令。"""
+
+    def __init__(self, entry: str = DEFAULT_ENTRY, env: dict | None = None):
+        self.calls = 0
+        self.rss_bytes = 0
+        self.process = None
+        # worker 的 stderr 写入已删除目录项的临时文件：worker 以 O_APPEND 写，
+        # 调用方每次调用后读出新增内容，空闲时截断
+        fd, path = tempfile.mkstemp(prefix="cvekit-worker-", suffix=".stderr")
+        self._stderr_log = os.fdopen(fd, "rb")
+        try:
+            writer = os.open(path, os.O_WRONLY | os.O_APPEND)
+        finally:
+            os.unlink(path)
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "cvekit.cli_worker", "serve", "--entry", entry],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=writer,
+                env=env,
+                text=True,
+                encoding="utf-8",
+            )
+        except BaseException:
+            self._stderr_log.close()
+            raise
+        finally:
+            os.close(writer)
+        try:
+            ready = self._receive()
+        except CvekitWorkerError:
+            self.close()
+            raise
+        if not ready.get("ready"):
+            self.close()
+            raise CvekitWorkerError(ready.get("error") or "cvekit worker failed to start")
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def _read_stderr(self) -> str:
+        """读出 worker 自上次读取以来写到 fd 1/2 的内容。"""
+        return self._stderr_log.read().decode("utf-8", errors="replace")
+
+    def _receive(self) -> dict:
+        line = self.process.stdout.readline()
+        if not line:
+            code = self.process.wait()
+            tail = self._read_stderr()[-STDERR_TAIL_BYTES:].rstrip()
+            message = f"cvekit worker exited (code {code})"
+            raise CvekitWorkerError(f"{message}, stderr tail:\n{tail}" if tail else message)
+        return json.loads(line)
+
+    def run(self, argv: list[str], env: dict | None = None, cwd: str | None = None) -> subprocess.CompletedProcess:
+        """执行 ``cvekit <argv>``，返回与子进程方式相同字段的 CompletedProcess。"""
+        request = {"argv": list(argv), "env": dict(env) if env is not None else None, "cwd": cwd or os.getcwd()}
+        # worker 空闲，没有写入者，可以安全截断上一次调用留下的日志
+        leftover = self._read_stderr()
+        if leftover:
+            logger.debug("cvekit worker 空闲时的输出: %s", leftover.rstrip())
+        os.ftruncate(self._stderr_log.fileno(), 0)
+        self._stderr_log.seek(0)
+        try:
+            self.process.stdin.write(json.dumps(request, ensure_ascii=False) + "\n")
+            self.process.stdin.flush()
+        except OSError as exc:
+            raise CvekitWorkerError(f"cvekit worker pipe failed: {exc}") from exc
+        response = self._receive()
+        self.calls += 1
+        self.rss_bytes = response.get("rss_bytes", 0)
+        return subprocess.CompletedProcess(
+            ["cvekit", *argv], response["returncode"], response["stdout"], response["stderr"] + self._read_stderr()
+        )
+
+    def close(self) -> None:
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        leftover = self._read_stderr()
+        if leftover:
+            logger.debug("cvekit worker 退出前的输出: %s", leftover.rstrip())
+        self._stderr_log.close()
+
+
+class CvekitWorkerPool:
+    """按需拉起 worker，执行完放回空闲列表，按调用次数和内存回收。"""
+
+    def __init__(
+        self,
+        entry: str = DEFAULT_ENTRY,
+        max_idle: int = MAX_IDLE_WORKERS,
+        max_calls: int = MAX_CALLS,
+        max_rss_bytes: int = MAX_RSS_BYTES,
+    ):
+        self.entry = entry
+        self.max_idle = max_idle
+        self.max_calls = max_calls
+        self.max_rss_bytes = max_rss_bytes
+        self.disabled = False
+        self._idle: list[CvekitWorker] = []
+        self._lock = threading.Lock()
+
+    def _expired(self, worker: CvekitWorker) -> bool:
+        if not worker.alive:
+            return True
+        if self.max_calls > 0 and worker.calls >= self.max_calls:
+            return True
+        return self.max_rss_bytes > 0 and worker.rss_bytes >= self.max_rss_bytes
+
+    def run(self, argv: list[str], env: dict | None = None) -> subprocess.CompletedProcess | None:
+        """在 worker 中执行命令；worker 无法启动时返回 None，由调用方改走子进程。"""
+        with self._lock:
+            if self.disabled:
+                return None
+            worker = self._idle.pop() if self._idle else None
+        if worker is None:
+            try:
+                worker = CvekitWorker(self.entry, env=env)
+            except (CvekitWorkerError, OSError, ValueError) as exc:
+                logger.warning("cvekit worker 启动失败，改为每次调用启动 cvekit 子进程: %s", exc)
+                with self._lock:
+                    self.disabled = True
+                return None
+        try:
+            result = worker.run(argv, env=env)
+        except (CvekitWorkerError, OSError, ValueError) as exc:
+            # 命令可能已经产生副作用（应用补丁、创建 PR），不重跑，按子进程异常退出处理
+            logger.error("cvekit worker 执行中退出: %s", exc)
+            worker.close()
+            return subprocess.CompletedProcess(["cvekit", *argv], 1, "", f"cvekit worker exited during call: {exc}")
+        with self._lock:
+            if not self._expired(worker) and len(self._idle) < self.max_idle:
+                self._idle.append(worker)
+                worker = None
+        if worker is not None:
+            logger.info("回收 cvekit worker: calls=%d, rss=%dMB", worker.calls, worker.rss_bytes // (1024 * 1024))
+            worker.close()
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.close()
+
+
+_pool: CvekitWorkerPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> CvekitWorkerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CvekitWorkerPool()
+        return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(close_pool)
+
+
+# ---------------------------------------------------------------------------
+# bench
+# ---------------------------------------------------------------------------
+
+def _cold_command() -> list[str]:
+    executable = shutil.which("cvekit")
+    return [executable] if executable else [sys.executable, "-m", "cvekit.cli"]
+
+
+def bench(commands: list[str], rounds: int) -> None:
+    env = os.environ.copy()
+    cold_command = _cold_command()
+    started_at = time.perf_counter()
+    worker = CvekitWorker(env=env)
+    startup = time.perf_counter() - started_at
+    print(f"cold: {' '.join(cold_command)}, rounds: {rounds}, worker startup: {startup:.2f}s")
+    try:
+        for command in commands:
+            argv = shlex.split(command)
+            cold_times, warm_times, codes = [], [], set()
+            for _ in range(rounds):
+                started_at = time.perf_counter()
+                cold = subprocess.run(cold_command + argv, capture_output=True, text=True, env=env)
+                cold_times.append(time.perf_counter() - started_at)
+                started_at = time.perf_counter()
+                warm = worker.run(argv, env=env)
+                warm_times.append(time.perf_counter() - started_at)
+                codes.add((cold.returncode, warm.returncode))
+            print(
+                f"{command}\n"
+                f"  cold CLI   : mean {sum(cold_times) / rounds:.3f}s, min {min(cold_times):.3f}s\n"
+                f"  warm worker: mean {sum(warm_times) / rounds:.3f}s, min {min(warm_times):.3f}s\n"
+                f"  exit codes (cold, warm): {sorted(codes)}"
+            )
+    finally:
+        worker.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="常驻 cvekit CLI worker")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_parser = sub.add_parser("serve")
+    serve_parser.add_argument("--entry", default=DEFAULT_ENTRY)
+    bench_parser = sub.add_parser("bench", help="对比冷启动 CLI 与常驻 worker 的每个 action 耗时")
+    bench_parser.add_argument("commands", nargs="*", default=_BENCH_DEFAULT_COMMANDS)
+    bench_parser.add_argument("--rounds", type=int, default=3)
+    parsed = parser.parse_args()
+    if parsed.command == "serve":
+        sys.exit(serve(parsed.entry))
+    bench(parsed.commands, parsed.rounds)
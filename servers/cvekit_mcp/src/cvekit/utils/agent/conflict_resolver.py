@@ -13,6 +13,7 @@ from types import SimpleNamespace
 from typing import Optional, Dict, Any
 
 from .invoke_llm import initial_agent
+from .. import tracing
 from ..tools.logger import logger
 from ..tools.project import Project, safe_git_reset_hard
 
@@ -84,6 +85,7 @@ class LLMConflictResolver:
             api_key=self.api_key,
             openai_api_base=base_url,
             verbose=self.debug_mode,
+            callbacks=tracing.langchain_callbacks(),
         )
 
         # 获取完整的 5 个工具：viewcode, locate_symbol, validate, git_history, git_show
@@ -20,6 +20,7 @@ from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.callbacks import FileCallbackHandler
 from langchain_openai import ChatOpenAI
 
+from .. import llm_cache, tracing
 from .prompt import (
     SYSTEM_PROMPT,
     SYSTEM_PROMPT_PTACH,
@@ -306,6 +307,8 @@ def initial_agent(
     )
     logger.info(f"[DEBUG-INIT-AGENT] Creating ChatOpenAI with model={model_name!r}")
 
+    # CVEKIT_LLM_CACHE 开启且温度不超过阈值时，agent 每轮模型调用按完整消息寻址复用历史响应
+    response_cache = llm_cache.langchain_cache(temperature)
     llm = ChatOpenAI(
         temperature=temperature,
         model=model_name,
@@ -313,6 +316,8 @@ def initial_agent(
         openai_api_base=base_url,
         verbose=True,
         model_kwargs=model_kwargs,
+        cache=response_cache,
+        callbacks=tracing.langchain_callbacks(),
     )
     logger.debug(f"[initial_agent] ChatOpenAI 实例创建成功: llm={llm}")
     logger.debug(f"[initial_agent] LLM 对象类型: {type(llm)}")
@@ -367,7 +372,12 @@ def initial_agent(
     logger.debug("[initial_agent] 创建代理执行器...")
     logger.debug(f"  参数: agent={agent}, tools={tools}, verbose={debug_mode}, max_iterations=30")
     agent_executor = AgentExecutor(
-        agent=agent, tools=tools, verbose=debug_mode, max_iterations=30
+        agent=agent,
+        tools=tools,
+        verbose=debug_mode,
+        max_iterations=30,
+        # 流式调用不经过 LangChain 缓存
+        stream_runnable=response_cache is None,
     )
     logger.debug(f"[initial_agent] 代理执行器创建成功: agent_executor={agent_executor}")
     logger.debug(f"[initial_agent] AgentExecutor 对象类型: {type(agent_executor)}")
@@ -9,7 +9,6 @@ from .gitee import setup_repository
 from .patch import getUrlText, ensure_patch_file
 from .commits import get_vulnerability_commits, branch_commit_from_upstream
 from .locales import i18n
-from .tools.project import safe_git_reset_hard
 from .branches import check_analyse_cache_result
 
 logger = logging.getLogger(__name__)
@@ -785,6 +784,8 @@ def apply_patch(
     
     # 清理工作区，确保没有未提交的文件导致后续操作失败
     try:
+        from .tools.project import safe_git_reset_hard
+
         logger.info("清理工作区，重置所有更改...")
         # 重置所有更改（使用安全函数处理锁文件问题）
         safe_git_reset_hard(repo)
@@ -3,14 +3,21 @@ from __future__ import annotations
 import logging
 import os
 import copy
+import functools
 import re
+import queue
+import shutil
 import subprocess
 import sys
+import tempfile
+import threading
 import time
 import uuid
 
 import git
 import yaml
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
 from dataclasses import dataclass
 
 from .apply_patch import extract_commit_message_from_patch
@@ -26,6 +33,8 @@ from .commit_message_template import (
 )
 from .config_layout import get_registry, ConfigError, TargetConfigLayoutError
 from . import git_subject_index_cache
+from . import llm_cache
+from . import tracing
 from .locales import i18n
 from .backport_sort import resolve_sorted_backport_items
 from tabulate import tabulate
@@ -34,6 +43,8 @@ logger = logging.getLogger(__name__)
 
 import readline
 
+_UPSTREAM_REMOTE_LOCK = threading.Lock()
+
 
 def _format_profile_seconds(value: float) -> str:
     return f"{max(float(value or 0.0), 0.0):.2f}s"
@@ -43,7 +54,7 @@ def _add_profile_totals(totals: dict[str, float], profile: dict[str, float] | No
     if not isinstance(profile, dict):
         return
     for key, value in profile.items():
-        if not key.endswith("_seconds"):
+        if not key.endswith(("_seconds", "_hits", "_misses")):
             continue
         totals[key] = float(totals.get(key, 0.0) or 0.0) + float(value or 0.0)
 
@@ -58,7 +69,7 @@ def _log_backport_batch_summary_profile(
     logger.info(
         "[backport-batch] profile-summary processed=%d/%d batch=%s patch_gen=%s "
         "merged_check=%s reverse_apply=%s conflict_check=%s linux_grep=%s "
-        "linux_index=%s target_index=%s item_total=%s",
+        "linux_index=%s target_index=%s item_total=%s llm_cache_hits=%d llm_cache_misses=%d",
         processed_count,
         total_items,
         _format_profile_seconds(batch_seconds),
@@ -70,6 +81,8 @@ def _log_backport_batch_summary_profile(
         _format_profile_seconds(profile_totals.get("linux_index_build_seconds", 0.0)),
         _format_profile_seconds(profile_totals.get("target_index_build_seconds", 0.0)),
         _format_profile_seconds(profile_totals.get("total_seconds", 0.0)),
+        int(profile_totals.get("llm_cache_hits", 0)),
+        int(profile_totals.get("llm_cache_misses", 0)),
     )
 
 
@@ -103,13 +116,26 @@ def _log_backport_batch_index_build_profile(commit_ref: str, profile: dict[str,
     )
 
 
+def _log_backport_batch_trace_summary(trace_mark: int) -> None:
+    if not tracing.is_enabled():
+        return
+    logger.info(
+        "[backport-batch] trace-summary\n%s",
+        tracing.format_summary(tracing.summarize(since=trace_mark)),
+    )
+
+
 def _finalize_backport_batch_profile(
     *,
     started_at: float,
     commit_ref: str,
     profile: dict[str, float],
     args,
+    llm_cache_started: dict[str, int] | None = None,
 ) -> None:
+    if llm_cache_started is not None:
+        # 计数器是进程级的；预检线程不调用 LLM，差值即本条目的命中/未命中次数
+        profile.update(llm_cache.counters_since(llm_cache_started))
     profile["total_seconds"] = max(
         time.perf_counter()
         - started_at
@@ -220,6 +246,62 @@ class BackportBatchContext:
     prepared_patch_batch_token: str
 
 
+@dataclass
+class _TargetWorktree:
+    # --jobs 并发预检使用的隔离 worktree：path 为 worktree 目录，ref 为 detached 检出的目标分支 SHA
+    path: str
+    ref: str
+
+
+class _TargetWorktreePool:
+    """为 --jobs 并发预检分配隔离的 detached worktree，退出时统一清理。"""
+
+    def __init__(self, target_path: str, base_ref: str, size: int):
+        self.target_path = target_path
+        self.base_ref = base_ref
+        self.size = size
+        self.root_dir = ""
+        self.paths: list[str] = []
+        self._free: queue.Queue[str] = queue.Queue()
+
+    def __enter__(self):
+        self.root_dir = tempfile.mkdtemp(prefix="cvekit-backport-batch-")
+        try:
+            target_repo = git.Repo(self.target_path)
+            for index in range(self.size):
+                path = os.path.join(self.root_dir, f"worker-{index}")
+                target_repo.git.worktree("add", "--detach", path, self.base_ref)
+                self.paths.append(path)
+                self._free.put(path)
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            target_repo = git.Repo(self.target_path)
+            for path in self.paths:
+                try:
+                    target_repo.git.worktree("remove", "--force", path)
+                except git.exc.GitCommandError as e:
+                    logger.warning("[backport-batch] 清理 worktree 失败: path=%s, error=%s", path, e)
+            target_repo.git.worktree("prune")
+        except Exception as e:
+            logger.warning("[backport-batch] 清理 worktree 失败: target=%s, error=%s", self.target_path, e)
+        shutil.rmtree(self.root_dir, ignore_errors=True)
+        self.paths = []
+        return False
+
+    @contextmanager
+    def acquire(self):
+        path = self._free.get()
+        try:
+            yield path
+        finally:
+            self._free.put(path)
+
+
 @dataclass
 class FilteredTitleIndexCache:
     # 只缓存当前 backport-batch 上下文最近一次 target branch title 索引，
@@ -367,6 +449,7 @@ def _normalize_excel_cell_value(row, idx) -> str:
 def handle_backport_batch(args):
     """处理批量补丁回移植逻辑（从 cli 入口拆分到 utils 模块）"""
     handle_started_at = time.perf_counter()
+    trace_mark = tracing.mark()
     if getattr(args, "preview_commit_message", False):
         return _handle_preview_commit_message(args)
     if getattr(args, "apply", None):
@@ -380,7 +463,8 @@ def handle_backport_batch(args):
             "请先使用 raw 配置生成 report，再对 .report.yml 执行回移植。"
         )
     context_started_at = time.perf_counter()
-    context = _prepare_backport_batch_context(args)
+    with tracing.span("backport_batch.context"):
+        context = _prepare_backport_batch_context(args)
     context_seconds = time.perf_counter() - context_started_at
     if context is None:
         logger.info("[backport-batch] 用户在交互模式中选择退出，停止执行")
@@ -416,27 +500,29 @@ def handle_backport_batch(args):
 
     default_target_branch = args.branch
     execute_started_at = time.perf_counter()
-    results, report_items = _execute_backport_batch_items(
-        sorted_items=sorted_items,
-        sort_errors=sort_errors,
-        is_report_config=is_report_config,
-        base_config=base_config,
-        base_project_dir=base_project_dir,
-        base_target_path=base_target_path,
-        default_target_branch=default_target_branch,
-        linux_subject_allowlist=context.linux_subject_allowlist,
-        filtered_subject_index_cache=context.filtered_subject_index_cache,
-        target_title_allowlist=context.target_title_allowlist,
-        target_title_index_cache=context.target_title_index_cache,
-        target_title_index_ref_branch=context.target_title_index_ref_branch,
-        target_title_index_ref_sha=context.target_title_index_ref_sha,
-        prepared_patch_batch_token=context.prepared_patch_batch_token,
-        args=args,
-    )
+    with tracing.span("backport_batch.execute", items=len(sorted_items)):
+        results, report_items = _execute_backport_batch_items(
+            sorted_items=sorted_items,
+            sort_errors=sort_errors,
+            is_report_config=is_report_config,
+            base_config=base_config,
+            base_project_dir=base_project_dir,
+            base_target_path=base_target_path,
+            default_target_branch=default_target_branch,
+            linux_subject_allowlist=context.linux_subject_allowlist,
+            filtered_subject_index_cache=context.filtered_subject_index_cache,
+            target_title_allowlist=context.target_title_allowlist,
+            target_title_index_cache=context.target_title_index_cache,
+            target_title_index_ref_branch=context.target_title_index_ref_branch,
+            target_title_index_ref_sha=context.target_title_index_ref_sha,
+            prepared_patch_batch_token=context.prepared_patch_batch_token,
+            args=args,
+        )
     execute_seconds = time.perf_counter() - execute_started_at
     if _conflict_summary_enabled(args, base_config):
         summary_started_at = time.perf_counter()
-        _apply_conflict_summaries(report_items, base_target_path)
+        with tracing.span("backport_batch.conflict_summary", items=len(report_items)):
+            _apply_conflict_summaries(report_items, base_target_path)
         logger.info(
             "[backport-batch] conflict summary 完成: items=%d elapsed=%s",
             len(report_items),
@@ -444,20 +530,22 @@ def handle_backport_batch(args):
         )
 
     report_build_started_at = time.perf_counter()
-    report = _build_backport_batch_report(
-        base_config=base_config,
-        base_project_dir=base_project_dir,
-        base_target_path=base_target_path,
-        default_target_branch=default_target_branch,
-        llm_provider=args.llm_provider,
-        llm_base_url=getattr(args, 'llm_base_url', None),
-        llm_model_name=getattr(args, 'llm_model_name', None),
-        backport_engine=_resolve_backport_engine(args, {}, base_config),
-        report_items=report_items,
-    )
+    with tracing.span("backport_batch.report_build"):
+        report = _build_backport_batch_report(
+            base_config=base_config,
+            base_project_dir=base_project_dir,
+            base_target_path=base_target_path,
+            default_target_branch=default_target_branch,
+            llm_provider=args.llm_provider,
+            llm_base_url=getattr(args, 'llm_base_url', None),
+            llm_model_name=getattr(args, 'llm_model_name', None),
+            backport_engine=_resolve_backport_engine(args, {}, base_config),
+            report_items=report_items,
+        )
     report_build_seconds = time.perf_counter() - report_build_started_at
     report_write_started_at = time.perf_counter()
-    _write_backport_batch_report(report_output_path, is_report_config, report)
+    with tracing.span("backport_batch.report_write"):
+        _write_backport_batch_report(report_output_path, is_report_config, report)
     report_write_seconds = time.perf_counter() - report_write_started_at
     if getattr(args, "backport_log_file", None):
         for result in results:
@@ -477,6 +565,7 @@ def handle_backport_batch(args):
         report_output_path if is_report_config else report_output_path + ".report.yml",
         getattr(args, "backport_log_file", ""),
     )
+    _log_backport_batch_trace_summary(trace_mark)
     return results
 
 
@@ -1496,13 +1585,15 @@ def _ensure_commit_available_for_cherry_pick(
 
     upstream_url = os.path.abspath(project_dir.rstrip("/"))
     remote_name = "upstream"
-    upstream_remote = next(
-        (remote for remote in target_repo.remotes if remote.name == remote_name),
-        None,
-    )
-    if upstream_remote is None:
-        upstream_remote = target_repo.create_remote(remote_name, upstream_url)
-    upstream_remote.fetch(commit_sha)
+    # 并发 worker 共享同一份仓库配置，remote 创建与 fetch 需串行
+    with _UPSTREAM_REMOTE_LOCK:
+        upstream_remote = next(
+            (remote for remote in target_repo.remotes if remote.name == remote_name),
+            None,
+        )
+        if upstream_remote is None:
+            upstream_remote = target_repo.create_remote(remote_name, upstream_url)
+        upstream_remote.fetch(commit_sha)
 
 def _filtered_commit_title_index_in_target(
     target_repo: git.Repo,
@@ -1777,6 +1868,7 @@ def _resolve_commit_title_for_merge_check(
         return ""
 
 
+@tracing.traced("backport_batch.merged_check")
 def _is_commit_merged_in_target(
     target_path: str,
     target_branch: str,
@@ -1787,11 +1879,14 @@ def _is_commit_merged_in_target(
     title_index_cache: FilteredTitleIndexCache | None = None,
     use_disk_subject_index_cache: bool = True,
     title_index_ref_sha: str | None = None,
+    checkout: bool = True,
 ):
     started_at = time.perf_counter()
     try:
         target_repo = git.Repo(target_path)
-        _ensure_clean_and_checkout(target_repo, target_branch)
+        # 合入检测只依赖对象库；并发预检时不切换检出，避免与其他 worker 争用工作区
+        if checkout:
+            _ensure_clean_and_checkout(target_repo, target_branch)
         target_repo.git.merge_base("--is-ancestor", commit_sha, target_branch)
         return True, None, time.perf_counter() - started_at
     except git.exc.GitCommandError as e:
@@ -1825,6 +1920,7 @@ def _is_commit_merged_in_target(
     except Exception as e:
         return False, str(e), time.perf_counter() - started_at
 
+@tracing.traced("backport_batch.reverse_apply")
 def _is_patch_applied_in_target(target_path: str, target_branch: str, patch_path: str):
     if not patch_path or not os.path.exists(patch_path):
         return False, "patch_path missing", 0.0
@@ -1839,21 +1935,172 @@ def _is_patch_applied_in_target(target_path: str, target_branch: str, patch_path
     except Exception as e:
         return False, str(e), time.perf_counter() - started_at
 
+CONFLICT_CHECK_MERGE_TREE = "merge-tree"
+CONFLICT_CHECK_CHERRY_PICK = "cherry-pick"
+CONFLICT_CHECK_BACKENDS = (CONFLICT_CHECK_MERGE_TREE, CONFLICT_CHECK_CHERRY_PICK)
+
+# merge-tree 在 git < 2.40 时需要自建临时提交，commit-tree 要求提交者身份
+_MERGE_TREE_COMMIT_ENV = {
+    "GIT_AUTHOR_NAME": "cvekit",
+    "GIT_AUTHOR_EMAIL": "cvekit@localhost",
+    "GIT_COMMITTER_NAME": "cvekit",
+    "GIT_COMMITTER_EMAIL": "cvekit@localhost",
+}
+
+
+@dataclass(frozen=True)
+class MergeTreeResult:
+    clean: bool
+    tree: str
+    conflict_paths: tuple[str, ...]
+    messages: tuple[str, ...]
+
+
+def _resolve_conflict_check_backend(args) -> str:
+    backend = str(getattr(args, "conflict_check", None) or CONFLICT_CHECK_MERGE_TREE).strip().lower()
+    if backend not in CONFLICT_CHECK_BACKENDS:
+        raise ValueError(f"不支持的 conflict_check: {backend!r}，请选择 merge-tree 或 cherry-pick")
+    return backend
+
+
+@functools.lru_cache(maxsize=None)
+def _merge_tree_capabilities() -> tuple[bool, bool]:
+    """返回 (支持 --write-tree, 支持 --merge-base)，分别需要 git >= 2.38 / 2.40。"""
+    result = subprocess.run(
+        ["git", "merge-tree", "-h"],
+        check=False,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    usage = result.stdout + result.stderr
+    return "--write-tree" in usage, "--merge-base" in usage
+
+
+def _git_output(repo_path: str, *args: str, env: dict | None = None) -> str:
+    result = subprocess.run(
+        ["git", "-C", repo_path, *args],
+        check=False,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        env={**os.environ, **env} if env else None,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"git {args[0]} failed")
+    return result.stdout.strip()
+
+
+def _merge_tree_cherry_pick(repo_path: str, onto: str, commit_sha: str) -> MergeTreeResult:
+    """在对象库中以 commit 的父提交为合并基，把 commit 三方合并到 onto 上。
+
+    与 cherry-pick 的合并语义一致，但不触碰工作区、索引和 HEAD，可以在多个
+    线程中对同一仓库并发执行。
+    """
+    supports_write_tree, supports_merge_base = _merge_tree_capabilities()
+    if not supports_write_tree:
+        raise RuntimeError("git merge-tree --write-tree 需要 git >= 2.38")
+    if supports_merge_base:
+        merge_args = [f"--merge-base={commit_sha}^", onto, commit_sha]
+    else:
+        # 没有 --merge-base 时，构造以父提交树为唯一公共祖先的两个临时提交
+        parent_tree = _git_output(repo_path, "rev-parse", "--verify", f"{commit_sha}^^{{tree}}")
+        base = _git_output(repo_path, "commit-tree", parent_tree, "-m", "merge-tree base", env=_MERGE_TREE_COMMIT_ENV)
+        merge_args = [
+            _git_output(
+                repo_path, "commit-tree", f"{rev}^{{tree}}", "-p", base, "-m", "merge-tree side",
+                env=_MERGE_TREE_COMMIT_ENV,
+            )
+            for rev in (onto, commit_sha)
+        ]
+    result = subprocess.run(
+        ["git", "-C", repo_path, "merge-tree", "--write-tree", "--name-only", "--messages", "-z", *merge_args],
+        check=False,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    # 退出码 0 表示干净合并，1 表示有冲突，其他为执行失败
+    if result.returncode not in (0, 1):
+        raise RuntimeError(result.stderr.strip() or f"git merge-tree exited with {result.returncode}")
+    conflict_info, _, message_section = result.stdout.partition("\0\0")
+    fields = conflict_info.split("\0")
+    conflict_paths = tuple(dict.fromkeys(path for path in fields[1:] if path))
+    # -z 下每条消息为: <路径数> NUL <路径>... NUL <类型> NUL <消息> NUL
+    messages = []
+    tokens = message_section.split("\0")
+    pos = 0
+    while pos < len(tokens) and tokens[pos].isdigit():
+        pos += 1 + int(tokens[pos])
+        if pos + 1 >= len(tokens):
+            break
+        if tokens[pos].startswith("CONFLICT"):
+            messages.append(tokens[pos + 1].strip())
+        pos += 2
+    return MergeTreeResult(
+        clean=result.returncode == 0,
+        tree=fields[0].strip(),
+        conflict_paths=conflict_paths,
+        messages=tuple(messages),
+    )
+
+
+def _check_conflict_with_merge_tree(
+    target_path: str,
+    target_branch: str,
+    commit_sha: str,
+    project_dir: str,
+):
+    started_at = time.perf_counter()
+    target_repo = git.Repo(target_path)
+    _ensure_commit_available_for_cherry_pick(target_repo, project_dir, commit_sha)
+    result = _merge_tree_cherry_pick(target_path, target_branch, commit_sha)
+    if result.clean:
+        return False, CONFLICT_CHECK_MERGE_TREE, None, time.perf_counter() - started_at
+    conflict_error = "merge-tree conflict: " + ", ".join(result.conflict_paths)
+    if result.messages:
+        conflict_error = f"{conflict_error}; " + "; ".join(result.messages)
+    return True, CONFLICT_CHECK_MERGE_TREE, conflict_error, time.perf_counter() - started_at
+
+
+@tracing.traced("backport_batch.conflict_check")
 def _check_conflict_with_apply_or_cherrypick(
     target_path: str,
     target_branch: str,
     commit_sha: str,
     patch_path: str,
     project_dir: str,
+    backend: str = CONFLICT_CHECK_MERGE_TREE,
 ):
+    """判断 commit 合入目标分支是否冲突，返回 (has_conflict, method, error, seconds)。
+
+    默认在对象库中用 git merge-tree 做三方合并，不检出也不重置工作区；
+    merge-tree 不可用（git 过旧、提交无父提交等）或 backend 为 cherry-pick 时，
+    回退到在工作区中 git apply --check + 试探 cherry-pick。
+    """
     started_at = time.perf_counter()
-    target_repo = git.Repo(target_path)
-    _ensure_clean_and_checkout(target_repo, target_branch)
     upstream_repo = git.Repo(project_dir)
     commit_obj = upstream_repo.commit(commit_sha)
     is_merge_commit = len(commit_obj.parents) > 1
     if is_merge_commit:
         return False, "merge-commit-skipped", None, time.perf_counter() - started_at
+    if backend == CONFLICT_CHECK_MERGE_TREE:
+        try:
+            has_conflict, method, error, _ = _check_conflict_with_merge_tree(
+                target_path, target_branch, commit_sha, project_dir
+            )
+            return has_conflict, method, error, time.perf_counter() - started_at
+        except Exception as e:
+            logger.info(
+                "[backport-batch] merge-tree 冲突检测不可用，回退 apply/cherry-pick: commit=%s, error=%s",
+                commit_sha,
+                e,
+            )
+    target_repo = git.Repo(target_path)
+    _ensure_clean_and_checkout(target_repo, target_branch)
     apply_error = None
     # 优先用 git apply --check
     try:
@@ -1882,6 +2129,7 @@ def _check_conflict_with_apply_or_cherrypick(
             return True, "cherry-pick", f"{apply_error}; cherry-pick error: {e}", time.perf_counter() - started_at
         return True, "cherry-pick", f"cherry-pick error: {e}", time.perf_counter() - started_at
 
+@tracing.traced("backport_batch.apply_patch")
 def _apply_patch_to_target_repo(
     target_path: str,
     target_branch: str,
@@ -2305,6 +2553,7 @@ def _resolve_is_merge_commit(base_project_dir, fixed_commit):
         return None
 
 
+@tracing.traced("backport_batch.patch_gen")
 def _prepare_backport_patch_and_commit(
     *,
     is_report_config,
@@ -2363,6 +2612,7 @@ def _resolve_merge_and_conflict_status(
     conflict_check_method,
     conflict_check_error,
     args,
+    worktree: _TargetWorktree | None = None,
 ):
     profile = {
         "merged_check_seconds": 0.0,
@@ -2446,6 +2696,7 @@ def _resolve_merge_and_conflict_status(
         title_index_cache=title_index_cache,
         use_disk_subject_index_cache=not bool(getattr(args, "no_cache", False)),
         title_index_ref_sha=target_title_index_ref_sha,
+        checkout=worktree is None,
     )
     profile["target_index_build_seconds"] = _consume_target_title_index_build_seconds(title_index_cache)
     profile["merged_check_seconds"] = max(
@@ -2469,7 +2720,9 @@ def _resolve_merge_and_conflict_status(
         patch_check_error = None
         if patch_path:
             patch_applied, patch_check_error, profile["reverse_apply_seconds"] = _is_patch_applied_in_target(
-                base_target_path, target_branch, patch_path
+                worktree.path if worktree else base_target_path,
+                worktree.ref if worktree else target_branch,
+                patch_path,
             )
             logger.info(
                 "[backport-batch] patch-reverse 检测结果: tag=%s, patch=%s, applied=%s, error=%s",
@@ -2507,11 +2760,12 @@ def _resolve_merge_and_conflict_status(
             tag or commit_id, fixed_commit, is_report_config, force_recheck,
         )
         has_conflict, conflict_check_method, conflict_check_error, profile["conflict_check_seconds"] = _check_conflict_with_apply_or_cherrypick(
-            base_target_path,
-            target_branch,
+            worktree.path if worktree else base_target_path,
+            worktree.ref if worktree else target_branch,
             fixed_commit,
             patch_path,
             base_project_dir,
+            backend=_resolve_conflict_check_backend(args),
         )
         logger.info(
             "[backport-batch] 冲突检测完成: tag=%s, has_conflict=%s, method=%s, error=%s",
@@ -2632,6 +2886,7 @@ def _get_source_patch_content(project_dir: str, commit_id: str) -> str:
     return result.stdout
 
 
+@tracing.traced("backport_batch.mystique")
 def _run_mystique_from_config(config_dict: dict, debug_mode: bool = False) -> dict:
     """运行 Mystique，并转换为 backport-batch 统一使用的结果结构。"""
     mystique_src = os.path.join(os.path.dirname(__file__), "mystique", "src")
@@ -2887,6 +3142,7 @@ def _run_mystique_from_config(config_dict: dict, debug_mode: bool = False) -> di
     return result
 
 
+@tracing.traced("backport_batch.backport_engine")
 def _run_selected_backport_engine(config_dict: dict, debug_mode: bool = False) -> dict:
     """根据 batch 配置选择 PortGPT 或 Mystique，并返回统一结果。"""
     engine = str(config_dict.get("backport_engine") or "portgpt").strip().lower()
@@ -3074,6 +3330,7 @@ def _execute_backport_batch_action(
                         fixed_commit,
                         patch_path,
                         base_project_dir,
+                        backend=_resolve_conflict_check_backend(args),
                     )
                     profile["conflict_check_seconds"] += recheck_conflict_seconds
 
@@ -3476,6 +3733,105 @@ def _build_backport_batch_failed_result(
     }
 
 
+def _resolve_backport_batch_item_status(
+    *,
+    fields,
+    target_branch,
+    is_report_config,
+    base_project_dir,
+    base_target_path,
+    target_title_allowlist,
+    target_title_index_cache,
+    target_title_index_ref_branch,
+    target_title_index_ref_sha,
+    prepared_patch_batch_token,
+    args,
+    worktree: _TargetWorktree | None = None,
+):
+    """执行条目的只读预检阶段：补丁生成、合入检测、反向应用检测与冲突检测。
+
+    传入 worktree 时，反向应用与冲突检测在隔离 worktree 中进行，合入检测
+    直接查询目标仓对象库而不切换检出，便于 --jobs 并发执行。
+    """
+    started_at = time.perf_counter()
+    commit_id = fields["commit_id"]
+    item_config = fields["item_config"]
+    tag = fields["tag"]
+    is_merge_commit = fields["is_merge_commit"]
+    profile = {"patch_gen_seconds": 0.0}
+    fixed_commit = commit_id
+    patch_path = item_config.get("patch_path") or item_config.get("original_patch_path") or ""
+    allow_existing_patch_reuse = bool(
+        patch_path
+        and item_config.get("_prepared_patch_batch_token") == prepared_patch_batch_token
+        and item_config.get("_prepared_patch_path") == patch_path
+    )
+    patch_started_at = time.perf_counter()
+    fixed_commit, patch_path, is_merge_commit, should_skip = _prepare_backport_patch_and_commit(
+        is_report_config=is_report_config,
+        generate_missing_patch=bool(is_report_config and getattr(args, "stop_at_first_conflict", False)),
+        allow_existing_patch_reuse=allow_existing_patch_reuse,
+        fixed_commit=fixed_commit,
+        patch_path=patch_path,
+        is_merge_commit=is_merge_commit,
+        base_project_dir=base_project_dir,
+    )
+    profile["patch_gen_seconds"] = time.perf_counter() - patch_started_at
+    status = {
+        "fixed_commit": fixed_commit,
+        "patch_path": patch_path,
+        "is_merge_commit": is_merge_commit,
+        "should_skip": should_skip,
+        "merged_in_target": item_config.get("merged_in_target"),
+        "merged_check_error": item_config.get("merged_check_error"),
+        "has_conflict": item_config.get("has_conflict"),
+        "conflict_check_method": item_config.get("conflict_check_method"),
+        "conflict_check_error": item_config.get("conflict_check_error"),
+        "profile": profile,
+    }
+    if should_skip:
+        status["elapsed_seconds"] = time.perf_counter() - started_at
+        return status
+
+    (
+        status["merged_in_target"],
+        status["merged_check_error"],
+        status["has_conflict"],
+        status["conflict_check_method"],
+        status["conflict_check_error"],
+        status_profile,
+    ) = _resolve_merge_and_conflict_status(
+        is_report_config=is_report_config,
+        force_recheck=bool(is_report_config and getattr(args, "stop_at_first_conflict", False)),
+        base_target_path=base_target_path,
+        target_branch=target_branch,
+        fixed_commit=fixed_commit,
+        patch_path=patch_path,
+        base_project_dir=base_project_dir,
+        is_merge_commit=is_merge_commit,
+        commit_title=fields["commit_title"],
+        target_title_allowlist=target_title_allowlist,
+        title_index_cache=target_title_index_cache,
+        target_title_index_ref_sha=(
+            target_title_index_ref_sha
+            if target_branch == target_title_index_ref_branch
+            else ""
+        ),
+        tag=tag,
+        commit_id=commit_id,
+        merged_in_target=status["merged_in_target"],
+        merged_check_error=status["merged_check_error"],
+        has_conflict=status["has_conflict"],
+        conflict_check_method=status["conflict_check_method"],
+        conflict_check_error=status["conflict_check_error"],
+        args=args,
+        worktree=worktree,
+    )
+    profile.update(status_profile)
+    status["elapsed_seconds"] = time.perf_counter() - started_at
+    return status
+
+
 def _process_backport_batch_item(
     item,
     is_report_config,
@@ -3491,8 +3847,10 @@ def _process_backport_batch_item(
     args,
     target_title_index_ref_branch="",
     target_title_index_ref_sha="",
+    prefetched_status=None,
 ):
     total_started_at = time.perf_counter()
+    llm_cache_started = llm_cache.counters()
     profile = {
         "patch_gen_seconds": 0.0,
         "merged_check_seconds": 0.0,
@@ -3530,76 +3888,48 @@ def _process_backport_batch_item(
             commit_ref=commit_ref,
             profile=profile,
             args=args,
+            llm_cache_started=llm_cache_started,
         )
         return {"skip": True, "did_backport": False, "profile": profile}
 
-    fixed_commit = commit_id
-    patch_path = item_config.get("patch_path") or item_config.get("original_patch_path") or ""
-    allow_existing_patch_reuse = bool(
-        patch_path
-        and item_config.get("_prepared_patch_batch_token") == prepared_patch_batch_token
-        and item_config.get("_prepared_patch_path") == patch_path
-    )
-    patch_started_at = time.perf_counter()
-    fixed_commit, patch_path, is_merge_commit, should_skip = _prepare_backport_patch_and_commit(
-        is_report_config=is_report_config,
-        generate_missing_patch=bool(is_report_config and getattr(args, "stop_at_first_conflict", False)),
-        allow_existing_patch_reuse=allow_existing_patch_reuse,
-        fixed_commit=fixed_commit,
-        patch_path=patch_path,
-        is_merge_commit=is_merge_commit,
-        base_project_dir=base_project_dir,
-    )
-    profile["patch_gen_seconds"] = time.perf_counter() - patch_started_at
-    if should_skip:
+    status = prefetched_status
+    if status is None:
+        status = _resolve_backport_batch_item_status(
+            fields=fields,
+            target_branch=target_branch,
+            is_report_config=is_report_config,
+            base_project_dir=base_project_dir,
+            base_target_path=base_target_path,
+            target_title_allowlist=target_title_allowlist,
+            target_title_index_cache=target_title_index_cache,
+            target_title_index_ref_branch=target_title_index_ref_branch,
+            target_title_index_ref_sha=target_title_index_ref_sha,
+            prepared_patch_batch_token=prepared_patch_batch_token,
+            args=args,
+        )
+    else:
+        # 预检阶段在并发 worker 中完成，条目总耗时需计入 worker 侧的执行时间
+        total_started_at -= float(status.get("elapsed_seconds", 0.0) or 0.0)
+    profile.update(status["profile"])
+    fixed_commit = status["fixed_commit"]
+    patch_path = status["patch_path"]
+    is_merge_commit = status["is_merge_commit"]
+    if status["should_skip"]:
         commit_ref = str(commit_id or input_commit or tag or "")
         _finalize_backport_batch_profile(
             started_at=total_started_at,
             commit_ref=commit_ref,
             profile=profile,
             args=args,
+            llm_cache_started=llm_cache_started,
         )
         return {"skip": True, "did_backport": False, "profile": profile}
 
-    merged_in_target = item_config.get("merged_in_target")
-    merged_check_error = item_config.get("merged_check_error")
-    has_conflict = item_config.get("has_conflict")
-    conflict_check_method = item_config.get("conflict_check_method")
-    conflict_check_error = item_config.get("conflict_check_error")
-    (
-        merged_in_target,
-        merged_check_error,
-        has_conflict,
-        conflict_check_method,
-        conflict_check_error,
-        status_profile,
-    ) = _resolve_merge_and_conflict_status(
-        is_report_config=is_report_config,
-        force_recheck=bool(is_report_config and getattr(args, "stop_at_first_conflict", False)),
-        base_target_path=base_target_path,
-        target_branch=target_branch,
-        fixed_commit=fixed_commit,
-        patch_path=patch_path,
-        base_project_dir=base_project_dir,
-        is_merge_commit=is_merge_commit,
-        commit_title=commit_title,
-        target_title_allowlist=target_title_allowlist,
-        title_index_cache=target_title_index_cache,
-        target_title_index_ref_sha=(
-            target_title_index_ref_sha
-            if target_branch == target_title_index_ref_branch
-            else ""
-        ),
-        tag=tag,
-        commit_id=commit_id,
-        merged_in_target=merged_in_target,
-        merged_check_error=merged_check_error,
-        has_conflict=has_conflict,
-        conflict_check_method=conflict_check_method,
-        conflict_check_error=conflict_check_error,
-        args=args,
-    )
-    profile.update(status_profile)
+    merged_in_target = status["merged_in_target"]
+    merged_check_error = status["merged_check_error"]
+    has_conflict = status["has_conflict"]
+    conflict_check_method = status["conflict_check_method"]
+    conflict_check_error = status["conflict_check_error"]
 
     config_dict = _build_backport_runtime_config(
         item_config=item_config,
@@ -3726,6 +4056,7 @@ def _process_backport_batch_item(
             commit_ref=commit_ref,
             profile=profile,
             args=args,
+            llm_cache_started=llm_cache_started,
         )
         return {
             "skip": False,
@@ -3775,6 +4106,7 @@ def _process_backport_batch_item(
             commit_ref=commit_ref,
             profile=profile,
             args=args,
+            llm_cache_started=llm_cache_started,
         )
         return {
             "skip": False,
@@ -4014,6 +4346,148 @@ def _prepare_backport_batch_context(args):
     )
 
 
+def _resolve_backport_batch_jobs(args, base_config: dict) -> int:
+    raw_jobs = getattr(args, "jobs", None) or base_config.get("jobs") or 1
+    try:
+        jobs = int(raw_jobs)
+    except (TypeError, ValueError):
+        raise ValueError(f"jobs 必须为正整数: {raw_jobs!r}")
+    if jobs < 1:
+        raise ValueError(f"jobs 必须为正整数: {raw_jobs!r}")
+    return jobs
+
+
+def _prefetch_backport_batch_item_status(
+    *,
+    worktree_pool: _TargetWorktreePool,
+    target_ref: str,
+    title_index_seed: FilteredTitleIndexCache,
+    **status_kwargs,
+):
+    # 每个任务使用独立的 title 索引缓存（以批内预热结果为种子），避免跨线程共享可变状态
+    title_index_cache = FilteredTitleIndexCache(
+        key=title_index_seed.key,
+        value=title_index_seed.value,
+    )
+    with worktree_pool.acquire() as worktree_path:
+        return _resolve_backport_batch_item_status(
+            target_title_index_cache=title_index_cache,
+            worktree=_TargetWorktree(path=worktree_path, ref=target_ref),
+            **status_kwargs,
+        )
+
+
+def _start_backport_batch_prefetch(
+    stack: ExitStack,
+    *,
+    jobs,
+    sorted_items,
+    start_index,
+    is_report_config,
+    base_config,
+    base_project_dir,
+    base_target_path,
+    default_target_branch,
+    target_title_allowlist,
+    target_title_index_cache,
+    target_title_index_ref_branch,
+    target_title_index_ref_sha,
+    prepared_patch_batch_token,
+    profile_totals,
+    args,
+):
+    """并发执行只读预检阶段，返回 {条目下标: Future}。
+
+    只有在批处理过程中目标分支不会被修改时（raw 配置生成 report，或 report
+    检测模式）预检结果才有效；其他场景返回空 dict，沿用串行路径。
+    """
+    if jobs <= 1:
+        return {}
+    if is_report_config and not getattr(args, "stop_at_first_conflict", False):
+        logger.info("[backport-batch] report 执行模式会修改目标分支，忽略 --jobs=%d 按串行处理", jobs)
+        return {}
+
+    target_repo = git.Repo(base_target_path)
+    branch_refs: dict[str, str] = {}
+    pending: list[tuple[int, dict, str, str]] = []
+    for idx, item in enumerate(sorted_items):
+        if idx < start_index or not isinstance(item, dict):
+            continue
+        fields = _extract_backport_batch_item_fields(item, is_report_config)
+        target_branch = _resolve_target_branch(fields["item_config"], base_config, default_target_branch)
+        if not target_branch:
+            continue
+        if target_branch not in branch_refs:
+            try:
+                branch_refs[target_branch] = target_repo.commit(target_branch).hexsha
+            except Exception as e:
+                logger.info(
+                    "[backport-batch] 目标分支无法解析，相关条目按串行处理: branch=%s, error=%s",
+                    target_branch,
+                    e,
+                )
+                branch_refs[target_branch] = ""
+        if branch_refs[target_branch]:
+            pending.append((idx, fields, target_branch, branch_refs[target_branch]))
+    if not pending:
+        return {}
+
+    use_disk_subject_index_cache = not bool(getattr(args, "no_cache", False))
+    if target_title_allowlist and target_title_index_ref_branch:
+        # 预热批内 target title 索引，后续各 worker 以此为种子，避免重复构建
+        try:
+            _filtered_commit_title_index_in_target(
+                target_repo,
+                target_title_index_ref_branch,
+                target_title_allowlist,
+                target_title_index_cache,
+                use_disk_subject_index_cache=use_disk_subject_index_cache,
+                index_ref_sha=target_title_index_ref_sha,
+            )
+        except Exception as e:
+            logger.warning("[backport-batch] 预热 target title 索引失败: %s", e)
+        _add_profile_totals(
+            profile_totals,
+            {"target_index_build_seconds": _consume_target_title_index_build_seconds(target_title_index_cache)},
+        )
+
+    pool_size = min(jobs, len(pending))
+    try:
+        worktree_pool = stack.enter_context(
+            _TargetWorktreePool(base_target_path, pending[0][3], pool_size)
+        )
+    except Exception as e:
+        logger.warning("[backport-batch] 创建并发 worktree 失败，回退串行处理: %s", e)
+        return {}
+    executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="backport-batch")
+    stack.callback(executor.shutdown, wait=True, cancel_futures=True)
+    logger.info(
+        "[backport-batch] 启用并发预检: jobs=%d, items=%d, worktree_root=%s",
+        pool_size,
+        len(pending),
+        worktree_pool.root_dir,
+    )
+    futures = {}
+    for idx, fields, target_branch, target_ref in pending:
+        futures[idx] = executor.submit(
+            _prefetch_backport_batch_item_status,
+            worktree_pool=worktree_pool,
+            target_ref=target_ref,
+            title_index_seed=target_title_index_cache,
+            fields=fields,
+            target_branch=target_branch,
+            is_report_config=is_report_config,
+            base_project_dir=base_project_dir,
+            base_target_path=base_target_path,
+            target_title_allowlist=target_title_allowlist,
+            target_title_index_ref_branch=target_title_index_ref_branch,
+            target_title_index_ref_sha=target_title_index_ref_sha,
+            prepared_patch_batch_token=prepared_patch_batch_token,
+            args=args,
+        )
+    return futures
+
+
 def _execute_backport_batch_items(
     sorted_items,
     sort_errors,
@@ -4037,13 +4511,16 @@ def _execute_backport_batch_items(
     profile_totals: dict[str, float] = {}
     processed_count = 0
     stop_at_first_conflict = bool(getattr(args, "stop_at_first_conflict", False))
+    jobs = _resolve_backport_batch_jobs(args, base_config)
     start_index = 0
     logger.info(
-        "[backport-batch] 开始批量处理: sorted_items=%d, sort_errors=%d, stop_at_first_conflict=%s, is_report_config=%s",
+        "[backport-batch] 开始批量处理: sorted_items=%d, sort_errors=%d, stop_at_first_conflict=%s, "
+        "is_report_config=%s, jobs=%d",
         len(sorted_items),
         len(sort_errors),
         stop_at_first_conflict,
         is_report_config,
+        jobs,
     )
 
     if stop_at_first_conflict and is_report_config:
@@ -4059,103 +4536,137 @@ def _execute_backport_batch_items(
     for _, item, error_message in sort_errors:
         _append_sort_error_report_item(report_items, item, error_message)
 
-    for idx, item in enumerate(sorted_items):
-        if stop_at_first_conflict and is_report_config and idx < start_index:
-            report_items.append(_copy_existing_report_item(item))
-            continue
-
-        item_tag = (
-            item.get("commit") or item.get("input_commit") or str(item.get("commit_title", ""))[:40]
-            if isinstance(item, dict) else str(item)[:40]
-        )
-        logger.info(
-            "[backport-batch] 处理第 %d/%d 项: tag=%s, is_report=%s, stop_at_first=%s",
-            idx, len(sorted_items), item_tag, is_report_config, stop_at_first_conflict,
-        )
-        item_started_at = time.perf_counter()
-        processed = _process_backport_batch_item(
-            item=item,
+    with ExitStack() as prefetch_stack:
+        prefetched = _start_backport_batch_prefetch(
+            prefetch_stack,
+            jobs=jobs,
+            sorted_items=sorted_items,
+            start_index=start_index,
             is_report_config=is_report_config,
             base_config=base_config,
             base_project_dir=base_project_dir,
             base_target_path=base_target_path,
             default_target_branch=default_target_branch,
-            linux_subject_allowlist=linux_subject_allowlist,
-            filtered_subject_index_cache=filtered_subject_index_cache,
             target_title_allowlist=target_title_allowlist,
             target_title_index_cache=target_title_index_cache,
             target_title_index_ref_branch=target_title_index_ref_branch,
             target_title_index_ref_sha=target_title_index_ref_sha,
             prepared_patch_batch_token=prepared_patch_batch_token,
+            profile_totals=profile_totals,
             args=args,
         )
-        processed_count += 1
-        processed_profile = processed.get("profile")
-        _add_profile_totals(profile_totals, processed_profile)
-        report_item_status = processed.get("report_item", {}) if isinstance(processed.get("report_item"), dict) else {}
-        logger.info(
-            "[backport-batch] item-profile index=%d/%d tag=%s elapsed=%s status=%s "
-            "merged=%s conflict=%s patch_gen=%s merged_check=%s reverse_apply=%s "
-            "conflict_check=%s linux_grep=%s item_total=%s",
-            idx,
-            len(sorted_items),
-            item_tag,
-            _format_profile_seconds(time.perf_counter() - item_started_at),
-            report_item_status.get("status") or "",
-            report_item_status.get("merged_in_target"),
-            report_item_status.get("has_conflict"),
-            _format_profile_seconds((processed_profile or {}).get("patch_gen_seconds", 0.0)),
-            _format_profile_seconds((processed_profile or {}).get("merged_check_seconds", 0.0)),
-            _format_profile_seconds((processed_profile or {}).get("reverse_apply_seconds", 0.0)),
-            _format_profile_seconds((processed_profile or {}).get("conflict_check_seconds", 0.0)),
-            _format_profile_seconds((processed_profile or {}).get("linux_grep_seconds", 0.0)),
-            _format_profile_seconds((processed_profile or {}).get("total_seconds", 0.0)),
-        )
-        if processed.get("skip"):
-            logger.info("[backport-batch] 条目跳过: index=%d", idx)
-            continue
-        if processed.get("result"):
-            results.append(processed["result"])
-        report_items.append(processed["report_item"])
-        if processed.get("fatal_error"):
-            logger.error(
-                "[backport-batch] 检测到致命错误，中止批量处理: %s",
-                processed["fatal_error"],
-            )
-            _append_remaining_pending_items(
-                report_items=report_items,
-                remaining_items=sorted_items[idx + 1 :],
-                is_report_config=is_report_config,
-                base_config=base_config,
-                default_target_branch=default_target_branch,
-                args=args,
+
+        for idx, item in enumerate(sorted_items):
+            if stop_at_first_conflict and is_report_config and idx < start_index:
+                report_items.append(_copy_existing_report_item(item))
+                continue
+
+            item_tag = (
+                item.get("commit") or item.get("input_commit") or str(item.get("commit_title", ""))[:40]
+                if isinstance(item, dict) else str(item)[:40]
             )
-            break
-        if (
-            stop_at_first_conflict
-            and processed.get("report_item", {}).get("has_conflict") is True
-        ):
-            logger.info("[backport-batch] 检测到第一条冲突，停止后续检查并标记为 pending")
-            _append_remaining_pending_items(
-                report_items=report_items,
-                remaining_items=sorted_items[idx + 1 :],
-                is_report_config=is_report_config,
-                base_config=base_config,
-                default_target_branch=default_target_branch,
-                args=args,
+            logger.info(
+                "[backport-batch] 处理第 %d/%d 项: tag=%s, is_report=%s, stop_at_first=%s",
+                idx, len(sorted_items), item_tag, is_report_config, stop_at_first_conflict,
             )
-            break
-        if processed.get("did_backport"):
-            logger.info("[backport-batch] 已执行回移植，停止后续处理以便检查 report.yml")
-            _append_remaining_pending_items(
-                report_items=report_items,
-                remaining_items=sorted_items[idx + 1 :],
-                is_report_config=is_report_config,
-                base_config=base_config,
-                default_target_branch=default_target_branch,
-                args=args,
+            item_started_at = time.perf_counter()
+            prefetched_status = None
+            if idx in prefetched:
+                try:
+                    prefetched_status = prefetched.pop(idx).result()
+                except Exception as e:
+                    logger.warning(
+                        "[backport-batch] 并发预检失败，回退串行检测: index=%d, tag=%s, error=%s",
+                        idx,
+                        item_tag,
+                        e,
+                    )
+            with tracing.span("backport_batch.item", index=idx, commit=item_tag) as item_span:
+                processed = _process_backport_batch_item(
+                    item=item,
+                    is_report_config=is_report_config,
+                    base_config=base_config,
+                    base_project_dir=base_project_dir,
+                    base_target_path=base_target_path,
+                    default_target_branch=default_target_branch,
+                    linux_subject_allowlist=linux_subject_allowlist,
+                    filtered_subject_index_cache=filtered_subject_index_cache,
+                    target_title_allowlist=target_title_allowlist,
+                    target_title_index_cache=target_title_index_cache,
+                    target_title_index_ref_branch=target_title_index_ref_branch,
+                    target_title_index_ref_sha=target_title_index_ref_sha,
+                    prepared_patch_batch_token=prepared_patch_batch_token,
+                    args=args,
+                    prefetched_status=prefetched_status,
+                )
+            processed_count += 1
+            processed_profile = processed.get("profile")
+            _add_profile_totals(profile_totals, processed_profile)
+            report_item_status = processed.get("report_item", {}) if isinstance(processed.get("report_item"), dict) else {}
+            item_span.set(status=report_item_status.get("status") or "")
+            logger.info(
+                "[backport-batch] item-profile index=%d/%d tag=%s elapsed=%s status=%s "
+                "merged=%s conflict=%s patch_gen=%s merged_check=%s reverse_apply=%s "
+                "conflict_check=%s linux_grep=%s item_total=%s",
+                idx,
+                len(sorted_items),
+                item_tag,
+                _format_profile_seconds(time.perf_counter() - item_started_at),
+                report_item_status.get("status") or "",
+                report_item_status.get("merged_in_target"),
+                report_item_status.get("has_conflict"),
+                _format_profile_seconds((processed_profile or {}).get("patch_gen_seconds", 0.0)),
+                _format_profile_seconds((processed_profile or {}).get("merged_check_seconds", 0.0)),
+                _format_profile_seconds((processed_profile or {}).get("reverse_apply_seconds", 0.0)),
+                _format_profile_seconds((processed_profile or {}).get("conflict_check_seconds", 0.0)),
+                _format_profile_seconds((processed_profile or {}).get("linux_grep_seconds", 0.0)),
+                _format_profile_seconds((processed_profile or {}).get("total_seconds", 0.0)),
             )
-            break
+            if processed.get("skip"):
+                logger.info("[backport-batch] 条目跳过: index=%d", idx)
+                continue
+            if processed.get("result"):
+                results.append(processed["result"])
+            report_items.append(processed["report_item"])
+            if processed.get("fatal_error"):
+                logger.error(
+                    "[backport-batch] 检测到致命错误，中止批量处理: %s",
+                    processed["fatal_error"],
+                )
+                _append_remaining_pending_items(
+                    report_items=report_items,
+                    remaining_items=sorted_items[idx + 1 :],
+                    is_report_config=is_report_config,
+                    base_config=base_config,
+                    default_target_branch=default_target_branch,
+                    args=args,
+                )
+                break
+            if (
+                stop_at_first_conflict
+                and processed.get("report_item", {}).get("has_conflict") is True
+            ):
+                logger.info("[backport-batch] 检测到第一条冲突，停止后续检查并标记为 pending")
+                _append_remaining_pending_items(
+                    report_items=report_items,
+                    remaining_items=sorted_items[idx + 1 :],
+                    is_report_config=is_report_config,
+                    base_config=base_config,
+                    default_target_branch=default_target_branch,
+                    args=args,
+                )
+                break
+            if processed.get("did_backport"):
+                logger.info("[backport-batch] 已执行回移植，停止后续处理以便检查 report.yml")
+                _append_remaining_pending_items(
+                    report_items=report_items,
+                    remaining_items=sorted_items[idx + 1 :],
+                    is_report_config=is_report_config,
+                    base_config=base_config,
+                    default_target_branch=default_target_branch,
+                    args=args,
+                )
+                break
     logger.info(
         "[backport-batch] 批量处理结束: results=%d, report_items=%d",
         len(results),
@@ -8,7 +8,7 @@ from typing import Any
 
 import git
 
-from . import git_subject_index_cache
+from . import git_subject_index_cache, tag_describe
 
 logger = logging.getLogger(__name__)
 
@@ -398,12 +398,33 @@ def parse_describe_order(describe: str):
     return _natural_sort_key(desc), 0
 
 
-def _batch_describe_commits(repo: git.Repo, parsed_items):
+def _batch_describe_commits(repo: git.Repo, parsed_items, use_disk_cache: bool = True):
     if not parsed_items:
         return {}
+    shas = list(dict.fromkeys(item[5].hexsha for item in parsed_items))
+    # 先一次拓扑遍历批量求最近 tag 与距离（结果按 tag 集合落盘缓存），失败或遗漏的再交给 git describe
     describe_map = {}
-    for item in parsed_items:
-        sha = item[5].hexsha
+    try:
+        describe_map = tag_describe.describe_commits(
+            repo.working_tree_dir or repo.git_dir,
+            shas,
+            use_disk_cache=use_disk_cache,
+        )
+    except Exception as e:
+        logger.warning("[backport-batch] 批量 tag 距离解析失败，回退 git describe: %s", e)
+    shas = [sha for sha in shas if sha not in describe_map]
+    if not shas:
+        return describe_map
+    # git describe 接受多个 commit-ish，按输入顺序逐行输出，一次进程即可完成
+    try:
+        lines = repo.git.describe("--tags", "--always", *shas).splitlines()
+        if len(lines) == len(shas):
+            describe_map.update((sha, line.strip()) for sha, line in zip(shas, lines))
+            return describe_map
+        logger.warning("[backport-batch] 批量 git describe 输出行数不符，逐个查询: expected=%d, got=%d", len(shas), len(lines))
+    except Exception as e:
+        logger.warning("[backport-batch] 批量 git describe 查询失败，逐个查询: %s", e)
+    for sha in shas:
         try:
             describe_map[sha] = repo.git.describe("--tags", "--always", sha).strip()
         except Exception as e:
@@ -428,7 +449,7 @@ def sort_commit_items_by_describe(
     if not parsed_items:
         return [], errors
 
-    describe_map = _batch_describe_commits(repo, parsed_items)
+    describe_map = _batch_describe_commits(repo, parsed_items, use_disk_cache=use_disk_subject_index_cache)
 
     sortable = []
     for item in parsed_items:
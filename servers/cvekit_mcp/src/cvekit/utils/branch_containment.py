@@ -0,0 +1,371 @@
+"""一次性判断多个分支是否包含某个 commit（祖先关系或 commit message 引用），结果与消息引用索引持久化，支持不同进程复用"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sqlite3
+import subprocess
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+from .git_object_reader import get_reader
+
+logger = logging.getLogger(__name__)
+
+ENV_CACHE_DB = "CVEKIT_BRANCH_CONTAINMENT_DB"
+
+# 已索引 tip 的保留上限；淘汰 tip 不删除消息引用，只会让下次索引多走一段历史
+MAX_INDEXED_TIPS_PER_REPO = 64
+_SQL_CHUNK_SIZE = 500
+# 索引 12 位以上的 hash：stable 分支常见 "commit 1a2b3c4d5e6f upstream" 这类缩写引用
+_MIN_ABBREV_LEN = 12
+_SHA_RE = re.compile(r"(?<![0-9a-f])[0-9a-f]{%d,40}(?![0-9a-f])" % _MIN_ABBREV_LEN)
+# 索引内容变化时递增，旧索引和未命中结果作废
+_SCHEMA_VERSION = 1
+_RECORD_SEP = "\x1e"
+
+
+class BranchRef(NamedTuple):
+    name: str
+    # 完整引用名（refs/heads/...、refs/remotes/...）；分支名只能按 revision 解析时为 None
+    ref: str | None
+    sha: str
+
+
+def default_cache_db_path() -> Path:
+    raw_path = os.environ.get(ENV_CACHE_DB, "").strip()
+    if raw_path:
+        return Path(raw_path).expanduser()
+    return Path("~/.cvekit/.cache/branch-containment.sqlite").expanduser()
+
+
+def resolve_branch_refs(repo_path: str, branch_names: Iterable[str]) -> list[BranchRef]:
+    """按 本地分支 > origin/<分支> > 其他 remote/<分支> 的顺序解析分支，不存在的分支跳过。"""
+    reader = get_reader(repo_path)
+    remotes = _git(repo_path, "remote").split()
+    remote_order = ["origin"] + [remote for remote in remotes if remote != "origin"]
+    result = []
+    for name in branch_names:
+        candidates = [f"refs/heads/{name}"] + [f"refs/remotes/{remote}/{name}" for remote in remote_order]
+        for ref in candidates:
+            resolved = reader.resolve(f"{ref}^{{commit}}")
+            if resolved is not None:
+                result.append(BranchRef(name, ref, resolved[0]))
+                break
+        else:
+            resolved = reader.resolve(f"{name}^{{commit}}")
+            if resolved is None:
+                logger.debug("分支 %s 不存在，跳过", name)
+                continue
+            result.append(BranchRef(name, None, resolved[0]))
+    return result
+
+
+def branches_containing(
+    repo_path: str,
+    commit: str,
+    branch_refs: Iterable[BranchRef],
+    *,
+    db_path: str | os.PathLike[str] | None = None,
+) -> list[str]:
+    """返回包含 commit 的分支名（保持 branch_refs 顺序）。
+
+    分支包含 commit 指：commit 是分支 tip 的祖先，或分支历史中有 commit
+    message 引用了该 commit 的完整 hash 或 12 位以上的缩写（上游 backport 的
+    "commit xxx upstream"）。
+    结果按 (commit, tip) 缓存；tip 不变时结论不会变化。
+    """
+    refs = list(branch_refs)
+    if not refs:
+        return []
+    repo_realpath = os.path.realpath(repo_path)
+    db_file = Path(db_path).expanduser() if db_path else default_cache_db_path()
+    started_at = time.perf_counter()
+    resolved = get_reader(repo_path).resolve(f"{commit}^{{commit}}")
+    # commit 不在本仓库时只能通过消息引用命中；缓存键用调用方给出的 hash
+    commit_sha = resolved[0] if resolved else commit.strip().lower()
+    tips = sorted({ref.sha for ref in refs})
+
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        cached = _load_results(conn, repo_realpath, commit_sha, tips)
+    missing_tips = [tip for tip in tips if tip not in cached]
+    if missing_tips:
+        computed = _compute_containment(
+            repo_path,
+            repo_realpath,
+            commit_sha,
+            commit_in_repo=resolved is not None,
+            refs=[ref for ref in refs if ref.sha in set(missing_tips)],
+            db_file=db_file,
+        )
+        cached.update(computed)
+        with closing(_connect(db_file)) as conn:
+            _ensure_schema(conn)
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO containment_result(repo_realpath, commit_sha, tip_sha, contained, method)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (repo_realpath, commit_sha, tip, int(contained), method)
+                    for tip, (contained, method) in computed.items()
+                ],
+            )
+            conn.commit()
+    result = [ref.name for ref in refs if cached.get(ref.sha, (False, ""))[0]]
+    logger.info(
+        "branch containment commit=%s refs=%d cached=%d contained=%s elapsed=%.3fs",
+        commit_sha,
+        len(refs),
+        len(tips) - len(missing_tips),
+        result,
+        time.perf_counter() - started_at,
+    )
+    return result
+
+
+def _compute_containment(
+    repo_path: str,
+    repo_realpath: str,
+    commit_sha: str,
+    *,
+    commit_in_repo: bool,
+    refs: list[BranchRef],
+    db_file: Path,
+) -> dict[str, tuple[bool, str]]:
+    computed: dict[str, tuple[bool, str]] = {}
+    if commit_in_repo:
+        for tip in _tips_with_ancestor(repo_path, commit_sha, refs):
+            computed[tip] = (True, "ancestor")
+
+    pending = [ref for ref in refs if ref.sha not in computed]
+    if pending:
+        with closing(_connect(db_file)) as conn:
+            _ensure_schema(conn)
+            _ensure_message_index(conn, repo_path, repo_realpath, sorted({ref.sha for ref in pending}))
+            mentions = _load_mentions(conn, repo_realpath, commit_sha)
+        for mention in mentions:
+            still_pending = [ref for ref in pending if ref.sha not in computed]
+            if not still_pending:
+                break
+            for tip in _tips_with_ancestor(repo_path, mention, still_pending):
+                computed[tip] = (True, f"mentioned:{mention}")
+    for ref in refs:
+        computed.setdefault(ref.sha, (False, ""))
+    return computed
+
+
+def _tips_with_ancestor(repo_path: str, ancestor: str, refs: list[BranchRef]) -> set[str]:
+    """一次 for-each-ref --contains 判断所有引用；git 会利用 commit-graph 的代数剪枝。"""
+    found: set[str] = set()
+    named = {ref.ref: ref.sha for ref in refs if ref.ref}
+    if named:
+        output = _git(
+            repo_path,
+            "for-each-ref",
+            "--contains",
+            ancestor,
+            "--format=%(refname)",
+            *sorted(named),
+        )
+        # for-each-ref 的模式按路径前缀匹配，只保留完全相同的引用
+        found.update(named[line] for line in output.splitlines() if line in named)
+    for ref in refs:
+        if ref.ref is None and ref.sha not in found:
+            process = subprocess.run(
+                ["git", "-C", repo_path, "merge-base", "--is-ancestor", ancestor, ref.sha],
+                check=False,
+                capture_output=True,
+            )
+            if process.returncode == 0:
+                found.add(ref.sha)
+    return found
+
+
+def _ensure_message_index(
+    conn: sqlite3.Connection,
+    repo_path: str,
+    repo_realpath: str,
+    tips: list[str],
+) -> None:
+    """把 tips 历史中 commit message 引用的 hash（12 位以上）写入索引，已索引 tip 的历史不再重复遍历。"""
+    indexed = {
+        row[0]
+        for row in conn.execute(
+            "SELECT tip_sha FROM message_index_tip WHERE repo_realpath = ?",
+            (repo_realpath,),
+        )
+    }
+    now = time.time()
+    new_tips = [tip for tip in tips if tip not in indexed]
+    if new_tips:
+        started_at = time.perf_counter()
+        rows = list(_scan_message_references(repo_path, new_tips, sorted(indexed)))
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO message_reference(repo_realpath, referenced_sha, commit_sha)
+            VALUES (?, ?, ?)
+            """,
+            [(repo_realpath, referenced, commit) for referenced, commit in rows],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO message_index_tip(repo_realpath, tip_sha, last_used_at) VALUES (?, ?, ?)",
+            [(repo_realpath, tip, now) for tip in new_tips],
+        )
+        conn.commit()
+        logger.info(
+            "commit message 引用索引更新 repo=%s tips=%d references=%d elapsed=%.3fs",
+            repo_realpath,
+            len(new_tips),
+            len(rows),
+            time.perf_counter() - started_at,
+        )
+    conn.executemany(
+        "UPDATE message_index_tip SET last_used_at = ? WHERE repo_realpath = ? AND tip_sha = ?",
+        [(now, repo_realpath, tip) for tip in tips if tip in indexed],
+    )
+    conn.execute(
+        """
+        DELETE FROM message_index_tip
+        WHERE repo_realpath = ?
+          AND tip_sha NOT IN (
+              SELECT tip_sha FROM message_index_tip
+              WHERE repo_realpath = ?
+              ORDER BY last_used_at DESC
+              LIMIT ?
+          )
+        """,
+        (repo_realpath, repo_realpath, MAX_INDEXED_TIPS_PER_REPO),
+    )
+    conn.commit()
+
+
+def _scan_message_references(repo_path: str, tips: list[str], exclude: list[str]):
+    args = ["git", "-C", repo_path, "log", f"--format={_RECORD_SEP}%H%n%B", *tips]
+    if exclude:
+        args += ["--not", *exclude]
+    process = subprocess.Popen(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    commit = ""
+    assert process.stdout is not None
+    with process.stdout:
+        for line in process.stdout:
+            if line.startswith(_RECORD_SEP):
+                commit = line[1:].strip()
+                continue
+            for referenced in _SHA_RE.findall(line.lower()):
+                if not commit.startswith(referenced):
+                    yield referenced, commit
+    if process.wait() != 0:
+        raise RuntimeError(f"git log 扫描 commit message 失败: {repo_path}")
+
+
+def _load_mentions(conn: sqlite3.Connection, repo_realpath: str, commit_sha: str) -> list[str]:
+    # 消息里的缩写引用是 commit_sha 的前缀；commit_sha 本身是缩写（commit 不在本仓库时无法补全）
+    # 时，再按前缀匹配更长的引用
+    prefixes = [commit_sha[:length] for length in range(_MIN_ABBREV_LEN, len(commit_sha) + 1)]
+    placeholders = ",".join("?" for _ in prefixes)
+    rows = conn.execute(
+        f"""
+        SELECT commit_sha FROM message_reference
+        WHERE repo_realpath = ?
+          AND (referenced_sha IN ({placeholders}) OR (referenced_sha >= ? AND referenced_sha < ?))
+        """,
+        (repo_realpath, *prefixes, commit_sha, commit_sha + "g"),
+    )
+    return sorted({row[0] for row in rows})
+
+
+def _load_results(
+    conn: sqlite3.Connection,
+    repo_realpath: str,
+    commit_sha: str,
+    tips: list[str],
+) -> dict[str, tuple[bool, str]]:
+    result = {}
+    for start in range(0, len(tips), _SQL_CHUNK_SIZE):
+        chunk = tips[start:start + _SQL_CHUNK_SIZE]
+        placeholders = ",".join("?" for _ in chunk)
+        for tip, contained, method in conn.execute(
+            f"""
+            SELECT tip_sha, contained, method
+            FROM containment_result
+            WHERE repo_realpath = ? AND commit_sha = ? AND tip_sha IN ({placeholders})
+            """,
+            (repo_realpath, commit_sha, *chunk),
+        ):
+            result[tip] = (bool(contained), method)
+    return result
+
+
+def _git(repo_path: str, *args: str) -> str:
+    process = subprocess.run(
+        ["git", "-C", repo_path, *args],
+        check=False,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip() or f"git {args[0]} failed")
+    return process.stdout
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS containment_result (
+            repo_realpath TEXT NOT NULL,
+            commit_sha TEXT NOT NULL,
+            tip_sha TEXT NOT NULL,
+            contained INTEGER NOT NULL,
+            method TEXT NOT NULL,
+            PRIMARY KEY (repo_realpath, commit_sha, tip_sha)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS message_reference (
+            repo_realpath TEXT NOT NULL,
+            referenced_sha TEXT NOT NULL,
+            commit_sha TEXT NOT NULL,
+            PRIMARY KEY (repo_realpath, referenced_sha, commit_sha)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS message_index_tip (
+            repo_realpath TEXT NOT NULL,
+            tip_sha TEXT NOT NULL,
+            last_used_at REAL NOT NULL,
+            PRIMARY KEY (repo_realpath, tip_sha)
+        )
+        """
+    )
+    if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+        # 旧索引只记录了完整 hash：重新扫描历史，并丢弃可能因此漏判的未命中结果
+        conn.execute("DELETE FROM message_reference")
+        conn.execute("DELETE FROM message_index_tip")
+        conn.execute("DELETE FROM containment_result WHERE contained = 0")
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        conn.commit()
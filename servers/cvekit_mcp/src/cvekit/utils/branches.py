@@ -7,8 +7,9 @@ from .gitee import setup_repository
 from .patch import get_cve_patch, getUrlText, ensure_patch_file
 from .commits import get_vulnerability_commits, branch_commit_from_upstream
 from .locales import i18n
-from .cache import BRANCHES_ANALYSIS_CACHE, _get_cache_key, cached, load_cache
-from .tools.project import safe_git_reset_hard
+from .cache import BRANCHES_ANALYSIS_CACHE, _get_cache_key, cached, find_cached_items
+from .git_object_reader import get_reader
+from . import branch_containment
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,9 @@ def _ensure_clean_worktree(repo: git.Repo) -> None:
     """
     try:
         if repo.is_dirty(untracked_files=True):
+            # tools.project 会加载 langchain 工具链，只在确实需要清理工作区时导入
+            from .tools.project import safe_git_reset_hard
+
             logger.info(
                 "工作区非干净状态，执行 git reset --hard 和 git clean -fdx"
             )
@@ -31,8 +35,9 @@ def get_commit_date(repo, commit_hash, linux_repo=None):
     """获取 commit 的提交日期字符串（YYYY-MM-DD），用于 git log --since
     
     注意：
-        - 直接使用 git 命令（--date=short --format=%cd）来获取日期，
+        - 按提交者自身时区换算日期，与 git log --date=short --format=%cd 一致，
           避免 Python 本地时区与 git 行为不一致的问题。
+        - 通过常驻 git cat-file 进程读取 commit，不再每次 fork git log。
     
     Args:
         repo: Git 仓库对象（kernel 仓库，用于回退）
@@ -41,32 +46,26 @@ def get_commit_date(repo, commit_hash, linux_repo=None):
     """
     # 优先从 linux 仓库查询
     if linux_repo is not None:
-        try:
-            # 使用 git log -1 --date=short --format=%cd 输出类似 2019-02-27 的日期
-            date_str = linux_repo.git.log(
-                "-1",
-                "--date=short",
-                "--format=%cd",
-                commit_hash,
-            ).strip()
-            return date_str
-        except Exception as e:
-            logger.debug(
-                f"无法从 linux 仓库获取 commit {commit_hash} 的提交日期: {str(e)}，尝试从 kernel 仓库查询"
-            )
+        commit = get_reader(linux_repo.working_dir).read_commit(commit_hash)
+        if commit is not None:
+            return commit.committer_date()
+        logger.debug(
+            f"无法从 linux 仓库获取 commit {commit_hash} 的提交日期，尝试从 kernel 仓库查询"
+        )
     
     # 如果 linux 仓库查询失败，从 kernel 仓库查询
-    try:
-        date_str = repo.git.log(
-            "-1",
-            "--date=short",
-            "--format=%cd",
-            commit_hash,
-        ).strip()
-        return date_str
-    except Exception as e:
-        logger.warning(f"无法获取 commit {commit_hash} 的提交日期: {str(e)}")
+    commit = get_reader(repo.working_dir).read_commit(commit_hash)
+    if commit is None:
+        logger.warning(f"无法获取 commit {commit_hash} 的提交日期")
         return None
+    return commit.committer_date()
+
+def _commit_title(commit, max_length):
+    # 只取第一行（标题）
+    first_line = commit.subject
+    if len(first_line) > max_length:
+        return first_line[:max_length] + "..."
+    return first_line
 
 def get_commit_message(repo, commit_hash, linux_repo=None, max_length=200):
     """获取commit的提交信息（commit message）
@@ -79,33 +78,24 @@ def get_commit_message(repo, commit_hash, linux_repo=None, max_length=200):
     """
     # 优先从linux仓库查询
     if linux_repo is not None:
-        try:
-            commit = linux_repo.commit(commit_hash)
-            message = commit.message.strip()
-            # 只取第一行（标题）
-            first_line = message.split('\n')[0]
-            if len(first_line) > max_length:
-                return first_line[:max_length] + "..."
-            return first_line
-        except Exception as e:
-            logger.debug(f"无法从linux仓库获取commit {commit_hash} 的提交信息: {str(e)}，尝试从kernel仓库查询")
+        commit = get_reader(linux_repo.working_dir).read_commit(commit_hash)
+        if commit is not None:
+            return _commit_title(commit, max_length)
+        logger.debug(f"无法从linux仓库获取commit {commit_hash} 的提交信息，尝试从kernel仓库查询")
     
     # 如果linux仓库查询失败，从kernel仓库查询
-    try:
-        commit = repo.commit(commit_hash)
-        message = commit.message.strip()
-        # 只取第一行（标题）
-        first_line = message.split('\n')[0]
-        if len(first_line) > max_length:
-            return first_line[:max_length] + "..."
-        return first_line
-    except Exception as e:
-        logger.debug(f"无法获取commit {commit_hash} 的提交信息: {str(e)}")
+    commit = get_reader(repo.working_dir).read_commit(commit_hash)
+    if commit is None:
+        logger.debug(f"无法获取commit {commit_hash} 的提交信息")
         return None
+    return _commit_title(commit, max_length)
 
 def get_branches_containing_commit(repo, commit_hash, target_branches, linux_repo=None):
-    """获取包含指定commit的分支，使用时间范围优化查询
-    
+    """获取包含指定commit的分支（commit 是分支祖先，或分支中有 commit message 提到该 hash）
+
+    所有分支在 branch_containment 中一次性判断，结果按 (commit, 分支 tip) 持久化缓存；
+    失败时回退到逐分支 git log / git branch --contains 查询。
+
     Args:
         repo: Git仓库对象（kernel仓库）
         commit_hash: 要查询的commit hash
@@ -114,7 +104,16 @@ def get_branches_containing_commit(repo, commit_hash, target_branches, linux_rep
     """
     if not target_branches:
         return []
-    
+    try:
+        branch_refs = branch_containment.resolve_branch_refs(repo.working_dir, target_branches)
+        return branch_containment.branches_containing(repo.working_dir, commit_hash, branch_refs)
+    except Exception as e:
+        logger.warning(f"批量分支包含关系查询失败，回退逐分支查询: {commit_hash}, {str(e)}")
+    return _get_branches_containing_commit_per_branch(repo, commit_hash, target_branches, linux_repo=linux_repo)
+
+
+def _get_branches_containing_commit_per_branch(repo, commit_hash, target_branches, linux_repo=None):
+    """逐分支查询包含指定commit的分支，使用时间范围优化查询"""
     result = []
     
     # 获取 commit 的提交日期字符串（优先从 linux 仓库查询）
@@ -557,14 +556,9 @@ def check_analyse_cache_result(cve_id: str, branch: str)-> bool:
         cve_id: CVE id
         branch: 分支名
     """
-    cache = load_cache(BRANCHES_ANALYSIS_CACHE)
-    for key, value in cache.items():
-        for item in value.get("data", []):
-            cache_cve = item.get(i18n("补丁ID"))
-            cache_branch = item.get(i18n("目标分支"))
-            if cve_id == cache_cve and cache_branch == branch:
-                cache_affected = item.get(i18n("是否受影响"))
-                if cache_affected == i18n("不受影响") or \
-                    cache_affected == i18n("已修复"):
-                    return True
+    for item in find_cached_items(BRANCHES_ANALYSIS_CACHE, cve_id, branch):
+        cache_affected = item.get(i18n("是否受影响"))
+        if cache_affected == i18n("不受影响") or \
+            cache_affected == i18n("已修复"):
+            return True
     return False
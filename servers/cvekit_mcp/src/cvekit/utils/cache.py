@@ -1,10 +1,13 @@
 import json
 import os
 import hashlib
+import sqlite3
+import time
+from contextlib import closing
 from datetime import datetime
 import logging
 from functools import wraps
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterable, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +17,14 @@ ISSUE_CACHE = os.path.join(CACHE_DIR, "issue_cache.json")
 COMMITS_CACHE = os.path.join(CACHE_DIR, "COMMITS_CACHE.json")
 BRANCHES_ANALYSIS_CACHE = os.path.join(CACHE_DIR, "branches_analysis_cache.json")
 
+# 各缓存文件路径只作为命名空间使用，数据统一存放在同目录的 SQLite 数据库中；
+# 首次访问某个命名空间时把旧 JSON 文件导入数据库，并改名为 *.migrated
+CACHE_DB_NAME = "cache.sqlite"
+_MIGRATED_SUFFIX = ".migrated"
+
+# 二级索引：缓存文件 -> 从缓存值中提取 (cve_id, branch, item) 的函数
+_SECONDARY_INDEXERS: dict[str, Callable[[Any], Iterable[tuple[str, str, Any]]]] = {}
+
 
 def _get_cache_key(*args) -> str:
     """生成缓存键"""
@@ -21,23 +32,173 @@ def _get_cache_key(*args) -> str:
     return hashlib.md5(key_str.encode()).hexdigest()
 
 
+def register_secondary_index(
+    cache_file: str,
+    indexer: Callable[[Any], Iterable[tuple[str, str, Any]]],
+) -> None:
+    """为缓存文件注册按 (CVE ID, 分支) 查询的二级索引，写入缓存时同步更新"""
+    _SECONDARY_INDEXERS[os.path.abspath(cache_file)] = indexer
+
+
+def _db_path(cache_file: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(cache_file)), CACHE_DB_NAME)
+
+
+def _namespace(cache_file: str) -> str:
+    return os.path.basename(cache_file)
+
+
+def _connect(cache_file: str) -> sqlite3.Connection:
+    db_path = _db_path(cache_file)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    _ensure_schema(conn)
+    _migrate_json_file(conn, cache_file)
+    return conn
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cache_entry (
+            namespace TEXT NOT NULL,
+            cache_key TEXT NOT NULL,
+            data TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (namespace, cache_key)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cache_item_index (
+            namespace TEXT NOT NULL,
+            cache_key TEXT NOT NULL,
+            cve_id TEXT NOT NULL,
+            branch TEXT NOT NULL,
+            item TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cache_entry_created ON cache_entry(namespace, created_at)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cache_item_cve_branch ON cache_item_index(namespace, cve_id, branch)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cache_item_key ON cache_item_index(namespace, cache_key)"
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cache_migration (
+            namespace TEXT PRIMARY KEY,
+            migrated_at REAL NOT NULL
+        )
+        """
+    )
+    conn.commit()
+
+
+def _migrate_json_file(conn: sqlite3.Connection, cache_file: str) -> None:
+    """把旧版 JSON 缓存文件导入数据库（每个命名空间只做一次，多进程并发安全）"""
+    if not os.path.exists(cache_file):
+        return
+    namespace = _namespace(cache_file)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        done = conn.execute(
+            "SELECT 1 FROM cache_migration WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        imported = 0
+        if not done:
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    legacy = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"旧缓存文件无法解析，跳过迁移: {cache_file}, 错误: {str(e)}")
+                legacy = {}
+            for key, entry in (legacy.items() if isinstance(legacy, dict) else ()):
+                try:
+                    created_at = datetime.fromisoformat(entry["timestamp"]).timestamp()
+                    _write_entry(conn, cache_file, key, entry["data"], created_at)
+                    imported += 1
+                except (KeyError, TypeError, ValueError):
+                    continue
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_migration(namespace, migrated_at) VALUES (?, ?)",
+                (namespace, time.time()),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    try:
+        os.replace(cache_file, cache_file + _MIGRATED_SUFFIX)
+    except OSError:
+        pass
+    if not done:
+        logger.info(f"旧缓存文件已迁移到 SQLite: {cache_file}, 条目数: {imported}")
+
+
+def _write_entry(conn: sqlite3.Connection, cache_file: str, key: str, value: Any, created_at: float) -> None:
+    namespace = _namespace(cache_file)
+    conn.execute(
+        "INSERT OR REPLACE INTO cache_entry(namespace, cache_key, data, created_at) VALUES (?, ?, ?, ?)",
+        (namespace, key, json.dumps(value, ensure_ascii=False), created_at),
+    )
+    conn.execute(
+        "DELETE FROM cache_item_index WHERE namespace = ? AND cache_key = ?",
+        (namespace, key),
+    )
+    indexer = _SECONDARY_INDEXERS.get(os.path.abspath(cache_file))
+    if indexer is None:
+        return
+    rows = []
+    for cve_id, branch, item in indexer(value) or ():
+        if cve_id and branch:
+            rows.append((namespace, key, str(cve_id), str(branch), json.dumps(item, ensure_ascii=False)))
+    conn.executemany(
+        "INSERT INTO cache_item_index(namespace, cache_key, cve_id, branch, item) VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
+
+
+def _delete_expired(conn: sqlite3.Connection, namespace: str, max_age_hours: int) -> None:
+    cutoff = time.time() - max_age_hours * 3600
+    conn.execute(
+        """
+        DELETE FROM cache_item_index
+        WHERE namespace = ?
+          AND cache_key IN (
+              SELECT cache_key FROM cache_entry WHERE namespace = ? AND created_at < ?
+          )
+        """,
+        (namespace, namespace, cutoff),
+    )
+    conn.execute(
+        "DELETE FROM cache_entry WHERE namespace = ? AND created_at < ?",
+        (namespace, cutoff),
+    )
+
+
 def load_cache(cache_file: str, max_age_hours: int = 24) -> dict:
     """加载缓存文件，可设置最大缓存时间(小时)"""
     try:
-        if not os.path.exists(cache_file):
-            return {}
-        
-        with open(cache_file, "r") as f:
-            data = json.load(f)
-            
-            # 检查缓存新鲜度
-            now = datetime.now()
-            for key in list(data.keys()):
-                cache_time = datetime.fromisoformat(data[key]["timestamp"])
-                if (now - cache_time).total_seconds() > max_age_hours * 3600:
-                    del data[key]
-
-            return data
+        cutoff = time.time() - max_age_hours * 3600
+        with closing(_connect(cache_file)) as conn:
+            rows = conn.execute(
+                "SELECT cache_key, data, created_at FROM cache_entry WHERE namespace = ? AND created_at >= ?",
+                (_namespace(cache_file), cutoff),
+            ).fetchall()
+        return {
+            key: {
+                "data": json.loads(data),
+                "timestamp": datetime.fromtimestamp(created_at).isoformat(),
+            }
+            for key, data, created_at in rows
+        }
     except Exception:
         return {}
 
@@ -45,28 +206,20 @@ def load_cache(cache_file: str, max_age_hours: int = 24) -> dict:
 def save_cache(cache_file: str, key: str, value: Any) -> None:
     """保存数据到缓存"""
     try:
-        # 确保缓存目录存在
-        cache_dir = os.path.dirname(cache_file)
-        if cache_dir:
-            os.makedirs(cache_dir, exist_ok=True)
-        
-        data = load_cache(cache_file)
-        data[key] = {
-            "data": value,
-            "timestamp": datetime.now().isoformat(),
-        }
-        
         # 尝试序列化，确保数据可以转换为JSON
         try:
             json.dumps(value, ensure_ascii=False)
         except (TypeError, ValueError) as e:
             logger.error(f"缓存数据无法序列化为JSON: {str(e)}")
             raise
-        
-        with open(cache_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        
-        logger.info(f"缓存已保存到: {cache_file}, key: {key}, 文件大小: {os.path.getsize(cache_file)} bytes")
+
+        with closing(_connect(cache_file)) as conn:
+            with conn:
+                # 与旧实现一致：写入时清理超过默认有效期的条目
+                _delete_expired(conn, _namespace(cache_file), 24)
+                _write_entry(conn, cache_file, key, value, time.time())
+
+        logger.info(f"缓存已保存到: {_db_path(cache_file)}, namespace: {_namespace(cache_file)}, key: {key}")
     except Exception as e:
         logger.error(f"保存缓存失败: {cache_file}, key: {key}, 错误: {str(e)}")
         import traceback
@@ -77,16 +230,18 @@ def save_cache(cache_file: str, key: str, value: Any) -> None:
 def delete_cache_key(cache_file: str, key: str) -> None:
     """删除指定缓存文件中的某个key"""
     try:
-        if not os.path.exists(cache_file):
-            logger.info(f"缓存文件不存在，无需删除key: {cache_file}")
-            return
-        
-        # 加载现有缓存
-        data = load_cache(cache_file)
-        if key in data:
-            del data[key]  # 删除目标key
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+        namespace = _namespace(cache_file)
+        with closing(_connect(cache_file)) as conn:
+            with conn:
+                deleted = conn.execute(
+                    "DELETE FROM cache_entry WHERE namespace = ? AND cache_key = ?",
+                    (namespace, key),
+                ).rowcount
+                conn.execute(
+                    "DELETE FROM cache_item_index WHERE namespace = ? AND cache_key = ?",
+                    (namespace, key),
+                )
+        if deleted:
             logger.info(f"已删除缓存key: {key}，缓存文件: {cache_file}")
         else:
             logger.info(f"缓存key不存在，无需删除: {key} (文件: {cache_file})")
@@ -97,8 +252,52 @@ def delete_cache_key(cache_file: str, key: str) -> None:
 
 def get_cached_data(cache_file: str, key: str, max_age_hours: int = 24) -> Any:
     """获取缓存数据"""
-    data = load_cache(cache_file, max_age_hours)
-    return data.get(key, {}).get("data")
+    try:
+        with closing(_connect(cache_file)) as conn:
+            row = conn.execute(
+                "SELECT data FROM cache_entry WHERE namespace = ? AND cache_key = ? AND created_at >= ?",
+                (_namespace(cache_file), key, time.time() - max_age_hours * 3600),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    except Exception:
+        return None
+
+
+def find_cached_items(cache_file: str, cve_id: str, branch: str, max_age_hours: int = 24) -> list:
+    """通过二级索引查找指定 (CVE ID, 分支) 的未过期缓存条目"""
+    try:
+        namespace = _namespace(cache_file)
+        with closing(_connect(cache_file)) as conn:
+            rows = conn.execute(
+                """
+                SELECT i.item
+                FROM cache_item_index AS i
+                JOIN cache_entry AS e
+                  ON e.namespace = i.namespace AND e.cache_key = i.cache_key
+                WHERE i.namespace = ? AND i.cve_id = ? AND i.branch = ? AND e.created_at >= ?
+                """,
+                (namespace, cve_id, branch, time.time() - max_age_hours * 3600),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+    except Exception as e:
+        logger.warning(f"查询缓存二级索引失败: {cache_file}, cve: {cve_id}, branch: {branch}, 错误: {str(e)}")
+        return []
+
+
+def _index_branch_analysis(value: Any) -> Iterable[tuple[str, str, Any]]:
+    """分支分析缓存的值是结果条目列表，按 补丁ID/目标分支 建立索引"""
+    from .locales import i18n
+
+    if not isinstance(value, list):
+        return []
+    return [
+        (item.get(i18n("补丁ID")), item.get(i18n("目标分支")), item)
+        for item in value
+        if isinstance(item, dict)
+    ]
+
+
+register_secondary_index(BRANCHES_ANALYSIS_CACHE, _index_branch_analysis)
 
 
 def cached(
@@ -162,4 +361,4 @@ def cached(
 
         return wrapper
 
-    return decorator
\ No newline at end of file
+    return decorator
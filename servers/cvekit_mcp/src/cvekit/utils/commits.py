@@ -10,7 +10,6 @@ from .cache import (
     COMMITS_CACHE,
 )
 from .patch import getUrlText, get_upstream_commit_from_url
-from .tools.project import safe_git_reset_hard
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +20,9 @@ def _ensure_clean_worktree(repo: git.Repo) -> None:
     """
     try:
         if repo.is_dirty(untracked_files=True):
+            # tools.project 会加载 langchain 工具链，只在确实需要清理工作区时导入
+            from .tools.project import safe_git_reset_hard
+
             logger.info(
                 "工作区非干净状态，执行 git reset --hard 和 git clean -fdx"
             )
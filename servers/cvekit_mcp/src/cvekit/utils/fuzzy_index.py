@@ -0,0 +1,95 @@
+"""基于 trigram 倒排索引的模糊匹配，用编辑距离下界剪枝后再做精确 Levenshtein 校验"""
+from __future__ import annotations
+
+import heapq
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Iterable
+
+import Levenshtein
+
+_PAD_HEAD = "\x00\x00"
+_PAD_TAIL = "\x00"
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"{_PAD_HEAD}{text}{_PAD_TAIL}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Top-k nearest strings by Levenshtein distance.
+
+    Candidates are visited in descending order of shared trigrams. One edit
+    destroys at most three trigrams of the query, so a candidate sharing
+    ``c`` of the query's ``n`` distinct trigrams is at least
+    ``ceil((n - c) / 3)`` edits away; the scan stops as soon as that bound
+    exceeds the current k-th best distance. The result is identical to a
+    brute-force scan, ties broken by insertion order.
+    """
+
+    def __init__(self, items: Iterable[str]):
+        self._items: list[str] = list(dict.fromkeys(items))
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        for idx, item in enumerate(self._items):
+            for gram in trigrams(item):
+                self._postings[gram].append(idx)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def nearest(
+        self,
+        query: str,
+        k: int = 1,
+        max_distance: int | None = None,
+    ) -> list[tuple[str, int]]:
+        """Return up to k (item, distance) pairs sorted by distance."""
+        if k <= 0 or not self._items:
+            return []
+        query_grams = trigrams(query)
+        shared = Counter(chain.from_iterable(self._postings.get(gram, ()) for gram in query_grams))
+
+        # 大小为 k 的最大堆：(-distance, -idx)，堆顶为当前第 k 名
+        best: list[tuple[int, int]] = []
+
+        def kth_distance() -> int | None:
+            if len(best) < k:
+                return max_distance
+            worst = -best[0][0]
+            return worst if max_distance is None else min(worst, max_distance)
+
+        def consider(idx: int) -> None:
+            limit = kth_distance()
+            item = self._items[idx]
+            if limit is not None and abs(len(item) - len(query)) > limit:
+                return
+            distance = Levenshtein.distance(query, item, score_cutoff=limit)
+            if limit is not None and distance > limit:
+                return
+            entry = (-distance, -idx)
+            if len(best) < k:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+
+        gram_count = len(query_grams)
+        buckets: dict[int, list[int]] = defaultdict(list)
+        for idx, count in shared.items():
+            buckets[count].append(idx)
+        for count in sorted(buckets, reverse=True):
+            limit = kth_distance()
+            if limit is not None and -(-(gram_count - count) // 3) > limit:
+                break
+            for idx in sorted(buckets[count]):
+                consider(idx)
+
+        # 未共享任何 trigram 的条目距离下界为 ceil(n / 3)，仅在仍可能入选时补扫
+        limit = kth_distance()
+        if limit is None or -(-gram_count // 3) <= limit:
+            for idx in range(len(self._items)):
+                if idx not in shared:
+                    consider(idx)
+
+        ranked = sorted((-neg_distance, -neg_idx) for neg_distance, neg_idx in best)
+        return [(self._items[idx], distance) for distance, idx in ranked]
@@ -0,0 +1,251 @@
+"""常驻 git cat-file 进程读取对象，避免每次读取 blob/commit 都 fork 一个 git 子进程"""
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class GitObject:
+    sha: str
+    type: str
+    data: bytes
+
+
+@dataclass(frozen=True)
+class CommitInfo:
+    sha: str
+    tree: str
+    parents: tuple[str, ...]
+    author: str
+    author_time: int
+    committer: str
+    committer_time: int
+    committer_tz: str
+    message: str
+
+    @property
+    def subject(self) -> str:
+        return self.message.strip().split("\n", 1)[0]
+
+    def committer_date(self) -> str:
+        """YYYY-MM-DD in the committer's own timezone, as ``git log --date=short``."""
+        sign = -1 if self.committer_tz.startswith("-") else 1
+        digits = self.committer_tz.lstrip("+-").rjust(4, "0")
+        offset = timedelta(hours=int(digits[:2]), minutes=int(digits[2:4])) * sign
+        return datetime.fromtimestamp(self.committer_time, timezone(offset)).strftime("%Y-%m-%d")
+
+
+class _CatFileProcess:
+    """One ``git cat-file --batch*`` process speaking the line protocol."""
+
+    def __init__(self, repo_path: str, mode: str):
+        self._repo_path = repo_path
+        self._mode = mode
+        self._process: subprocess.Popen | None = None
+
+    def _ensure_started(self) -> subprocess.Popen:
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                ["git", "-C", self._repo_path, "cat-file", self._mode],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._process
+
+    def request(self, rev: str, *, with_content: bool) -> tuple[str, str, bytes] | None:
+        for attempt in range(2):
+            process = self._ensure_started()
+            try:
+                process.stdin.write(rev.encode("utf-8") + b"\n")
+                process.stdin.flush()
+                header = process.stdout.readline()
+                if not header:
+                    raise BrokenPipeError("git cat-file exited")
+                header = header.rstrip(b"\n")
+                if header.endswith((b" missing", b" ambiguous")):
+                    return None
+                parts = header.split(b" ")
+                sha, obj_type, size = parts[0].decode(), parts[1].decode(), int(parts[2])
+                data = b""
+                if with_content:
+                    data = process.stdout.read(size + 1)[:size]
+                return sha, obj_type, data
+            except (BrokenPipeError, OSError, ValueError) as exc:
+                self.close()
+                if attempt:
+                    logger.warning("git cat-file %s 读取失败 repo=%s rev=%s: %s", self._mode, self._repo_path, rev, exc)
+        return None
+
+    def close(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+
+class GitObjectReader:
+    """Thread-safe object reader for one repository.
+
+    Revisions are resolved through a persistent ``--batch-check`` process; the
+    object body comes from a persistent ``--batch`` process unless the object
+    id is already in the LRU of decoded objects.
+    """
+
+    def __init__(self, repo_path: str, cache_bytes: int = DEFAULT_CACHE_BYTES):
+        self.repo_path = repo_path
+        self._cache_bytes = cache_bytes
+        self._cached_bytes = 0
+        self._objects: OrderedDict[str, GitObject] = OrderedDict()
+        self._commits: dict[str, CommitInfo] = {}
+        self._lock = threading.Lock()
+        self._batch = _CatFileProcess(repo_path, "--batch")
+        self._batch_check = _CatFileProcess(repo_path, "--batch-check")
+
+    def resolve(self, rev: str) -> tuple[str, str] | None:
+        """Return (sha, type) for rev, or None if it does not name an object."""
+        if not rev or "\n" in rev:
+            return None
+        with self._lock:
+            result = self._batch_check.request(rev, with_content=False)
+        return (result[0], result[1]) if result else None
+
+    def read(self, rev: str) -> GitObject | None:
+        resolved = self.resolve(rev)
+        if resolved is None:
+            return None
+        sha = resolved[0]
+        with self._lock:
+            cached = self._objects.get(sha)
+            if cached is not None:
+                self._objects.move_to_end(sha)
+                return cached
+            result = self._batch.request(sha, with_content=True)
+            if result is None:
+                return None
+            obj = GitObject(*result)
+            self._remember(obj)
+            return obj
+
+    def read_blob(self, ref: str, path: str) -> bytes | None:
+        obj = self.read(f"{ref}:{path}")
+        if obj is None or obj.type != "blob":
+            return None
+        return obj.data
+
+    def read_text(self, ref: str, path: str, errors: str = "replace") -> str | None:
+        data = self.read_blob(ref, path)
+        return None if data is None else data.decode("utf-8", errors=errors)
+
+    def read_commit(self, rev: str) -> CommitInfo | None:
+        obj = self.read(f"{rev}^{{commit}}")
+        if obj is None or obj.type != "commit":
+            return None
+        with self._lock:
+            info = self._commits.get(obj.sha)
+            if info is None:
+                info = _parse_commit(obj.sha, obj.data)
+                self._commits[obj.sha] = info
+            return info
+
+    def close(self) -> None:
+        with self._lock:
+            self._batch.close()
+            self._batch_check.close()
+            self._objects.clear()
+            self._commits.clear()
+            self._cached_bytes = 0
+
+    def _remember(self, obj: GitObject) -> None:
+        if len(obj.data) > self._cache_bytes:
+            return
+        self._objects[obj.sha] = obj
+        self._cached_bytes += len(obj.data)
+        while self._cached_bytes > self._cache_bytes:
+            _, evicted = self._objects.popitem(last=False)
+            self._cached_bytes -= len(evicted.data)
+            self._commits.pop(evicted.sha, None)
+
+
+def _parse_commit(sha: str, data: bytes) -> CommitInfo:
+    text = data.decode("utf-8", errors="replace")
+    header, _, message = text.partition("\n\n")
+    tree = ""
+    parents: list[str] = []
+    author = committer = ""
+    author_time = committer_time = 0
+    committer_tz = "+0000"
+    for line in header.split("\n"):
+        key, _, value = line.partition(" ")
+        if key == "tree":
+            tree = value
+        elif key == "parent":
+            parents.append(value)
+        elif key in {"author", "committer"}:
+            ident, _, stamp = value.rpartition("> ")
+            seconds, _, tz = stamp.partition(" ")
+            try:
+                parsed_seconds = int(seconds)
+            except ValueError:
+                parsed_seconds = 0
+            if key == "author":
+                author, author_time = ident + ">", parsed_seconds
+            else:
+                committer, committer_time, committer_tz = ident + ">", parsed_seconds, tz or "+0000"
+    return CommitInfo(
+        sha=sha,
+        tree=tree,
+        parents=tuple(parents),
+        author=author,
+        author_time=author_time,
+        committer=committer,
+        committer_time=committer_time,
+        committer_tz=committer_tz,
+        message=message,
+    )
+
+
+_readers: dict[str, GitObjectReader] = {}
+_readers_lock = threading.Lock()
+
+
+def get_reader(repo_path: str) -> GitObjectReader:
+    """Shared reader for repo_path; processes live until close_all()."""
+    key = os.path.realpath(os.path.abspath(os.path.expanduser(repo_path)))
+    with _readers_lock:
+        reader = _readers.get(key)
+        if reader is None:
+            reader = GitObjectReader(key)
+            _readers[key] = reader
+        return reader
+
+
+def close_all() -> None:
+    with _readers_lock:
+        readers = list(_readers.values())
+        _readers.clear()
+    for reader in readers:
+        reader.close()
+
+
+atexit.register(close_all)
@@ -6,9 +6,10 @@ import os
 import sqlite3
 import subprocess
 import time
+import zlib
 from contextlib import closing
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, NamedTuple
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,16 @@ INDEX_KIND_SOURCE_SUBJECT_NO_MERGES = "source_subject_no_merges"
 #目标仓 title 检查
 INDEX_KIND_TARGET_SUBJECT = "target_subject"
 
+# SQLite 单条语句绑定参数上限的保守取值
+_SQL_CHUNK_SIZE = 500
+
+
+class SubjectLookup(NamedTuple):
+    ref_name: str
+    ref_sha: str
+    index_kind: str
+    subjects: Iterable[str]
+
 
 def default_cache_db_path() -> Path:
     raw_path = os.environ.get(ENV_CACHE_DB, "").strip()
@@ -43,73 +54,127 @@ def load_subject_matches(
     index_kind: str,
     db_path: str | os.PathLike[str] | None = None,
 ) -> dict[str, tuple[str, ...]] | None:
-    started_at = time.perf_counter()
-    subject_list = [normalize_subject(subject) for subject in subjects if normalize_subject(subject)]
-    if not subject_list:
-        return {}
+    return load_subject_matches_bulk(
+        repo_path=repo_path,
+        lookups=[SubjectLookup(ref_name, ref_sha, index_kind, subjects)],
+        db_path=db_path,
+    )[0]
+
+
+def load_subject_matches_bulk(
+    *,
+    repo_path: str,
+    lookups: Iterable[SubjectLookup],
+    db_path: str | os.PathLike[str] | None = None,
+) -> list[dict[str, tuple[str, ...]] | None]:
+    """Resolve subjects for several (ref, index kind) pairs in one transaction.
 
+    Results are returned in lookup order; ``None`` marks a lookup whose ref is
+    not indexed at ``ref_sha``. Reachability is answered from the stored
+    per-tip bitmap, so indexed tips need no git subprocess at all.
+    """
+    lookup_list = list(lookups)
     repo_realpath = _repo_realpath(repo_path)
     repo_cache_id = _repo_cache_id(repo_realpath)
     db_file = Path(db_path).expanduser() if db_path else default_cache_db_path()
+    results: list[dict[str, tuple[str, ...]] | None] = []
+    # 缺少可达性位图的查询留到关闭连接后再走 git 子进程过滤
+    deferred: list[tuple[int, SubjectLookup, list[str], list[tuple[str, str]], float]] = []
+
     with closing(_connect(db_file)) as conn:
         _ensure_schema(conn)
-        meta = conn.execute(
-            """
-            SELECT tip_sha, status
-            FROM repo_ref_index
-            WHERE repo_realpath = ?
-              AND ref_name = ?
-              AND index_kind = ?
-            """,
-            (repo_cache_id, ref_name, index_kind),
-        ).fetchone()
-        if not meta or meta[0] != ref_sha or meta[1] != "complete":
-            logger.info(
-                "git subject disk cache miss repo=%s ref=%s sha=%s kind=%s subjects=%d elapsed=%.3fs",
-                repo_realpath,
-                ref_name,
-                ref_sha,
-                index_kind,
-                len(subject_list),
-                time.perf_counter() - started_at,
-            )
-            return None
+        conn.execute("BEGIN")
+        for lookup in lookup_list:
+            started_at = time.perf_counter()
+            subject_list = list(dict.fromkeys(
+                normalize_subject(subject) for subject in lookup.subjects if normalize_subject(subject)
+            ))
+            if not subject_list:
+                results.append({})
+                continue
+            meta = conn.execute(
+                """
+                SELECT tip_sha, status
+                FROM repo_ref_index
+                WHERE repo_realpath = ?
+                  AND ref_name = ?
+                  AND index_kind = ?
+                """,
+                (repo_cache_id, lookup.ref_name, lookup.index_kind),
+            ).fetchone()
+            if not meta or meta[0] != lookup.ref_sha or meta[1] != "complete":
+                logger.info(
+                    "git subject disk cache miss repo=%s ref=%s sha=%s kind=%s subjects=%d elapsed=%.3fs",
+                    repo_realpath,
+                    lookup.ref_name,
+                    lookup.ref_sha,
+                    lookup.index_kind,
+                    len(subject_list),
+                    time.perf_counter() - started_at,
+                )
+                results.append(None)
+                continue
 
-        placeholders = ",".join("?" for _ in subject_list)
-        rows = conn.execute(
-            f"""
-            SELECT subject, commit_id
-            FROM git_commit_subjects
-            WHERE repo_realpath = ?
-              AND index_kind = ?
-              AND subject IN ({placeholders})
-            ORDER BY subject, commit_time DESC, commit_id
-            """,
-            (repo_cache_id, index_kind, *subject_list),
-        ).fetchall()
-        _touch_ref(conn, repo_cache_id, ref_name, index_kind)
+            rows = _subject_rows_with_ordinals(conn, repo_cache_id, lookup.index_kind, subject_list)
+            bitmap = _load_reachability(conn, repo_cache_id, lookup.ref_name, lookup.index_kind, lookup.ref_sha)
+            _touch_ref(conn, repo_cache_id, lookup.ref_name, lookup.index_kind)
+            if bitmap is None:
+                results.append(None)
+                deferred.append((
+                    len(results) - 1,
+                    lookup,
+                    subject_list,
+                    [(subject, commit_id) for subject, commit_id, _ in rows],
+                    started_at,
+                ))
+                continue
+            reachable = [
+                (subject, commit_id)
+                for subject, commit_id, ordinal in rows
+                if ordinal is not None and ordinal in bitmap
+            ]
+            results.append(_collect_matches(
+                repo_realpath, lookup, subject_list, len(rows), reachable, started_at, source="bitmap",
+            ))
         conn.commit()
 
-    reachable = _reachable_commits(repo_realpath, ref_sha, [commit_id for _, commit_id in rows])
+    for position, lookup, subject_list, rows, started_at in deferred:
+        reachable_ids = _reachable_commits(repo_realpath, lookup.ref_sha, [commit_id for _, commit_id in rows])
+        reachable = [(subject, commit_id) for subject, commit_id in rows if commit_id in reachable_ids]
+        results[position] = _collect_matches(
+            repo_realpath, lookup, subject_list, len(rows), reachable, started_at, source="git",
+        )
+    return results
+
+
+def _collect_matches(
+    repo_realpath: str,
+    lookup: SubjectLookup,
+    subject_list: list[str],
+    candidate_rows: int,
+    reachable: list[tuple[str, str]],
+    started_at: float,
+    *,
+    source: str,
+) -> dict[str, tuple[str, ...]]:
     matches: dict[str, list[str]] = {subject: [] for subject in subject_list}
-    for subject, commit_id in rows:
-        if commit_id not in reachable:
-            continue
+    for subject, commit_id in reachable:
         matches.setdefault(subject, []).append(commit_id)
     matched_subjects = sum(1 for commit_ids in matches.values() if commit_ids)
     matched_commits = sum(len(commit_ids) for commit_ids in matches.values())
     logger.info(
         "git subject disk cache load repo=%s ref=%s sha=%s kind=%s subjects=%d candidate_rows=%d "
-        "reachable_commits=%d matched_subjects=%d matched_commits=%d elapsed=%.3fs",
+        "reachable_commits=%d matched_subjects=%d matched_commits=%d reachability=%s elapsed=%.3fs",
         repo_realpath,
-        ref_name,
-        ref_sha,
-        index_kind,
+        lookup.ref_name,
+        lookup.ref_sha,
+        lookup.index_kind,
         len(subject_list),
-        len(rows),
-        len(reachable),
+        candidate_rows,
+        len({commit_id for _, commit_id in reachable}),
         matched_subjects,
         matched_commits,
+        source,
         time.perf_counter() - started_at,
     )
     return {subject: tuple(dict.fromkeys(commit_ids)) for subject, commit_ids in matches.items()}
@@ -134,21 +199,35 @@ def ensure_subject_index(
     db_file.parent.mkdir(parents=True, exist_ok=True)
     started_at = time.perf_counter()
 
+    has_reachability = False
     with closing(_connect(db_file)) as conn:
         _ensure_schema(conn)
         previous = _ref_meta(conn, repo_cache_id, ref_name, index_kind)
         if previous and previous["tip_sha"] == ref_sha:
             _touch_ref(conn, repo_cache_id, ref_name, index_kind)
             conn.commit()
-            logger.info(
-                "git subject disk cache hit repo=%s ref=%s sha=%s kind=%s elapsed=%.3fs",
-                repo_realpath,
-                ref_name,
-                ref_sha,
-                index_kind,
-                time.perf_counter() - started_at,
+            has_reachability = _has_reachability(conn, repo_cache_id, ref_name, index_kind, ref_sha)
+
+    if previous and previous["tip_sha"] == ref_sha:
+        if not has_reachability:
+            # 旧版本缓存没有可达性位图，命中时补建一次，此后查询不再需要 git 子进程
+            _backfill_reachability(
+                db_file=db_file,
+                repo_realpath=repo_realpath,
+                repo_cache_id=repo_cache_id,
+                ref_name=ref_name,
+                ref_sha=ref_sha,
+                index_kind=index_kind,
             )
-            return "hit"
+        logger.info(
+            "git subject disk cache hit repo=%s ref=%s sha=%s kind=%s elapsed=%.3fs",
+            repo_realpath,
+            ref_name,
+            ref_sha,
+            index_kind,
+            time.perf_counter() - started_at,
+        )
+        return "hit"
 
     if previous:
         previous_tip = previous["tip_sha"]
@@ -160,6 +239,8 @@ def ensure_subject_index(
                 ref_sha=ref_sha,
                 index_kind=index_kind,
                 item_count=0,
+                previous_tip=previous_tip,
+                removed_commits=_rev_list_commits(repo_realpath, f"{ref_sha}..{previous_tip}"),
             )
             logger.info(
                 "git subject disk cache ref moved backward repo=%s ref=%s old_sha=%s new_sha=%s kind=%s",
@@ -183,6 +264,8 @@ def ensure_subject_index(
             index_kind=index_kind,
             log_ref=log_ref,
             no_merges=no_merges,
+            previous_tip=previous_tip if base_sha else None,
+            removed_commits=_rev_list_commits(repo_realpath, f"{base_sha}..{previous_tip}") if base_sha else None,
         )
         logger.info(
             "git subject disk cache imported repo=%s ref=%s old_sha=%s new_sha=%s base_sha=%s kind=%s rows_added=%d status=%s",
@@ -247,6 +330,71 @@ def build_and_store_subject_index(
     return rows_added
 
 
+def load_commit_describes(
+    *,
+    repo_path: str,
+    tags_fingerprint: str,
+    commit_ids: Iterable[str],
+    db_path: str | os.PathLike[str] | None = None,
+) -> dict[str, str]:
+    """Return cached describe strings computed against the same tag set.
+
+    A describe string depends only on the commit's ancestry and on the tags,
+    so rows stay valid across upstream tip moves until a tag is added,
+    moved or deleted (which changes ``tags_fingerprint``).
+    """
+    repo_cache_id = _repo_cache_id(_repo_realpath(repo_path))
+    db_file = Path(db_path).expanduser() if db_path else default_cache_db_path()
+    candidates = list(dict.fromkeys(commit_id for commit_id in commit_ids if commit_id))
+    describes: dict[str, str] = {}
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        for chunk in _chunks(candidates):
+            placeholders = ",".join("?" for _ in chunk)
+            describes.update(conn.execute(
+                f"""
+                SELECT commit_id, describe
+                FROM git_commit_describe
+                WHERE repo_realpath = ?
+                  AND tags_fingerprint = ?
+                  AND commit_id IN ({placeholders})
+                """,
+                (repo_cache_id, tags_fingerprint, *chunk),
+            ).fetchall())
+    return describes
+
+
+def store_commit_describes(
+    *,
+    repo_path: str,
+    tags_fingerprint: str,
+    describes: dict[str, str],
+    db_path: str | os.PathLike[str] | None = None,
+) -> None:
+    repo_cache_id = _repo_cache_id(_repo_realpath(repo_path))
+    db_file = Path(db_path).expanduser() if db_path else default_cache_db_path()
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        conn.execute("BEGIN")
+        # tag 集合变化后旧结果全部失效，直接清掉
+        conn.execute(
+            "DELETE FROM git_commit_describe WHERE repo_realpath = ? AND tags_fingerprint != ?",
+            (repo_cache_id, tags_fingerprint),
+        )
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO git_commit_describe (
+                repo_realpath,
+                commit_id,
+                tags_fingerprint,
+                describe
+            ) VALUES (?, ?, ?, ?)
+            """,
+            [(repo_cache_id, commit_id, tags_fingerprint, text) for commit_id, text in describes.items()],
+        )
+        conn.commit()
+
+
 def _repo_realpath(repo_path: str) -> str:
     return os.path.realpath(os.path.abspath(os.path.expanduser(repo_path)))
 
@@ -299,6 +447,50 @@ def _ensure_schema(conn: sqlite3.Connection) -> None:
         )
         """
     )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS git_commit_ordinals (
+            ordinal INTEGER PRIMARY KEY,
+            repo_realpath TEXT NOT NULL,
+            commit_id TEXT NOT NULL,
+            UNIQUE (
+                repo_realpath,
+                commit_id
+            )
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS repo_ref_reachability (
+            repo_realpath TEXT NOT NULL,
+            ref_name TEXT NOT NULL,
+            index_kind TEXT NOT NULL,
+            tip_sha TEXT NOT NULL,
+            commit_count INTEGER NOT NULL,
+            bitmap BLOB NOT NULL,
+            PRIMARY KEY (
+                repo_realpath,
+                ref_name,
+                index_kind
+            )
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS git_commit_describe (
+            repo_realpath TEXT NOT NULL,
+            commit_id TEXT NOT NULL,
+            tags_fingerprint TEXT NOT NULL,
+            describe TEXT NOT NULL,
+            PRIMARY KEY (
+                repo_realpath,
+                commit_id
+            )
+        )
+        """
+    )
     conn.execute(
         """
         CREATE INDEX IF NOT EXISTS idx_git_commit_subject_lookup
@@ -342,10 +534,23 @@ def _store_ref_tip(
     ref_sha: str,
     index_kind: str,
     item_count: int,
+    previous_tip: str | None = None,
+    removed_commits: list[str] | None = None,
 ) -> None:
     now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
     with closing(_connect(db_file)) as conn:
         _ensure_schema(conn)
+        conn.execute("BEGIN")
+        _update_reachability(
+            conn,
+            repo_cache_id,
+            ref_name,
+            index_kind,
+            previous_tip=previous_tip,
+            ref_sha=ref_sha,
+            added_commits=[],
+            removed_commits=removed_commits,
+        )
         conn.execute(
             """
             INSERT OR REPLACE INTO repo_ref_index (
@@ -374,7 +579,15 @@ def _import_subject_rows(
     index_kind: str,
     log_ref: str,
     no_merges: bool,
+    previous_tip: str | None = None,
+    removed_commits: list[str] | None = None,
 ) -> int:
+    """Import ``git log log_ref`` rows and move the ref's reachability bitmap.
+
+    Without ``previous_tip`` the log covers everything reachable from
+    ``ref_sha`` and the bitmap is rebuilt from it; otherwise the previous
+    tip's bitmap loses ``removed_commits`` and gains the logged commits.
+    """
     rows = [_coerce_subject_row(row) for row in _git_log_subject_rows(repo_realpath, log_ref, no_merges=no_merges)]
     now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
@@ -401,6 +614,16 @@ def _import_subject_rows(
             ],
         )
         inserted = conn.total_changes - before_changes
+        _update_reachability(
+            conn,
+            repo_cache_id,
+            ref_name,
+            index_kind,
+            previous_tip=previous_tip,
+            ref_sha=ref_sha,
+            added_commits=[commit_id for commit_id, _, _ in rows],
+            removed_commits=[] if previous_tip is None else removed_commits,
+        )
         conn.execute(
             """
             INSERT OR REPLACE INTO repo_ref_index (
@@ -443,6 +666,224 @@ def _touch_ref(
     )
 
 
+class _ReachabilityBitmap:
+    """Membership set of commit ordinals, stored zlib-compressed."""
+
+    def __init__(self, data: bytes = b""):
+        self._bits = bytearray(data)
+
+    @classmethod
+    def from_blob(cls, blob: bytes) -> "_ReachabilityBitmap":
+        return cls(zlib.decompress(blob))
+
+    def to_blob(self) -> bytes:
+        return zlib.compress(bytes(self._bits))
+
+    def __contains__(self, ordinal: int) -> bool:
+        byte_index = ordinal >> 3
+        return byte_index < len(self._bits) and bool(self._bits[byte_index] & (1 << (ordinal & 7)))
+
+    def __len__(self) -> int:
+        return sum(bin(byte).count("1") for byte in self._bits)
+
+    def add(self, ordinals: Iterable[int]) -> None:
+        for ordinal in ordinals:
+            byte_index = ordinal >> 3
+            if byte_index >= len(self._bits):
+                self._bits.extend(bytes(byte_index + 1 - len(self._bits)))
+            self._bits[byte_index] |= 1 << (ordinal & 7)
+
+    def discard(self, ordinals: Iterable[int]) -> None:
+        for ordinal in ordinals:
+            byte_index = ordinal >> 3
+            if byte_index < len(self._bits):
+                self._bits[byte_index] &= ~(1 << (ordinal & 7)) & 0xFF
+
+
+def _chunks(values: list, size: int = _SQL_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _commit_ordinals(
+    conn: sqlite3.Connection,
+    repo_cache_id: str,
+    commit_ids: Iterable[str],
+    *,
+    create: bool,
+) -> dict[str, int]:
+    candidates = list(dict.fromkeys(commit_id for commit_id in commit_ids if commit_id))
+    if create:
+        conn.executemany(
+            "INSERT OR IGNORE INTO git_commit_ordinals (repo_realpath, commit_id) VALUES (?, ?)",
+            [(repo_cache_id, commit_id) for commit_id in candidates],
+        )
+    ordinals: dict[str, int] = {}
+    for chunk in _chunks(candidates):
+        placeholders = ",".join("?" for _ in chunk)
+        ordinals.update(conn.execute(
+            f"""
+            SELECT commit_id, ordinal
+            FROM git_commit_ordinals
+            WHERE repo_realpath = ?
+              AND commit_id IN ({placeholders})
+            """,
+            (repo_cache_id, *chunk),
+        ).fetchall())
+    return ordinals
+
+
+def _subject_rows_with_ordinals(
+    conn: sqlite3.Connection,
+    repo_cache_id: str,
+    index_kind: str,
+    subjects: list[str],
+) -> list[tuple[str, str, int | None]]:
+    rows: list[tuple[str, str, int | None, int]] = []
+    for chunk in _chunks(subjects):
+        placeholders = ",".join("?" for _ in chunk)
+        rows.extend(conn.execute(
+            f"""
+            SELECT s.subject, s.commit_id, o.ordinal, s.commit_time
+            FROM git_commit_subjects AS s
+            LEFT JOIN git_commit_ordinals AS o
+              ON o.repo_realpath = s.repo_realpath
+             AND o.commit_id = s.commit_id
+            WHERE s.repo_realpath = ?
+              AND s.index_kind = ?
+              AND s.subject IN ({placeholders})
+            """,
+            (repo_cache_id, index_kind, *chunk),
+        ).fetchall())
+    rows.sort(key=lambda row: (row[0], -row[3], row[1]))
+    return [(subject, commit_id, ordinal) for subject, commit_id, ordinal, _ in rows]
+
+
+def _has_reachability(
+    conn: sqlite3.Connection,
+    repo_cache_id: str,
+    ref_name: str,
+    index_kind: str,
+    ref_sha: str,
+) -> bool:
+    row = conn.execute(
+        """
+        SELECT 1
+        FROM repo_ref_reachability
+        WHERE repo_realpath = ?
+          AND ref_name = ?
+          AND index_kind = ?
+          AND tip_sha = ?
+        """,
+        (repo_cache_id, ref_name, index_kind, ref_sha),
+    ).fetchone()
+    return row is not None
+
+
+def _load_reachability(
+    conn: sqlite3.Connection,
+    repo_cache_id: str,
+    ref_name: str,
+    index_kind: str,
+    ref_sha: str,
+) -> _ReachabilityBitmap | None:
+    row = conn.execute(
+        """
+        SELECT bitmap
+        FROM repo_ref_reachability
+        WHERE repo_realpath = ?
+          AND ref_name = ?
+          AND index_kind = ?
+          AND tip_sha = ?
+        """,
+        (repo_cache_id, ref_name, index_kind, ref_sha),
+    ).fetchone()
+    if not row:
+        return None
+    return _ReachabilityBitmap.from_blob(row[0])
+
+
+def _update_reachability(
+    conn: sqlite3.Connection,
+    repo_cache_id: str,
+    ref_name: str,
+    index_kind: str,
+    *,
+    previous_tip: str | None,
+    ref_sha: str,
+    added_commits: list[str],
+    removed_commits: list[str] | None,
+) -> None:
+    """Move the ref's bitmap to ref_sha, or drop it when it cannot be derived."""
+    if previous_tip is None:
+        bitmap = _ReachabilityBitmap()
+    else:
+        bitmap = _load_reachability(conn, repo_cache_id, ref_name, index_kind, previous_tip)
+    if bitmap is None or removed_commits is None:
+        conn.execute(
+            """
+            DELETE FROM repo_ref_reachability
+            WHERE repo_realpath = ?
+              AND ref_name = ?
+              AND index_kind = ?
+            """,
+            (repo_cache_id, ref_name, index_kind),
+        )
+        return
+    if removed_commits:
+        bitmap.discard(_commit_ordinals(conn, repo_cache_id, removed_commits, create=False).values())
+    bitmap.add(_commit_ordinals(conn, repo_cache_id, added_commits, create=True).values())
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO repo_ref_reachability (
+            repo_realpath,
+            ref_name,
+            index_kind,
+            tip_sha,
+            commit_count,
+            bitmap
+        ) VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (repo_cache_id, ref_name, index_kind, ref_sha, len(bitmap), bitmap.to_blob()),
+    )
+
+
+def _backfill_reachability(
+    *,
+    db_file: Path,
+    repo_realpath: str,
+    repo_cache_id: str,
+    ref_name: str,
+    ref_sha: str,
+    index_kind: str,
+) -> None:
+    commit_ids = _rev_list_commits(repo_realpath, ref_sha)
+    if commit_ids is None:
+        return
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        conn.execute("BEGIN")
+        _update_reachability(
+            conn,
+            repo_cache_id,
+            ref_name,
+            index_kind,
+            previous_tip=None,
+            ref_sha=ref_sha,
+            added_commits=commit_ids,
+            removed_commits=[],
+        )
+        conn.commit()
+    logger.info(
+        "git subject disk cache reachability backfilled repo=%s ref=%s sha=%s kind=%s commits=%d",
+        repo_realpath,
+        ref_name,
+        ref_sha,
+        index_kind,
+        len(commit_ids),
+    )
+
+
 def _is_ancestor(repo_path: str, old_sha: str, new_sha: str) -> bool:
     process = subprocess.run(
         [
@@ -485,6 +926,32 @@ def _merge_base(repo_path: str, old_sha: str, new_sha: str) -> str | None:
     return base_sha or None
 
 
+def _rev_list_commits(repo_path: str, rev_range: str) -> list[str] | None:
+    process = subprocess.run(
+        [
+            "git",
+            "-C",
+            repo_path,
+            "rev-list",
+            rev_range,
+        ],
+        check=False,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    if process.returncode != 0:
+        logger.warning(
+            "git subject disk cache rev-list failed repo=%s range=%s: %s",
+            repo_path,
+            rev_range,
+            process.stderr.strip() or f"git rev-list exited with {process.returncode}",
+        )
+        return None
+    return [line.strip() for line in process.stdout.splitlines() if line.strip()]
+
+
 def _reachable_commits(repo_path: str, tip_sha: str, commit_ids: Iterable[str]) -> set[str]:
     candidates = list(dict.fromkeys(commit_id.strip() for commit_id in commit_ids if commit_id and commit_id.strip()))
     if not candidates:
@@ -0,0 +1,297 @@
+"""LLM 响应缓存：按模型、温度、规范化 prompt、工具 schema 和 system message 寻址，支持不同进程复用"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Iterable, Optional, Sequence
+
+try:
+    from langchain_core.caches import BaseCache
+    from langchain_core.load import dumps as lc_dumps, loads as lc_loads
+except ImportError:
+    BaseCache = None
+    lc_dumps = lc_loads = None
+
+logger = logging.getLogger(__name__)
+
+# 缓存默认关闭，设置为 1/true/yes/on 开启
+ENV_CACHE_ENABLED = "CVEKIT_LLM_CACHE"
+ENV_CACHE_DB = "CVEKIT_LLM_CACHE_DB"
+ENV_CACHE_TTL_SECONDS = "CVEKIT_LLM_CACHE_TTL_SECONDS"
+ENV_CACHE_MAX_MB = "CVEKIT_LLM_CACHE_MAX_MB"
+# 温度高于该值的请求结果本身是随机采样，默认只缓存温度为 0 的请求
+ENV_CACHE_MAX_TEMPERATURE = "CVEKIT_LLM_CACHE_MAX_TEMPERATURE"
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_MB = 512
+CACHE_FORMAT = 1
+
+# 每写入多少条检查一次 TTL/容量，避免每次写入都扫描全表
+_EVICT_EVERY = 32
+
+_counter_lock = threading.Lock()
+_counters = {"llm_cache_hits": 0, "llm_cache_misses": 0}
+_writes_since_evict = 0
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning("忽略无效的 %s=%r，使用默认值 %s", name, raw, default)
+        return default
+
+
+def is_enabled() -> bool:
+    return _env_flag(ENV_CACHE_ENABLED)
+
+
+def should_cache(temperature: float | None) -> bool:
+    if not is_enabled():
+        return False
+    return float(temperature or 0.0) <= _env_float(ENV_CACHE_MAX_TEMPERATURE, 0.0)
+
+
+def default_cache_db_path() -> Path:
+    raw_path = os.environ.get(ENV_CACHE_DB, "").strip()
+    if raw_path:
+        return Path(raw_path).expanduser()
+    return Path("~/.cvekit/.cache/llm-response.sqlite").expanduser()
+
+
+def normalize_prompt(text: str | None) -> str:
+    """统一换行、去掉行尾空白和首尾空行；不改动行内内容（代码缩进有语义）。"""
+    lines = str(text or "").replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def tool_schema(tools: Iterable[Any] | None) -> list:
+    """LangChain 工具的 name/description/参数 schema，作为缓存键的一部分。"""
+    schema = []
+    for item in tools or ():
+        args = getattr(item, "args", None)
+        schema.append({
+            "name": getattr(item, "name", None) or getattr(item, "__name__", str(item)),
+            "description": getattr(item, "description", "") or "",
+            "args": args if isinstance(args, dict) else {},
+        })
+    return sorted(schema, key=lambda entry: entry["name"])
+
+
+def fingerprint(
+    *,
+    model: str,
+    temperature: float | None,
+    prompt: str,
+    system_message: str = "",
+    tools: Iterable[Any] | None = None,
+    extra: dict | None = None,
+) -> str:
+    payload = {
+        "format": CACHE_FORMAT,
+        "model": str(model or ""),
+        "temperature": float(temperature or 0.0),
+        "prompt": normalize_prompt(prompt),
+        "system": normalize_prompt(system_message),
+        "tools": tool_schema(tools),
+        "extra": extra or {},
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def counters() -> dict[str, int]:
+    with _counter_lock:
+        return dict(_counters)
+
+
+def counters_since(started: dict[str, int]) -> dict[str, int]:
+    current = counters()
+    return {key: current[key] - int(started.get(key, 0)) for key in current}
+
+
+def reset_counters() -> None:
+    with _counter_lock:
+        for key in _counters:
+            _counters[key] = 0
+
+
+def _count(key: str) -> None:
+    with _counter_lock:
+        _counters[key] += 1
+
+
+def lookup(key: str, db_path: str | os.PathLike[str] | None = None) -> str | None:
+    db_file = Path(db_path).expanduser() if db_path else default_cache_db_path()
+    ttl = _env_float(ENV_CACHE_TTL_SECONDS, DEFAULT_TTL_SECONDS)
+    now = time.time()
+    try:
+        with closing(_connect(db_file)) as conn:
+            _ensure_schema(conn)
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_response WHERE cache_key = ?",
+                (key,),
+            ).fetchone()
+            if row and (ttl <= 0 or now - row[1] <= ttl):
+                conn.execute(
+                    "UPDATE llm_response SET last_used_at = ?, hits = hits + 1 WHERE cache_key = ?",
+                    (now, key),
+                )
+                conn.commit()
+                _count("llm_cache_hits")
+                return row[0]
+    except sqlite3.Error as e:
+        logger.warning("读取 LLM 响应缓存失败，按未命中处理: db=%s, error=%s", db_file, e)
+    _count("llm_cache_misses")
+    return None
+
+
+def store(
+    key: str,
+    response: str,
+    *,
+    model: str = "",
+    db_path: str | os.PathLike[str] | None = None,
+) -> None:
+    global _writes_since_evict
+    db_file = Path(db_path).expanduser() if db_path else default_cache_db_path()
+    now = time.time()
+    try:
+        with closing(_connect(db_file)) as conn:
+            _ensure_schema(conn)
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_response(cache_key, model, response, size, created_at, last_used_at, hits)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+                """,
+                (key, str(model or ""), response, len(response.encode("utf-8")), now, now),
+            )
+            conn.commit()
+            with _counter_lock:
+                _writes_since_evict += 1
+                due = _writes_since_evict >= _EVICT_EVERY
+                if due:
+                    _writes_since_evict = 0
+            if due:
+                evict(conn)
+    except sqlite3.Error as e:
+        logger.warning("写入 LLM 响应缓存失败: db=%s, error=%s", db_file, e)
+
+
+def evict(
+    conn: sqlite3.Connection,
+    *,
+    ttl_seconds: float | None = None,
+    max_bytes: int | None = None,
+) -> int:
+    """删除过期条目，再按 last_used_at 从旧到新淘汰到容量上限以内，返回删除条数。"""
+    if ttl_seconds is None:
+        ttl_seconds = _env_float(ENV_CACHE_TTL_SECONDS, DEFAULT_TTL_SECONDS)
+    if max_bytes is None:
+        max_bytes = int(_env_float(ENV_CACHE_MAX_MB, DEFAULT_MAX_MB) * 1024 * 1024)
+    removed = 0
+    if ttl_seconds > 0:
+        removed += conn.execute(
+            "DELETE FROM llm_response WHERE created_at < ?",
+            (time.time() - ttl_seconds,),
+        ).rowcount
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_response").fetchone()[0]
+    if max_bytes > 0 and total > max_bytes:
+        victims = []
+        for key, size in conn.execute("SELECT cache_key, size FROM llm_response ORDER BY last_used_at ASC"):
+            if total <= max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM llm_response WHERE cache_key = ?", victims)
+        removed += len(victims)
+    conn.commit()
+    if removed:
+        logger.info("LLM 响应缓存淘汰 %d 条", removed)
+    return removed
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS llm_response (
+            cache_key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used_at REAL NOT NULL,
+            hits INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_llm_response_last_used ON llm_response(last_used_at)"
+    )
+
+
+if BaseCache is not None:
+
+    class LangChainLLMCache(BaseCache):
+        """供 ChatOpenAI(cache=...) 使用，agent 每一轮模型调用各自按完整消息和绑定工具寻址。
+
+        LangChain 传入的 prompt 是序列化后的完整消息列表（含 system message 和
+        工具调用结果），llm_string 包含模型参数与 bind_tools 的工具 schema。
+        """
+
+        def __init__(self, db_path: str | os.PathLike[str] | None = None):
+            self.db_path = db_path
+
+        def _key(self, prompt: str, llm_string: str) -> str:
+            return fingerprint(model="langchain", temperature=0.0, prompt=prompt, extra={"llm": llm_string})
+
+        def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Any]]:
+            cached = lookup(self._key(prompt, llm_string), self.db_path)
+            if cached is None:
+                return None
+            try:
+                return lc_loads(cached)
+            except Exception as e:
+                logger.warning("LLM 响应缓存条目无法反序列化，按未命中处理: %s", e)
+                return None
+
+        def update(self, prompt: str, llm_string: str, return_val: Sequence[Any]) -> None:
+            store(self._key(prompt, llm_string), lc_dumps(list(return_val)), model="langchain", db_path=self.db_path)
+
+        def clear(self, **kwargs: Any) -> None:
+            db_file = Path(self.db_path).expanduser() if self.db_path else default_cache_db_path()
+            with closing(_connect(db_file)) as conn:
+                _ensure_schema(conn)
+                conn.execute("DELETE FROM llm_response WHERE model = 'langchain'")
+                conn.commit()
+
+else:
+    LangChainLLMCache = None
+
+
+def langchain_cache(temperature: float | None):
+    """返回可传给 ChatOpenAI(cache=...) 的缓存；未开启或温度不适合缓存时返回 None。"""
+    if LangChainLLMCache is None or not should_cache(temperature):
+        return None
+    return LangChainLLMCache()
@@ -12,13 +12,19 @@ Modifications for CVEKit MCP backport workflow:
 """
 
 
+from collections import OrderedDict
+from contextlib import contextmanager
+import functools
+import hashlib
+import threading
 from typing import Generator
 
 import common
+import config
 import tree_sitter_c as tsc
 import tree_sitter_cpp as tscpp
 import tree_sitter_java as tsjava
-from tree_sitter import Language, Node, Parser
+from tree_sitter import Language, Node, Parser, Point, Query, Tree
 
 TS_JAVA_PACKAGE = "(package_declaration (scoped_identifier) @package)(package_declaration (identifier) @package)"
 TS_JAVA_IMPORT = "(import_declaration (scoped_identifier) @import)"
@@ -33,22 +39,265 @@ TS_JAVA_METHOD = "(method_declaration) @method (constructor_declaration) @method
 TS_METHODNAME = "(method_declaration 	(identifier)@id)(constructor_declaration 	(identifier)@id)"
 TS_FPARAM = "(formal_parameters)@name"
 
+# 已编译 Query 的 LRU 容量，按 (语言, 查询文本) 缓存
+QUERY_CACHE_SIZE = 256
+# 按内容哈希缓存的语法树数量，同时作为增量重解析的基线候选
+TREE_CACHE_SIZE = 32
+# 小于该字节数的源码直接全量解析，增量解析的收益抵不过查找基线的开销
+INCREMENTAL_MIN_BYTES = 4096
+# 增量解析要求未改动内容至少占新源码的比例
+INCREMENTAL_MIN_SHARED = 0.5
+# 按行对齐时，失配后向前查找的行数、判定重新对齐所需的连续相同行数，以及最多的变化块数
+INCREMENTAL_RESYNC_WINDOW = 64
+INCREMENTAL_RESYNC_LINES = 3
+INCREMENTAL_MAX_EDITS = 64
+
+
+@functools.lru_cache(maxsize=None)
+def _ts_language(language: common.Language | int) -> Language:
+    if language == common.Language.JAVA:
+        return Language(tsjava.language())
+    if language == getattr(common.Language, "CPP", None):
+        return Language(tscpp.language())
+    return Language(tsc.language())
+
+
+class _ParserPool:
+    """进程级 Parser 池：Parser 不可并发使用，按语言借出、用完归还。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle: dict[int, list[Parser]] = {}
+
+    @contextmanager
+    def acquire(self, language: Language) -> Generator[Parser, None, None]:
+        key = id(language)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            parser = idle.pop() if idle else None
+        if parser is None:
+            parser = Parser(language)
+        try:
+            yield parser
+        finally:
+            with self._lock:
+                self._idle[key].append(parser)
+
+
+class _CompiledQuery:
+    # Query 内部持有游标，同一个 Query 的 captures 需要串行执行
+    def __init__(self, query: Query):
+        self.query = query
+        self.lock = threading.Lock()
+
+    def captures(self, node: Node) -> dict[str, list[Node]]:
+        with self.lock:
+            return self.query.captures(node)
+
+
+class _LRU:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.items: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            value = self.items.get(key)
+            if value is not None:
+                self.items.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def values(self) -> list:
+        with self.lock:
+            return list(reversed(self.items.values()))
+
+    def clear(self) -> None:
+        with self.lock:
+            self.items.clear()
+
+
+_parser_pool = _ParserPool()
+_query_cache = _LRU(QUERY_CACHE_SIZE)
+# (language id, sha1(code)) -> (language id, code, Tree)
+_tree_cache = _LRU(TREE_CACHE_SIZE)
+
+
+def _compiled_query(language: Language, query_str: str) -> _CompiledQuery:
+    key = (id(language), query_str)
+    compiled = _query_cache.get(key)
+    if compiled is None:
+        compiled = _CompiledQuery(language.query(query_str))
+        _query_cache.put(key, compiled)
+    return compiled
+
+
+def _point_at(code: bytes, byte: int) -> Point:
+    row = code.count(b"\n", 0, byte)
+    return Point(row, byte - (code.rfind(b"\n", 0, byte) + 1))
+
+
+def _shared_prefix_len(left: bytes, right: bytes) -> int:
+    # 二分比较切片，相等判断在 C 层完成，大文件上比逐字节循环快得多
+    lo, hi = 0, min(len(left), len(right))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if left[lo:mid] == right[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _shared_suffix_len(left: bytes, right: bytes, limit: int) -> int:
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if left[len(left) - mid : len(left) - lo] == right[len(right) - mid : len(right) - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _line_offsets(lines: list[bytes], base: int) -> list[int]:
+    offsets = [base]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    return offsets
+
+
+def _changed_ranges(old: bytes, new: bytes) -> list[tuple[int, int, int, int]] | None:
+    """按行对齐新旧源码，返回变化块的字节区间 (old_start, old_end, new_start, new_end)。
+
+    只处理少量分散改动：失配后在 INCREMENTAL_RESYNC_WINDOW 行内找连续
+    INCREMENTAL_RESYNC_LINES 行重新对齐，找不到或改动块过多时返回 None。
+    """
+    prefix = _shared_prefix_len(old, new)
+    suffix = _shared_suffix_len(old, new, min(len(old), len(new)) - prefix)
+    # 对齐到行首，保证按行切分的中间区域两侧一致
+    start = old.rfind(b"\n", 0, prefix) + 1
+    old_stop, new_stop = len(old) - suffix, len(new) - suffix
+    # 保留行尾，末尾不完整的行不会与中间的完整行误判为相同
+    a = old[start:old_stop].splitlines(keepends=True)
+    b = new[start:new_stop].splitlines(keepends=True)
+    a_offsets = _line_offsets(a, start)
+    b_offsets = _line_offsets(b, start)
+    sync = INCREMENTAL_RESYNC_LINES
+
+    ranges: list[tuple[int, int, int, int]] = []
+    i = j = 0
+    while i < len(a) or j < len(b):
+        if i < len(a) and j < len(b) and a[i] == b[j]:
+            i += 1
+            j += 1
+            continue
+        if len(ranges) >= INCREMENTAL_MAX_EDITS:
+            return None
+        found = None
+        for distance in range(1, INCREMENTAL_RESYNC_WINDOW + 1):
+            for skip_old in range(distance + 1):
+                x, y = i + skip_old, j + distance - skip_old
+                if x > len(a) or y > len(b):
+                    continue
+                if (x == len(a) and y == len(b)) or a[x : x + sync] == b[y : y + sync] and (
+                    len(a) - x >= sync or len(a) - x == len(b) - y
+                ):
+                    found = (x, y)
+                    break
+            if found:
+                break
+        if found is None:
+            return None
+        x, y = found
+        ranges.append((a_offsets[i], a_offsets[x], b_offsets[j], b_offsets[y]))
+        i, j = x, y
+    return ranges
+
+
+def _incremental_base(language: Language, code: bytes) -> Tree | None:
+    """在缓存的树中找与 code 最接近的一棵，复制后按变化区间 edit()，作为增量解析的旧树。"""
+    if len(code) < INCREMENTAL_MIN_BYTES:
+        return None
+    best = None
+    best_shared = -1
+    for language_id, old_code, tree in _tree_cache.values():
+        if language_id != id(language) or not len(code) // 2 <= len(old_code) <= len(code) * 2:
+            continue
+        prefix = _shared_prefix_len(old_code, code)
+        shared = prefix + _shared_suffix_len(old_code, code, min(len(old_code), len(code)) - prefix)
+        if shared > best_shared:
+            best, best_shared = (old_code, tree), shared
+    if best is None:
+        return None
+    old_code, tree = best
+    ranges = _changed_ranges(old_code, code)
+    if ranges is None or sum(n_end - n_start for _, _, n_start, n_end in ranges) > len(code) * (
+        1 - INCREMENTAL_MIN_SHARED
+    ):
+        return None
+
+    # 缓存的树可能正被其他 ASTParser 使用，不能原地 edit；tree-sitter 0.24 的 Tree.copy()
+    # 未初始化 source 字段，释放时会崩溃，改为用未改动的旧树重解析一次得到独立副本（几乎全部复用子树）
+    with _parser_pool.acquire(language) as parser:
+        edited = parser.parse(old_code, tree)
+    # 按顺序逐个 edit，前面的区间已替换为新内容，因此起点使用新源码坐标
+    for old_start, old_end, new_start, new_end in ranges:
+        start_point = _point_at(code, new_start)
+        removed = old_code[old_start:old_end]
+        newlines = removed.count(b"\n")
+        if newlines:
+            old_end_point = Point(start_point.row + newlines, len(removed) - removed.rfind(b"\n") - 1)
+        else:
+            old_end_point = Point(start_point.row, start_point.column + len(removed))
+        edited.edit(
+            start_byte=new_start,
+            old_end_byte=new_start + len(removed),
+            new_end_byte=new_end,
+            start_point=start_point,
+            old_end_point=old_end_point,
+            new_end_point=_point_at(code, new_end),
+        )
+    return edited
+
+
+def parse_tree(code: bytes, language: Language) -> Tree:
+    """解析 code；相同内容直接复用缓存的树，只改动少量行时基于旧树增量重解析。"""
+    if not config.AST_CACHE:
+        with _parser_pool.acquire(language) as parser:
+            return parser.parse(code)
+
+    key = (id(language), hashlib.sha1(code).digest())
+    cached = _tree_cache.get(key)
+    if cached is not None:
+        return cached[2]
+
+    old_tree = _incremental_base(language, code)
+    with _parser_pool.acquire(language) as parser:
+        tree = parser.parse(code, old_tree) if old_tree is not None else parser.parse(code)
+    _tree_cache.put(key, (id(language), code, tree))
+    return tree
+
+
+def clear_caches() -> None:
+    _query_cache.clear()
+    _tree_cache.clear()
+
 
 class ASTParser:
     def __init__(self, code: str | bytes, language: common.Language | int):
-        if language == common.Language.C:
-            self.LANGUAGE = Language(tsc.language())
-        elif language == common.Language.CPP:
-            self.LANGUAGE = Language(tscpp.language())
-        elif language == common.Language.JAVA:
-            self.LANGUAGE = Language(tsjava.language())
-        else:
-            self.LANGUAGE = Language(tsc.language())
-        self.parser = Parser(self.LANGUAGE)
+        self.LANGUAGE = _ts_language(language)
         if isinstance(code, str):
-            self.tree = self.parser.parse(bytes(code, "utf-8"))
+            self.tree = parse_tree(bytes(code, "utf-8"), self.LANGUAGE)
         elif isinstance(code, bytes):
-            self.tree = self.parser.parse(code)
+            self.tree = parse_tree(code, self.LANGUAGE)
         self.root = self.tree.root_node
 
     @staticmethod
@@ -81,7 +330,7 @@ class ASTParser:
                 break
 
     def query(self, query_str: str, *, node: Node | None = None) -> dict[str, list[Node]]:
-        query = self.LANGUAGE.query(query_str)
+        query = _compiled_query(self.LANGUAGE, query_str) if config.AST_CACHE else self.LANGUAGE.query(query_str)
         if node is not None:
             captures = query.captures(node)
         else:
@@ -140,7 +389,7 @@ class ASTParser:
         return self.query_by_capture_name(query_str, "name")
 
     def get_all_includes(self) -> list[Node]:
-        if self.LANGUAGE == Language(tscpp.language()) or self.LANGUAGE == Language(tsc.language()):
+        if self.LANGUAGE != _ts_language(common.Language.JAVA):
             query_str = """
             (preproc_include)@name
             """
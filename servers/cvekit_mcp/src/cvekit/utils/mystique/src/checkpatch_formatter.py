@@ -6,15 +6,20 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
 import re
 import shutil
 import subprocess
 import tempfile
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from collections.abc import Callable
 
+import checkpatch_server
+import config
 import llm
 from changed_region_formatter import normalize_changed_regions
 from func_parser import parse_functions
@@ -81,6 +86,10 @@ _CONTROL_OR_STATEMENT_RE = re.compile(
 )
 # 用于修复 labels should not be indented，把 err: 这类 label 顶到行首
 _LABEL_RE = re.compile(r"^\s+([A-Za-z_]\w*:\s*(?:/\*.*\*/\s*)?)$")
+# 按补丁内容缓存 checkpatch 结果，同一轮格式化里未变化的补丁不再重复检查
+_CHECKPATCH_MEMO_SIZE = 256
+_checkpatch_memo: OrderedDict[tuple, tuple[int, str]] = OrderedDict()
+_checkpatch_memo_lock = threading.Lock()
 
 
 def _is_format_only_message(message: str) -> bool:
@@ -99,19 +108,53 @@ class CheckpatchDiagnostic:
     line: int
 
 
+def _checkpatch_memo_key(checkpatch_path: str, patch_text: str) -> tuple | None:
+    try:
+        stat = os.stat(checkpatch_path)
+    except OSError:
+        return None
+    digest = hashlib.sha256(patch_text.encode("utf-8", errors="surrogatepass")).hexdigest()
+    return os.path.realpath(checkpatch_path), stat.st_mtime_ns, stat.st_size, os.getcwd(), digest
+
+
+def clear_checkpatch_memo() -> None:
+    with _checkpatch_memo_lock:
+        _checkpatch_memo.clear()
+
+
 def run_checkpatch(checkpatch_path: str, patch_text: str) -> tuple[int, str]:
-    """Run checkpatch against patch text without modifying the target repository."""
+    """Run checkpatch against patch text without modifying the target repository.
+
+    Results are memoized by patch content (a repeated check returns the
+    first run's output, including its temporary file name), and uncached
+    patches go to a resident checkpatch_server worker when one is available.
+    """
+    key = _checkpatch_memo_key(checkpatch_path, patch_text) if config.CHECKPATCH_SERVER else None
+    if key is not None:
+        with _checkpatch_memo_lock:
+            if key in _checkpatch_memo:
+                _checkpatch_memo.move_to_end(key)
+                return _checkpatch_memo[key]
+
     patch_file = None
     try:
         with tempfile.NamedTemporaryFile("w", suffix=".patch", delete=False) as handle:
             handle.write(patch_text)
             patch_file = handle.name
-        result = subprocess.run(
-            [checkpatch_path, "--no-tree", "--strict", patch_file],
-            capture_output=True,
-            text=True,
-        )
-        return result.returncode, (result.stdout + result.stderr).strip()
+        result = checkpatch_server.check(checkpatch_path, patch_file)
+        if result is None:
+            completed = subprocess.run(
+                [checkpatch_path, "--no-tree", "--strict", patch_file],
+                capture_output=True,
+                text=True,
+            )
+            result = completed.returncode, (completed.stdout + completed.stderr).strip()
+        if key is not None:
+            with _checkpatch_memo_lock:
+                _checkpatch_memo[key] = result
+                while len(_checkpatch_memo) > _CHECKPATCH_MEMO_SIZE:
+                    _checkpatch_memo.popitem(last=False)
+        return result
     except OSError as exc:
         logging.warning("Could not run target repository checkpatch.pl: %s", exc)
         return 1, ""
@@ -0,0 +1,253 @@
+"""
+Resident checkpatch.pl workers.
+
+Every ``scripts/checkpatch.pl`` run spends most of its time starting up
+(compiling its regex tables and loading spelling.txt / const_structs), and
+the formatting pipeline runs it several times per file. This module keeps a
+Perl process per checkpatch.pl alive that has loaded the script once and
+checks patch files sent to it over a pipe.
+
+The worker evaluates the unmodified script with its main loop wrapped in a
+request loop: ``for my $filename (@ARGV) {`` becomes "for each request" and
+the final ``exit($exit);`` reports the result instead of exiting, so every
+request runs exactly the per-file code and epilogue of a one-shot run. Each
+request runs in a child forked from the loaded script, because checkpatch.pl
+keeps file-scope state between files (``%camelcase``, ``%ignore_type``, the
+line arrays and counters) that must not carry over from one request to the
+next. A
+script without those anchors, or any worker-side failure, makes ``check``
+return None; checkpatch_formatter.run_checkpatch then runs the one-shot
+subprocess, so output and exit codes on that path are unchanged.
+"""
+
+from __future__ import annotations
+
+import atexit
+import locale
+import logging
+import os
+import shutil
+import subprocess
+import threading
+
+import config
+
+_MAX_IDLE_WORKERS = 4
+
+_WORKER_SCRIPT = r"""
+use strict;
+use warnings;
+use POSIX ();
+
+my $checkpatch = shift @ARGV;
+open(my $proto_in, '<&', \*STDIN) or die "dup stdin: $!";
+open(my $proto_out, '>&', \*STDOUT) or die "dup stdout: $!";
+binmode($proto_in);
+binmode($proto_out);
+$proto_out->autoflush(1);
+open(STDIN, '<', '/dev/null') or die "stdin: $!";
+
+# STDOUT/STDERR 改为内存句柄收集每个请求的输出；fd 1/2 由 /dev/null 占住，
+# 避免 checkpatch 之后打开的文件复用这两个 fd
+my ($ready, $out, $err) = (0, '', '');
+close(STDOUT);
+open(STDOUT, '>', \$out) or die "stdout: $!";
+open(my $hold_out, '>', '/dev/null') or die "hold stdout: $!";
+close(STDERR);
+open(STDERR, '>', \$err) or die "stderr: $!";
+open(my $hold_err, '>', '/dev/null') or die "hold stderr: $!";
+
+sub unsupported {
+    print {$proto_out} "UNSUPPORTED $_[0]\n";
+    exit(0);
+}
+
+sub CheckpatchWorker::next_request {
+    my ($argv) = @_;
+    if (!$ready) {
+        print {$proto_out} "READY\n";
+        $ready = 1;
+    }
+    # 每个请求在 fork 出的子进程里执行，子进程从刚加载完脚本的状态开始，
+    # checkpatch 在文件作用域累积的状态（%camelcase、计数器等）不会带到下一个请求
+    while (defined(my $line = <$proto_in>)) {
+        chomp $line;
+        my $pid = fork();
+        if (!defined $pid) {
+            print {$proto_out} "FAILED fork: $!\n";
+            next;
+        }
+        if (!$pid) {
+            @$argv = ($line);
+            open(STDOUT, '>', \$out) or die "stdout: $!";
+            open(STDERR, '>', \$err) or die "stderr: $!";
+            return 1;
+        }
+        waitpid($pid, 0);
+        print {$proto_out} "FAILED status $?\n" if $?;
+    }
+    return 0;
+}
+
+sub CheckpatchWorker::finish_request {
+    my ($code) = @_;
+    close(STDOUT);
+    close(STDERR);
+    print {$proto_out} "DONE $code " . length($out) . " " . length($err) . "\n" . $out . $err;
+    POSIX::_exit(0);
+}
+
+open(my $fh, '<', $checkpatch) or unsupported("cannot read $checkpatch: $!");
+my $source = do { local $/; <$fh> };
+close($fh);
+
+# 行内替换，不改变行号，告警里的 "line N" 与一次性运行一致
+my $loop_count = () = $source =~ /^for my \$filename \(\@ARGV\) \{$/mg;
+my $exit_count = () = $source =~ /^exit\(\$exit\);$/mg;
+unsupported("main loop not found") if $loop_count != 1 || $exit_count != 1;
+$source =~ s/^for my \$filename \(\@ARGV\) \{$/while (CheckpatchWorker::next_request(\\\@ARGV)) { for my \$filename (\@ARGV) {/m;
+$source =~ s/^exit\(\$exit\);$/CheckpatchWorker::finish_request(\$exit); }/m;
+unsupported("exit before main loop") if index($source, 'CheckpatchWorker::finish_request') < index($source, 'CheckpatchWorker::next_request');
+
+$0 = $checkpatch;
+my $ok = eval "package main;\n#line 1 \"$checkpatch\"\n$source\n;1";
+if (!$ok) {
+    # 请求中途出错时直接退出，调用方改走一次性进程拿到原样的报错
+    unsupported(($@ || 'unknown error') =~ s/\s+/ /gr) if !$ready;
+    exit(1);
+}
+exit(0);
+"""
+
+
+class CheckpatchWorkerError(RuntimeError):
+    pass
+
+
+def _decode(data: bytes) -> str:
+    # 与 subprocess.run(text=True) 一致：按 locale 解码并统一换行
+    text = data.decode(locale.getpreferredencoding(False), errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+class CheckpatchWorker:
+    """One Perl process with checkpatch.pl loaded, checking one patch file at a time."""
+
+    def __init__(self, checkpatch_path: str, args: tuple[str, ...] = ("--no-tree", "--strict")):
+        perl = shutil.which("perl")
+        if perl is None:
+            raise CheckpatchWorkerError("perl executable not found")
+        self.checkpatch_path = checkpatch_path
+        self.process = subprocess.Popen(
+            [perl, "-e", _WORKER_SCRIPT, checkpatch_path, *args],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        status = self.process.stdout.readline().decode("utf-8", errors="replace").strip()
+        if status != "READY":
+            self.close()
+            raise CheckpatchWorkerError(status.removeprefix("UNSUPPORTED ") or "worker exited during startup")
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def _read_exact(self, size: int) -> bytes:
+        chunks = []
+        while size > 0:
+            chunk = self.process.stdout.read(size)
+            if not chunk:
+                raise CheckpatchWorkerError("checkpatch worker exited mid-response")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def check(self, patch_file: str) -> tuple[int, str]:
+        """Return (exit code, stdout + stderr) exactly as a one-shot run would."""
+        if "\n" in patch_file:
+            raise CheckpatchWorkerError("patch path contains a newline")
+        try:
+            self.process.stdin.write(os.fsencode(patch_file) + b"\n")
+            self.process.stdin.flush()
+            header = self.process.stdout.readline().split()
+        except OSError as exc:
+            raise CheckpatchWorkerError(f"checkpatch worker pipe failed: {exc}") from exc
+        if header[:1] == [b"FAILED"]:
+            raise CheckpatchWorkerError(f"checkpatch request {b' '.join(header).decode('utf-8', errors='replace')}")
+        if len(header) != 4 or header[0] != b"DONE":
+            raise CheckpatchWorkerError("checkpatch worker exited mid-request")
+        stdout = self._read_exact(int(header[2]))
+        stderr = self._read_exact(int(header[3]))
+        return int(header[1]), (_decode(stdout) + _decode(stderr)).strip()
+
+    def close(self) -> None:
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+
+_idle: dict[tuple, list[CheckpatchWorker]] = {}
+_unsupported: set[tuple] = set()
+_lock = threading.Lock()
+
+
+def check(checkpatch_path: str, patch_file: str) -> tuple[int, str] | None:
+    """Check a patch file with a resident worker, or None to run checkpatch directly.
+
+    Workers are keyed by script version and working directory, since
+    checkpatch reads .checkpatch.conf from the working directory when it
+    starts.
+    """
+    if not config.CHECKPATCH_SERVER:
+        return None
+    try:
+        stat = os.stat(checkpatch_path)
+    except OSError:
+        return None
+    key = (os.path.realpath(checkpatch_path), stat.st_mtime_ns, stat.st_size, os.getcwd())
+    with _lock:
+        if key in _unsupported:
+            return None
+        worker = _idle[key].pop() if _idle.get(key) else None
+    if worker is None:
+        try:
+            worker = CheckpatchWorker(checkpatch_path)
+        except (CheckpatchWorkerError, OSError) as exc:
+            logging.info("checkpatch worker unavailable, running checkpatch.pl per call: %s", exc)
+            with _lock:
+                _unsupported.add(key)
+            return None
+    try:
+        result = worker.check(patch_file)
+    except (CheckpatchWorkerError, OSError, ValueError) as exc:
+        logging.warning("checkpatch worker failed, rerunning checkpatch.pl directly: %s", exc)
+        worker.close()
+        return None
+    with _lock:
+        idle = _idle.setdefault(key, [])
+        if worker.alive and len(idle) < _MAX_IDLE_WORKERS:
+            idle.append(worker)
+            worker = None
+    if worker is not None:
+        worker.close()
+    return result
+
+
+def close_workers() -> None:
+    with _lock:
+        workers = [worker for idle in _idle.values() for worker in idle]
+        _idle.clear()
+        _unsupported.clear()
+    for worker in workers:
+        worker.close()
+
+
+atexit.register(close_workers)
@@ -0,0 +1,580 @@
+"""
+Compact, memory-mappable representation of Joern PDG dot files.
+
+Each method graph is stored as flat integer columns: CSR out/in adjacency,
+one string-id column per node and edge attribute, and a sorted
+line-number -> node index. All graphs of a ``pdg`` directory are packed into
+one ``pdg.pack`` file next to it; loading maps the file and slices
+``memoryview`` columns out of it without decoding anything up front.
+
+``parse_dot`` reads the dot files that Joern and ``nx.nx_agraph.write_dot``
+produce without pygraphviz, reproducing what ``read_dot`` returns: node
+attributes in first-appearance order, quoted/HTML strings unwrapped and
+attributes equal to their declared default dropped.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+import networkx as nx
+
+PACK_SUFFIX = ".pack"
+PACK_VERSION = 1
+NO_LINE = -(2 ** 31)
+
+_MAGIC = b"MQPDGPK1"
+_HEADER = struct.Struct("<8sQQ")
+_ALIGN = 8
+
+
+# ---------------------------------------------------------------------------
+# dot parsing
+# ---------------------------------------------------------------------------
+
+@dataclass
+class DotGraph:
+    nodes: dict[str, dict[str, str]] = field(default_factory=dict)
+    edges: list[tuple[str, str, str | None, dict[str, str]]] = field(default_factory=list)
+
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/|^\#[^\n]*)
+  | (?P<edgeop>->|--)
+  | (?P<quoted>"(?:[^"\\]|\\.)*")
+  | (?P<html><)
+  | (?P<punct>[{}\[\]=;,:+])
+  | (?P<id>-?(?:\.[0-9]+|[0-9]+(?:\.[0-9]*)?)|[A-Za-z_\x80-\U0010ffff][A-Za-z_0-9\x80-\U0010ffff]*)
+""", re.VERBOSE | re.DOTALL | re.MULTILINE)
+
+_KEYWORDS = {"strict", "graph", "digraph", "node", "edge", "subgraph"}
+
+
+def _tokenize(text: str) -> list[tuple[str, str]]:
+    tokens: list[tuple[str, str]] = []
+    pos = 0
+    length = len(text)
+    while pos < length:
+        m = _TOKEN_RE.match(text, pos)
+        if m is None:
+            raise ValueError(f"unexpected character {text[pos]!r} at offset {pos}")
+        kind = m.lastgroup
+        if kind == "html":
+            depth = 0
+            end = pos
+            while end < length:
+                ch = text[end]
+                if ch == "<":
+                    depth += 1
+                elif ch == ">":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                end += 1
+            if depth:
+                raise ValueError(f"unterminated HTML string at offset {pos}")
+            tokens.append(("str", text[pos + 1:end]))
+            pos = end + 1
+            continue
+        pos = m.end()
+        if kind in ("ws", "comment"):
+            continue
+        value = m.group(kind)
+        if kind == "quoted":
+            # graphviz 只转义 \" 和行尾续行，其余反斜杠原样保留
+            value = value[1:-1].replace("\\\r\n", "").replace("\\\n", "").replace('\\"', '"')
+            if tokens and tokens[-1][0] == "+" and len(tokens) > 1 and tokens[-2][0] == "str":
+                tokens.pop()
+                tokens[-1] = ("str", tokens[-1][1] + value)
+                continue
+            tokens.append(("str", value))
+        elif kind == "id":
+            lowered = value.lower()
+            tokens.append((lowered, value) if lowered in _KEYWORDS else ("str", value))
+        else:
+            tokens.append((value, value))
+    return tokens
+
+
+class _DotParser:
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.graph = DotGraph()
+        self.node_defaults: dict[str, str] = {}
+        self.edge_defaults: dict[str, str] = {}
+
+    def peek(self) -> str | None:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self, kind: str | None = None) -> str:
+        if self.pos >= len(self.tokens):
+            raise ValueError("unexpected end of dot input")
+        tok_kind, value = self.tokens[self.pos]
+        if kind is not None and tok_kind != kind:
+            raise ValueError(f"expected {kind!r}, got {value!r}")
+        self.pos += 1
+        return value
+
+    def parse(self) -> DotGraph:
+        if self.peek() == "strict":
+            self.take()
+        if self.peek() not in ("graph", "digraph"):
+            raise ValueError("dot input does not start with graph/digraph")
+        self.take()
+        if self.peek() == "str":
+            self.take()
+        self.take("{")
+        self.stmt_list()
+        self.take("}")
+        return self.graph
+
+    def stmt_list(self) -> None:
+        while self.peek() not in ("}", None):
+            self.stmt()
+            if self.peek() == ";":
+                self.take()
+
+    def stmt(self) -> None:
+        kind = self.peek()
+        if kind in ("graph", "node", "edge"):
+            self.take()
+            attrs = self.attr_list()
+            if kind == "node":
+                self.node_defaults.update(attrs)
+            elif kind == "edge":
+                self.edge_defaults.update(attrs)
+            return
+        if kind in ("subgraph", "{"):
+            if kind == "subgraph":
+                self.take()
+                if self.peek() == "str":
+                    self.take()
+            self.take("{")
+            self.stmt_list()
+            self.take("}")
+            return
+        first = self.node_id()
+        if self.peek() == "=":
+            self.take()
+            self.take("str")
+            return
+        chain = [first]
+        while self.peek() == "->" or self.peek() == "--":
+            self.take()
+            chain.append(self.node_id())
+        attrs = self.attr_list() if self.peek() == "[" else {}
+        for name in chain:
+            self.graph.nodes.setdefault(name, {})
+        if len(chain) == 1:
+            self.graph.nodes[first].update(attrs)
+            return
+        key = attrs.pop("key", None)
+        for u, v in zip(chain, chain[1:]):
+            self.graph.edges.append((u, v, key, dict(attrs)))
+
+    def node_id(self) -> str:
+        name = self.take("str")
+        # 端口 (node:port[:compass]) 不影响图结构
+        while self.peek() == ":":
+            self.take()
+            self.take("str")
+        return name
+
+    def attr_list(self) -> dict[str, str]:
+        attrs: dict[str, str] = {}
+        while self.peek() == "[":
+            self.take()
+            while self.peek() != "]":
+                name = self.take("str")
+                value = "true"
+                if self.peek() == "=":
+                    self.take()
+                    value = self.take("str")
+                attrs[name] = value
+                if self.peek() in (",", ";"):
+                    self.take()
+            self.take("]")
+        return attrs
+
+
+def parse_dot(text: str) -> DotGraph:
+    parser = _DotParser(text)
+    graph = parser.parse()
+    # 与 pygraphviz 一致：与声明默认值相同（未声明则为空串）的属性不出现在结果里
+    for attrs in graph.nodes.values():
+        for name in [k for k, v in attrs.items() if v == parser.node_defaults.get(k, "")]:
+            del attrs[name]
+    for _, _, _, attrs in graph.edges:
+        for name in [k for k, v in attrs.items() if v == parser.edge_defaults.get(k, "")]:
+            del attrs[name]
+    return graph
+
+
+def read_dot(path: str) -> DotGraph:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return parse_dot(f.read())
+
+
+# ---------------------------------------------------------------------------
+# compact graph
+# ---------------------------------------------------------------------------
+
+class _Strings:
+    """String table: utf-8 blob plus offsets, decoded on demand."""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+        self._decoded: dict[int, str] = {}
+
+    def __getitem__(self, sid: int) -> str:
+        value = self._decoded.get(sid)
+        if value is None:
+            value = bytes(self._blob[self._offsets[sid]:self._offsets[sid + 1]]).decode("utf-8")
+            self._decoded[sid] = value
+        return value
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class CompactGraph:
+    """One PDG as int32 columns.
+
+    Nodes are numbered 0..n-1 in dot order. Edges are numbered in CSR-out
+    order, so out edges of node ``u`` are ``out_offsets[u]..out_offsets[u+1]``
+    and the edge attribute columns are indexed by that edge number.
+    ``in_edges`` lists edge numbers grouped by target, sorted by source.
+    """
+
+    def __init__(self, strings: _Strings, columns: dict, node_attr_names: list[str], edge_attr_names: list[str]):
+        self._strings = strings
+        self._node_ids = columns["node_id"]
+        self._lines = columns["line"]
+        self._out_offsets = columns["out_offsets"]
+        self._out_targets = columns["out_targets"]
+        self._in_offsets = columns["in_offsets"]
+        self._in_sources = columns["in_sources"]
+        self._in_edges = columns["in_edges"]
+        self._edge_keys = columns["edge_key"]
+        self._line_values = columns["line_values"]
+        self._line_offsets = columns["line_offsets"]
+        self._line_nodes = columns["line_nodes"]
+        self._node_attrs = {name: columns[f"node_attr:{name}"] for name in node_attr_names}
+        self._edge_attrs = {name: columns[f"edge_attr:{name}"] for name in edge_attr_names}
+        self._index: dict[str, int] | None = None
+
+    def __len__(self) -> int:
+        return len(self._node_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._out_targets)
+
+    def node_id(self, index: int) -> str:
+        return self._strings[self._node_ids[index]]
+
+    def index_of(self, node_id) -> int:
+        if self._index is None:
+            self._index = {self.node_id(i): i for i in range(len(self))}
+        return self._index[str(node_id)]
+
+    def line(self, index: int) -> int | None:
+        value = self._lines[index]
+        return None if value == NO_LINE else value
+
+    def attr(self, index: int, name: str) -> str | None:
+        column = self._node_attrs.get(name)
+        if column is None:
+            return None
+        sid = column[index]
+        return None if sid < 0 else self._strings[sid]
+
+    def attrs(self, index: int) -> dict[str, str]:
+        result = {}
+        for name, column in self._node_attrs.items():
+            sid = column[index]
+            if sid >= 0:
+                result[name] = self._strings[sid]
+        return result
+
+    def edge_attr(self, edge: int, name: str) -> str | None:
+        column = self._edge_attrs.get(name)
+        if column is None:
+            return None
+        sid = column[edge]
+        return None if sid < 0 else self._strings[sid]
+
+    def edge_attrs(self, edge: int) -> dict[str, str]:
+        result = {}
+        for name, column in self._edge_attrs.items():
+            sid = column[edge]
+            if sid >= 0:
+                result[name] = self._strings[sid]
+        return result
+
+    def out_edges(self, index: int) -> range:
+        """Edge numbers leaving ``index``; the target is ``target(edge)``."""
+        return range(self._out_offsets[index], self._out_offsets[index + 1])
+
+    def target(self, edge: int) -> int:
+        return self._out_targets[edge]
+
+    def in_edges(self, index: int) -> list[tuple[int, int]]:
+        """(source, edge) pairs entering ``index``."""
+        start, end = self._in_offsets[index], self._in_offsets[index + 1]
+        return [(self._in_sources[i], self._in_edges[i]) for i in range(start, end)]
+
+    def successors(self, index: int) -> list[int]:
+        return list(dict.fromkeys(self._out_targets[e] for e in self.out_edges(index)))
+
+    def predecessors(self, index: int) -> list[int]:
+        return list(dict.fromkeys(source for source, _ in self.in_edges(index)))
+
+    def nodes_at_line(self, line: int) -> range | list[int]:
+        pos = bisect_left(self._line_values, line)
+        if pos == len(self._line_values) or self._line_values[pos] != line:
+            return []
+        return self._line_nodes[self._line_offsets[pos]:self._line_offsets[pos + 1]]
+
+    def to_networkx(self) -> nx.MultiDiGraph:
+        g = nx.MultiDiGraph()
+        for index in range(len(self)):
+            g.add_node(self.node_id(index), **self.attrs(index))
+        for index in range(len(self)):
+            u = self.node_id(index)
+            for edge in self.out_edges(index):
+                sid = self._edge_keys[edge]
+                key = None if sid < 0 else self._strings[sid]
+                g.add_edge(u, self.node_id(self._out_targets[edge]), key=key, **self.edge_attrs(edge))
+        return g
+
+    @classmethod
+    def from_dot_graph(cls, dot: DotGraph) -> CompactGraph:
+        strings, columns, node_attr_names, edge_attr_names = _build_columns(dot)
+        offsets = array("q", [0])
+        blob = bytearray()
+        for value in strings:
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        return cls(_Strings(bytes(blob), offsets), columns, node_attr_names, edge_attr_names)
+
+    @classmethod
+    def from_dot(cls, path: str) -> CompactGraph:
+        return cls.from_dot_graph(read_dot(path))
+
+
+def _parse_line(value: str | None) -> int:
+    if value is None:
+        return NO_LINE
+    try:
+        line = int(value)
+    except ValueError:
+        return NO_LINE
+    return line if NO_LINE < line < 2 ** 31 else NO_LINE
+
+
+def _build_columns(dot: DotGraph) -> tuple[list[str], dict[str, array], list[str], list[str]]:
+    string_ids: dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        sid = string_ids.get(value)
+        if sid is None:
+            sid = len(string_ids)
+            string_ids[value] = sid
+        return sid
+
+    names = list(dot.nodes)
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+
+    node_attr_names = list(dict.fromkeys(k for attrs in dot.nodes.values() for k in attrs))
+    columns: dict[str, array] = {"node_id": array("i", (intern(name) for name in names))}
+    for attr_name in node_attr_names:
+        columns[f"node_attr:{attr_name}"] = array(
+            "i", (intern(dot.nodes[name][attr_name]) if attr_name in dot.nodes[name] else -1 for name in names))
+    columns["line"] = array("i", (_parse_line(dot.nodes[name].get("LINE_NUMBER")) for name in names))
+
+    # 出边按源节点分组，同一源节点内按目标首次出现的顺序把平行边放在一起
+    outgoing: list[dict[int, list[int]]] = [{} for _ in range(n)]
+    for order, (u, v, _, _) in enumerate(dot.edges):
+        outgoing[index[u]].setdefault(index[v], []).append(order)
+    edge_order = [order for targets in outgoing for orders in targets.values() for order in orders]
+    out_offsets = array("i", [0])
+    out_targets = array("i")
+    for targets in outgoing:
+        for target, orders in targets.items():
+            out_targets.extend([target] * len(orders))
+        out_offsets.append(len(out_targets))
+    columns["out_offsets"] = out_offsets
+    columns["out_targets"] = out_targets
+    columns["edge_key"] = array(
+        "i", (-1 if dot.edges[order][2] is None else intern(dot.edges[order][2]) for order in edge_order))
+    edge_attr_names = list(dict.fromkeys(k for _, _, _, attrs in dot.edges for k in attrs))
+    for attr_name in edge_attr_names:
+        column = array("i")
+        for order in edge_order:
+            attrs = dot.edges[order][3]
+            column.append(intern(attrs[attr_name]) if attr_name in attrs else -1)
+        columns[f"edge_attr:{attr_name}"] = column
+
+    incoming: list[list[tuple[int, int]]] = [[] for _ in range(n)]
+    for source in range(n):
+        for edge in range(out_offsets[source], out_offsets[source + 1]):
+            incoming[out_targets[edge]].append((source, edge))
+    in_offsets = array("i", [0])
+    in_sources = array("i")
+    in_edges = array("i")
+    for pairs in incoming:
+        for source, edge in pairs:
+            in_sources.append(source)
+            in_edges.append(edge)
+        in_offsets.append(len(in_sources))
+    columns["in_offsets"] = in_offsets
+    columns["in_sources"] = in_sources
+    columns["in_edges"] = in_edges
+
+    # 行号索引只收录规范写法的 LINE_NUMBER，与按字符串比较的旧实现保持一致
+    by_line: dict[int, list[int]] = {}
+    for i, name in enumerate(names):
+        raw = dot.nodes[name].get("LINE_NUMBER")
+        line = columns["line"][i]
+        if line != NO_LINE and raw == str(line):
+            by_line.setdefault(line, []).append(i)
+    line_values = array("i", sorted(by_line))
+    line_offsets = array("i", [0])
+    line_nodes = array("i")
+    for line in line_values:
+        line_nodes.extend(by_line[line])
+        line_offsets.append(len(line_nodes))
+    columns["line_values"] = line_values
+    columns["line_offsets"] = line_offsets
+    columns["line_nodes"] = line_nodes
+    return list(string_ids), columns, node_attr_names, edge_attr_names
+
+
+# ---------------------------------------------------------------------------
+# pack file
+# ---------------------------------------------------------------------------
+
+def pack_path(pdg_dir: str) -> str:
+    return os.path.normpath(pdg_dir) + PACK_SUFFIX
+
+
+def _dot_stats(pdg_dir: str) -> dict[str, list[int]]:
+    stats = {}
+    for name in sorted(os.listdir(pdg_dir)):
+        st = os.stat(os.path.join(pdg_dir, name))
+        stats[name] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+def write_pack(pdg_dir: str, force: bool = False) -> str:
+    """Pack every dot file of pdg_dir into ``<pdg_dir>.pack``; no-op when fresh."""
+    path = pack_path(pdg_dir)
+    stats = _dot_stats(pdg_dir)
+    if not force and _read_toc(path, stats) is not None:
+        return path
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    entries = []
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, 0, 0))
+        for name, stat in stats.items():
+            entry: dict = {"file": name, "stat": stat}
+            entries.append(entry)
+            try:
+                dot = read_dot(os.path.join(pdg_dir, name))
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"❌ PDG 打包时解析失败: {name}, {e}")
+                entry["error"] = str(e)
+                continue
+            strings, columns, node_attr_names, edge_attr_names = _build_columns(dot)
+            offsets = array("q", [0])
+            blob = bytearray()
+            for value in strings:
+                blob += value.encode("utf-8")
+                offsets.append(len(blob))
+            columns["str_offsets"] = offsets
+            sections = {}
+            for column_name, column in columns.items():
+                sections[column_name] = [_write_aligned(f, column.tobytes()), column.typecode, len(column)]
+            sections["str_blob"] = [_write_aligned(f, bytes(blob)), "B", len(blob)]
+            entry.update(node_attrs=node_attr_names, edge_attrs=edge_attr_names, sections=sections)
+        toc = json.dumps({"version": PACK_VERSION, "byteorder": sys.byteorder, "graphs": entries}).encode("utf-8")
+        toc_offset = _write_aligned(f, toc)
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, toc_offset, len(toc)))
+    os.replace(tmp_path, path)
+    return path
+
+
+def _write_aligned(f, data: bytes) -> int:
+    pad = -f.tell() % _ALIGN
+    if pad:
+        f.write(b"\0" * pad)
+    offset = f.tell()
+    f.write(data)
+    return offset
+
+
+def _read_toc(path: str, stats: dict[str, list[int]]) -> dict | None:
+    try:
+        with open(path, "rb") as f:
+            magic, toc_offset, toc_length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or toc_offset == 0:
+                return None
+            f.seek(toc_offset)
+            toc = json.loads(f.read(toc_length))
+    except (OSError, struct.error, ValueError):
+        return None
+    if toc.get("version") != PACK_VERSION or toc.get("byteorder") != sys.byteorder:
+        return None
+    if {entry["file"]: entry["stat"] for entry in toc["graphs"]} != stats:
+        return None
+    return toc
+
+
+@dataclass
+class PackEntry:
+    file: str
+    graph: CompactGraph | None
+    error: str | None = None
+
+
+def load_pack(pdg_dir: str) -> list[PackEntry] | None:
+    """Map ``<pdg_dir>.pack``; None when it is missing or stale."""
+    path = pack_path(pdg_dir)
+    if not os.path.exists(path):
+        return None
+    toc = _read_toc(path, _dot_stats(pdg_dir))
+    if toc is None:
+        logging.info(f"ℹ️ PDG pack 已过期，回退到逐个解析 dot: {path}")
+        return None
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    result = []
+    for entry in toc["graphs"]:
+        if "error" in entry:
+            result.append(PackEntry(entry["file"], None, entry["error"]))
+            continue
+        columns = {}
+        for column_name, (offset, typecode, length) in entry["sections"].items():
+            size = struct.calcsize(typecode)
+            columns[column_name] = view[offset:offset + length * size].cast(typecode)
+        strings = _Strings(columns.pop("str_blob"), columns.pop("str_offsets"))
+        graph = CompactGraph(strings, columns, entry["node_attrs"], entry["edge_attrs"])
+        result.append(PackEntry(entry["file"], graph))
+    return result
@@ -20,28 +20,63 @@ def _join_url(base: str, path: str) -> str:
 
 
 JOERN_PATH = os.getenv("JOERN_PATH", os.path.expanduser("~/.local/joern/joern-cli"))
-LLM_PROVIDER = os.getenv("LLM_PROVIDER", "minimax")
-BASE_URL = os.getenv("BASE_URL", "").strip()
+# Joern 导出结果按内容寻址的共享缓存，目录置空或上限为 0 时关闭
+JOERN_CACHE_DIR = os.getenv("MYSTIQUE_JOERN_CACHE_DIR", os.path.expanduser("~/.cvekit/.cache/joern")).strip()
+JOERN_CACHE_MAX_BYTES = int(os.getenv("MYSTIQUE_JOERN_CACHE_MAX_MB", "2048")) * 1024 * 1024
+# 常驻 joern --server 进程数，0 表示每次导出都启动 joern-parse/joern-export 子进程
+JOERN_SERVER_WORKERS = int(os.getenv("MYSTIQUE_JOERN_SERVER_WORKERS", "0"))
+JOERN_SERVER_START_TIMEOUT = float(os.getenv("MYSTIQUE_JOERN_SERVER_START_TIMEOUT", "300"))
+JOERN_SERVER_QUERY_TIMEOUT = float(os.getenv("MYSTIQUE_JOERN_SERVER_QUERY_TIMEOUT", "1800"))
+# target_compat_resolver 的 include 图 / ctags 结果按 tree 持久化的数据库，置空时仅缓存在进程内存中
+TARGET_SCOPE_CACHE_DB = os.getenv(
+    "MYSTIQUE_TARGET_SCOPE_CACHE_DB", os.path.expanduser("~/.cvekit/.cache/target-scope.sqlite")
+).strip()
+# ASTParser 复用 Parser、已编译 Query 和语法树（含增量重解析），设为 0 时每次重新构建
+AST_CACHE = os.getenv("MYSTIQUE_AST_CACHE", "1").strip() != "0"
+# checkpatch.pl 常驻 Perl worker（只加载一次脚本）并按补丁内容缓存结果，设为 0 时每次启动 checkpatch.pl
+CHECKPATCH_SERVER = os.getenv("MYSTIQUE_CHECKPATCH_SERVER", "1").strip() != "0"
+# main_from_repo 并发迁移的文件数、patchbp 并发求解的方法簇数；默认 1 按顺序执行，
+# 方法簇共享 Project/方法对象，线程安全未经完整验证前需显式开启
+FILE_WORKERS = max(1, int(os.getenv("MYSTIQUE_FILE_WORKERS", "1")))
+CLUSTER_WORKERS = max(1, int(os.getenv("MYSTIQUE_CLUSTER_WORKERS", "1")))
 
-GPT_API_KEY = os.getenv("GPT_API_KEY", "")
-LLM_API_KEY = os.getenv("LLM_API_KEY", os.getenv("API_KEY", ""))
-
-default_style = "openai_chat"
-LLM_API_STYLE = os.getenv("LLM_API_STYLE", default_style)
-LLM_MODEL = os.getenv("LLM_MODEL", os.getenv("MODEL_NAME", "MiniMax-M2.7-highspeed"))
 _FORMAT_MODE_ALIASES = {
     "full": "full_function",
     "changed": "changed_regions",
 }
-_format_mode_env = os.getenv("MYSTIQUE_FORMAT_MODE", "full").strip().lower()
-FORMAT_NORMALIZATION_MODE = _FORMAT_MODE_ALIASES.get(_format_mode_env, _format_mode_env)
 
-if os.getenv("LLM_API_URL"):
-    LLM_API_URL = os.getenv("LLM_API_URL", "").strip()
-elif BASE_URL:
-    LLM_API_URL = _join_url(BASE_URL, "/chat/completions")
-else:
-    LLM_API_URL = "https://api.openai.com/v1/chat/completions"
+
+def _llm_settings_from_env() -> tuple[str, str, str, str, str, str]:
+    """Return (LLM_PROVIDER, BASE_URL, GPT_API_KEY, LLM_API_KEY, LLM_MODEL, LLM_API_URL) from the environment."""
+    base_url = os.getenv("BASE_URL", "").strip()
+    if os.getenv("LLM_API_URL"):
+        api_url = os.getenv("LLM_API_URL", "").strip()
+    elif base_url:
+        api_url = _join_url(base_url, "/chat/completions")
+    else:
+        api_url = "https://api.openai.com/v1/chat/completions"
+    return (
+        os.getenv("LLM_PROVIDER", "minimax"),
+        base_url,
+        os.getenv("GPT_API_KEY", ""),
+        os.getenv("LLM_API_KEY", os.getenv("API_KEY", "")),
+        os.getenv("LLM_MODEL", os.getenv("MODEL_NAME", "MiniMax-M2.7-highspeed")),
+        api_url,
+    )
+
+
+def _format_mode_from_env() -> str:
+    mode = os.getenv("MYSTIQUE_FORMAT_MODE", "full").strip().lower()
+    return _FORMAT_MODE_ALIASES.get(mode, mode)
+
+
+LLM_PROVIDER, BASE_URL, GPT_API_KEY, LLM_API_KEY, LLM_MODEL, LLM_API_URL = _llm_settings_from_env()
+
+default_style = "openai_chat"
+LLM_API_STYLE = os.getenv("LLM_API_STYLE", default_style)
+FORMAT_NORMALIZATION_MODE = _format_mode_from_env()
+# difftools 的 diff 后端：python 为进程内 histogram 实现（与 git 输出一致），git 为调用 git diff --no-index
+DIFF_BACKEND = os.getenv("MYSTIQUE_DIFF_BACKEND", "python").strip().lower()
 
 # 本地模式示例:
 # LLM_API_STYLE=legacy_instruct
@@ -95,7 +130,14 @@ def configure_llm(
     base_url: str | None = None,
     model_name: str | None = None,
 ) -> None:
+    """Apply per-run LLM settings on top of the environment defaults.
+
+    Settings left as None fall back to the environment rather than to an
+    earlier call's value, so one run's key or model never leaks into the next
+    run in a resident cvekit worker.
+    """
     global LLM_PROVIDER, GPT_API_KEY, LLM_API_KEY, BASE_URL, LLM_MODEL, LLM_API_URL
+    LLM_PROVIDER, BASE_URL, GPT_API_KEY, LLM_API_KEY, LLM_MODEL, LLM_API_URL = _llm_settings_from_env()
     if provider is not None:
         LLM_PROVIDER = provider
     if api_key is not None:
@@ -109,9 +151,10 @@ def configure_llm(
 
 
 def configure_format_normalization(mode: str | None = None) -> None:
-    """Select full-function or changed-region LLM formatting."""
+    """Select full-function or changed-region LLM formatting; None restores MYSTIQUE_FORMAT_MODE."""
     global FORMAT_NORMALIZATION_MODE
     if mode is None:
+        FORMAT_NORMALIZATION_MODE = _format_mode_from_env()
         return
     normalized = _FORMAT_MODE_ALIASES.get(mode.strip().lower(), mode.strip().lower())
     if normalized not in {"full_function", "changed_regions"}:
@@ -19,6 +19,8 @@ import subprocess
 import tempfile
 from dataclasses import dataclass
 
+import config
+import histogram_diff
 from common import HunkType
 
 
@@ -52,17 +54,39 @@ class DelHunk(Hunk):
     a_code: str
 
 
+def _use_python_backend(algorithm: str) -> bool:
+    return config.DIFF_BACKEND == "python" and algorithm == "histogram"
+
+
+def _strip_diff_header(diff: str) -> str:
+    diff_lines = diff.splitlines()[4:]
+    return "\n".join(diff_lines)
+
+
 def git_diff_file(file1: str, file2: str, remove_diff_header: bool = False, algorithm: str = "histogram") -> str:
-    diff = subprocess.run(["git", "--no-pager", "diff", "--no-index", "-w", "-b",
-                           "--unified=10000", "--function-context", f"--diff-algorithm={algorithm}", file1, file2],
-                          stdout=subprocess.PIPE).stdout.decode()
+    diff = None
+    if _use_python_backend(algorithm):
+        try:
+            with open(file1, "rb") as f:
+                code1 = f.read().decode("utf-8")
+            with open(file2, "rb") as f:
+                code2 = f.read().decode("utf-8")
+            diff = histogram_diff.diff_texts(code1, code2, name1=file1, name2=file2)
+        except (OSError, UnicodeDecodeError) as e:
+            logging.debug("[GIT_DIFF_FILE] 进程内 diff 不可用，回退 git diff: %s", e)
+    if diff is None:
+        diff = subprocess.run(["git", "--no-pager", "diff", "--no-index", "-w", "-b",
+                               "--unified=10000", "--function-context", f"--diff-algorithm={algorithm}", file1, file2],
+                              stdout=subprocess.PIPE).stdout.decode()
     if remove_diff_header:
-        diff_lines = diff.splitlines()[4:]
-        diff = "\n".join(diff_lines)
+        diff = _strip_diff_header(diff)
     return diff
 
 
 def git_diff_code(code1: str, code2: str, remove_diff_header: bool = False) -> str:
+    if _use_python_backend("histogram"):
+        diff = histogram_diff.diff_texts(code1, code2)
+        return _strip_diff_header(diff) if remove_diff_header else diff
     tf1 = tempfile.NamedTemporaryFile()
     tf2 = tempfile.NamedTemporaryFile()
     tf1.write(code1.encode())
@@ -0,0 +1,839 @@
+"""
+In-process port of git's xdiff histogram diff.
+
+Reproduces ``git diff --no-index -w -b --unified=N --function-context
+--diff-algorithm=histogram`` for two in-memory texts: histogram LCS with the
+classic Myers fallback, change compaction with the indent heuristic, and
+unified hunk emission with function context and hunk-header function names.
+Lines are compared with all whitespace ignored, as with ``-w``.
+"""
+
+
+import hashlib
+
+# git 的 isspace 只认这四个字符
+_SPACE = " \t\n\r"
+_NO_NEWLINE = "\n\\ No newline at end of file\n"
+
+_HISTOGRAM_MAX_CHAIN = 64
+_MAX_EQLIMIT = 1024
+_SIMSCAN_WINDOW = 100
+_KPDIS_RUN = 4
+_MAX_COST_MIN = 256
+_SNAKE_CNT = 20
+_HEUR_MIN_COST = 256
+_K_HEUR = 4
+
+_MAX_INDENT = 200
+_MAX_BLANKS = 20
+_START_OF_FILE_PENALTY = 1
+_END_OF_FILE_PENALTY = 21
+_TOTAL_BLANK_WEIGHT = -30
+_POST_BLANK_WEIGHT = 6
+_RELATIVE_INDENT_PENALTY = -4
+_RELATIVE_INDENT_WITH_BLANK_PENALTY = 10
+_RELATIVE_OUTDENT_PENALTY = 24
+_RELATIVE_OUTDENT_WITH_BLANK_PENALTY = 17
+_RELATIVE_DEDENT_PENALTY = 23
+_RELATIVE_DEDENT_WITH_BLANK_PENALTY = 17
+_INDENT_WEIGHT = 60
+_INDENT_HEURISTIC_MAX_SLIDING = 100
+
+_FUNCNAME_MAX = 80
+
+
+def split_lines(text: str) -> list[str]:
+    """Split into records the way xdiff does: on '\\n', keeping it."""
+    if not text:
+        return []
+    lines = text.split("\n")
+    records = [line + "\n" for line in lines[:-1]]
+    if lines[-1]:
+        records.append(lines[-1])
+    return records
+
+
+def _strip_ws(line: str) -> str:
+    return "".join(ch for ch in line if ch not in _SPACE)
+
+
+class _File:
+    """One side of the diff: records, whitespace-insensitive classes, change marks."""
+
+    def __init__(self, records: list[str], classes: list[int]):
+        self.recs = records
+        self.cls = classes
+        self.nrec = len(records)
+        # rchg[i + 1] 对应第 i 行，两端各留一个恒为 0 的哨兵
+        self.rchg = bytearray(self.nrec + 2)
+
+    def changed(self, i: int) -> int:
+        return self.rchg[i + 1]
+
+    def mark(self, i: int, value: int = 1) -> None:
+        self.rchg[i + 1] = value
+
+
+# ── histogram ─────────────────────────────────────────────────────────
+
+
+class _Record:
+    __slots__ = ("ptr", "cnt")
+
+    def __init__(self, ptr: int):
+        self.ptr = ptr
+        self.cnt = 1
+
+
+def _find_lcs(f1: _File, f2: _File, line1: int, count1: int, line2: int, count2: int):
+    """Return (begin1, end1, begin2, end2), None for no common line, or "fallback"."""
+    cls1, cls2 = f1.cls, f2.cls
+    end1 = line1 + count1 - 1
+    end2 = line2 + count2 - 1
+    records: dict[int, _Record] = {}
+    next_ptr: dict[int, int] = {}
+    line_map: dict[int, _Record] = {}
+    for ptr in range(end1, line1 - 1, -1):
+        key = cls1[ptr - 1]
+        rec = records.get(key)
+        if rec is None:
+            rec = _Record(ptr)
+            records[key] = rec
+            next_ptr[ptr] = 0
+        else:
+            next_ptr[ptr] = rec.ptr
+            rec.ptr = ptr
+            rec.cnt += 1
+        line_map[ptr] = rec
+
+    begin1 = lcs_end1 = begin2 = lcs_end2 = 0
+    best_cnt = _HISTOGRAM_MAX_CHAIN + 1
+    has_common = False
+    b_ptr = line2
+    while b_ptr <= end2:
+        b_next = b_ptr + 1
+        rec = records.get(cls2[b_ptr - 1])
+        if rec is not None:
+            if rec.cnt > best_cnt:
+                has_common = True
+            else:
+                has_common = True
+                as_ = rec.ptr
+                while True:
+                    np = next_ptr[as_]
+                    bs = b_ptr
+                    ae = as_
+                    be = bs
+                    rc = rec.cnt
+                    while line1 < as_ and line2 < bs and cls1[as_ - 2] == cls2[bs - 2]:
+                        as_ -= 1
+                        bs -= 1
+                        if 1 < rc:
+                            rc = min(rc, line_map[as_].cnt)
+                    while ae < end1 and be < end2 and cls1[ae] == cls2[be]:
+                        ae += 1
+                        be += 1
+                        if 1 < rc:
+                            rc = min(rc, line_map[ae].cnt)
+                    if b_next <= be:
+                        b_next = be + 1
+                    if lcs_end1 < begin1 or (lcs_end1 - begin1) < (ae - as_) or rc < best_cnt:
+                        begin1, lcs_end1, begin2, lcs_end2 = as_, ae, bs, be
+                        best_cnt = rc
+                    if np == 0:
+                        break
+                    while np <= ae:
+                        np = next_ptr[np]
+                        if np == 0:
+                            break
+                    if np == 0:
+                        break
+                    as_ = np
+        b_ptr = b_next
+
+    if has_common and _HISTOGRAM_MAX_CHAIN < best_cnt:
+        return "fallback"
+    if begin1 == 0 and begin2 == 0:
+        return None
+    return begin1, lcs_end1, begin2, lcs_end2
+
+
+def _histogram_diff(f1: _File, f2: _File) -> None:
+    # xhistogram.c 左侧递归、右侧尾调用；各区间互不重叠，用显式栈等价展开
+    stack = [(1, f1.nrec, 1, f2.nrec)]
+    while stack:
+        line1, count1, line2, count2 = stack.pop()
+        if count1 <= 0 and count2 <= 0:
+            continue
+        if not count1:
+            for i in range(line2 - 1, line2 - 1 + count2):
+                f2.mark(i)
+            continue
+        if not count2:
+            for i in range(line1 - 1, line1 - 1 + count1):
+                f1.mark(i)
+            continue
+        lcs = _find_lcs(f1, f2, line1, count1, line2, count2)
+        if lcs == "fallback":
+            _myers_fallback(f1, f2, line1, count1, line2, count2)
+            continue
+        if lcs is None:
+            for i in range(line1 - 1, line1 - 1 + count1):
+                f1.mark(i)
+            for i in range(line2 - 1, line2 - 1 + count2):
+                f2.mark(i)
+            continue
+        begin1, end1, begin2, end2 = lcs
+        stack.append((end1 + 1, line1 + count1 - 1 - end1, end2 + 1, line2 + count2 - 1 - end2))
+        stack.append((line1, begin1 - line1, line2, begin2 - line2))
+
+
+# ── classic Myers (xdl_do_diff) used as histogram fallback ────────────
+
+
+def _bogosqrt(n: int) -> int:
+    i = 1
+    while n > 0:
+        i <<= 1
+        n >>= 2
+    return i
+
+
+def _clean_mmatch(dis: list[int], i: int, s: int, e: int) -> bool:
+    if i - s > _SIMSCAN_WINDOW:
+        s = i - _SIMSCAN_WINDOW
+    if e - i > _SIMSCAN_WINDOW:
+        e = i + _SIMSCAN_WINDOW
+    rdis0, rpdis0 = 0, 1
+    r = 1
+    while i - r >= s:
+        if not dis[i - r]:
+            rdis0 += 1
+        elif dis[i - r] == 2:
+            rpdis0 += 1
+        else:
+            break
+        r += 1
+    if rdis0 == 0:
+        return False
+    rdis1, rpdis1 = 0, 1
+    r = 1
+    while i + r <= e:
+        if not dis[i + r]:
+            rdis1 += 1
+        elif dis[i + r] == 2:
+            rpdis1 += 1
+        else:
+            break
+        r += 1
+    if rdis1 == 0:
+        return False
+    rdis1 += rdis0
+    rpdis1 += rpdis0
+    return rpdis1 * _KPDIS_RUN < (rpdis1 + rdis1)
+
+
+def _myers_fallback(f1: _File, f2: _File, line1: int, count1: int, line2: int, count2: int) -> None:
+    ha1 = f1.cls[line1 - 1:line1 - 1 + count1]
+    ha2 = f2.cls[line2 - 1:line2 - 1 + count2]
+    rchg1, rchg2 = _myers_diff(ha1, ha2)
+    for i, value in enumerate(rchg1):
+        if value:
+            f1.mark(line1 - 1 + i)
+    for i, value in enumerate(rchg2):
+        if value:
+            f2.mark(line2 - 1 + i)
+
+
+def _myers_diff(cls1: list[int], cls2: list[int]) -> tuple[bytearray, bytearray]:
+    n1, n2 = len(cls1), len(cls2)
+    rchg1 = bytearray(n1)
+    rchg2 = bytearray(n2)
+
+    # xdl_trim_ends
+    lim = min(n1, n2)
+    start = 0
+    while start < lim and cls1[start] == cls2[start]:
+        start += 1
+    lim -= start
+    tail = 0
+    while tail < lim and cls1[n1 - 1 - tail] == cls2[n2 - 1 - tail]:
+        tail += 1
+    dend1 = n1 - tail - 1
+    dend2 = n2 - tail - 1
+
+    # xdl_cleanup_records
+    count1: dict[int, int] = {}
+    count2: dict[int, int] = {}
+    for key in cls1:
+        count1[key] = count1.get(key, 0) + 1
+    for key in cls2:
+        count2[key] = count2.get(key, 0) + 1
+    dis1 = [0] * (n1 + 1)
+    dis2 = [0] * (n2 + 1)
+    mlim = min(_bogosqrt(n1), _MAX_EQLIMIT)
+    for i in range(start, dend1 + 1):
+        nm = count2.get(cls1[i], 0)
+        dis1[i] = 0 if nm == 0 else 2 if nm >= mlim else 1
+    mlim = min(_bogosqrt(n2), _MAX_EQLIMIT)
+    for i in range(start, dend2 + 1):
+        nm = count1.get(cls2[i], 0)
+        dis2[i] = 0 if nm == 0 else 2 if nm >= mlim else 1
+
+    rindex1: list[int] = []
+    ha1: list[int] = []
+    for i in range(start, dend1 + 1):
+        if dis1[i] == 1 or (dis1[i] == 2 and not _clean_mmatch(dis1, i, start, dend1)):
+            rindex1.append(i)
+            ha1.append(cls1[i])
+        else:
+            rchg1[i] = 1
+    rindex2: list[int] = []
+    ha2: list[int] = []
+    for i in range(start, dend2 + 1):
+        if dis2[i] == 1 or (dis2[i] == 2 and not _clean_mmatch(dis2, i, start, dend2)):
+            rindex2.append(i)
+            ha2.append(cls2[i])
+        else:
+            rchg2[i] = 1
+
+    ndiags = len(ha1) + len(ha2) + 3
+    mxcost = max(_bogosqrt(ndiags), _MAX_COST_MIN)
+    kvdf = [0] * (2 * ndiags + 2)
+    kvdb = [0] * (2 * ndiags + 2)
+    offset = ndiags + 1
+    _recs_cmp(ha1, rindex1, rchg1, 0, len(ha1), ha2, rindex2, rchg2, 0, len(ha2), kvdf, kvdb, offset, False, mxcost)
+    return rchg1, rchg2
+
+
+def _split(ha1, off1, lim1, ha2, off2, lim2, kvdf, kvdb, offset, need_min, mxcost):
+    """xdl_split: returns (i1, i2, min_lo, min_hi)."""
+    dmin, dmax = off1 - lim2, lim1 - off2
+    fmid, bmid = off1 - off2, lim1 - lim2
+    odd = (fmid - bmid) & 1
+    fmin = fmax = fmid
+    bmin = bmax = bmid
+    kvdf[offset + fmid] = off1
+    kvdb[offset + bmid] = lim1
+    line_max = 1 << 62
+    ec = 0
+    while True:
+        ec += 1
+        got_snake = False
+        if fmin > dmin:
+            fmin -= 1
+            kvdf[offset + fmin - 1] = -1
+        else:
+            fmin += 1
+        if fmax < dmax:
+            fmax += 1
+            kvdf[offset + fmax + 1] = -1
+        else:
+            fmax -= 1
+        for d in range(fmax, fmin - 1, -2):
+            if kvdf[offset + d - 1] >= kvdf[offset + d + 1]:
+                i1 = kvdf[offset + d - 1] + 1
+            else:
+                i1 = kvdf[offset + d + 1]
+            prev1 = i1
+            i2 = i1 - d
+            while i1 < lim1 and i2 < lim2 and ha1[i1] == ha2[i2]:
+                i1 += 1
+                i2 += 1
+            if i1 - prev1 > _SNAKE_CNT:
+                got_snake = True
+            kvdf[offset + d] = i1
+            if odd and bmin <= d <= bmax and kvdb[offset + d] <= i1:
+                return i1, i2, True, True
+
+        if bmin > dmin:
+            bmin -= 1
+            kvdb[offset + bmin - 1] = line_max
+        else:
+            bmin += 1
+        if bmax < dmax:
+            bmax += 1
+            kvdb[offset + bmax + 1] = line_max
+        else:
+            bmax -= 1
+        for d in range(bmax, bmin - 1, -2):
+            if kvdb[offset + d - 1] < kvdb[offset + d + 1]:
+                i1 = kvdb[offset + d - 1]
+            else:
+                i1 = kvdb[offset + d + 1] - 1
+            prev1 = i1
+            i2 = i1 - d
+            while i1 > off1 and i2 > off2 and ha1[i1 - 1] == ha2[i2 - 1]:
+                i1 -= 1
+                i2 -= 1
+            if prev1 - i1 > _SNAKE_CNT:
+                got_snake = True
+            kvdb[offset + d] = i1
+            if not odd and fmin <= d <= fmax and i1 <= kvdf[offset + d]:
+                return i1, i2, True, True
+
+        if need_min:
+            continue
+
+        if got_snake and ec > _HEUR_MIN_COST:
+            best = 0
+            for d in range(fmax, fmin - 1, -2):
+                dd = d - fmid if d > fmid else fmid - d
+                i1 = kvdf[offset + d]
+                i2 = i1 - d
+                v = (i1 - off1) + (i2 - off2) - dd
+                if (v > _K_HEUR * ec and v > best
+                        and off1 + _SNAKE_CNT <= i1 < lim1
+                        and off2 + _SNAKE_CNT <= i2 < lim2):
+                    k = 1
+                    while ha1[i1 - k] == ha2[i2 - k]:
+                        if k == _SNAKE_CNT:
+                            best = v
+                            spl = (i1, i2)
+                            break
+                        k += 1
+            if best > 0:
+                return spl[0], spl[1], True, False
+
+            best = 0
+            for d in range(bmax, bmin - 1, -2):
+                dd = d - bmid if d > bmid else bmid - d
+                i1 = kvdb[offset + d]
+                i2 = i1 - d
+                v = (lim1 - i1) + (lim2 - i2) - dd
+                if (v > _K_HEUR * ec and v > best
+                        and off1 < i1 <= lim1 - _SNAKE_CNT
+                        and off2 < i2 <= lim2 - _SNAKE_CNT):
+                    k = 0
+                    while ha1[i1 + k] == ha2[i2 + k]:
+                        if k == _SNAKE_CNT - 1:
+                            best = v
+                            spl = (i1, i2)
+                            break
+                        k += 1
+            if best > 0:
+                return spl[0], spl[1], False, True
+
+        if ec >= mxcost:
+            fbest = fbest1 = -1
+            for d in range(fmax, fmin - 1, -2):
+                i1 = min(kvdf[offset + d], lim1)
+                i2 = i1 - d
+                if lim2 < i2:
+                    i1, i2 = lim2 + d, lim2
+                if fbest < i1 + i2:
+                    fbest = i1 + i2
+                    fbest1 = i1
+            bbest = bbest1 = line_max
+            for d in range(bmax, bmin - 1, -2):
+                i1 = max(off1, kvdb[offset + d])
+                i2 = i1 - d
+                if i2 < off2:
+                    i1, i2 = off2 + d, off2
+                if i1 + i2 < bbest:
+                    bbest = i1 + i2
+                    bbest1 = i1
+            if (lim1 + lim2) - bbest < fbest - (off1 + off2):
+                return fbest1, fbest - fbest1, True, False
+            return bbest1, bbest - bbest1, False, True
+
+
+def _recs_cmp(ha1, rindex1, rchg1, off1, lim1, ha2, rindex2, rchg2, off2, lim2, kvdf, kvdb, offset, need_min, mxcost):
+    stack = [(off1, lim1, off2, lim2, need_min)]
+    while stack:
+        off1, lim1, off2, lim2, need_min = stack.pop()
+        while off1 < lim1 and off2 < lim2 and ha1[off1] == ha2[off2]:
+            off1 += 1
+            off2 += 1
+        while off1 < lim1 and off2 < lim2 and ha1[lim1 - 1] == ha2[lim2 - 1]:
+            lim1 -= 1
+            lim2 -= 1
+        if off1 == lim1:
+            for i in range(off2, lim2):
+                rchg2[rindex2[i]] = 1
+        elif off2 == lim2:
+            for i in range(off1, lim1):
+                rchg1[rindex1[i]] = 1
+        else:
+            i1, i2, min_lo, min_hi = _split(ha1, off1, lim1, ha2, off2, lim2, kvdf, kvdb, offset, need_min, mxcost)
+            stack.append((i1, lim1, i2, lim2, min_hi))
+            stack.append((off1, i1, off2, i2, min_lo))
+
+
+# ── xdl_change_compact ────────────────────────────────────────────────
+
+
+def _get_indent(line: str) -> int:
+    ret = 0
+    for ch in line:
+        if ch not in _SPACE:
+            return ret
+        if ch == " ":
+            ret += 1
+        elif ch == "\t":
+            ret += 8 - ret % 8
+        if ret >= _MAX_INDENT:
+            return _MAX_INDENT
+    return -1
+
+
+def _measure_split(f: _File, split: int) -> tuple[int, int, int, int, int, int]:
+    if split >= f.nrec:
+        end_of_file, indent = 1, -1
+    else:
+        end_of_file, indent = 0, _get_indent(f.recs[split])
+    pre_blank, pre_indent = 0, -1
+    for i in range(split - 1, -1, -1):
+        pre_indent = _get_indent(f.recs[i])
+        if pre_indent != -1:
+            break
+        pre_blank += 1
+        if pre_blank == _MAX_BLANKS:
+            pre_indent = 0
+            break
+    post_blank, post_indent = 0, -1
+    for i in range(split + 1, f.nrec):
+        post_indent = _get_indent(f.recs[i])
+        if post_indent != -1:
+            break
+        post_blank += 1
+        if post_blank == _MAX_BLANKS:
+            post_indent = 0
+            break
+    return end_of_file, indent, pre_blank, pre_indent, post_blank, post_indent
+
+
+def _score_add_split(m, score: list[int]) -> None:
+    end_of_file, m_indent, pre_blank, pre_indent, m_post_blank, post_indent = m
+    if pre_indent == -1 and pre_blank == 0:
+        score[1] += _START_OF_FILE_PENALTY
+    if end_of_file:
+        score[1] += _END_OF_FILE_PENALTY
+    post_blank = 1 + m_post_blank if m_indent == -1 else 0
+    total_blank = pre_blank + post_blank
+    score[1] += _TOTAL_BLANK_WEIGHT * total_blank
+    score[1] += _POST_BLANK_WEIGHT * post_blank
+    indent = m_indent if m_indent != -1 else post_indent
+    any_blanks = total_blank != 0
+    score[0] += indent
+    if indent == -1 or pre_indent == -1:
+        pass
+    elif indent > pre_indent:
+        score[1] += _RELATIVE_INDENT_WITH_BLANK_PENALTY if any_blanks else _RELATIVE_INDENT_PENALTY
+    elif indent == pre_indent:
+        pass
+    elif post_indent != -1 and post_indent > indent:
+        score[1] += _RELATIVE_OUTDENT_WITH_BLANK_PENALTY if any_blanks else _RELATIVE_OUTDENT_PENALTY
+    else:
+        score[1] += _RELATIVE_DEDENT_WITH_BLANK_PENALTY if any_blanks else _RELATIVE_DEDENT_PENALTY
+
+
+def _score_cmp(s1: list[int], s2: list[int]) -> int:
+    cmp_indents = (s1[0] > s2[0]) - (s1[0] < s2[0])
+    return _INDENT_WEIGHT * cmp_indents + (s1[1] - s2[1])
+
+
+class _Group:
+    __slots__ = ("start", "end")
+
+    def __init__(self, f: _File):
+        self.start = self.end = 0
+        while f.changed(self.end):
+            self.end += 1
+
+    def next(self, f: _File) -> bool:
+        if self.end == f.nrec:
+            return False
+        self.start = self.end + 1
+        self.end = self.start
+        while f.changed(self.end):
+            self.end += 1
+        return True
+
+    def previous(self, f: _File) -> bool:
+        if self.start == 0:
+            return False
+        self.end = self.start - 1
+        self.start = self.end
+        while f.changed(self.start - 1):
+            self.start -= 1
+        return True
+
+    def slide_down(self, f: _File) -> bool:
+        if self.end < f.nrec and f.cls[self.start] == f.cls[self.end]:
+            f.mark(self.start, 0)
+            f.mark(self.end, 1)
+            self.start += 1
+            self.end += 1
+            while f.changed(self.end):
+                self.end += 1
+            return True
+        return False
+
+    def slide_up(self, f: _File) -> bool:
+        if self.start > 0 and f.cls[self.start - 1] == f.cls[self.end - 1]:
+            self.start -= 1
+            self.end -= 1
+            f.mark(self.start, 1)
+            f.mark(self.end, 0)
+            while f.changed(self.start - 1):
+                self.start -= 1
+            return True
+        return False
+
+
+def _change_compact(f: _File, fo: _File) -> None:
+    g = _Group(f)
+    go = _Group(fo)
+    while True:
+        if g.end != g.start:
+            while True:
+                groupsize = g.end - g.start
+                end_matching_other = -1
+                while g.slide_up(f):
+                    go.previous(fo)
+                earliest_end = g.end
+                if go.end > go.start:
+                    end_matching_other = g.end
+                while g.slide_down(f):
+                    go.next(fo)
+                    if go.end > go.start:
+                        end_matching_other = g.end
+                if groupsize == g.end - g.start:
+                    break
+
+            if g.end == earliest_end:
+                pass
+            elif end_matching_other != -1:
+                while go.end == go.start:
+                    g.slide_up(f)
+                    go.previous(fo)
+            else:
+                shift = earliest_end
+                if g.end - groupsize - 1 > shift:
+                    shift = g.end - groupsize - 1
+                if g.end - _INDENT_HEURISTIC_MAX_SLIDING > shift:
+                    shift = g.end - _INDENT_HEURISTIC_MAX_SLIDING
+                best_shift = -1
+                best_score = [0, 0]
+                while shift <= g.end:
+                    score = [0, 0]
+                    _score_add_split(_measure_split(f, shift), score)
+                    _score_add_split(_measure_split(f, shift - groupsize), score)
+                    if best_shift == -1 or _score_cmp(score, best_score) <= 0:
+                        best_score = score
+                        best_shift = shift
+                    shift += 1
+                while g.end > best_shift:
+                    g.slide_up(f)
+                    go.previous(fo)
+
+        if not g.next(f):
+            break
+        go.next(fo)
+
+
+# ── script building and unified emission (xemit.c) ────────────────────
+
+
+def _build_script(f1: _File, f2: _File) -> list[list[int]]:
+    changes: list[list[int]] = []
+    i1, i2 = f1.nrec, f2.nrec
+    while i1 >= 0 or i2 >= 0:
+        if f1.changed(i1 - 1) or f2.changed(i2 - 1):
+            l1, l2 = i1, i2
+            while f1.changed(i1 - 1):
+                i1 -= 1
+            while f2.changed(i2 - 1):
+                i2 -= 1
+            changes.append([i1, i2, l1 - i1, l2 - i2])
+        i1 -= 1
+        i2 -= 1
+    changes.reverse()
+    return changes
+
+
+def _funcname(line: str) -> str | None:
+    """git's default funcname rule (def_ff)."""
+    if not line or not (("a" <= line[0] <= "z") or ("A" <= line[0] <= "Z") or line[0] in "_$"):
+        return None
+    data = line.encode("utf-8")[:_FUNCNAME_MAX]
+    while data and chr(data[-1]) in _SPACE:
+        data = data[:-1]
+    return data.decode("utf-8", errors="replace")
+
+
+def _is_func_rec(f: _File, i: int) -> bool:
+    return _funcname(f.recs[i]) is not None
+
+
+def _is_empty_rec(f: _File, i: int) -> bool:
+    return all(ch in _SPACE for ch in f.recs[i])
+
+
+def _get_func_line(f1: _File, start: int, limit: int) -> tuple[int, str | None]:
+    step = -1 if start > limit else 1
+    line = start
+    while line != limit and 0 <= line < f1.nrec:
+        name = _funcname(f1.recs[line])
+        if name is not None:
+            return line, name
+        line += step
+    return -1, None
+
+
+def _get_hunk_end(changes: list[list[int]], first: int, ctxlen: int) -> int:
+    max_common = 2 * ctxlen
+    last = first
+    for idx in range(first + 1, len(changes)):
+        prev, cur = changes[idx - 1], changes[idx]
+        if cur[0] - (prev[0] + prev[2]) > max_common:
+            break
+        last = idx
+    return last
+
+
+def _format_range(start: int, count: int) -> str:
+    text = str(start if count else start - 1)
+    if count != 1:
+        text += f",{count}"
+    return text
+
+
+def _emit_record(out: list[str], prefix: str, line: str) -> None:
+    out.append(prefix)
+    if line.endswith("\n"):
+        out.append(line)
+    else:
+        out.append(line)
+        out.append(_NO_NEWLINE)
+
+
+def _emit(f1: _File, f2: _File, changes: list[list[int]], ctxlen: int, func_context: bool) -> list[str]:
+    out: list[str] = []
+    func_text = ""
+    funclineprev = -1
+    idx = 0
+    while idx < len(changes):
+        first = idx
+        last = _get_hunk_end(changes, first, ctxlen)
+        xch = changes[first]
+        s1 = max(xch[0] - ctxlen, 0)
+        s2 = max(xch[1] - ctxlen, 0)
+
+        if func_context:
+            i1 = xch[0]
+            extend = True
+            if i1 >= f1.nrec:
+                i2 = xch[1]
+                while i2 < f2.nrec:
+                    if _is_func_rec(f2, i2):
+                        extend = False
+                        break
+                    i2 += 1
+                i1 = f1.nrec - 1
+            if extend:
+                fs1, _ = _get_func_line(f1, i1, -1)
+                while fs1 > 0 and not _is_empty_rec(f1, fs1 - 1) and not _is_func_rec(f1, fs1 - 1):
+                    fs1 -= 1
+                if fs1 < 0:
+                    fs1 = 0
+                if fs1 < s1:
+                    s2 = max(s2 - (s1 - fs1), 0)
+                    s1 = fs1
+
+        while True:
+            xche = changes[last]
+            lctx = min(ctxlen, f1.nrec - (xche[0] + xche[2]), f2.nrec - (xche[1] + xche[3]))
+            e1 = xche[0] + xche[2] + lctx
+            e2 = xche[1] + xche[3] + lctx
+            if not func_context:
+                break
+            fe1, _ = _get_func_line(f1, xche[0] + xche[2], f1.nrec)
+            while fe1 > 0 and _is_empty_rec(f1, fe1 - 1):
+                fe1 -= 1
+            if fe1 < 0:
+                fe1 = f1.nrec
+            if fe1 > e1:
+                e2 = min(e2 + (fe1 - e1), f2.nrec)
+                e1 = fe1
+            if last + 1 < len(changes):
+                line = min(changes[last + 1][0], f1.nrec - 1)
+                if line - ctxlen <= e1 or _get_func_line(f1, line, e1)[0] < 0:
+                    last += 1
+                    continue
+            break
+
+        found, name = _get_func_line(f1, s1 - 1, funclineprev)
+        if found >= 0:
+            func_text = name or ""
+        funclineprev = s1 - 1
+        header = f"@@ -{_format_range(s1 + 1, e1 - s1)} +{_format_range(s2 + 1, e2 - s2)} @@"
+        if func_text:
+            header += " " + func_text
+        out.append(header + "\n")
+
+        while s2 < xch[1]:
+            _emit_record(out, " ", f2.recs[s2])
+            s2 += 1
+        s1, s2 = xch[0], xch[1]
+        for cur in range(first, last + 1):
+            xch = changes[cur]
+            while s1 < xch[0] and s2 < xch[1]:
+                _emit_record(out, " ", f2.recs[s2])
+                s1 += 1
+                s2 += 1
+            for s1 in range(xch[0], xch[0] + xch[2]):
+                _emit_record(out, "-", f1.recs[s1])
+            for s2 in range(xch[1], xch[1] + xch[3]):
+                _emit_record(out, "+", f2.recs[s2])
+            s1 = xch[0] + xch[2]
+            s2 = xch[1] + xch[3]
+        for s2 in range(xche[1] + xche[3], e2):
+            _emit_record(out, " ", f2.recs[s2])
+        idx = last + 1
+    return out
+
+
+def _blob_id(text: str) -> str:
+    data = text.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()[:7]
+
+
+def diff_texts(
+    text1: str,
+    text2: str,
+    *,
+    name1: str = "a",
+    name2: str = "b",
+    context: int = 10000,
+    function_context: bool = True,
+) -> str:
+    """Unified diff of text1 -> text2, ignoring whitespace like ``git diff -w``.
+
+    Returns "" when the texts are equal modulo whitespace, like git does.
+    """
+    recs1 = split_lines(text1)
+    recs2 = split_lines(text2)
+    classes: dict[str, int] = {}
+    cls1 = [classes.setdefault(_strip_ws(line), len(classes)) for line in recs1]
+    cls2 = [classes.setdefault(_strip_ws(line), len(classes)) for line in recs2]
+    f1 = _File(recs1, cls1)
+    f2 = _File(recs2, cls2)
+
+    _histogram_diff(f1, f2)
+    _change_compact(f1, f2)
+    _change_compact(f2, f1)
+    changes = _build_script(f1, f2)
+    if not changes:
+        return ""
+
+    path1 = name1.lstrip("/")
+    path2 = name2.lstrip("/")
+    header = [
+        f"diff --git a/{path1} b/{path2}\n",
+        f"index {_blob_id(text1)}..{_blob_id(text2)} 100644\n",
+        f"--- a/{path1}\n",
+        f"+++ b/{path2}\n",
+    ]
+    return "".join(header + _emit(f1, f2, changes, context, function_context))
@@ -25,6 +25,8 @@ from typing import Any
 
 import networkx as nx
 
+import compact_pdg
+import joern_server
 from common import Language
 import config
 
@@ -55,6 +57,16 @@ def _run_cmd_or_raise(cmd: list[str], cwd: str):
         ) from exc
 
 
+def _run_joern_tool(cmd: list[str], cwd: str):
+    pool = joern_server.get_pool()
+    if pool is not None:
+        try:
+            return pool.run_tool(cmd, cwd)
+        except joern_server.JoernServerError as exc:
+            logging.warning("Joern server 执行失败，回退到子进程: %s", exc)
+    return _run_cmd_or_raise(cmd, cwd)
+
+
 def _should_retry_parse_without_overlays(error_text: str) -> bool:
     markers = (
         "TypeEvalPass failed",
@@ -122,7 +134,7 @@ def export(code_path: str, output_path: str, language: Language, overwrite: bool
 
     parse_cmd = ['joern-parse', '--language', language.value, os.path.abspath(code_path)]
     try:
-        _run_cmd_or_raise(parse_cmd, cwd=output_path)
+        _run_joern_tool(parse_cmd, cwd=output_path)
     except RuntimeError as exc:
         if not _should_retry_parse_without_overlays(str(exc)):
             raise
@@ -130,7 +142,7 @@ def export(code_path: str, output_path: str, language: Language, overwrite: bool
             "joern-parse failed with overlays, retrying without overlays: %s",
             os.path.abspath(code_path),
         )
-        _run_cmd_or_raise(
+        _run_joern_tool(
             ['joern-parse', '--nooverlays', '--language', language.value, os.path.abspath(code_path)],
             cwd=output_path,
         )
@@ -139,15 +151,15 @@ def export(code_path: str, output_path: str, language: Language, overwrite: bool
         raise FileNotFoundError(f"joern-parse finished but missing CPG binary: {cpg_bin}")
     # Some joern-export versions do not support `--input` and still return 0 on
     # invalid arguments. Use positional CPG input for better compatibility.
-    _run_cmd_or_raise(
+    _run_joern_tool(
         ['joern-export', os.path.abspath(cpg_bin), '--repr', 'cfg', '--out', os.path.abspath(cfg_dir)],
         cwd=output_path,
     )
-    _run_cmd_or_raise(
+    _run_joern_tool(
         ['joern-export', os.path.abspath(cpg_bin), '--repr', 'pdg', '--out', os.path.abspath(pdg_dir)],
         cwd=output_path,
     )
-    _run_cmd_or_raise(
+    _run_joern_tool(
         ['joern-export', os.path.abspath(cpg_bin), '--repr', 'all', '--out', os.path.abspath(cpg_dir)],
         cwd=output_path,
     )
@@ -468,6 +480,7 @@ def export_with_preprocess_and_merge(code_path: str, output_path: str, language:
     export_with_preprocess(code_path, output_path, language, need_cdg, overwrite)
     merge(output_path, pdg_dir, code_path, overwrite)
     add_cfg_lines(output_path, pdg_dir, code_path, cpg_dir, overwrite)
+    compact_pdg.write_pack(pdg_dir, force=overwrite)
 
 
 class CPGNode:
@@ -508,19 +521,33 @@ class Edge:
 class CPG:
     def __init__(self, cpg_dir: str):
         self.cpg_dir = cpg_dir
-        cpg_path = os.path.join(cpg_dir, 'export.dot')
-        if not os.path.exists(cpg_path):
-            raise FileNotFoundError(f"export.dot is not found in {cpg_path}")
-        self.g: nx.MultiDiGraph = nx.nx_agraph.read_dot(cpg_path)
+        self.cpg_path = os.path.join(cpg_dir, 'export.dot')
+        if not os.path.exists(self.cpg_path):
+            raise FileNotFoundError(f"export.dot is not found in {self.cpg_path}")
+
+    @cached_property
+    def _dot(self) -> compact_pdg.DotGraph:
+        # 整个 CPG 很大且切片流程用不到，首次访问时才解析
+        return compact_pdg.read_dot(self.cpg_path)
+
+    @cached_property
+    def g(self) -> nx.MultiDiGraph:
+        g = nx.MultiDiGraph()
+        for node, attr in self._dot.nodes.items():
+            g.add_node(node, **attr)
+        for u, v, key, attr in self._dot.edges:
+            g.add_edge(u, v, key=key, **attr)
+        return g
 
     def get_node(self, node_id: int) -> dict[str, str]:
-        return self.g.nodes[node_id]
+        return self._dot.nodes[str(node_id)]
 
 class PDGNode:
-    def __init__(self, node_id: int, attr: dict[str, str], pdg: PDG):
-        self.node_id: int = node_id
-        self.attr: dict[str, str] = attr
+    def __init__(self, pdg: PDG, index: int):
         self.pdg: PDG = pdg
+        self.index: int = index
+        self.node_id: str = pdg.graph.node_id(index)
+        self.attr: dict[str, str] = pdg.node_attrs(index)
         self.is_patch_node = False
 
     def __hash__(self):
@@ -536,6 +563,9 @@ class PDGNode:
 
     @property
     def line_number(self) -> int | None:
+        line = self.pdg.graph.line(self.index)
+        if line is not None:
+            return line
         if 'LINE_NUMBER' not in self.attr:
             return None
         return int(self.attr['LINE_NUMBER'])
@@ -552,41 +582,17 @@ class PDGNode:
 
     @property
     def get_successors(self) -> list[PDGNode]:
-        nodes = []
-        for node in self.pdg.g.successors(self.node_id):
-            nodes.append(PDGNode(node, self.pdg.g.nodes[node], self.pdg))
-        return nodes
+        return [self.pdg.node_at(index) for index in self.pdg.graph.successors(self.index)]
 
     @property
     def get_predecessors(self) -> list[PDGNode]:
-        nodes = []
-        for node in self.pdg.g.predecessors(self.node_id):
-            nodes.append(PDGNode(node, self.pdg.g.nodes[node], self.pdg))
-        return nodes
+        return [self.pdg.node_at(index) for index in self.pdg.graph.predecessors(self.index)]
 
     def get_predecessors_by_label(self, label: str) -> list[tuple[PDGNode, str]]:
-        nodes = []
-        for node in self.pdg.g.predecessors(self.node_id):
-            for _, edge in self.pdg.g[node][self.node_id].items():
-                if edge['label'].startswith(label):
-                    if "&gt;" in edge['label']:
-                        edge['label'] = edge['label'].replace("&gt;", ">")
-                    elif "&lt;" in edge['label']:
-                        edge['label'] = edge['label'].replace("&lt;", "<")
-                    nodes.append((PDGNode(node, self.pdg.g.nodes[node], self.pdg), edge['label']))
-        return nodes
+        return [(self.pdg.node_at(index), edge) for index, edge in self.pdg.predecessors_by_label(self.index, label)]
 
     def get_successors_by_label(self, label: str) -> list[tuple[PDGNode, str]]:
-        nodes = []
-        for node in self.pdg.g.successors(self.node_id):
-            for _, edge in self.pdg.g[self.node_id][node].items():
-                if edge['label'].startswith(label):
-                    if "&gt;" in edge['label']:
-                        edge['label'] = edge['label'].replace("&gt;", ">")
-                    elif "&lt;" in edge['label']:
-                        edge['label'] = edge['label'].replace("&lt;", "<")
-                    nodes.append((PDGNode(node, self.pdg.g.nodes[node], self.pdg), edge['label']))
-        return nodes
+        return [(self.pdg.node_at(index), edge) for index, edge in self.pdg.successors_by_label(self.index, label)]
 
     @property
     def pred_dominance(self) -> PDGNode | None:
@@ -680,50 +686,105 @@ class PDGNode:
 
 
 class PDG:
-    def __init__(self, pdg_path: str) -> None:
+    def __init__(self, pdg_path: str, graph: compact_pdg.CompactGraph | None = None) -> None:
         self.pdg_path = pdg_path
-        if not os.path.exists(self.pdg_path):
-            raise FileNotFoundError(f"dot file is not found in {self.pdg_path}")
-        self.g: nx.MultiDiGraph = nx.nx_agraph.read_dot(pdg_path)
+        if graph is None:
+            if not os.path.exists(self.pdg_path):
+                raise FileNotFoundError(f"dot file is not found in {self.pdg_path}")
+            graph = compact_pdg.CompactGraph.from_dot(pdg_path)
+        self.graph: compact_pdg.CompactGraph = graph
+        self._attrs: dict[int, dict[str, str]] = {}
+        self._nodes: dict[int, PDGNode] = {}
         if self.method_node is None:
             raise ValueError("METHOD node is not found")
 
     @cached_property
-    def method_node(self) -> PDGNode | None:
-        for node in self.g.nodes():
-            if self.g.nodes[node]['NODE_TYPE'] == 'METHOD':
-                return node
+    def _method_index(self) -> int | None:
+        for index in range(len(self.graph)):
+            if self.graph.attr(index, 'NODE_TYPE') == 'METHOD':
+                return index
+        return None
+
+    @property
+    def method_node(self) -> str | None:
+        if self._method_index is None:
+            return None
+        return self.graph.node_id(self._method_index)
+
+    @cached_property
+    def g(self) -> nx.MultiDiGraph:
+        """networkx view for dot output; node attribute dicts are shared with PDGNode.attr."""
+        g = self.graph.to_networkx()
+        for index in range(len(self.graph)):
+            shared = g.nodes[self.graph.node_id(index)]
+            shared.update(self._attrs.get(index, {}))
+            self._attrs[index] = shared
+            if index in self._nodes:
+                self._nodes[index].attr = shared
+        return g
 
     @property
     def filename(self) -> str | None:
-        return self.g.nodes[self.method_node]["FILENAME"]
+        return self.graph.attr(self._method_index, "FILENAME")
 
     @property
     def line_number(self) -> int | None:
-        if "LINE_NUMBER" not in self.g.nodes[self.method_node]:
+        if self.graph.attr(self._method_index, "LINE_NUMBER") is None:
             return None
-        return int(self.g.nodes[self.method_node]["LINE_NUMBER"])
+        return int(self.graph.attr(self._method_index, "LINE_NUMBER"))
 
     @property
     def name(self) -> str | None:
-        try:
-            name_attr = self.g.nodes[self.method_node]["NAME"]
-        except KeyError:
-            return None
-        return name_attr
+        return self.graph.attr(self._method_index, "NAME")
+
+    def node_attrs(self, index: int) -> dict[str, str]:
+        attrs = self._attrs.get(index)
+        if attrs is None:
+            attrs = self.graph.attrs(index)
+            self._attrs[index] = attrs
+        return attrs
+
+    def node_at(self, index: int) -> PDGNode:
+        node = self._nodes.get(index)
+        if node is None:
+            node = PDGNode(self, index)
+            self._nodes[index] = node
+        return node
+
+    def nodes(self) -> list[PDGNode]:
+        return [self.node_at(index) for index in range(len(self.graph))]
 
     def get_node(self, node_id) -> PDGNode:
-        return PDGNode(node_id, self.g.nodes[node_id], self)
+        return self.node_at(self.graph.index_of(node_id))
 
     def get_nodes_by_line_number(self, line_number: int) -> list[PDGNode]:
-        nodes: list[PDGNode] = []
-        for node, attr in self.g.nodes.items():
-            if 'LINE_NUMBER' not in attr:
-                continue
-            if attr['LINE_NUMBER'] == str(line_number):
-                pdg_node = PDGNode(node, attr, self)
-                nodes.append(pdg_node)
-        return nodes
+        return [self.node_at(index) for index in self.graph.nodes_at_line(line_number)]
+
+    def predecessors_by_label(self, index: int, label: str) -> list[tuple[int, str]]:
+        """(source index, edge label) of in edges whose label starts with label."""
+        result = []
+        for source, edge in self.graph.in_edges(index):
+            edge_label = self.graph.edge_attr(edge, 'label')
+            if edge_label is not None and edge_label.startswith(label):
+                result.append((source, _unescape_edge_label(edge_label)))
+        return result
+
+    def successors_by_label(self, index: int, label: str) -> list[tuple[int, str]]:
+        """(target index, edge label) of out edges whose label starts with label."""
+        result = []
+        for edge in self.graph.out_edges(index):
+            edge_label = self.graph.edge_attr(edge, 'label')
+            if edge_label is not None and edge_label.startswith(label):
+                result.append((self.graph.target(edge), _unescape_edge_label(edge_label)))
+        return result
+
+
+def _unescape_edge_label(label: str) -> str:
+    if "&gt;" in label:
+        return label.replace("&gt;", ">")
+    elif "&lt;" in label:
+        return label.replace("&lt;", "<")
+    return label
 
 
 if __name__ == '__main__':
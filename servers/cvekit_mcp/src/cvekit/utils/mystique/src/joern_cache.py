@@ -0,0 +1,194 @@
+"""
+Content-addressed cache of Joern exports shared across runs and workers.
+
+An export directory (cpg/pdg/cfg plus the preprocess/merge snapshots and
+``pdg.pack``) is keyed by the sha256 of the exported source files, the
+installed Joern build, the language and ``need_cdg``. Entries are published
+by an atomic rename, so parallel batch workers never see half-written
+entries, and the cache is trimmed to ``config.JOERN_CACHE_MAX_BYTES`` by
+evicting the least recently used entries.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+import config
+import joern
+from common import Language
+
+CACHE_FORMAT = 1
+ARTIFACTS = ("cpg", "pdg", "cfg", "pdg-old", "pdg_old_merge", "pdg_old_def", "pdg.pack")
+
+_ENTRIES = "entries"
+_META = "meta.json"
+_LAST_USED = "last_used"
+
+
+@functools.lru_cache(maxsize=None)
+def _joern_fingerprint() -> str | None:
+    """Identify the Joern build by its io.joern jars; None when Joern is not installed."""
+    try:
+        joern.set_joern_env(config.JOERN_PATH)
+    except RuntimeError:
+        return None
+    home = os.environ["JOERN_HOME"]
+    for lib_dir in (os.path.join(home, "lib"), os.path.join(os.path.dirname(home), "lib")):
+        if os.path.isdir(lib_dir):
+            jars = sorted(name for name in os.listdir(lib_dir) if name.startswith("io.joern."))
+            if jars:
+                return hashlib.sha256("\n".join(jars).encode()).hexdigest()
+    binary = shutil.which("joern") or home
+    return f"{os.path.realpath(binary)}:{os.stat(binary).st_mtime_ns}"
+
+
+def cache_key(code_path: str, language: Language, need_cdg: bool) -> str | None:
+    fingerprint = _joern_fingerprint()
+    if fingerprint is None:
+        return None
+    digest = hashlib.sha256()
+    digest.update(f"{CACHE_FORMAT}\0{fingerprint}\0{language.value}\0{int(need_cdg)}\0".encode())
+    for root, dirs, files in os.walk(code_path):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                content = f.read()
+            digest.update(os.path.relpath(path, code_path).encode() + b"\0")
+            digest.update(hashlib.sha256(content).digest())
+    return digest.hexdigest()
+
+
+def _entries_dir(cache_dir: str) -> str:
+    return os.path.join(cache_dir, _ENTRIES)
+
+
+def _entry_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _copy_artifacts(src: str, dst: str) -> list[str]:
+    copied = []
+    for name in ARTIFACTS:
+        src_path = os.path.join(src, name)
+        if not os.path.exists(src_path):
+            continue
+        dst_path = os.path.join(dst, name)
+        _remove(dst_path)
+        copied.append(dst_path)
+        # copy2 保留 mtime，pdg.pack 对 dot 文件的新鲜度校验在恢复后仍然成立
+        if os.path.isdir(src_path):
+            shutil.copytree(src_path, dst_path)
+        else:
+            shutil.copy2(src_path, dst_path)
+    return copied
+
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def restore(cache_dir: str, key: str, output_path: str) -> bool:
+    entry = os.path.join(_entries_dir(cache_dir), key)
+    if not os.path.isfile(os.path.join(entry, _META)):
+        return False
+    os.makedirs(output_path, exist_ok=True)
+    copied: list[str] = []
+    try:
+        copied = _copy_artifacts(entry, output_path)
+        os.utime(os.path.join(entry, _LAST_USED))
+    except OSError as e:
+        # 与并发淘汰撞车时当作未命中，清掉拷了一半的产物
+        logging.warning(f"⚠️ Joern 缓存恢复失败，改为重新导出: {entry}, {e}")
+        for path in copied:
+            _remove(path)
+        return False
+    return True
+
+
+def store(cache_dir: str, key: str, output_path: str, max_bytes: int) -> None:
+    entries = _entries_dir(cache_dir)
+    entry = os.path.join(entries, key)
+    if os.path.exists(entry):
+        return
+    os.makedirs(entries, exist_ok=True)
+    tmp = os.path.join(cache_dir, f"tmp-{key[:16]}-{uuid.uuid4().hex}")
+    try:
+        os.makedirs(tmp)
+        _copy_artifacts(output_path, tmp)
+        with open(os.path.join(tmp, _META), "w") as f:
+            json.dump({"key": key, "size": _entry_size(tmp), "created": time.time()}, f)
+        open(os.path.join(tmp, _LAST_USED), "w").close()
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # 其他 worker 已发布同一个 key
+            pass
+    except OSError as e:
+        logging.warning(f"⚠️ 写入 Joern 缓存失败: {entry}, {e}")
+    finally:
+        _remove(tmp)
+    evict(cache_dir, max_bytes)
+
+
+def evict(cache_dir: str, max_bytes: int) -> None:
+    entries = _entries_dir(cache_dir)
+    if not os.path.isdir(entries):
+        return
+    found = []
+    for key in os.listdir(entries):
+        entry = os.path.join(entries, key)
+        try:
+            with open(os.path.join(entry, _META)) as f:
+                size = int(json.load(f)["size"])
+            last_used = os.stat(os.path.join(entry, _LAST_USED)).st_mtime_ns
+        except (OSError, ValueError, KeyError):
+            continue
+        found.append((last_used, key, size))
+    total = sum(size for _, _, size in found)
+    for _, key, size in sorted(found):
+        if total <= max_bytes:
+            break
+        trash = os.path.join(cache_dir, f"tmp-evict-{uuid.uuid4().hex}")
+        try:
+            # 先改名再删除，正在读取的 worker 只会看到条目整体消失
+            os.rename(os.path.join(entries, key), trash)
+        except OSError:
+            continue
+        _remove(trash)
+        total -= size
+
+
+def export_with_cache(code_path: str, output_path: str, language: Language, need_cdg: bool = True, overwrite: bool = False):
+    """Drop-in replacement for joern.export_with_preprocess_and_merge backed by the shared cache."""
+    cache_dir = config.JOERN_CACHE_DIR
+    max_bytes = config.JOERN_CACHE_MAX_BYTES
+    key = cache_key(code_path, language, need_cdg) if cache_dir and max_bytes > 0 else None
+    if key is None:
+        joern.export_with_preprocess_and_merge(code_path, output_path, language, need_cdg, overwrite)
+        return
+
+    has_local_export = os.path.exists(os.path.join(output_path, "cpg", "export.dot"))
+    if not overwrite and not has_local_export and restore(cache_dir, key, output_path):
+        logging.info(f"ℹ️ Joern 缓存命中: {code_path} -> {key[:12]}")
+        return
+
+    joern.export_with_preprocess_and_merge(code_path, output_path, language, need_cdg, overwrite)
+    store(cache_dir, key, output_path, max_bytes)
@@ -0,0 +1,342 @@
+"""
+Resident Joern server pool.
+
+``joern-parse`` / ``joern-export`` are thin launchers around
+``io.joern.joerncli.JoernParse`` / ``JoernExport``; starting a JVM for each
+call dominates the export time of small method sets. This module keeps
+``joern --server`` processes alive for the life of the process and runs the
+same entry points inside them over Joern's HTTP query API
+(``/query-sync``, or ``/query`` + ``/result/<uuid>`` on older builds).
+
+Any server-side failure raises JoernServerError; joern._run_joern_tool then
+reruns the command as a subprocess, so error text and retries are exactly
+those of the subprocess path.
+
+Benchmark against the subprocess path::
+
+    python joern_server.py bench cache/<hash>/pre/code cache/<hash>/post/code ...
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import config
+
+_TOOL_MAIN = {
+    "joern-parse": "io.joern.joerncli.JoernParse",
+    "joern-export": "io.joern.joerncli.JoernExport",
+}
+_OK = "<<MYSTIQUE_JOERN_OK>>"
+_ERR = "<<MYSTIQUE_JOERN_ERR>>"
+
+
+class JoernServerError(RuntimeError):
+    pass
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _scala_string(value: str) -> str:
+    # JSON 字符串字面量同时也是合法的 Scala 字符串字面量
+    return json.dumps(value, ensure_ascii=False)
+
+
+def tool_script(cmd: list[str], cwd: str) -> str:
+    """Scala snippet running a joern-parse/joern-export command line in the server JVM."""
+    tool, args = os.path.basename(cmd[0]), list(cmd[1:])
+    if tool not in _TOOL_MAIN:
+        raise JoernServerError(f"unsupported joern tool: {cmd[0]}")
+    if tool == "joern-parse" and "--output" not in args and "-o" not in args:
+        # 服务端 JVM 的工作目录不是 cwd，显式指定 cpg.bin 的位置
+        args = ["--output", os.path.join(os.path.abspath(cwd), "cpg.bin")] + args
+    arg_list = ", ".join(_scala_string(arg) for arg in args)
+    return (
+        "{\n"
+        f"  val mystiqueArgs = Array[String]({arg_list})\n"
+        "  try {\n"
+        f"    {_TOOL_MAIN[tool]}.main(mystiqueArgs)\n"
+        f"    println({_scala_string(_OK)})\n"
+        "  } catch {\n"
+        f"    case e: Throwable => println({_scala_string(_ERR + ' ')} + e)\n"
+        "  }\n"
+        "}\n"
+    )
+
+
+class JoernServer:
+    """HTTP client for one ``joern --server`` instance, optionally owning its process."""
+
+    def __init__(self, url: str, process: subprocess.Popen | None = None):
+        self.url = url.rstrip("/")
+        self.process = process
+        self._sync = True
+
+    @classmethod
+    def launch(cls, timeout: float | None = None) -> JoernServer:
+        port = _free_port()
+        process = subprocess.Popen(
+            ["joern", "--server", "--server-host", "127.0.0.1", "--server-port", str(port)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        server = cls(f"http://127.0.0.1:{port}", process)
+        deadline = time.monotonic() + (timeout or config.JOERN_SERVER_START_TIMEOUT)
+        while True:
+            if process.poll() is not None:
+                raise JoernServerError(f"joern --server exited with {process.returncode}")
+            try:
+                server.query("1", timeout=max(1.0, deadline - time.monotonic()))
+                return server
+            except (JoernServerError, OSError):
+                if time.monotonic() > deadline:
+                    server.close()
+                    raise JoernServerError(f"joern --server not ready after {timeout or config.JOERN_SERVER_START_TIMEOUT}s")
+                time.sleep(0.5)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is None or self.process.poll() is None
+
+    def _post(self, path: str, payload: dict, timeout: float) -> dict:
+        request = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+
+    def _get(self, path: str, timeout: float) -> dict:
+        with urllib.request.urlopen(self.url + path, timeout=timeout) as response:
+            return json.loads(response.read())
+
+    def query(self, code: str, timeout: float | None = None) -> str:
+        """Evaluate code in the server REPL and return its stdout."""
+        timeout = timeout or config.JOERN_SERVER_QUERY_TIMEOUT
+        try:
+            if self._sync:
+                try:
+                    result = self._post("/query-sync", {"query": code}, timeout)
+                except urllib.error.HTTPError as exc:
+                    if exc.code != 404:
+                        raise
+                    self._sync = False
+            if not self._sync:
+                result = self._query_async(code, timeout)
+        except (OSError, ValueError) as exc:
+            raise JoernServerError(f"joern server request failed: {exc}") from exc
+        if not result.get("success", False):
+            raise JoernServerError(f"joern server query failed: {result.get('err') or result.get('stderr')}")
+        return result.get("stdout", "")
+
+    def _query_async(self, code: str, timeout: float) -> dict:
+        submitted = self._post("/query", {"query": code}, timeout)
+        if not submitted.get("success", False):
+            return submitted
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            result = self._get(f"/result/{submitted['uuid']}", timeout)
+            if result.get("success", False):
+                return result
+            time.sleep(0.05)
+        raise JoernServerError(f"joern server query timed out after {timeout}s")
+
+    def run_tool(self, cmd: list[str], cwd: str) -> str:
+        stdout = self.query(tool_script(cmd, cwd))
+        if _OK not in stdout:
+            detail = stdout.split(_ERR, 1)[-1].strip() if _ERR in stdout else stdout.strip()
+            raise JoernServerError(f"{' '.join(cmd)} failed in joern server: {detail}")
+        return stdout
+
+    def close(self) -> None:
+        process, self.process = self.process, None
+        if process is None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+class JoernServerPool:
+    """Up to ``size`` servers, started on demand and lent to one caller at a time."""
+
+    def __init__(self, size: int, factory=JoernServer.launch):
+        self.size = size
+        self._factory = factory
+        self._idle: queue.Queue[JoernServer] = queue.Queue()
+        self._servers: list[JoernServer] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._launch_error: str | None = None
+
+    def _acquire(self) -> JoernServer:
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._closed:
+                    raise JoernServerError("joern server pool is closed")
+                if self._launch_error is not None:
+                    raise JoernServerError(f"joern server unavailable: {self._launch_error}")
+                start_new = len(self._servers) < self.size
+                if start_new:
+                    # 先占位，避免并发请求同时拉起超过 size 个 JVM
+                    self._servers.append(None)
+            if start_new:
+                break
+            # 限时等待：有 server 退出时其名额会空出来，需要重新判断是否拉起新的
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        try:
+            server = self._factory()
+        except Exception as exc:
+            # 拉起失败（未安装、端口/内存问题等）后不再重试，后续请求直接走子进程
+            with self._lock:
+                self._servers.remove(None)
+                self._launch_error = f"{type(exc).__name__}: {exc}"
+            raise JoernServerError(f"failed to start joern server: {exc}") from exc
+        with self._lock:
+            self._servers[self._servers.index(None)] = server
+        return server
+
+    def _release(self, server: JoernServer) -> None:
+        if server.alive and not self._closed:
+            self._idle.put(server)
+            return
+        server.close()
+        with self._lock:
+            if server in self._servers:
+                self._servers.remove(server)
+
+    def run_tool(self, cmd: list[str], cwd: str) -> str:
+        server = self._acquire()
+        try:
+            return server.run_tool(cmd, cwd)
+        finally:
+            self._release(server)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            servers = [server for server in self._servers if server is not None]
+            self._servers = []
+        for server in servers:
+            server.close()
+
+
+_pool: JoernServerPool | None = None
+_pool_lock = threading.Lock()
+_pool_disabled = False
+
+
+def get_pool() -> JoernServerPool | None:
+    """Process-wide pool, or None when MYSTIQUE_JOERN_SERVER_WORKERS is 0."""
+    global _pool
+    if _pool_disabled or config.JOERN_SERVER_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = JoernServerPool(config.JOERN_SERVER_WORKERS)
+        return _pool
+
+
+def set_pool(pool: JoernServerPool | None, disabled: bool = False) -> JoernServerPool | None:
+    """Replace the process-wide pool; returns the previous one (not closed)."""
+    global _pool, _pool_disabled
+    with _pool_lock:
+        previous, _pool, _pool_disabled = _pool, pool, disabled
+    return previous
+
+
+def close_pool() -> None:
+    previous = set_pool(None)
+    if previous is not None:
+        previous.close()
+
+
+atexit.register(close_pool)
+
+
+def _bench(code_dirs: list[str], language: str, workers: int, rounds: int) -> None:
+    import shutil
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    import joern
+    from common import Language
+
+    lang = Language[language.upper()]
+    joern.set_joern_env(config.JOERN_PATH)
+
+    def export_all(concurrent: bool) -> float:
+        out_root = tempfile.mkdtemp(prefix="joern-bench-")
+        jobs = [(code_dir, os.path.join(out_root, str(i))) for i, code_dir in enumerate(code_dirs)]
+        start = time.perf_counter()
+        try:
+            if concurrent:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    list(executor.map(lambda job: joern.export(job[0], job[1], lang, overwrite=True), jobs))
+            else:
+                for code_dir, output in jobs:
+                    joern.export(code_dir, output, lang, overwrite=True)
+            return time.perf_counter() - start
+        finally:
+            shutil.rmtree(out_root, ignore_errors=True)
+
+    set_pool(None, disabled=True)
+    subprocess_times = [export_all(False) for _ in range(rounds)]
+
+    pool = JoernServerPool(workers)
+    set_pool(pool)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        warm = [executor.submit(pool._acquire) for _ in range(workers)]
+        for future in warm:
+            pool._release(future.result())
+    startup = time.perf_counter() - start
+    try:
+        server_times = [export_all(True) for _ in range(rounds)]
+    finally:
+        close_pool()
+
+    print(f"code dirs: {len(code_dirs)}, workers: {workers}, rounds: {rounds}")
+    print("subprocess : " + ", ".join(f"{t:.1f}s" for t in subprocess_times))
+    print(f"server pool: startup {startup:.1f}s, " + ", ".join(f"{t:.1f}s" for t in server_times))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark joern export: subprocess vs resident server pool")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench")
+    bench.add_argument("code_dirs", nargs="+")
+    bench.add_argument("--language", default="C", choices=["C", "JAVA"])
+    bench.add_argument("--workers", type=int, default=3)
+    bench.add_argument("--rounds", type=int, default=2)
+    parsed = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    _bench(parsed.code_dirs, parsed.language, parsed.workers, parsed.rounds)
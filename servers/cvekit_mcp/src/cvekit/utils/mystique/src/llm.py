@@ -28,6 +28,12 @@ from common import Language
 from config import PROMPT_TEMPLATE
 from semantic_sanitizer import unescaped_newlines_in_strings
 
+try:
+    from cvekit.utils import llm_cache, tracing
+except ImportError:
+    llm_cache = None
+    tracing = None
+
 
 KERNEL_PARSE_ONLY_ANNOTATIONS = (
     "__iomem",
@@ -212,18 +218,24 @@ def llm_generate(
 
     Returns:
         LLM response text, or None on failure.
+
+    With CVEKIT_LLM_CACHE enabled, temperature-0 responses are served from
+    the shared response cache (see cvekit.utils.llm_cache).
     """
     # If tools provided, use LangChain agent
     if tools:
         api_key = config.LLM_API_KEY or config.GPT_API_KEY or "EMPTY_KEY"
         base_url = config.LLM_API_URL.replace("/chat/completions", "")
 
+        response_cache = llm_cache.langchain_cache(temperature) if llm_cache is not None else None
         llm = ChatOpenAI(
             model=config.LLM_MODEL,
             api_key=api_key,
             base_url=base_url,
             max_tokens=max_tokens,
             temperature=temperature,
+            cache=response_cache,
+            callbacks=tracing.langchain_callbacks() if tracing is not None else None,
         )
 
         prompt_template = ChatPromptTemplate.from_messages([
@@ -236,6 +248,8 @@ def llm_generate(
         agent_executor = AgentExecutor(
             agent=agent, tools=tools, verbose=True,
             max_iterations=max_iterations,
+            # 流式调用不经过 LangChain 缓存，开启缓存时改用 invoke
+            stream_runnable=response_cache is None,
         )
 
         try:
@@ -292,12 +306,41 @@ def llm_generate(
             "do_sample": True,
         }
 
+    cache_key = None
+    if llm_cache is not None and llm_cache.should_cache(temperature):
+        cache_key = llm_cache.fingerprint(
+            model=config.LLM_MODEL,
+            temperature=temperature,
+            prompt=prompt,
+            system_message=data["messages"][0]["content"] if style == "openai_chat" else "",
+            extra={"style": style, "url": config.LLM_API_URL, "max_tokens": max_tokens},
+        )
+        cached = llm_cache.lookup(cache_key)
+        if cached is not None:
+            logging.info(f"ℹ️ LLM响应缓存命中: {cache_key[:12]}")
+            return cached
+
+    result = _post_llm_request(headers, data)
+    if result is not None and cache_key is not None:
+        llm_cache.store(cache_key, result, model=config.LLM_MODEL)
+    return result
+
+
+def _post_llm_request(headers: dict, data: dict) -> str | None:
+    trace_span = tracing.start_span("llm", cat="llm", model=data.get("model")) if tracing is not None else None
     try:
         response = requests.post(config.LLM_API_URL, headers=headers, json=data, verify=False, timeout=120)
         if response.status_code != 200:
             logging.error(f"❌ LLM通用请求失败: {response.status_code} - {response.text}")
             return None
         result_data = response.json()
+        usage = result_data.get("usage") if isinstance(result_data, dict) else None
+        if trace_span is not None and isinstance(usage, dict):
+            trace_span.set(
+                prompt_tokens=int(usage.get("prompt_tokens", 0) or 0),
+                completion_tokens=int(usage.get("completion_tokens", 0) or 0),
+                total_tokens=int(usage.get("total_tokens", 0) or 0),
+            )
         if "choices" in result_data and len(result_data["choices"]) > 0:
             choice0 = result_data["choices"][0]
             if isinstance(choice0, dict):
@@ -313,6 +356,9 @@ def llm_generate(
     except Exception as e:
         logging.error(f"💥 LLM通用请求异常: {e}")
         return None
+    finally:
+        if trace_span is not None:
+            trace_span.end()
 
 
 def clean_llm_output(output: str, language: Language) -> str:
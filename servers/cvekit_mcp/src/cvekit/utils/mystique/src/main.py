@@ -13,6 +13,7 @@ Modifications for CVEKit MCP backport workflow:
 
 
 import argparse
+import contextlib
 import hashlib
 import logging
 import os
@@ -20,6 +21,9 @@ import re
 import subprocess
 import sys
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from types import SimpleNamespace
@@ -80,6 +84,12 @@ _CVEKIT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..
 if os.path.isdir(_CVEKIT_ROOT) and _CVEKIT_ROOT not in sys.path:
     sys.path.insert(0, _CVEKIT_ROOT)
 
+try:
+    from cvekit.utils import tracing  # noqa: E402  依赖上面的 sys.path 设置
+except ImportError:
+    # 脱离 cvekit 包单独运行 Mystique 时不记录 span
+    tracing = SimpleNamespace(span=lambda *args, **kwargs: contextlib.nullcontext())
+
 
 def _get_changed_lines_from_diff(file1: str, file2: str) -> tuple[set[int], set[int]]:
     """通过 git diff 获取两个文件之间的变更行号（基于 @@ 头解析，不依赖 difft）。"""
@@ -598,6 +608,34 @@ def _set_method_external_diff_lines(project: Project, changed_lines: set[int]) -
             method._external_diff_lines = filtered
 
 
+@dataclass
+class PatchbpOutcome:
+    """patchbp 单次调用的迁移明细；并发迁移多个文件时每个调用各持一份。"""
+    failed_signatures: list[str] = field(default_factory=list)
+    soft_skipped_signatures: list[str] = field(default_factory=list)
+    successful_signatures: list[str] = field(default_factory=list)
+    successful_target_names: list[str] = field(default_factory=list)
+    profile: dict[str, float] = field(default_factory=dict)
+
+
+_cache_dir_locks: dict[str, threading.Lock] = {}
+_cache_dir_locks_guard = threading.Lock()
+
+
+def _cache_dir_lock(cache_dir: str) -> threading.Lock:
+    # 输入相同的两次 patchbp 共用 cache/<hash>，并发时需要串行使用该目录
+    with _cache_dir_locks_guard:
+        return _cache_dir_locks.setdefault(os.path.abspath(cache_dir), threading.Lock())
+
+
+def _map_in_order(func, items: list, max_workers: int) -> list:
+    """用有界线程池执行 func，结果按 items 原顺序返回；max_workers <= 1 时串行。"""
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
 def patchbp(
     pre_method_file: str,
     post_method_file: str,
@@ -608,24 +646,65 @@ def patchbp(
     pre_changed_lines: set[int] | None = None,
     post_changed_lines: set[int] | None = None,
     symbol_compat_hints: str = "",
+    outcome: PatchbpOutcome | None = None,
+) -> str:
+    # patchbp.last_* 仅为兼容旧调用方保留；并发调用请传入 outcome
+    if outcome is None:
+        outcome = PatchbpOutcome()
+    try:
+        pre_method_file = _resolve_input_path(pre_method_file)
+        post_method_file = _resolve_input_path(post_method_file)
+        target_method_file = _resolve_input_path(target_method_file)
+
+        with open(pre_method_file, "r") as f:
+            pre_method_code = f.read()
+        with open(post_method_file, "r") as f:
+            post_method_code = f.read()
+        with open(target_method_file, "r") as f:
+            target_method_code = f.read()
+
+        input_hash = hashlib.md5((pre_method_code + post_method_code + target_method_code).encode()).hexdigest()[:10]
+        cache_dir = f"cache/{input_hash}"
+        with _cache_dir_lock(cache_dir):
+            return _patchbp_in_cache_dir(
+                outcome,
+                cache_dir,
+                pre_method_file,
+                post_method_file,
+                target_method_file,
+                pre_method_code,
+                post_method_code,
+                target_method_code,
+                language,
+                signatures,
+                overwrite,
+                pre_changed_lines,
+                post_changed_lines,
+                symbol_compat_hints,
+            )
+    finally:
+        patchbp.last_failed_signatures = list(outcome.failed_signatures)
+        patchbp.last_soft_skipped_signatures = list(outcome.soft_skipped_signatures)
+        patchbp.last_successful_signatures = list(outcome.successful_signatures)
+        patchbp.last_successful_target_names = list(outcome.successful_target_names)
+
+
+def _patchbp_in_cache_dir(
+    outcome: PatchbpOutcome,
+    cache_dir: str,
+    pre_method_file: str,
+    post_method_file: str,
+    target_method_file: str,
+    pre_method_code: str,
+    post_method_code: str,
+    target_method_code: str,
+    language: Language,
+    signatures: list[str] | None,
+    overwrite: bool,
+    pre_changed_lines: set[int] | None,
+    post_changed_lines: set[int] | None,
+    symbol_compat_hints: str,
 ) -> str:
-    patchbp.last_failed_signatures = []
-    patchbp.last_soft_skipped_signatures = []
-    patchbp.last_successful_signatures = []
-    patchbp.last_successful_target_names = []
-    pre_method_file = _resolve_input_path(pre_method_file)
-    post_method_file = _resolve_input_path(post_method_file)
-    target_method_file = _resolve_input_path(target_method_file)
-
-    with open(pre_method_file, "r") as f:
-        pre_method_code = f.read()
-    with open(post_method_file, "r") as f:
-        post_method_code = f.read()
-    with open(target_method_file, "r") as f:
-        target_method_code = f.read()
-
-    input_hash = hashlib.md5((pre_method_code + post_method_code + target_method_code).encode()).hexdigest()[:10]
-    cache_dir = f"cache/{input_hash}"
     os.makedirs(cache_dir, exist_ok=True)
     pre_dir = os.path.join(cache_dir, "pre")
     post_dir = os.path.join(cache_dir, "post")
@@ -654,15 +733,18 @@ def patchbp(
 
     logging.info("main.py:export_joern_graph: 为三个代码目录导出 Joern 图（CPG 和 PDG）")
     logging.info(f"  输入: pre_dir={pre_dir}, post_dir={post_dir}, target_dir={target_dir}, language={language}")
-    utils.export_joern_graph(
-        pre_dir,
-        post_dir,
-        target_dir,
-        need_cdg=False,
-        language=language,
-        multiprocess=True,
-        overwrite=overwrite,
-    )
+    started_at = time.perf_counter()
+    with tracing.span("mystique.joern_export"):
+        utils.export_joern_graph(
+            pre_dir,
+            post_dir,
+            target_dir,
+            need_cdg=False,
+            language=language,
+            multiprocess=True,
+            overwrite=overwrite,
+        )
+    outcome.profile["joern_export_seconds"] = time.perf_counter() - started_at
     logging.info(f"  输出: {pre_dir}/cpg, {pre_dir}/pdg, {post_dir}/cpg, {post_dir}/pdg, {target_dir}/cpg, {target_dir}/pdg")
 
     logging.info("main.py:Project: 创建项目对象，管理项目中的文件、导入、类、方法和字段")
@@ -765,10 +847,10 @@ def patchbp(
                 function_anchor_map=function_anchor_map,
             )
             _log_external_migration_result(external_result)
-            patchbp.last_failed_signatures = _external_failure_reasons(external_result)
+            outcome.failed_signatures = _external_failure_reasons(external_result)
             return external_result.code
         logging.warning("⚠️ 未检测到可迁移的修改函数，直接返回原始 target")
-        patchbp.last_failed_signatures = ["no modified methods detected"]
+        outcome.failed_signatures = ["no modified methods detected"]
         return target_method_code
 
     logging.info(f"🔍 本次待迁移函数数: {len(selected_signatures)}")
@@ -803,15 +885,22 @@ def patchbp(
     )
     logging.info(f"  输出: artifacts_by_signature.keys()={list(artifacts_by_signature.keys())}, prepare_failed_signatures={prepare_failed_signatures}")
 
-    replacements: list[tuple[str, int, int, str]] = []
-    solve_failed_signatures: list[str] = []
-    for cluster in clusters:
+    def solve_cluster(cluster):
         logging.info("main.py:solve_cluster_jointly: 联合求解一个方法簇的补丁问题，首先尝试直接移植，失败则使用 LLM 进行联合修复")
         logging.info(f"  输入: cluster={cluster}, language={language}")
         cluster_replacements, cluster_failed = solve_cluster_jointly(cluster, artifacts_by_signature, language, new_defines)
-        logging.info(f"  输出: cluster_replacements={cluster_replacements}, cluster_failed={cluster_failed}")
-        replacements.extend(cluster_replacements)
-        solve_failed_signatures.extend(cluster_failed)
+        logging.info(f"  输出: cluster={cluster}, cluster_replacements={cluster_replacements}, cluster_failed={cluster_failed}")
+        return cluster_replacements, cluster_failed
+
+    # 各簇只读 artifacts_by_signature、只写各自的方法目录，可并发求解；结果按簇顺序合并
+    replacements: list[tuple[str, int, int, str]] = []
+    solve_failed_signatures: list[str] = []
+    started_at = time.perf_counter()
+    with tracing.span("mystique.solve_clusters", clusters=len(clusters)):
+        for cluster_replacements, cluster_failed in _map_in_order(solve_cluster, clusters, config.CLUSTER_WORKERS):
+            replacements.extend(cluster_replacements)
+            solve_failed_signatures.extend(cluster_failed)
+    outcome.profile["solve_clusters_seconds"] = time.perf_counter() - started_at
 
     if not replacements:
         if language == Language.C:
@@ -835,14 +924,14 @@ def patchbp(
                 post_method_code,
                 target_method_code,
             )
-            patchbp.last_failed_signatures = sorted(set(
+            outcome.failed_signatures = sorted(set(
                 method_failures
                 + _external_failure_reasons(external_result)
             ))
-            patchbp.last_soft_skipped_signatures = soft_skips
+            outcome.soft_skipped_signatures = soft_skips
             return external_result.code
         logging.warning("❌ 所有函数迁移失败，返回原始 target")
-        patchbp.last_failed_signatures = sorted(set(
+        outcome.failed_signatures = sorted(set(
             prepare_failed_signatures + solve_failed_signatures
         )) or ["all method migrations failed"]
         return target_method_code
@@ -862,9 +951,9 @@ def patchbp(
         artifacts_by_signature,
         language,
     )
-    patchbp.last_successful_signatures = successful_signatures
-    patchbp.last_successful_target_names = sorted(successful_target_names)
-    logging.info("成功迁移 target 函数: %s", patchbp.last_successful_target_names)
+    outcome.successful_signatures = successful_signatures
+    outcome.successful_target_names = sorted(successful_target_names)
+    logging.info("成功迁移 target 函数: %s", outcome.successful_target_names)
 
     if language == Language.C:
         external_result = migrate_external_changes(
@@ -892,8 +981,8 @@ def patchbp(
     else:
         failed_signatures = sorted(set(prepare_failed_signatures + solve_failed_signatures))
         soft_skips = []
-    patchbp.last_failed_signatures = failed_signatures
-    patchbp.last_soft_skipped_signatures = soft_skips
+    outcome.failed_signatures = failed_signatures
+    outcome.soft_skipped_signatures = soft_skips
     return patched_code
 
 
@@ -948,18 +1037,15 @@ def _write_result_file(result: str, target_path: str, output_path: str | None =
 
 
 def _git_get_file_content(repo_path: str, ref: str, file_path: str, warn: bool = True) -> str | None:
-    try:
-        result = subprocess.run(
-            ["git", "-C", repo_path, "show", f"{ref}:{file_path}"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        return result.stdout
-    except subprocess.CalledProcessError:
+    from cvekit.utils.git_object_reader import get_reader
+
+    content = get_reader(repo_path).read_text(ref, file_path)
+    if content is None:
         if warn:
             logging.warning(f"无法获取文件内容: {repo_path}:{file_path} at {ref}")
         return None
+    # 与原先 git show + text=True 的通用换行处理保持一致
+    return content.replace("\r\n", "\n").replace("\r", "\n")
 
 
 def _git_get_commit_changed_files(repo_path: str, commit_id: str) -> list[dict]:
@@ -1945,7 +2031,7 @@ def _try_apply_patch(
     return FastPathResult(True, patch_text=patch_to_append)
 
 
-_mystique_env_initialized = False
+_mystique_log_handlers: list[logging.Handler] = []
 _mystique_logfile: str | None = None
 
 
@@ -1954,23 +2040,334 @@ def _init_mystique_env(
     cve_id: str | None = None,
     timestamp: str | None = None,
 ) -> str | None:
-    global _mystique_env_initialized, _mystique_logfile
-    if _mystique_env_initialized:
+    global _mystique_log_handlers, _mystique_logfile
+    root = logging.getLogger()
+    # 只在本函数装上的 handler 仍挂在 root logger 上时复用；常驻 cvekit worker 每次调用结束会
+    # 移除调用中新增的 handler 并恢复环境变量，下一次调用需要按自己的 CVE 和时间戳重新初始化
+    if _mystique_log_handlers and all(handler in root.handlers for handler in _mystique_log_handlers):
         return _mystique_logfile
     log_level = logging.DEBUG if debug else logging.INFO
     joern.set_joern_env(config.JOERN_PATH)
     timestamp = timestamp or datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
     _mystique_logfile = _build_mystique_log_path(cve_id, timestamp)
+    existing = root.handlers[:]
     log.init_logger(
-        logging.getLogger(),
+        root,
         log_level,
         _mystique_logfile,
         exact_path=True,
     )
-    _mystique_env_initialized = True
+    _mystique_log_handlers = [handler for handler in root.handlers if handler not in existing]
     return _mystique_logfile
 
 
+@dataclass
+class _FileOutcome:
+    """main_from_repo 中单个改动文件的产出，最终按 changed_files 顺序合并。"""
+    results: list[dict] = field(default_factory=list)
+    patch_parts: list[str] = field(default_factory=list)
+    manual_review: bool = False
+    unresolved_text_config: bool = False
+    profile: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class _MethodFileJob:
+    """一个需要 patchbp 函数级迁移的文件，字段在进入线程池之前全部确定。"""
+    source_path: str
+    target_file_path: str
+    pre_content: str
+    post_content: str
+    target_content: str
+    file_patch: str | None
+    symbol_hints: str
+    signatures: list[str] | None
+    file_hunks: dict[str, list[PatchHunk]]
+    file_hunk_ranges: dict[str, tuple[set[int], set[int]]]
+    target_path: str
+    target_ref: str
+    result_dir: str
+
+
+def _migrate_method_file(job: _MethodFileJob) -> _FileOutcome:
+    """用 patchbp 迁移单个文件，再做格式归一化、生成 diff 和 checkpatch 精修。
+
+    只读 job 里的数据，只写 result_dir 下以源文件路径命名的结果文件，
+    因此不同文件的 job 可以并发执行。
+    """
+    outcome = _FileOutcome()
+    source_path = job.source_path
+    target_file_path = job.target_file_path
+    pre_content = job.pre_content
+    post_content = job.post_content
+    target_content = job.target_content
+    file_patch = job.file_patch
+    signatures = job.signatures
+    file_hunks = job.file_hunks
+    file_hunk_ranges = job.file_hunk_ranges
+    target_path = job.target_path
+    target_ref = job.target_ref
+    result_dir = job.result_dir
+
+    language = detect_language(source_path)
+    file_ext = ".java" if language == Language.JAVA else ".c"
+
+    with tempfile.TemporaryDirectory(prefix="mystique_repo_") as tmpdir:
+        pre_file = os.path.join(tmpdir, f"1.pre{file_ext}")
+        post_file = os.path.join(tmpdir, f"2.post{file_ext}")
+        target_file = os.path.join(tmpdir, f"3.target{file_ext}")
+
+        with open(pre_file, "w") as f:
+            f.write(pre_content)
+        with open(post_file, "w") as f:
+            f.write(post_content)
+        with open(target_file, "w") as f:
+            f.write(target_content)
+
+        # Determine signatures: user-provided > difft > git patch hunk > auto-detect
+        if signatures is not None:
+            file_signatures = _normalize_signatures(signatures)
+        else:
+            # Try git diff + @@-based parsing first
+            difft_pre_changed, difft_post_changed = _get_changed_lines_from_diff(pre_file, post_file)
+            if difft_pre_changed or difft_post_changed:
+                logging.info(f"  diff 检测到修改: pre行 {sorted(difft_pre_changed)}, post行 {sorted(difft_post_changed)}")
+                modified_funcs = (
+                    _find_functions_containing_lines(pre_content, difft_pre_changed, language)
+                    | _find_functions_containing_lines(post_content, difft_post_changed, language)
+                )
+                if modified_funcs:
+                    virtual_file_name = os.path.basename(target_file)
+                    file_signatures = [f"{virtual_file_name}#{fn}" for fn in sorted(modified_funcs)]
+                    logging.info(f"  从 diff + func_parser 解析到函数: {sorted(modified_funcs)}")
+                else:
+                    file_signatures = None
+            elif source_path in file_hunks:
+                # Fallback to git patch hunk + func_parser
+                modified_funcs = _find_functions_by_hunk_lines(
+                    pre_content, file_hunks[source_path], language
+                )
+                if modified_funcs:
+                    virtual_file_name = os.path.basename(target_file)
+                    file_signatures = [f"{virtual_file_name}#{fn}" for fn in sorted(modified_funcs)]
+                    logging.info(f"  从 git patch hunk + func_parser 解析到函数: {sorted(modified_funcs)}")
+                else:
+                    file_signatures = None
+            elif source_path in file_hunk_ranges:
+                # Fallback to line-based function detection
+                pre_changed, post_changed = file_hunk_ranges[source_path]
+                modified_funcs = (
+                    _find_functions_containing_lines(pre_content, pre_changed, language)
+                    | _find_functions_containing_lines(post_content, post_changed, language)
+                )
+                if modified_funcs:
+                    virtual_file_name = os.path.basename(target_file)
+                    file_signatures = [
+                        f"{virtual_file_name}#{fn}"
+                        for fn in sorted(modified_funcs)
+                    ]
+                    logging.info(f"  从 git format-patch + tree-sitter 解析到函数: {sorted(modified_funcs)}")
+                else:
+                    file_signatures = None
+            else:
+                file_signatures = None
+
+        logging.info(f"开始迁移文件: {source_path}")
+        logging.info(f"  函数签名: {file_signatures}")
+        pre_changed = file_hunk_ranges.get(source_path, (set(), set()))[0] if file_hunk_ranges else None
+        post_changed = file_hunk_ranges.get(source_path, (set(), set()))[1] if file_hunk_ranges else None
+        started_at = time.perf_counter()
+        patchbp_outcome = PatchbpOutcome()
+        with tracing.span("mystique.patchbp", file=source_path):
+            patched_code = patchbp(
+                pre_file,
+                post_file,
+                target_file,
+                language,
+                signatures=file_signatures,
+                overwrite=False,
+                pre_changed_lines=pre_changed,
+                post_changed_lines=post_changed,
+                symbol_compat_hints=job.symbol_hints,
+                outcome=patchbp_outcome,
+            )
+        failed_signatures = list(patchbp_outcome.failed_signatures)
+        soft_skipped_signatures = list(patchbp_outcome.soft_skipped_signatures)
+        successful_target_names = list(patchbp_outcome.successful_target_names)
+        outcome.profile.update(patchbp_outcome.profile)
+        outcome.profile["patchbp_seconds"] = time.perf_counter() - started_at
+
+    safe_name = source_path.replace("/", "_").replace(".", "_")
+
+    # Detect whether any actual changes were made — if the patched code is
+    # equivalent to the target after normalisation, all functions in this
+    # file were already ported (equivalent changes already present).
+    need_not_ported = (
+        format.normalize(patched_code) == format.normalize(target_content)
+    )
+
+    if need_not_ported:
+        logging.info(
+            "⚡ 文件 %s 所有函数已合入目标,无需移植 (need not ported)",
+            source_path,
+        )
+        outcome.results.append({
+            "source_file": source_path,
+            "target_file": target_file_path,
+            "patched_file": None,
+            "language": language.value,
+            "status": "need_not_ported",
+            "soft_skipped_signatures": soft_skipped_signatures,
+            "warning": (
+                f"soft-skipped header signatures: {soft_skipped_signatures}"
+                if soft_skipped_signatures else ""
+            ),
+        })
+        return outcome
+
+    unresolved_issue = _unresolved_method_issue(failed_signatures) if failed_signatures else None
+    if unresolved_issue:
+        logging.warning(
+            "文件 %s 存在未覆盖的 Mystique 迁移项，将导出已迁移部分并作为 issue 记录: %s",
+            source_path,
+            failed_signatures,
+        )
+
+    # 1. Save raw LLM output (before any formatting)
+    patched_code = restore_target_signature_modifiers(
+        patched_code, target_content, file_signatures
+    )
+    # Repair the common LLM error that turns an escaped "\n" into a real newline.
+    patched_code = repair_broken_string_newlines(patched_code)
+
+    raw_path = os.path.join(result_dir, f"0_raw_{safe_name}{file_ext}")
+    with open(raw_path, "w") as f:
+        f.write(patched_code)
+
+    # 2. Final patched file (raw output used directly)
+    result_path = os.path.join(result_dir, f"2_patched_{safe_name}{file_ext}")
+    with open(result_path, "w") as f:
+        f.write(patched_code)
+
+    # 2.5. Normalize formatting to match target style via LLM
+    started_at = time.perf_counter()
+    with tracing.span("mystique.normalize", file=source_path):
+        patched_code = _normalize_patched_formatting(
+            patched_code,
+            target_content,
+            language,
+            file_signatures,
+            successful_target_names,
+            target_path,
+            target_file_path,
+            file_patch,
+        )
+    outcome.profile["normalize_seconds"] = time.perf_counter() - started_at
+
+    # 2.6. Save normalized patched file (for verification)
+    normalized_path = os.path.join(result_dir, f"3_normalized_{safe_name}{file_ext}")
+    with open(normalized_path, "w") as f:
+        f.write(patched_code)
+
+    # 3. Generate unified diff
+    patch_diff = _generate_unified_patch(
+        target_path, target_ref, target_file_path, patched_code,
+        simplified_target=target_content,
+    )
+
+    # 4.  checkpatch.pl检测patch，提取可通过空白调整修复的问题,将诊断反馈给现有 changed-region 格式器
+    checkpatch_path = os.path.join(target_path, "scripts", "checkpatch.pl")
+    if (
+        patch_diff
+        and config.FORMAT_NORMALIZATION_MODE == "changed_regions"
+        and os.path.isfile(checkpatch_path)
+    ):
+        from format_pipeline import refine_with_checkpatch_pipeline
+
+        def generate_refined_patch(refined_code: str) -> str | None:
+            return _generate_unified_patch(
+                target_path,
+                target_ref,
+                target_file_path,
+                refined_code,
+                simplified_target=target_content,
+            )
+
+        started_at = time.perf_counter()
+        with tracing.span("mystique.checkpatch", file=source_path):
+            refinement = refine_with_checkpatch_pipeline(
+                patched_code,
+                patch_diff,
+                target_content,
+                target_path,
+                target_file_path,
+                file_signatures,
+                successful_target_names,
+                file_patch,
+                generate_refined_patch,
+            )
+        outcome.profile["checkpatch_seconds"] = time.perf_counter() - started_at
+        if refinement.changed:
+            patched_code = refinement.code
+            patch_diff = refinement.diff
+            with open(normalized_path, "w") as f:
+                f.write(patched_code)
+    if patch_diff:
+        outcome.patch_parts.append(patch_diff)
+        logging.info(f"文件 {source_path} 迁移完成，已生成 diff")
+    else:
+        # If Mystique produced code that normalizes back to the current
+        # target content, this file is effectively already ported. Report
+        # it as need_not_ported instead of a synthetic "ported" result
+        # without a patch, otherwise the batch adapter will misclassify the
+        # whole case as failed.
+        if format.normalize(patched_code) == format.normalize(target_content):
+            logging.info(
+                "文件 %s 迁移后与目标代码等价，无需导出 diff (need not ported)",
+                source_path,
+            )
+            result_item = {
+                "source_file": source_path,
+                "target_file": target_file_path,
+                "patched_file": None,
+                "language": language.value,
+                "status": "need_not_ported",
+            }
+            if failed_signatures:
+                result_item["failed_signatures"] = failed_signatures
+                result_item["issues"] = [unresolved_issue]
+                result_item["warning"] = unresolved_issue["reason"]
+            outcome.results.append(result_item)
+            return outcome
+        logging.warning(f"文件 {source_path} 迁移完成，但无法生成 diff")
+
+    logging.info(f"文件 {source_path} 迁移完成，结果写入: {result_path}")
+    outcome.results.append(_ported_file_result(
+        source_path,
+        target_file_path,
+        result_path,
+        language.value,
+        soft_skipped_signatures,
+        failed_signatures,
+    ))
+    return outcome
+
+
+def _run_method_file_job(job: _MethodFileJob) -> _FileOutcome:
+    started_at = time.perf_counter()
+    with tracing.span("mystique.migrate_file", file=job.source_path):
+        outcome = _migrate_method_file(job)
+    outcome.profile["total_seconds"] = time.perf_counter() - started_at
+    logging.info(
+        "文件 %s 各阶段耗时: %s",
+        job.source_path,
+        ", ".join(f"{name}={seconds:.2f}s" for name, seconds in outcome.profile.items()),
+    )
+    for result in outcome.results:
+        result["profile"] = dict(outcome.profile)
+    return outcome
+
+
 def main_from_repo(
     project_dir: str,
     target_path: str,
@@ -2093,13 +2490,15 @@ def main_from_repo(
         file_hunk_ranges,
     )
 
-    all_patch_parts: list[str] = []
+    # 第一阶段按顺序完成分类、取文件内容、fast path 和符号兼容性线索；
+    # 需要函数级迁移的文件先收集成 job，每个文件的产出放在 changed_files 顺序的槽位里
+    file_outcomes: list[_FileOutcome] = []
+    method_jobs: list[tuple[int, _MethodFileJob]] = []
     file_symbol_hints: dict[str, str] = {}
-    has_required_unresolved_text_config = False
-    has_required_manual_review = False
-    results = []
     for file_info in changed_files:
         source_path = file_info["new_path"]
+        outcome = _FileOutcome()
+        file_outcomes.append(outcome)
 
         # Skip files already handled by target config layout adapter
         if skip_file_paths and source_path in skip_file_paths:
@@ -2124,13 +2523,13 @@ def main_from_repo(
                 source_path,
                 reason,
             )
-            results.append(_manual_review_result(
+            outcome.results.append(_manual_review_result(
                 source_path,
                 target_file_path,
                 "need_human",
                 reason,
             ))
-            has_required_manual_review = True
+            outcome.manual_review = True
             continue
 
         if status in ("A", "D"):
@@ -2143,9 +2542,9 @@ def main_from_repo(
             ) if file_patch else FastPathResult(False)
             if fast_result.ok and fast_result.patch_text:
                 # 如果direct apply成功
-                all_patch_parts.append(fast_result.patch_text)
+                outcome.patch_parts.append(fast_result.patch_text)
                 action = "新增" if status == "A" else "删除"
-                results.append({
+                outcome.results.append({
                     "source_file": source_path,
                     "target_file": source_path,
                     "patched_file": f"(原始{action}文件补丁直接应用)",
@@ -2162,7 +2561,7 @@ def main_from_repo(
                         action,
                         source_path,
                     )
-                    results.append(optional_direct_apply_issue_result(source_path, source_path))
+                    outcome.results.append(optional_direct_apply_issue_result(source_path, source_path))
                 else:
                     logging.warning(
                         "无法应用%s文件的补丁: %s，跳过",
@@ -2181,25 +2580,25 @@ def main_from_repo(
         target_file_path = _git_find_file_in_target(target_path, target_ref, source_path)
         if not target_file_path:
             logging.warning(f"目标仓库中未找到对应文件: {source_path}，需要人工确认")
-            results.append(_manual_review_result(
+            outcome.results.append(_manual_review_result(
                 source_path,
                 source_path,
                 "need_human",
                 "target file not found or ambiguous in target repository",
             ))
-            has_required_manual_review = True
+            outcome.manual_review = True
             continue
 
         target_content = _git_get_file_content(target_path, target_ref, target_file_path)
         if not target_content:
             logging.warning(f"无法获取目标仓库文件内容: {target_file_path}，需要人工确认")
-            results.append(_manual_review_result(
+            outcome.results.append(_manual_review_result(
                 source_path,
                 target_file_path,
                 "need_human",
                 "unable to read target file content",
             ))
-            has_required_manual_review = True
+            outcome.manual_review = True
             continue
 
         file_patch = _extract_file_patch(patch_text, source_path) if patch_text else None
@@ -2213,8 +2612,8 @@ def main_from_repo(
                 patch_defined_symbols,
             ) if file_patch else FastPathResult(False)
             if fast_result.ok and fast_result.patch_text:
-                all_patch_parts.append(fast_result.patch_text)
-                results.append({
+                outcome.patch_parts.append(fast_result.patch_text)
+                outcome.results.append({
                     "source_file": source_path,
                     "target_file": target_file_path,
                     "patched_file": "(original patch applied cleanly)",
@@ -2226,7 +2625,7 @@ def main_from_repo(
                     "可选文档/元数据补丁无法直接应用，跳过该文件: %s",
                     source_path,
                 )
-                results.append(optional_direct_apply_issue_result(source_path, target_file_path))
+                outcome.results.append(optional_direct_apply_issue_result(source_path, target_file_path))
                 continue
             if fast_result.symbol_hints:
                 file_symbol_hints[source_path] = fast_result.symbol_hints
@@ -2305,242 +2704,62 @@ def main_from_repo(
                         result_dir=result_dir,
                         generate_patch=generate_relocated_text_config_patch,
                     )
-            results.append(result)
+            outcome.results.append(result)
             if patch_diff:
-                all_patch_parts.append(patch_diff)
+                outcome.patch_parts.append(patch_diff)
             if has_unresolved:
-                has_required_unresolved_text_config = True
-            continue
-
-        language = detect_language(source_path)
-        file_ext = ".java" if language == Language.JAVA else ".c"
-
-        with tempfile.TemporaryDirectory(prefix="mystique_repo_") as tmpdir:
-            pre_file = os.path.join(tmpdir, f"1.pre{file_ext}")
-            post_file = os.path.join(tmpdir, f"2.post{file_ext}")
-            target_file = os.path.join(tmpdir, f"3.target{file_ext}")
-
-            with open(pre_file, "w") as f:
-                f.write(pre_content)
-            with open(post_file, "w") as f:
-                f.write(post_content)
-            with open(target_file, "w") as f:
-                f.write(target_content)
-
-            # Determine signatures: user-provided > difft > git patch hunk > auto-detect
-            if signatures is not None:
-                file_signatures = _normalize_signatures(signatures)
-            else:
-                # Try git diff + @@-based parsing first
-                difft_pre_changed, difft_post_changed = _get_changed_lines_from_diff(pre_file, post_file)
-                if difft_pre_changed or difft_post_changed:
-                    logging.info(f"  diff 检测到修改: pre行 {sorted(difft_pre_changed)}, post行 {sorted(difft_post_changed)}")
-                    modified_funcs = (
-                        _find_functions_containing_lines(pre_content, difft_pre_changed, language)
-                        | _find_functions_containing_lines(post_content, difft_post_changed, language)
-                    )
-                    if modified_funcs:
-                        virtual_file_name = os.path.basename(target_file)
-                        file_signatures = [f"{virtual_file_name}#{fn}" for fn in sorted(modified_funcs)]
-                        logging.info(f"  从 diff + func_parser 解析到函数: {sorted(modified_funcs)}")
-                    else:
-                        file_signatures = None
-                elif source_path in file_hunks:
-                    # Fallback to git patch hunk + func_parser
-                    modified_funcs = _find_functions_by_hunk_lines(
-                        pre_content, file_hunks[source_path], language
-                    )
-                    if modified_funcs:
-                        virtual_file_name = os.path.basename(target_file)
-                        file_signatures = [f"{virtual_file_name}#{fn}" for fn in sorted(modified_funcs)]
-                        logging.info(f"  从 git patch hunk + func_parser 解析到函数: {sorted(modified_funcs)}")
-                    else:
-                        file_signatures = None
-                elif source_path in file_hunk_ranges:
-                    # Fallback to line-based function detection
-                    pre_changed, post_changed = file_hunk_ranges[source_path]
-                    modified_funcs = (
-                        _find_functions_containing_lines(pre_content, pre_changed, language)
-                        | _find_functions_containing_lines(post_content, post_changed, language)
-                    )
-                    if modified_funcs:
-                        virtual_file_name = os.path.basename(target_file)
-                        file_signatures = [
-                            f"{virtual_file_name}#{fn}"
-                            for fn in sorted(modified_funcs)
-                        ]
-                        logging.info(f"  从 git format-patch + tree-sitter 解析到函数: {sorted(modified_funcs)}")
-                    else:
-                        file_signatures = None
-                else:
-                    file_signatures = None
-
-            logging.info(f"开始迁移文件: {source_path}")
-            logging.info(f"  函数签名: {file_signatures}")
-            pre_changed = file_hunk_ranges.get(source_path, (set(), set()))[0] if file_hunk_ranges else None
-            post_changed = file_hunk_ranges.get(source_path, (set(), set()))[1] if file_hunk_ranges else None
-            patched_code = patchbp(
-                pre_file,
-                post_file,
-                target_file,
-                language,
-                signatures=file_signatures,
-                overwrite=False,
-                pre_changed_lines=pre_changed,
-                post_changed_lines=post_changed,
-                symbol_compat_hints=file_symbol_hints.get(source_path, ""),
-            )
-            failed_signatures = list(getattr(patchbp, "last_failed_signatures", []) or [])
-            soft_skipped_signatures = list(getattr(patchbp, "last_soft_skipped_signatures", []) or [])
-            successful_target_names = list(getattr(patchbp, "last_successful_target_names", []) or [])
-
-        safe_name = source_path.replace("/", "_").replace(".", "_")
-
-        # Detect whether any actual changes were made — if the patched code is
-        # equivalent to the target after normalisation, all functions in this
-        # file were already ported (equivalent changes already present).
-        need_not_ported = (
-            format.normalize(patched_code) == format.normalize(target_content)
-        )
-
-        if need_not_ported:
-            logging.info(
-                "⚡ 文件 %s 所有函数已合入目标,无需移植 (need not ported)",
-                source_path,
-            )
-            results.append({
-                "source_file": source_path,
-                "target_file": target_file_path,
-                "patched_file": None,
-                "language": language.value,
-                "status": "need_not_ported",
-                "soft_skipped_signatures": soft_skipped_signatures,
-                "warning": (
-                    f"soft-skipped header signatures: {soft_skipped_signatures}"
-                    if soft_skipped_signatures else ""
-                ),
-            })
+                outcome.unresolved_text_config = True
             continue
 
-        unresolved_issue = _unresolved_method_issue(failed_signatures) if failed_signatures else None
-        if unresolved_issue:
-            logging.warning(
-                "文件 %s 存在未覆盖的 Mystique 迁移项，将导出已迁移部分并作为 issue 记录: %s",
-                source_path,
-                failed_signatures,
-            )
-
-        # 1. Save raw LLM output (before any formatting)
-        patched_code = restore_target_signature_modifiers(
-            patched_code, target_content, file_signatures
-        )
-        # Repair the common LLM error that turns an escaped "\n" into a real newline.
-        patched_code = repair_broken_string_newlines(patched_code)
-
-        raw_path = os.path.join(result_dir, f"0_raw_{safe_name}{file_ext}")
-        with open(raw_path, "w") as f:
-            f.write(patched_code)
-
-        # 2. Final patched file (raw output used directly)
-        result_path = os.path.join(result_dir, f"2_patched_{safe_name}{file_ext}")
-        with open(result_path, "w") as f:
-            f.write(patched_code)
-
-        # 2.5. Normalize formatting to match target style via LLM
-        patched_code = _normalize_patched_formatting(
-            patched_code,
-            target_content,
-            language,
-            file_signatures,
-            successful_target_names,
-            target_path,
-            target_file_path,
-            file_patch,
-        )
-
-        # 2.6. Save normalized patched file (for verification)
-        normalized_path = os.path.join(result_dir, f"3_normalized_{safe_name}{file_ext}")
-        with open(normalized_path, "w") as f:
-            f.write(patched_code)
-
-        # 3. Generate unified diff
-        patch_diff = _generate_unified_patch(
-            target_path, target_ref, target_file_path, patched_code,
-            simplified_target=target_content,
+        method_jobs.append((len(file_outcomes) - 1, _MethodFileJob(
+            source_path=source_path,
+            target_file_path=target_file_path,
+            pre_content=pre_content,
+            post_content=post_content,
+            target_content=target_content,
+            file_patch=file_patch,
+            symbol_hints=file_symbol_hints.get(source_path, ""),
+            signatures=signatures,
+            file_hunks=file_hunks,
+            file_hunk_ranges=file_hunk_ranges,
+            target_path=target_path,
+            target_ref=target_ref,
+            result_dir=result_dir,
+        )))
+
+    # 第二阶段：函数级迁移主要耗在 LLM 往返和 Joern 导出上，放进有界线程池并发执行。
+    # patch_defined_symbols / file_symbol_hints 在第一阶段已算好，job 之间只读共享；
+    # 映射到同一目标文件（如共享头文件）的 job 在同一个任务里按原顺序执行
+    job_groups: dict[str, list[tuple[int, _MethodFileJob]]] = {}
+    for slot, job in method_jobs:
+        job_groups.setdefault(job.target_file_path, []).append((slot, job))
+    started_at = time.perf_counter()
+    for group_outcomes in _map_in_order(
+        lambda group: [(slot, _run_method_file_job(job)) for slot, job in group],
+        list(job_groups.values()),
+        config.FILE_WORKERS,
+    ):
+        for slot, outcome in group_outcomes:
+            file_outcomes[slot] = outcome
+    if method_jobs:
+        logging.info(
+            "函数级迁移完成: %d 个文件, %d 组, workers=%d, 耗时 %.2fs",
+            len(method_jobs),
+            len(job_groups),
+            config.FILE_WORKERS,
+            time.perf_counter() - started_at,
         )
 
-        # 4.  checkpatch.pl检测patch，提取可通过空白调整修复的问题,将诊断反馈给现有 changed-region 格式器
-        checkpatch_path = os.path.join(target_path, "scripts", "checkpatch.pl")
-        if (
-            patch_diff
-            and config.FORMAT_NORMALIZATION_MODE == "changed_regions"
-            and os.path.isfile(checkpatch_path)
-        ):
-            from format_pipeline import refine_with_checkpatch_pipeline
-
-            def generate_refined_patch(refined_code: str) -> str | None:
-                return _generate_unified_patch(
-                    target_path,
-                    target_ref,
-                    target_file_path,
-                    refined_code,
-                    simplified_target=target_content,
-                )
-
-            refinement = refine_with_checkpatch_pipeline(
-                patched_code,
-                patch_diff,
-                target_content,
-                target_path,
-                target_file_path,
-                file_signatures,
-                successful_target_names,
-                file_patch,
-                generate_refined_patch,
-            )
-            if refinement.changed:
-                patched_code = refinement.code
-                patch_diff = refinement.diff
-                with open(normalized_path, "w") as f:
-                    f.write(patched_code)
-        if patch_diff:
-            all_patch_parts.append(patch_diff)
-            logging.info(f"文件 {source_path} 迁移完成，已生成 diff")
-        else:
-            # If Mystique produced code that normalizes back to the current
-            # target content, this file is effectively already ported. Report
-            # it as need_not_ported instead of a synthetic "ported" result
-            # without a patch, otherwise the batch adapter will misclassify the
-            # whole case as failed.
-            if format.normalize(patched_code) == format.normalize(target_content):
-                logging.info(
-                    "文件 %s 迁移后与目标代码等价，无需导出 diff (need not ported)",
-                    source_path,
-                )
-                result_item = {
-                    "source_file": source_path,
-                    "target_file": target_file_path,
-                    "patched_file": None,
-                    "language": language.value,
-                    "status": "need_not_ported",
-                }
-                if failed_signatures:
-                    result_item["failed_signatures"] = failed_signatures
-                    result_item["issues"] = [unresolved_issue]
-                    result_item["warning"] = unresolved_issue["reason"]
-                results.append(result_item)
-                continue
-            logging.warning(f"文件 {source_path} 迁移完成，但无法生成 diff")
+    all_patch_parts: list[str] = []
+    has_required_unresolved_text_config = False
+    has_required_manual_review = False
+    results = []
+    for outcome in file_outcomes:
+        results.extend(outcome.results)
+        all_patch_parts.extend(outcome.patch_parts)
+        has_required_unresolved_text_config |= outcome.unresolved_text_config
+        has_required_manual_review |= outcome.manual_review
 
-        logging.info(f"文件 {source_path} 迁移完成，结果写入: {result_path}")
-        results.append(_ported_file_result(
-            source_path,
-            target_file_path,
-            result_path,
-            language.value,
-            soft_skipped_signatures,
-            failed_signatures,
-        ))
 
     if (
         all_patch_parts
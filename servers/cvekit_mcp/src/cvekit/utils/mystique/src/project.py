@@ -25,6 +25,7 @@ import networkx as nx
 from tree_sitter import Node
 
 import ast_parser
+import compact_pdg
 import config
 import format
 import joern
@@ -48,12 +49,20 @@ class ProjectJoern:
             self.pdgs_by_name_file[key].sort(key=lambda x: x[0])
 
     def build_pdgs(self, pdg_dir: str):
-        dot_names = os.listdir(pdg_dir)
+        # 优先 mmap 导出后写好的 pdg.pack，缺失或过期时逐个解析 dot
+        packed = compact_pdg.load_pack(pdg_dir)
+        if packed is None:
+            entries = [(dot, None, None) for dot in os.listdir(pdg_dir)]
+        else:
+            entries = [(entry.file, entry.graph, entry.error) for entry in packed]
         pdgs: dict[tuple[int, str, str], joern.PDG] = {}
-        for dot in dot_names:
+        for dot, graph, error in entries:
             dot_path = os.path.join(pdg_dir, dot)
+            if error is not None:
+                logging.warning(f"❌ PDG 加载失败: {dot_path}, {error}")
+                continue
             try:
-                pdg = joern.PDG(pdg_path=dot_path)
+                pdg = joern.PDG(pdg_path=dot_path, graph=graph)
             except Exception as e:
                 logging.warning(f"❌ PDG 加载失败: {dot_path}, {e}")
                 continue
@@ -625,8 +634,7 @@ class Method:
         line_pdg_pairs = {}
         if self.pdg is None:
             return None
-        for node_id in self.pdg.g.nodes():
-            node = self.pdg.get_node(node_id)
+        for node in self.pdg.nodes():
             if node.line_number is None:
                 continue
             line_pdg_pairs[node.line_number] = node
@@ -637,8 +645,7 @@ class Method:
         rel_line_pdg_pairs = {}
         if self.pdg is None:
             return None
-        for node_id in self.pdg.g.nodes():
-            node = self.pdg.get_node(node_id)
+        for node in self.pdg.nodes():
             if node.line_number is None:
                 continue
             rel_line_pdg_pairs[node.line_number - self.start_line + 1] = node
@@ -1336,6 +1343,7 @@ class Method:
     def backward_slice(criteria_lines: set[int], criteria_nodes: list[PDGNode], criteria_identifier: dict[int, set[str]], all_nodes: dict[int, list[PDGNode]], level: int) -> tuple[set[int], list[PDGNode]]:
         result_lines = criteria_lines.copy()
         result_nodes = criteria_nodes.copy()
+        result_ids = {node.node_id for node in result_nodes}
         if level == 0:
             level = sys.maxsize
 
@@ -1349,35 +1357,42 @@ class Method:
                         continue
                     result_lines.add(int(pred_node.line_number))
                     result_nodes.append(pred_node)
+                    result_ids.add(pred_node.node_id)
 
-        # DDG 切片
+        # DDG 切片，在 PDG 数组下标上做 BFS
         for sline in criteria_lines:
             for node in all_nodes[sline]:
                 if node.type == "METHOD" or "METHOD_RETURN" in ast.literal_eval(node.type):
                     continue
-                visited = set()
-                queue: deque[tuple[PDGNode, int]] = deque([(node, 0)])
+                pdg = node.pdg
+                visited: set[int] = set()
+                queue: deque[tuple[int, int]] = deque([(node.index, 0)])
                 while queue:
-                    node, depth = queue.popleft()
-                    if node not in visited:
-                        visited.add(node)
-                        if node not in result_nodes:
-                            result_nodes.append(node)
-                        if node.line_number is not None:
-                            result_lines.add(node.line_number)
-                        if depth < level:
-                            for pred_node, edge in node.pred_ddg:
-                                if pred_node.line_number is None or int(pred_node.line_number) == sys.maxsize or node.line_number is None:
-                                    continue
-                                if pred_node.line_number > node.line_number:
-                                    continue
-                                if edge not in node.code:
-                                    continue
-                                if len(criteria_identifier) > 0:
-                                    if node.line_number in criteria_identifier:
-                                        if edge not in criteria_identifier[node.line_number]:
-                                            continue
-                                queue.append((pred_node, depth + 1))
+                    index, depth = queue.popleft()
+                    if index in visited:
+                        continue
+                    visited.add(index)
+                    current = pdg.node_at(index)
+                    if current.node_id not in result_ids:
+                        result_ids.add(current.node_id)
+                        result_nodes.append(current)
+                    line = current.line_number
+                    if line is not None:
+                        result_lines.add(line)
+                    if depth >= level or line is None:
+                        continue
+                    code = current.code
+                    identifiers = criteria_identifier.get(line)
+                    for pred_index, edge in pdg.predecessors_by_label(index, 'DDG'):
+                        edge = edge.replace('DDG: ', '')
+                        pred_line = pdg.graph.line(pred_index)
+                        if pred_line is None or pred_line > line:
+                            continue
+                        if edge not in code:
+                            continue
+                        if identifiers is not None and edge not in identifiers:
+                            continue
+                        queue.append((pred_index, depth + 1))
 
         return result_lines, result_nodes
 
@@ -1385,6 +1400,7 @@ class Method:
     def forward_slice(criteria_lines: set[int], criteria_nodes: list[PDGNode], criteria_identifier: dict[int, set[str]], all_nodes: dict[int, list[PDGNode]], level: int) -> tuple[set[int], list[PDGNode]]:
         result_lines = criteria_lines.copy()
         result_nodes = criteria_nodes.copy()
+        result_ids = {node.node_id for node in result_nodes}
         if level == 0:
             level = sys.maxsize
 
@@ -1402,34 +1418,42 @@ class Method:
                         continue  # 防止循环依赖
                     result_lines.add(int(succ_node.line_number))
                     result_nodes.append(succ_node)
+                    result_ids.add(succ_node.node_id)
 
-        # DDG 切片
+        # DDG 切片，在 PDG 数组下标上做 BFS
         for sline in criteria_lines:
             for node in all_nodes[sline]:
                 if node.type == "METHOD" or "METHOD_RETURN" in ast.literal_eval(node.type):
                     continue
-                visited = set()
-                queue: deque[tuple[PDGNode, int]] = deque([(node, 0)])
+                pdg = node.pdg
+                visited: set[int] = set()
+                queue: deque[tuple[int, int]] = deque([(node.index, 0)])
                 while queue:
-                    node, depth = queue.popleft()
-                    if node not in visited:
-                        visited.add(node)
-                        if node not in result_nodes:
-                            result_nodes.append(node)
-                        if node.line_number is not None:
-                            result_lines.add(node.line_number)
-                        if depth < level:
-                            for succ_node, edge in node.succ_ddg:
-                                if edge not in node.code:
-                                    continue
-                                if succ_node.line_number is None or int(succ_node.line_number) == sys.maxsize or node.line_number is None:
-                                    continue
-                                if succ_node.line_number < node.line_number:
-                                    continue
-                                if node.line_number in criteria_identifier:
-                                    if edge not in criteria_identifier[node.line_number]:
-                                        continue
-                                queue.append((succ_node, depth + 1))
+                    index, depth = queue.popleft()
+                    if index in visited:
+                        continue
+                    visited.add(index)
+                    current = pdg.node_at(index)
+                    if current.node_id not in result_ids:
+                        result_ids.add(current.node_id)
+                        result_nodes.append(current)
+                    line = current.line_number
+                    if line is not None:
+                        result_lines.add(line)
+                    if depth >= level or line is None:
+                        continue
+                    code = current.code
+                    identifiers = criteria_identifier.get(line)
+                    for succ_index, edge in pdg.successors_by_label(index, 'DDG'):
+                        edge = edge.replace('DDG: ', '')
+                        if edge not in code:
+                            continue
+                        succ_line = pdg.graph.line(succ_index)
+                        if succ_line is None or succ_line < line:
+                            continue
+                        if identifiers is not None and edge not in identifiers:
+                            continue
+                        queue.append((succ_index, depth + 1))
 
         return result_lines, result_nodes
 
@@ -6,6 +6,7 @@
 
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass, field
 import difflib
 import logging
@@ -16,6 +17,7 @@ import tempfile
 
 from ast_parser import ASTParser
 from common import Language
+from target_scope_cache import TargetTreeView, tree_view
 
 
 SYSTEM_INCLUDE_RE = re.compile(r"^(?P<prefix>\s*#\s*include\s*)<(?P<header>[^>]+)>(?P<suffix>.*)$")
@@ -211,15 +213,37 @@ def _resolve_include_path(
     return None
 
 
+def _parse_include_edges(target_repo_path: str, source_path: str) -> tuple[tuple[str, str], ...] | None:
+    try:
+        with open(os.path.join(target_repo_path, source_path), encoding="utf-8", errors="ignore") as f:
+            source = f.read()
+    except OSError:
+        return None
+
+    edges: list[tuple[str, str]] = []
+    for line in source.splitlines():
+        match = INCLUDE_RE.match(line)
+        if match is not None:
+            edges.append((match.group("header"), match.group("quote")))
+    return tuple(edges)
+
+
 def _collect_reachable_include_files(
     target_repo_path: str,
     current_file_path: str | None,
     patch_headers: list[str],
     max_depth: int = 2,
+    view: TargetTreeView | None = None,
 ) -> list[str]:
+    if view is None:
+        with tree_view(target_repo_path) as local_view:
+            return _collect_reachable_include_files(
+                target_repo_path, current_file_path, patch_headers, max_depth, local_view
+            )
+
     include_files: list[str] = []
     seen: set[str] = set()
-    queue: list[tuple[str, int]] = []
+    queue: deque[tuple[str, int]] = deque()
 
     def add_file(path: str | None, depth: int) -> None:
         if path is None or path in seen:
@@ -234,22 +258,17 @@ def _collect_reachable_include_files(
     for header in patch_headers:
         add_file(_resolve_include_path(target_repo_path, header, "<", current_file_path), 0)
 
+    # include 边按 tree 缓存，头文件只在首次访问或内容变化后重新读取
     while queue:
-        source_path, depth = queue.pop(0)
-        try:
-            with open(os.path.join(target_repo_path, source_path), encoding="utf-8", errors="ignore") as f:
-                source = f.read()
-        except OSError:
+        source_path, depth = queue.popleft()
+        edges = view.include_edges(source_path, lambda path: _parse_include_edges(target_repo_path, path))
+        if edges is None:
             continue
-
-        for line in source.splitlines():
-            match = INCLUDE_RE.match(line)
-            if match is None:
-                continue
+        for header, quote in edges:
             include_path = _resolve_include_path(
                 target_repo_path,
-                match.group("header"),
-                match.group("quote"),
+                header,
+                quote,
                 source_path,
             )
             add_file(include_path, depth + 1)
@@ -261,6 +280,7 @@ def _select_symbol_scopes(
     target_repo_path: str,
     file_patch: str,
     current_file_path: str | None,
+    view: TargetTreeView | None = None,
 ) -> list[str]:
     scopes: list[str] = []
 
@@ -285,6 +305,7 @@ def _select_symbol_scopes(
         target_repo_path,
         current_file_path,
         patch_headers,
+        view=view,
     ):
         add_scope(include_file)
 
@@ -503,7 +524,28 @@ def collect_patch_defined_symbols_from_post_files(
     return defined_symbols
 
 
-def _run_ctags(target_repo_path: str, scopes: list[str]) -> list[SymbolLocation]:
+def _run_ctags(
+    target_repo_path: str,
+    scopes: list[str],
+    view: TargetTreeView | None = None,
+) -> list[SymbolLocation]:
+    if not scopes:
+        return []
+    if view is None:
+        with tree_view(target_repo_path) as local_view:
+            return _run_ctags(target_repo_path, scopes, local_view)
+
+    # 各 scope 的 ctags 结果按 tree 缓存，只对未命中的 scope 和工作区改动文件执行 ctags
+    def run(paths: list[str]) -> list[tuple[str, str, int, str]]:
+        return [
+            (loc.symbol, loc.path, loc.line, loc.kind)
+            for loc in _run_ctags_uncached(target_repo_path, paths)
+        ]
+
+    return [SymbolLocation(*tag) for tag in view.scope_tags(scopes, run)]
+
+
+def _run_ctags_uncached(target_repo_path: str, scopes: list[str]) -> list[SymbolLocation]:
     if not scopes:
         return []
     with tempfile.NamedTemporaryFile(prefix="mystique-ctags-", suffix=".tags", delete=False) as f:
@@ -696,12 +738,12 @@ def check_patch_symbol_compatibility(
     if not symbols:
         return SymbolCompatibilityResult()
 
-    scopes = _select_symbol_scopes(target_repo_path, file_patch, current_file_path)
-    if not scopes:
-        logging.debug("symbol compatibility skipped: no target scopes for %s", current_file_path)
-        return SymbolCompatibilityResult()
-
-    locations = _run_ctags(target_repo_path, scopes)
+    with tree_view(target_repo_path) as view:
+        scopes = _select_symbol_scopes(target_repo_path, file_patch, current_file_path, view)
+        if not scopes:
+            logging.debug("symbol compatibility skipped: no target scopes for %s", current_file_path)
+            return SymbolCompatibilityResult()
+        locations = _run_ctags(target_repo_path, scopes, view)
     by_symbol: dict[str, list[SymbolLocation]] = {}
     for loc in locations:
         by_symbol.setdefault(loc.symbol, []).append(loc)
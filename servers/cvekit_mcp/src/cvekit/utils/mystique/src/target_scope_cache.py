@@ -0,0 +1,466 @@
+"""
+目标仓 include 图与分 scope ctags 结果缓存，供 target_compat_resolver 复用。
+
+缓存按 (目标仓 realpath, HEAD tree SHA) 组织：
+- 每个文件解析出的 ``#include`` 边（header, quote）；
+- 每个 scope（目录或单个文件）的 ctags 结果。
+
+同一进程内命中直接走内存；``config.TARGET_SCOPE_CACHE_DB`` 非空时同时写入
+SQLite，跨进程复用。HEAD 切换到新 tree 时，以最近使用的旧 tree 为基线，
+``git diff --name-only`` 得到的变更路径所在的文件和 scope 重新计算，其余条目直接沿用。
+工作区中未提交/未跟踪的改动（``git status``）不会写入缓存：这些文件每次都从磁盘
+重新读取，所在 scope 的 ctags 结果只对这些文件单独补跑。
+被 .gitignore 忽略的文件不在 tree 中，视为随 tree 不变。
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import closing
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from typing import Callable, Iterable
+import zlib
+
+import config
+
+# 每个仓库保留的 tree 缓存上限，超出后按最近使用时间淘汰
+MAX_TREES_PER_REPO = 4
+
+IncludeEdges = tuple[tuple[str, str], ...]
+# (symbol, path, line, kind)
+TagTuple = tuple[str, str, int, str]
+
+_lock = threading.RLock()
+# repo realpath -> OrderedDict[tree_sha, _TreeState]，按使用顺序排列，末尾最新
+_memory_trees: dict[str, OrderedDict[str, "_TreeState"]] = {}
+
+
+@dataclass
+class _ScopeEntry:
+    tags: tuple[TagTuple, ...]
+    # 建缓存时工作区有改动的路径，其 tag 不在 tags 中，使用时需要单独补跑
+    pending: frozenset[str] = frozenset()
+
+
+@dataclass
+class _TreeState:
+    repo_key: str
+    tree_sha: str
+    includes: dict[str, IncludeEdges] = field(default_factory=dict)
+    scopes: dict[str, _ScopeEntry] = field(default_factory=dict)
+    base: "_TreeState | None" = None
+    # 与 base 相比发生变化的路径及其所有上级目录，None 表示无法复用 base
+    affected: frozenset[str] | None = None
+
+
+def _ancestors(path: str) -> Iterable[str]:
+    """path 本身及其各级上级目录，最后是仓库根目录（空字符串）。"""
+    yield path
+    while path:
+        path = os.path.dirname(path)
+        yield path
+
+
+def _normalize_scope(scope: str) -> str:
+    norm = os.path.normpath(scope).replace(os.sep, "/")
+    return "" if norm == "." else norm
+
+
+def _git(repo_path: str, *args: str) -> bytes | None:
+    try:
+        proc = subprocess.run(
+            ["git", "-C", repo_path, *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+    except OSError:
+        return None
+    if proc.returncode != 0:
+        logging.debug(
+            "target scope cache: git %s failed in %s: %s",
+            args[0],
+            repo_path,
+            proc.stderr.decode("utf-8", errors="replace").strip()[:200],
+        )
+        return None
+    return proc.stdout
+
+
+def _git_tree_sha(repo_path: str) -> str | None:
+    output = _git(repo_path, "rev-parse", "--verify", "HEAD^{tree}")
+    if output is None:
+        return None
+    return output.decode("ascii", errors="replace").strip() or None
+
+
+def _git_dirty_paths(repo_path: str) -> frozenset[str] | None:
+    output = _git(
+        repo_path,
+        "status",
+        "--porcelain=v1",
+        "-z",
+        "--untracked-files=all",
+        "--no-renames",
+    )
+    if output is None:
+        return None
+    paths = set()
+    for record in output.split(b"\x00"):
+        if len(record) > 3:
+            paths.add(record[3:].decode("utf-8", errors="surrogateescape"))
+    return frozenset(paths)
+
+
+def _git_changed_paths(repo_path: str, old_tree: str, new_tree: str) -> list[str] | None:
+    output = _git(repo_path, "diff", "--name-only", "--no-renames", "-z", old_tree, new_tree)
+    if output is None:
+        return None
+    return [path.decode("utf-8", errors="surrogateescape") for path in output.split(b"\x00") if path]
+
+
+def _affected_paths(changed: list[str]) -> frozenset[str]:
+    affected: set[str] = set()
+    for path in changed:
+        for item in _ancestors(path):
+            if item in affected:
+                break
+            affected.add(item)
+    return frozenset(affected)
+
+
+# ── SQLite 持久化 ──
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS target_tree (
+            repo_realpath TEXT NOT NULL,
+            tree_sha TEXT NOT NULL,
+            last_used_at REAL NOT NULL,
+            PRIMARY KEY (repo_realpath, tree_sha)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS target_include_edges (
+            repo_realpath TEXT NOT NULL,
+            tree_sha TEXT NOT NULL,
+            path TEXT NOT NULL,
+            edges TEXT NOT NULL,
+            PRIMARY KEY (repo_realpath, tree_sha, path)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS target_scope_tags (
+            repo_realpath TEXT NOT NULL,
+            tree_sha TEXT NOT NULL,
+            scope TEXT NOT NULL,
+            pending TEXT NOT NULL,
+            tags BLOB NOT NULL,
+            PRIMARY KEY (repo_realpath, tree_sha, scope)
+        )
+        """
+    )
+
+
+def _open_db() -> sqlite3.Connection | None:
+    db_path = (config.TARGET_SCOPE_CACHE_DB or "").strip()
+    if not db_path:
+        return None
+    try:
+        conn = _connect(os.path.expanduser(db_path))
+        _ensure_schema(conn)
+        return conn
+    except (OSError, sqlite3.Error) as exc:
+        logging.warning("target scope cache 数据库不可用，仅使用内存缓存: %s", exc)
+        return None
+
+
+def _touch_tree(conn: sqlite3.Connection, repo_key: str, tree_sha: str) -> str | None:
+    """登记 tree 并淘汰旧 tree，返回此前最近使用的其他 tree 作为增量基线。"""
+    row = conn.execute(
+        """
+        SELECT tree_sha FROM target_tree
+        WHERE repo_realpath = ? AND tree_sha != ?
+        ORDER BY last_used_at DESC LIMIT 1
+        """,
+        (repo_key, tree_sha),
+    ).fetchone()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO target_tree (repo_realpath, tree_sha, last_used_at) VALUES (?, ?, ?)",
+            (repo_key, tree_sha, time.time()),
+        )
+        stale = conn.execute(
+            """
+            SELECT tree_sha FROM target_tree
+            WHERE repo_realpath = ?
+            ORDER BY last_used_at DESC
+            LIMIT -1 OFFSET ?
+            """,
+            (repo_key, MAX_TREES_PER_REPO),
+        ).fetchall()
+        for (stale_sha,) in stale:
+            for table in ("target_tree", "target_include_edges", "target_scope_tags"):
+                conn.execute(
+                    f"DELETE FROM {table} WHERE repo_realpath = ? AND tree_sha = ?",
+                    (repo_key, stale_sha),
+                )
+    return row[0] if row else None
+
+
+def _load_includes(conn: sqlite3.Connection, repo_key: str, tree_sha: str) -> dict[str, IncludeEdges]:
+    rows = conn.execute(
+        "SELECT path, edges FROM target_include_edges WHERE repo_realpath = ? AND tree_sha = ?",
+        (repo_key, tree_sha),
+    ).fetchall()
+    return {path: tuple(tuple(edge) for edge in json.loads(edges)) for path, edges in rows}
+
+
+def _load_scope(conn: sqlite3.Connection, repo_key: str, tree_sha: str, scope: str) -> _ScopeEntry | None:
+    row = conn.execute(
+        "SELECT pending, tags FROM target_scope_tags WHERE repo_realpath = ? AND tree_sha = ? AND scope = ?",
+        (repo_key, tree_sha, scope),
+    ).fetchone()
+    if row is None:
+        return None
+    pending, blob = row
+    tags = json.loads(zlib.decompress(blob).decode("utf-8"))
+    return _ScopeEntry(tuple(tuple(tag) for tag in tags), frozenset(json.loads(pending)))
+
+
+def _store_entries(
+    conn: sqlite3.Connection,
+    state: _TreeState,
+    includes: dict[str, IncludeEdges],
+    scopes: dict[str, _ScopeEntry],
+) -> None:
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO target_include_edges (repo_realpath, tree_sha, path, edges) VALUES (?, ?, ?, ?)",
+            [(state.repo_key, state.tree_sha, path, json.dumps(edges)) for path, edges in includes.items()],
+        )
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO target_scope_tags (repo_realpath, tree_sha, scope, pending, tags)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    state.repo_key,
+                    state.tree_sha,
+                    scope,
+                    json.dumps(sorted(entry.pending)),
+                    zlib.compress(json.dumps(entry.tags).encode("utf-8")),
+                )
+                for scope, entry in scopes.items()
+            ],
+        )
+
+
+# ── 内存状态 ──
+
+
+def _tree_state(repo_path: str, repo_key: str, tree_sha: str) -> _TreeState:
+    with _lock:
+        trees = _memory_trees.setdefault(repo_key, OrderedDict())
+        state = trees.get(tree_sha)
+        if state is not None:
+            trees.move_to_end(tree_sha)
+            return state
+        base = next(reversed(trees.values()), None)
+
+    state = _TreeState(repo_key, tree_sha)
+    conn = _open_db()
+    if conn is not None:
+        with closing(conn):
+            db_base_sha = _touch_tree(conn, repo_key, tree_sha)
+            state.includes.update(_load_includes(conn, repo_key, tree_sha))
+            if base is None and db_base_sha:
+                base = _TreeState(repo_key, db_base_sha, includes=_load_includes(conn, repo_key, db_base_sha))
+    if base is not None:
+        changed = _git_changed_paths(repo_path, base.tree_sha, tree_sha)
+        if changed is not None:
+            state.base = base
+            state.affected = _affected_paths(changed)
+            # 基线只保留一层，避免旧 tree 链在内存中无限延长
+            base.base = None
+            base.affected = None
+
+    with _lock:
+        trees = _memory_trees.setdefault(repo_key, OrderedDict())
+        trees[tree_sha] = state
+        while len(trees) > MAX_TREES_PER_REPO:
+            trees.popitem(last=False)
+    return state
+
+
+class TargetTreeView:
+    """一次兼容性检查期间对目标仓的缓存视图；不是 git 仓库时退化为直接计算。"""
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self._state: _TreeState | None = None
+        self._dirty: frozenset[str] = frozenset()
+        self._new_includes: dict[str, IncludeEdges] = {}
+        self._new_scopes: dict[str, _ScopeEntry] = {}
+
+        tree_sha = _git_tree_sha(repo_path)
+        dirty = _git_dirty_paths(repo_path) if tree_sha else None
+        if tree_sha and dirty is not None:
+            self._dirty = dirty
+            self._state = _tree_state(repo_path, os.path.realpath(repo_path), tree_sha)
+
+    @property
+    def cached(self) -> bool:
+        return self._state is not None
+
+    def __enter__(self) -> "TargetTreeView":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
+
+    def flush(self) -> None:
+        if self._state is None or not (self._new_includes or self._new_scopes):
+            return
+        includes, scopes = self._new_includes, self._new_scopes
+        self._new_includes, self._new_scopes = {}, {}
+        conn = _open_db()
+        if conn is None:
+            return
+        try:
+            with closing(conn):
+                _store_entries(conn, self._state, includes, scopes)
+        except sqlite3.Error as exc:
+            logging.warning("target scope cache 写入失败: %s", exc)
+
+    def include_edges(self, path: str, parse: Callable[[str], IncludeEdges | None]) -> IncludeEdges | None:
+        """返回 path 的 include 边；parse 从磁盘读取并解析，返回 None 表示文件不可读。"""
+        state = self._state
+        if state is None or path in self._dirty:
+            return parse(path)
+        with _lock:
+            edges = state.includes.get(path)
+            if edges is None and state.base is not None and path not in state.affected:
+                edges = state.base.includes.get(path)
+                if edges is not None:
+                    state.includes[path] = edges
+                    self._new_includes[path] = edges
+        if edges is not None:
+            return edges
+        edges = parse(path)
+        if edges is not None:
+            with _lock:
+                state.includes[path] = edges
+            self._new_includes[path] = edges
+        return edges
+
+    def _lookup_scope(self, scope: str) -> _ScopeEntry | None:
+        state = self._state
+        with _lock:
+            entry = state.scopes.get(scope)
+        if entry is not None:
+            return entry
+
+        conn = _open_db()
+        if conn is not None:
+            with closing(conn):
+                entry = _load_scope(conn, state.repo_key, state.tree_sha, scope)
+                base = state.base
+                if entry is None and base is not None and scope not in state.affected:
+                    with _lock:
+                        entry = base.scopes.get(scope)
+                    if entry is None:
+                        entry = _load_scope(conn, base.repo_key, base.tree_sha, scope)
+                    if entry is not None:
+                        self._new_scopes[scope] = entry
+        elif state.base is not None and scope not in state.affected:
+            with _lock:
+                entry = state.base.scopes.get(scope)
+            if entry is not None:
+                self._new_scopes[scope] = entry
+
+        if entry is not None:
+            with _lock:
+                state.scopes[scope] = entry
+        return entry
+
+    def scope_tags(self, scopes: list[str], run: Callable[[list[str]], list[TagTuple]]) -> list[TagTuple]:
+        """返回 scopes 下所有 tag，按 ctags 排序规则排序并去重；run 对给定路径执行一次 ctags。"""
+        if self._state is None:
+            return _sorted_unique(run(scopes))
+
+        result: list[TagTuple] = []
+        missing: list[str] = []
+        live: set[str] = set()
+        for raw_scope in scopes:
+            scope = _normalize_scope(raw_scope)
+            if scope in missing:
+                continue
+            entry = self._lookup_scope(scope)
+            if entry is None:
+                missing.append(scope)
+                continue
+            stale = entry.pending | {path for path in self._dirty if _within(path, scope)}
+            result.extend(tag for tag in entry.tags if tag[1] not in stale)
+            live.update(path for path in stale if os.path.isfile(os.path.join(self.repo_path, path)))
+
+        if not missing and not live:
+            return _sorted_unique(result)
+
+        fresh = run(missing + sorted(live - set(missing)))
+        result.extend(fresh)
+        if missing:
+            buckets: dict[str, list[TagTuple]] = {scope: [] for scope in missing}
+            for tag in fresh:
+                if tag[1] in self._dirty:
+                    continue
+                for item in _ancestors(tag[1]):
+                    bucket = buckets.get(item)
+                    if bucket is not None:
+                        bucket.append(tag)
+            for scope, tags in buckets.items():
+                pending = frozenset(path for path in self._dirty if _within(path, scope))
+                entry = _ScopeEntry(tuple(_sorted_unique(tags)), pending)
+                with _lock:
+                    self._state.scopes[scope] = entry
+                self._new_scopes[scope] = entry
+        return _sorted_unique(result)
+
+
+def _within(path: str, scope: str) -> bool:
+    return not scope or path == scope or path.startswith(scope + "/")
+
+
+def _sorted_unique(tags: Iterable[TagTuple]) -> list[TagTuple]:
+    # ctags 默认按整行字节序排序，行号按文本比较，与原先单次 ctags 输出的顺序保持一致
+    return sorted(set(tags), key=lambda tag: (tag[0], tag[1], str(tag[2]), tag[3]))
+
+
+def tree_view(repo_path: str) -> TargetTreeView:
+    return TargetTreeView(repo_path)
+
+
+def clear_memory_cache() -> None:
+    with _lock:
+        _memory_trees.clear()
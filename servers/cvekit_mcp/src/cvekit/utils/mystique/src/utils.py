@@ -14,9 +14,12 @@ Modifications for CVEKit MCP backport workflow:
 
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import difftools
-import joern
+import joern_cache
+import joern_server
 from common import Language
 
 try:
@@ -32,14 +35,20 @@ def export_joern_graph(pre_dir: str, post_dir: str, target_dir: str, need_cdg: b
         (f"{post_dir}/code", post_dir, language, need_cdg, overwrite),
         (f"{target_dir}/code", target_dir, language, need_cdg, overwrite)
     ]
-    if multiprocess and cpu_heater is not None:
-        cpu_heater.multiprocess(joern.export_with_preprocess_and_merge, worker_args, max_workers=3, show_progress=False)
+    # 在 main_from_repo 的并发 worker 线程中不能 fork 进程池，改用线程并发（导出本身是子进程）
+    in_worker_thread = threading.current_thread() is not threading.main_thread()
+    if joern_server.get_pool() is not None or (multiprocess and in_worker_thread):
+        # 常驻 Joern server 在本进程内，三个导出用线程并发提交
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(lambda args: joern_cache.export_with_cache(*args), worker_args))
+    elif multiprocess and cpu_heater is not None:
+        cpu_heater.multiprocess(joern_cache.export_with_cache, worker_args, max_workers=3, show_progress=False)
     else:
         if multiprocess and cpu_heater is None:
             logging.warning("cpu_heater 不可用，已自动降级为串行导出 Joern 图")
-        joern.export_with_preprocess_and_merge(*worker_args[0])
-        joern.export_with_preprocess_and_merge(*worker_args[1])
-        joern.export_with_preprocess_and_merge(*worker_args[2])
+        joern_cache.export_with_cache(*worker_args[0])
+        joern_cache.export_with_cache(*worker_args[1])
+        joern_cache.export_with_cache(*worker_args[2])
     logging.info("generate pre-patch, post-patch, target CPG PDG done.")
 
 
@@ -0,0 +1,133 @@
+"""Tests for the pooled parser, compiled-query cache and incremental reparsing of ASTParser."""
+import random
+import threading
+
+import pytest
+
+for _module in ("tree_sitter", "tree_sitter_c", "tree_sitter_cpp", "tree_sitter_java"):
+    pytest.importorskip(_module)
+
+import ast_parser
+import config
+from common import Language
+
+
+def _kernel_like_source(count: int = 300) -> str:
+    return "#include <linux/kernel.h>\n\n" + "".join(
+        f"static int func_{i}(struct device *dev, int flags)\n"
+        "{\n"
+        "\tif (!dev)\n"
+        "\t\treturn -EINVAL;\n"
+        f"\treturn helper_{i}(dev, flags + {i});\n"
+        "}\n\n"
+        for i in range(count)
+    )
+
+
+def _fresh_sexp(code: str) -> str:
+    original = config.AST_CACHE
+    config.AST_CACHE = False
+    try:
+        return str(ast_parser.ASTParser(code, Language.C).root)
+    finally:
+        config.AST_CACHE = original
+
+
+@pytest.fixture(autouse=True)
+def _clean_caches(monkeypatch):
+    monkeypatch.setattr(config, "AST_CACHE", True)
+    ast_parser.clear_caches()
+    yield
+    ast_parser.clear_caches()
+
+
+def test_languages_trees_and_queries_are_reused():
+    code = _kernel_like_source(5)
+    first = ast_parser.ASTParser(code, Language.C)
+    second = ast_parser.ASTParser(code, Language.C)
+    assert first.LANGUAGE is second.LANGUAGE
+    assert first.tree is second.tree
+
+    assert len(first.query_all(ast_parser.TS_C_METHOD)) == 5
+    compiled = ast_parser._compiled_query(first.LANGUAGE, ast_parser.TS_C_METHOD)
+    assert len(second.query_all(ast_parser.TS_C_METHOD)) == 5
+    assert ast_parser._compiled_query(second.LANGUAGE, ast_parser.TS_C_METHOD) is compiled
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        ("return helper_150(dev, flags + 150);", "return helper_150(dev, flags | 150);\n\tflags++;"),
+        ("\tif (!dev)\n\t\treturn -EINVAL;\n\treturn helper_7(", "\treturn helper_7("),
+        ("#include <linux/kernel.h>\n", "#include <linux/kernel.h>\n#include <linux/slab.h>\n"),
+        ("return helper_299(dev, flags + 299);\n}\n", "return helper_299(dev, flags + 299);\n}\n\nint tail(void) { return 0; }\n"),
+        ("static int func_42(", "static int func_42 broken("),
+    ],
+)
+def test_incremental_reparse_matches_full_parse(old, new):
+    code = _kernel_like_source()
+    original = ast_parser.ASTParser(code, Language.C)
+    original_sexp = str(original.root)
+
+    edited = code.replace(old, new, 1)
+    assert edited != code
+    reparsed = ast_parser.ASTParser(edited, Language.C)
+    assert str(reparsed.root) == _fresh_sexp(edited)
+    # 基线树不会被原地修改，仍持有它的解析结果保持不变
+    assert str(original.root) == original_sexp
+    assert original.root.end_byte == len(code.encode())
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_scattered_line_edits_reparse_incrementally(seed, monkeypatch):
+    rng = random.Random(seed)
+    code = _kernel_like_source()
+    ast_parser.ASTParser(code, Language.C)
+    lines = code.split("\n")
+    for _ in range(rng.randint(2, 8)):
+        index = rng.randrange(len(lines))
+        action = rng.choice(("modify", "insert", "delete"))
+        if action == "modify":
+            lines[index] += " /* edited */"
+        elif action == "insert":
+            lines.insert(index, "\tcounter++;")
+        else:
+            del lines[index]
+    edited = "\n".join(lines)
+
+    bases = []
+    real_base = ast_parser._incremental_base
+    monkeypatch.setattr(
+        ast_parser, "_incremental_base", lambda *args: bases.append(real_base(*args)) or bases[-1]
+    )
+    reparsed = ast_parser.ASTParser(edited, Language.C)
+    assert bases and bases[0] is not None
+    assert str(reparsed.root) == _fresh_sexp(edited)
+
+
+def test_cache_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(config, "AST_CACHE", False)
+    code = _kernel_like_source(3)
+    assert ast_parser.ASTParser(code, Language.C).tree is not ast_parser.ASTParser(code, Language.C).tree
+
+
+def test_parsers_and_queries_are_thread_safe():
+    sources = [_kernel_like_source(20 + i) for i in range(4)]
+    errors = []
+
+    def work(index):
+        try:
+            for _ in range(20):
+                code = sources[(index + _) % len(sources)]
+                parser = ast_parser.ASTParser(code, Language.C)
+                expected = code.count("static int func_")
+                assert len(parser.query_all(ast_parser.TS_C_METHOD)) == expected
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
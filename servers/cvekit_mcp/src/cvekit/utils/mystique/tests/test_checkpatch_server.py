@@ -0,0 +1,335 @@
+"""Parity tests: resident checkpatch workers against one-shot checkpatch.pl runs."""
+import os
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+if shutil.which("perl") is None:
+    pytest.skip("perl is required", allow_module_level=True)
+
+import checkpatch_formatter
+import checkpatch_server
+import config
+
+# Mirrors the layout of the kernel's scripts/checkpatch.pl: option parsing and
+# table loading at startup, the per-file main loop with its state reset, the
+# epilogue notes and a single trailing exit($exit). Like the real script it
+# also keeps file-scope state that the loop does not reset: each CamelCase
+# word is reported only once per process.
+_FAKE_CHECKPATCH = r"""#!/usr/bin/env perl
+use strict;
+use warnings;
+use Getopt::Long qw(:config no_auto_abbrev);
+
+my $P = $0;
+$P =~ s@.*/@@g;
+my $tree = 1;
+my $strict = 0;
+my $quiet = 0;
+GetOptions('tree!' => \$tree, 'strict!' => \$strict, 'q|quiet+' => \$quiet) or exit(2);
+
+my %spelling;
+open(my $spelling, '<', "__DIR__/spelling.txt") or die "$P: cannot open spelling.txt: $!\n";
+while (<$spelling>) {
+	chomp;
+	my ($bad, $good) = split /\|\|/;
+	$spelling{$bad} = $good;
+}
+close($spelling);
+
+my @rawlines = ();
+my %camelcase = ();
+my $seen_files = 0;
+my $exit = 0;
+
+if ($#ARGV < 0) {
+	push(@ARGV, '-');
+}
+
+my $vname;
+for my $filename (@ARGV) {
+	my $FILE;
+	if ($filename eq '-') {
+		open($FILE, '<&STDIN');
+	} else {
+		open($FILE, '<', "$filename") ||
+			die "$P: $filename: open failed - $!\n";
+	}
+	$vname = $filename eq '-' ? 'Your patch' : $filename;
+	while (<$FILE>) {
+		chomp;
+		push(@rawlines, $_);
+	}
+	close($FILE);
+
+	if ($#ARGV > 0 && $quiet == 0) {
+		print '-' x length($vname) . "\n";
+		print "$vname\n";
+		print '-' x length($vname) . "\n";
+	}
+
+	if (!process($filename)) {
+		$exit = 1;
+	}
+	@rawlines = ();
+}
+
+if (!$quiet) {
+	if ($exit) {
+		print << "EOM"
+
+NOTE: If any of the errors are false positives, please report
+      them to the maintainer, see CHECKPATCH in MAINTAINERS.
+EOM
+	}
+}
+
+exit($exit);
+
+sub process {
+	my ($filename) = @_;
+	my ($file, $line, $errors, $warnings, $checks) = ('', 0, 0, 0, 0);
+	$seen_files++;
+	warn "$P: strict mode off\n" if !$strict;
+	for my $raw (@rawlines) {
+		if ($raw =~ m{^\+\+\+ b/(.*)$}) {
+			$file = $1;
+		} elsif ($raw =~ /^@@ -\d+(?:,\d+)? \+(\d+)/) {
+			$line = $1 - 1;
+		} elsif ($raw =~ /^([ +])(.*)$/) {
+			$line++;
+			next if $1 ne '+';
+			my $text = $2;
+			if ($text =~ /\($/) {
+				print "CHECK: Lines should not end with a '('\n#$line: FILE: $file:$line:\n+$text\n\n";
+				$checks++;
+			}
+			if ($text =~ /^\s+(\w+):$/) {
+				print "WARNING: labels should not be indented\n#$line: FILE: $file:$line:\n+$text\n\n";
+				$warnings++;
+			}
+			for my $word (split /\W+/, $text) {
+				if ($word =~ /^[a-z]+[A-Z]\w*$/ && !defined $camelcase{$word}) {
+					$camelcase{$word} = 1;
+					print "CHECK: Avoid CamelCase: <$word>\n#$line: FILE: $file:$line:\n+$text\n\n";
+					$checks++;
+				}
+				next if !exists $spelling{$word};
+				print "WARNING: '$word' may be misspelled - perhaps '$spelling{$word}'?\n#$line: FILE: $file:$line:\n+$text\n\n";
+				$warnings++;
+			}
+			if ($text =~ /\bBUG\(\)/) {
+				print "ERROR: Avoid crashing the kernel - try using WARN_ON & recovery code rather than BUG() or BUG_ON()\n#$line: FILE: $file:$line:\n+$text\n\n";
+				$errors++;
+			}
+			warn "Use of uninitialized value in concatenation at line $line\n" if $text =~ /UNINIT/;
+			die "$P: internal error on $file:$line\n" if $text =~ /CRASH_CHECKPATCH/;
+		}
+	}
+	print "total: $errors errors, $warnings warnings, $checks checks, " . scalar(@rawlines) . " lines checked\n\n";
+	if ($errors + $warnings + $checks) {
+		print "$vname has style problems, please review.\n";
+	} else {
+		print "$vname has no obvious style problems and is ready for submission.\n";
+	}
+	return !$errors && !$warnings && !($strict && $checks);
+}
+"""
+
+_PATCHES = {
+    "clean": """\
+--- a/drivers/net/foo.c
++++ b/drivers/net/foo.c
+@@ -10,3 +10,4 @@ static int foo(void)
+ {
++\treturn bar();
+ }
+""",
+    "style": """\
+--- a/drivers/net/foo.c
++++ b/drivers/net/foo.c
+@@ -10,3 +10,7 @@ static int foo(void)
+ {
++\tret = call_something(
++\t\targ);
++\t  out:
++\t/* recieve the packet */
+ }
+""",
+    "check_only": """\
+--- a/lib/bar.c
++++ b/lib/bar.c
+@@ -1,1 +1,2 @@
+ int x;
++int myValue = f(
+""",
+    "error_and_warning": """\
+--- a/kernel/baz.c
++++ b/kernel/baz.c
+@@ -5,2 +5,4 @@ void baz(void)
+ {
++\tBUG();
++\tUNINIT;
+ }
+""",
+}
+
+
+@pytest.fixture
+def checkpatch(tmp_path, monkeypatch):
+    scripts = tmp_path / "linux" / "scripts"
+    scripts.mkdir(parents=True)
+    (scripts / "spelling.txt").write_text("recieve||receive\nteh||the\n", encoding="utf-8")
+    path = scripts / "checkpatch.pl"
+    path.write_text(_FAKE_CHECKPATCH.replace("__DIR__", str(scripts)), encoding="utf-8")
+    path.chmod(0o755)
+    monkeypatch.setattr(config, "CHECKPATCH_SERVER", True)
+    checkpatch_server.close_workers()
+    checkpatch_formatter.clear_checkpatch_memo()
+    yield str(path)
+    checkpatch_server.close_workers()
+    checkpatch_formatter.clear_checkpatch_memo()
+
+
+def _one_shot(checkpatch_path, patch_file, *args):
+    result = subprocess.run(
+        [checkpatch_path, *(args or ("--no-tree", "--strict")), patch_file],
+        capture_output=True,
+        text=True,
+    )
+    return result.returncode, (result.stdout + result.stderr).strip()
+
+
+def _write_patches(tmp_path):
+    paths = {}
+    for name, text in _PATCHES.items():
+        paths[name] = str(tmp_path / f"{name}.patch")
+        with open(paths[name], "w", encoding="utf-8") as handle:
+            handle.write(text)
+    return paths
+
+
+def test_worker_matches_one_shot_runs(checkpatch, tmp_path):
+    paths = _write_patches(tmp_path)
+    worker = checkpatch_server.CheckpatchWorker(checkpatch)
+    try:
+        # 同一个 worker 反复检查，逐字节对齐一次性运行，确认每个请求之间的状态已复位
+        for _ in range(2):
+            for name, path in paths.items():
+                assert worker.check(path) == _one_shot(checkpatch, path), name
+    finally:
+        worker.close()
+
+    returncodes = {name: _one_shot(checkpatch, path)[0] for name, path in paths.items()}
+    assert returncodes == {"clean": 0, "style": 1, "check_only": 1, "error_and_warning": 1}
+
+
+def test_worker_matches_real_checkpatch(tmp_path, monkeypatch):
+    # 设置 MYSTIQUE_TEST_CHECKPATCH 指向内核源码里的 scripts/checkpatch.pl 时运行
+    checkpatch = os.environ.get("MYSTIQUE_TEST_CHECKPATCH") or os.path.expanduser("~/linux/scripts/checkpatch.pl")
+    if not os.path.isfile(checkpatch):
+        pytest.skip("scripts/checkpatch.pl not found; set MYSTIQUE_TEST_CHECKPATCH")
+    monkeypatch.chdir(tmp_path)
+    paths = _write_patches(tmp_path)
+    expected = {name: _one_shot(checkpatch, path) for name, path in paths.items()}
+    worker = checkpatch_server.CheckpatchWorker(checkpatch)
+    try:
+        # CamelCase 等只报告一次的检查依赖 checkpatch 的全局状态，重复检查同一补丁也要与一次性运行一致
+        for _ in range(2):
+            for name, path in paths.items():
+                assert worker.check(path) == expected[name], name
+    finally:
+        worker.close()
+
+
+def test_worker_honours_checkpatch_options(checkpatch, tmp_path):
+    path = _write_patches(tmp_path)["check_only"]
+    worker = checkpatch_server.CheckpatchWorker(checkpatch, args=("--no-tree",))
+    try:
+        assert worker.check(path) == _one_shot(checkpatch, path, "--no-tree")
+        assert worker.check(path)[0] == 0
+    finally:
+        worker.close()
+
+
+def test_run_checkpatch_reuses_worker_and_memoizes(checkpatch, monkeypatch):
+    launched = []
+    real_worker = checkpatch_server.CheckpatchWorker
+    monkeypatch.setattr(
+        checkpatch_server, "CheckpatchWorker", lambda *args: launched.append(args) or real_worker(*args)
+    )
+    one_shot = []
+    real_run = subprocess.run
+    monkeypatch.setattr(
+        checkpatch_formatter.subprocess, "run", lambda *args, **kwargs: one_shot.append(args) or real_run(*args, **kwargs)
+    )
+
+    results = [checkpatch_formatter.run_checkpatch(checkpatch, text) for text in _PATCHES.values()]
+    assert len(launched) == 1 and one_shot == []
+    assert "recieve' may be misspelled" in results[1][1]
+
+    checks = []
+    real_check = checkpatch_server.check
+    monkeypatch.setattr(
+        checkpatch_server, "check", lambda *args: checks.append(args) or real_check(*args)
+    )
+    again = [checkpatch_formatter.run_checkpatch(checkpatch, text) for text in _PATCHES.values()]
+    assert again == results
+    assert checks == []
+
+    os.utime(checkpatch, ns=(0, 0))
+    assert checkpatch_formatter.run_checkpatch(checkpatch, _PATCHES["clean"])[0] == 0
+    assert len(checks) == 1
+
+
+def test_worker_failure_falls_back_to_one_shot(checkpatch, tmp_path):
+    crash = _PATCHES["clean"].replace("return bar();", "CRASH_CHECKPATCH;")
+    code, output = checkpatch_formatter.run_checkpatch(checkpatch, crash)
+    assert code != 0
+    assert "internal error on drivers/net/foo.c:11" in output
+
+    # 出错的 worker 被丢弃，下一次调用重新拉起
+    assert checkpatch_formatter.run_checkpatch(checkpatch, _PATCHES["clean"])[0] == 0
+
+
+def test_script_without_main_loop_runs_one_shot(checkpatch, tmp_path, monkeypatch):
+    legacy = tmp_path / "legacy-checkpatch.pl"
+    legacy.write_text(
+        '#!/usr/bin/env perl\nprint "legacy checked $ARGV[-1]\\n";\nexit(0);\n', encoding="utf-8"
+    )
+    legacy.chmod(0o755)
+    with pytest.raises(checkpatch_server.CheckpatchWorkerError, match="main loop not found"):
+        checkpatch_server.CheckpatchWorker(str(legacy))
+
+    code, output = checkpatch_formatter.run_checkpatch(str(legacy), _PATCHES["clean"])
+    assert code == 0 and output.startswith("legacy checked ")
+
+
+def test_disabled_server_runs_checkpatch_per_call(checkpatch, monkeypatch):
+    monkeypatch.setattr(config, "CHECKPATCH_SERVER", False)
+    assert checkpatch_server.check(checkpatch, "/nonexistent.patch") is None
+    first = checkpatch_formatter.run_checkpatch(checkpatch, _PATCHES["style"])
+    assert first[0] == 1 and checkpatch_formatter._checkpatch_memo == {}
+
+
+def test_concurrent_checks_match_one_shot(checkpatch, tmp_path):
+    paths = _write_patches(tmp_path)
+    expected = {name: _one_shot(checkpatch, path) for name, path in paths.items()}
+    errors = []
+
+    def work(offset):
+        try:
+            for index in range(12):
+                name = list(paths)[(index + offset) % len(paths)]
+                assert checkpatch_server.check(checkpatch, paths[name]) == expected[name]
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
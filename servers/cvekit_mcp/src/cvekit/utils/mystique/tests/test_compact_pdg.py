@@ -0,0 +1,173 @@
+"""Tests for the compact PDG format, the dot parser and array-backed slicing."""
+import os
+
+import pytest
+
+nx = pytest.importorskip("networkx")
+
+import compact_pdg
+import joern
+
+
+# nx.nx_agraph.write_dot 写出的形式（预处理 + merge 之后）
+_WRITTEN_DOT = r'''digraph "" {
+	node [label="\N"];
+	100	[CODE="int f(int a)",
+		FILENAME="a.c",
+		LINE_NUMBER=1,
+		LINE_NUMBER_END=6,
+		NAME=f,
+		NODE_TYPE=METHOD,
+		label="[100][1:0][METHOD]: int f(int a)"];
+	101	[CODE="int a",
+		LINE_NUMBER=1,
+		NODE_TYPE="['METHOD_PARAMETER_IN']",
+		label="[101][1:6][METHOD_PARAMETER_IN]: int a"];
+	100 -> 101	[key=0,
+		label=DDG];
+	102	[CODE="int b = a + 1;",
+		LINE_NUMBER=2,
+		NODE_TYPE="['LOCAL', 'CALL']",
+		label="[102][2]:int b = a + 1;"];
+	101 -> 102	[key=0,
+		label="DDG: a"];
+	101 -> 102	[key=1,
+		label=CFG];
+	103	[CODE="if (b &gt; 2)",
+		LINE_NUMBER=3,
+		NODE_TYPE="['CONTROL_STRUCTURE']",
+		label="[103][3]:if (b &gt; 2)"];
+	102 -> 103	[key=0,
+		label="DDG: b"];
+	102 -> 103	[key=1,
+		label=CFG];
+	104	[CODE="a = b;",
+		LINE_NUMBER=4,
+		NODE_TYPE="['CALL']",
+		label="[104][4]:a = b;"];
+	102 -> 104	[key=0,
+		label="DDG: b"];
+	103 -> 104	[key=0,
+		label=CFG];
+	103 -> 104	[key=1,
+		label="CDG: "];
+	105	[CODE="return a;",
+		LINE_NUMBER=5,
+		NODE_TYPE="['RETURN']",
+		label="[105][5]:return a;"];
+	104 -> 105	[key=0,
+		label="DDG: a"];
+	104 -> 105	[key=1,
+		label=CFG];
+	106	[CODE=RET,
+		LINE_NUMBER=6,
+		NODE_TYPE="['METHOD_RETURN']",
+		label="[106][6]:RET"];
+	105 -> 106	[key=0,
+		label=CFG];
+}
+'''
+
+
+def _write_pdg_dir(tmp_path):
+    pdg_dir = tmp_path / "pdg"
+    pdg_dir.mkdir()
+    (pdg_dir / "0-pdg.dot").write_text(_WRITTEN_DOT)
+    (pdg_dir / "1-pdg.dot").write_text('digraph "g" {\n"1" [NODE_TYPE="CALL"]\n}\n')
+    (pdg_dir / "2-pdg.dot").write_text("digraph {\n")
+    return str(pdg_dir)
+
+
+def test_parse_dot_matches_read_dot_conventions():
+    dot = compact_pdg.parse_dot(r'''
+        // comment
+        digraph "m" {
+          node [shape=box];
+          "7" [label = <(METHOD,main)<SUB>3</SUB>> CODE="say \"hi\"\\n" shape=box NAME=""];
+          "7" -> "8" -> "9" [ label = "DDG: x" ];
+          "8" [CODE="a" + "b"];
+          9:p -> 7 [key=k2, label="CFG"]
+        }
+    ''')
+    assert list(dot.nodes) == ["7", "8", "9"]
+    # shape 与默认值相同、NAME 为空串，都被丢弃
+    assert dot.nodes["7"] == {"label": "(METHOD,main)<SUB>3</SUB>", "CODE": 'say "hi"\\\\n'}
+    assert dot.nodes["8"] == {"CODE": "ab"}
+    assert dot.edges == [
+        ("7", "8", None, {"label": "DDG: x"}),
+        ("8", "9", None, {"label": "DDG: x"}),
+        ("9", "7", "k2", {"label": "CFG"}),
+    ]
+
+
+def test_compact_graph_matches_networkx_view():
+    dot = compact_pdg.parse_dot(_WRITTEN_DOT)
+    graph = compact_pdg.CompactGraph.from_dot_graph(dot)
+    g = graph.to_networkx()
+    assert list(g.nodes) == list(dot.nodes)
+    assert g.number_of_edges() == len(dot.edges) == graph.edge_count
+    for index in range(len(graph)):
+        node = graph.node_id(index)
+        assert g.nodes[node] == dot.nodes[node]
+        assert [graph.node_id(i) for i in graph.successors(index)] == list(g.successors(node))
+        assert sorted(graph.node_id(i) for i in graph.predecessors(index)) == sorted(g.predecessors(node))
+    assert list(graph.nodes_at_line(2)) == [graph.index_of("102")]
+    assert list(graph.nodes_at_line(1)) == [graph.index_of("100"), graph.index_of("101")]
+    assert list(graph.nodes_at_line(42)) == []
+
+
+def test_pack_round_trip_and_staleness(tmp_path):
+    pdg_dir = _write_pdg_dir(tmp_path)
+    path = compact_pdg.write_pack(pdg_dir)
+    assert path == str(tmp_path / "pdg.pack")
+
+    entries = {entry.file: entry for entry in compact_pdg.load_pack(pdg_dir)}
+    assert set(entries) == {"0-pdg.dot", "1-pdg.dot", "2-pdg.dot"}
+    assert entries["2-pdg.dot"].graph is None and entries["2-pdg.dot"].error
+
+    packed = joern.PDG(os.path.join(pdg_dir, "0-pdg.dot"), graph=entries["0-pdg.dot"].graph)
+    parsed = joern.PDG(os.path.join(pdg_dir, "0-pdg.dot"))
+    for pdg in (packed, parsed):
+        assert (pdg.name, pdg.filename, pdg.line_number, pdg.method_node) == ("f", "a.c", 1, "100")
+        node = pdg.get_nodes_by_line_number(4)[0]
+        assert node.code == "a = b;"
+        assert [(n.node_id, label) for n, label in node.pred_ddg] == [("102", "b")]
+        assert [n.node_id for n in node.pred_cfg_nodes] == ["103"]
+        assert node.pred_dominance.node_id == "103"
+        assert pdg.get_node("103").succ_dominance.node_id == "104"
+        assert pdg.get_node(103) is pdg.get_node("103")
+
+    # 未变化时不重写；dot 文件改动后 pack 视为过期
+    mtime = os.stat(path).st_mtime_ns
+    compact_pdg.write_pack(pdg_dir)
+    assert os.stat(path).st_mtime_ns == mtime
+    with open(os.path.join(pdg_dir, "1-pdg.dot"), "a") as f:
+        f.write("\n")
+    assert compact_pdg.load_pack(pdg_dir) is None
+
+
+def test_networkx_view_shares_node_attributes():
+    pdg = joern.PDG("mem", graph=compact_pdg.CompactGraph.from_dot_graph(compact_pdg.parse_dot(_WRITTEN_DOT)))
+    node = pdg.get_nodes_by_line_number(2)[0]
+    node.add_attr("color", "red")
+    assert pdg.g.nodes["102"]["color"] == "red"
+    node.add_attr("style", "bold")
+    assert pdg.g.nodes["102"]["style"] == "bold"
+
+
+def test_slices_follow_ddg_on_indices():
+    project = pytest.importorskip("project")
+    pdg = joern.PDG("mem", graph=compact_pdg.CompactGraph.from_dot_graph(compact_pdg.parse_dot(_WRITTEN_DOT)))
+    all_nodes = {line: pdg.get_nodes_by_line_number(line) for line in range(1, 7)}
+    criteria = all_nodes[4]
+
+    lines, nodes = project.Method.backward_slice({4}, criteria, {}, all_nodes, 4)
+    assert lines == {1, 2, 3, 4}
+    assert [n.node_id for n in nodes] == ["104", "103", "102", "101"]
+
+    lines, nodes = project.Method.forward_slice({2}, all_nodes[2], {}, all_nodes, 4)
+    assert lines == {2, 3, 4, 5}
+    assert len({n.node_id for n in nodes}) == len(nodes)
+
+    lines, _ = project.Method.backward_slice({4}, criteria, {4: {"x"}}, all_nodes, 4)
+    assert lines == {3, 4}
@@ -0,0 +1,106 @@
+"""Parity tests: in-process histogram diff vs the git diff backend."""
+import random
+import shutil
+
+import pytest
+
+import config
+import difftools
+import histogram_diff
+
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+_VOCAB = [
+    "}", "{", "", "\treturn 0;", "int x;", "\tif (a) {", "\t\tfoo();",
+    "static int f(void)", "\tbar();", "  ", "\t}", "x = 1;", "/* c */",
+    "\t\tbaz(a, b);", "else", "int main()",
+]
+
+
+def _lines(rng, n):
+    return [rng.choice(_VOCAB) if rng.random() < 0.8 else f"l{rng.randint(0, 30)}" for _ in range(n)]
+
+
+def _mutate(rng, lines):
+    out = list(lines)
+    for _ in range(rng.randint(0, 6)):
+        pos = rng.randint(0, len(out))
+        op = rng.random()
+        if op < 0.4:
+            out[pos:pos] = _lines(rng, rng.randint(1, 4))
+        elif op < 0.7 and out:
+            del out[pos:pos + rng.randint(1, 3)]
+        elif out:
+            i = min(pos, len(out) - 1)
+            out[i] = "  " + out[i] if rng.random() < 0.3 else rng.choice(_VOCAB)
+    return out
+
+
+def _join(rng, lines):
+    text = "\n".join(lines)
+    if lines and rng.random() < 0.8:
+        text += "\n"
+    return text
+
+
+def _parsed(diff):
+    # parse_diff 不支持省略行数的单行 hunk 头（如 "+1 @@"），两个后端应在同样的输入上失败
+    try:
+        return difftools.parse_diff(diff)
+    except ValueError as e:
+        return type(e)
+
+
+def _both_backends(monkeypatch, code1, code2):
+    monkeypatch.setattr(config, "DIFF_BACKEND", "git")
+    expected = difftools.git_diff_code(code1, code2, remove_diff_header=True)
+    monkeypatch.setattr(config, "DIFF_BACKEND", "python")
+    actual = difftools.git_diff_code(code1, code2, remove_diff_header=True)
+    return expected, actual
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_python_backend_matches_git_on_random_code(monkeypatch, seed):
+    rng = random.Random(seed)
+    for _ in range(60):
+        before = _lines(rng, rng.randint(0, 40))
+        code1, code2 = _join(rng, before), _join(rng, _mutate(rng, before))
+        expected, actual = _both_backends(monkeypatch, code1, code2)
+        assert actual == expected
+        assert _parsed(actual) == _parsed(expected)
+
+
+def test_python_backend_matches_git_on_repetitive_code(monkeypatch):
+    # 公共行全部重复超过 64 次时 histogram 会回退到 Myers
+    rng = random.Random(7)
+    alphabet = ["}", "", "\t}"]
+    for _ in range(5):
+        before = [rng.choice(alphabet) for _ in range(rng.randint(150, 400))]
+        after = list(before)
+        for _ in range(rng.randint(1, 20)):
+            pos = rng.randint(0, len(after))
+            if rng.random() < 0.5:
+                after[pos:pos] = [rng.choice(alphabet + ["y"]) for _ in range(rng.randint(1, 6))]
+            else:
+                del after[pos:pos + rng.randint(1, 6)]
+        expected, actual = _both_backends(monkeypatch, "\n".join(before) + "\n", "\n".join(after) + "\n")
+        assert actual == expected
+
+
+def test_python_backend_ignores_whitespace_and_marks_missing_newline(monkeypatch):
+    expected, actual = _both_backends(monkeypatch, "int a;\n  int b;\n", "int a;\n\tint b;\n")
+    assert actual == expected == ""
+
+    expected, actual = _both_backends(monkeypatch, "a\nb", "a\nc\nd")
+    assert actual == expected
+    assert "\\ No newline at end of file" in actual
+
+
+def test_diff_texts_reports_function_name_in_hunk_header():
+    code1 = "int f(void)\n{\n\tone();\n\ttwo();\n\tthree();\n\tfour();\n}\n"
+    code2 = code1.replace("four", "FOUR")
+
+    diff = histogram_diff.diff_texts(code1, code2, context=1, function_context=False)
+
+    assert "@@ -5,3 +5,3 @@ int f(void)\n" in diff
@@ -0,0 +1,87 @@
+"""Tests for the content-addressed Joern export cache."""
+import os
+
+import pytest
+
+pytest.importorskip("networkx")
+
+import config
+import joern
+import joern_cache
+from common import Language
+
+
+@pytest.fixture
+def fake_export(monkeypatch, tmp_path):
+    calls = []
+
+    def export(code_path, output_path, language, need_cdg=True, overwrite=False):
+        calls.append(output_path)
+        for name in ("cpg", "pdg", "cfg", "pdg-old"):
+            os.makedirs(os.path.join(output_path, name), exist_ok=True)
+        with open(os.path.join(output_path, "cpg", "export.dot"), "w") as f:
+            f.write("digraph {}\n")
+        with open(os.path.join(output_path, "pdg", "0-pdg.dot"), "w") as f:
+            f.write(f"digraph {{ /* {need_cdg} */ }}\n" + "x" * 1000)
+
+    monkeypatch.setattr(joern, "export_with_preprocess_and_merge", export)
+    monkeypatch.setattr(joern_cache, "_joern_fingerprint", lambda: "joern-test")
+    monkeypatch.setattr(config, "JOERN_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "JOERN_CACHE_MAX_BYTES", 1 << 20)
+    return calls
+
+
+def _code_dir(tmp_path, name, content):
+    code = tmp_path / name / "code"
+    code.mkdir(parents=True)
+    (code / "a.c").write_text(content)
+    return str(code)
+
+
+def test_export_reused_across_output_dirs(tmp_path, fake_export):
+    first = _code_dir(tmp_path, "cve1", "int f(void) { return 0; }\n")
+    second = _code_dir(tmp_path, "cve2", "int f(void) { return 0; }\n")
+
+    joern_cache.export_with_cache(first, str(tmp_path / "cve1"), Language.C, False)
+    joern_cache.export_with_cache(second, str(tmp_path / "cve2"), Language.C, False)
+
+    assert fake_export == [str(tmp_path / "cve1")]
+    restored = tmp_path / "cve2" / "pdg" / "0-pdg.dot"
+    original = tmp_path / "cve1" / "pdg" / "0-pdg.dot"
+    assert restored.read_text() == original.read_text()
+    assert os.stat(restored).st_mtime_ns == os.stat(original).st_mtime_ns
+
+
+def test_key_covers_content_and_need_cdg(tmp_path, fake_export):
+    code = _code_dir(tmp_path, "m", "int f(void) { return 0; }\n")
+    key = joern_cache.cache_key(code, Language.C, False)
+    assert key != joern_cache.cache_key(code, Language.C, True)
+    (tmp_path / "m" / "code" / "a.c").write_text("int f(void) { return 1; }\n")
+    assert key != joern_cache.cache_key(code, Language.C, False)
+
+
+def test_disabled_without_joern(tmp_path, fake_export, monkeypatch):
+    monkeypatch.setattr(joern_cache, "_joern_fingerprint", lambda: None)
+    code = _code_dir(tmp_path, "m", "int f;\n")
+    joern_cache.export_with_cache(code, str(tmp_path / "m"), Language.C, False)
+    assert not os.path.exists(config.JOERN_CACHE_DIR)
+
+
+def test_evicts_least_recently_used(tmp_path, fake_export, monkeypatch):
+    monkeypatch.setattr(config, "JOERN_CACHE_MAX_BYTES", 2500)
+    entries = os.path.join(config.JOERN_CACHE_DIR, "entries")
+    keys = []
+    for i in range(3):
+        code = _code_dir(tmp_path, f"m{i}", f"int f{i};\n")
+        keys.append(joern_cache.cache_key(code, Language.C, False))
+        joern_cache.export_with_cache(code, str(tmp_path / f"m{i}"), Language.C, False)
+        last_used = os.path.join(entries, keys[-1], "last_used")
+        os.utime(last_used, ns=(i * 10 ** 9, i * 10 ** 9))
+        if i == 1:
+            # 再次命中 m0，使 m1 成为最久未用的条目
+            restored = tmp_path / "m0-again"
+            assert joern_cache.restore(config.JOERN_CACHE_DIR, keys[0], str(restored))
+            os.utime(os.path.join(entries, keys[0], "last_used"), ns=(5 * 10 ** 9, 5 * 10 ** 9))
+    joern_cache.evict(config.JOERN_CACHE_DIR, config.JOERN_CACHE_MAX_BYTES)
+    assert sorted(os.listdir(entries)) == sorted([keys[0], keys[2]])
+    assert not [name for name in os.listdir(config.JOERN_CACHE_DIR) if name.startswith("tmp-")]
@@ -0,0 +1,109 @@
+"""Tests for the resident Joern server pool against a fake query API."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("networkx")
+
+import joern
+import joern_server
+
+
+class _FakeJoern(BaseHTTPRequestHandler):
+    sync = True
+    fail = False
+    queries: list = []
+    results: dict = {}
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _run(self, query):
+        type(self).queries.append(query)
+        if "mystiqueArgs" not in query:
+            return ""
+        return "<<MYSTIQUE_JOERN_ERR>> java.lang.RuntimeException: boom" if self.fail else "done\n<<MYSTIQUE_JOERN_OK>>\n"
+
+    def do_POST(self):
+        query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["query"]
+        if self.path == "/query-sync" and self.sync:
+            self._reply(200, {"success": True, "uuid": "u", "stdout": self._run(query)})
+        elif self.path == "/query":
+            uuid = f"u{len(self.results)}"
+            type(self).results[uuid] = self._run(query)
+            self._reply(200, {"success": True, "uuid": uuid})
+        else:
+            self._reply(404, {})
+
+    def do_GET(self):
+        uuid = self.path.rsplit("/", 1)[-1]
+        self._reply(200, {"success": True, "uuid": uuid, "stdout": self.results[uuid]})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    _FakeJoern.sync, _FakeJoern.fail, _FakeJoern.queries, _FakeJoern.results = True, False, [], {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _FakeJoern)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_tool_script_runs_main_with_explicit_output():
+    script = joern_server.tool_script(["joern-parse", "--language", "newc", '/tmp/a "b"/code'], "/tmp/out")
+    assert "io.joern.joerncli.JoernParse.main(mystiqueArgs)" in script
+    assert 'Array[String]("--output", "/tmp/out/cpg.bin", "--language", "newc", "/tmp/a \\"b\\"/code")' in script
+    with pytest.raises(joern_server.JoernServerError):
+        joern_server.tool_script(["joern", "--script", "x.sc"], "/tmp")
+
+
+@pytest.mark.parametrize("sync", [True, False])
+def test_pool_runs_tools_on_server(fake_server, sync):
+    _FakeJoern.sync = sync
+    started = []
+
+    def factory():
+        started.append(1)
+        return joern_server.JoernServer(fake_server)
+
+    pool = joern_server.JoernServerPool(2, factory=factory)
+    threads = [threading.Thread(target=pool.run_tool, args=(["joern-export", "cpg.bin"], "/tmp")) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 1 <= len(started) <= 2
+    assert len([q for q in _FakeJoern.queries if "JoernExport" in q]) == 6
+    pool.close()
+
+
+def test_failures_fall_back_to_subprocess(fake_server, monkeypatch):
+    _FakeJoern.fail = True
+    ran = []
+    monkeypatch.setattr(joern, "_run_cmd_or_raise", lambda cmd, cwd: ran.append(cmd))
+    previous = joern_server.set_pool(joern_server.JoernServerPool(1, factory=lambda: joern_server.JoernServer(fake_server)))
+    try:
+        joern._run_joern_tool(["joern-export", "cpg.bin"], "/tmp")
+        assert ran == [["joern-export", "cpg.bin"]]
+
+        def broken():
+            raise OSError("no joern")
+
+        joern_server.set_pool(joern_server.JoernServerPool(1, factory=broken))
+        joern._run_joern_tool(["joern-parse", "code"], "/tmp")
+        joern._run_joern_tool(["joern-parse", "code"], "/tmp")
+        assert len(ran) == 3
+    finally:
+        joern_server.close_pool()
+        joern_server.set_pool(previous)
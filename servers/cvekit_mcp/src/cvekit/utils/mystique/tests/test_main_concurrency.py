@@ -0,0 +1,163 @@
+"""main_from_repo: concurrent per-file migration keeps the sequential output."""
+import os
+import subprocess
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("scubatrace")
+
+import config
+import main
+
+_FILES = ["lib/a.c", "lib/b.c", "drivers/c.c", "drivers/d.c", "lib/dup.c"]
+
+
+def _git(cwd, *args):
+    return subprocess.run(
+        ["git", "-C", str(cwd), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={
+            "GIT_AUTHOR_NAME": "tester",
+            "GIT_AUTHOR_EMAIL": "tester@example.com",
+            "GIT_COMMITTER_NAME": "tester",
+            "GIT_COMMITTER_EMAIL": "tester@example.com",
+            "HOME": str(cwd),
+            "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+        },
+    ).stdout.strip()
+
+
+def _write(repo, path, text):
+    full = repo / path
+    full.parent.mkdir(parents=True, exist_ok=True)
+    full.write_text(text, encoding="utf-8")
+
+
+def _function(name, body):
+    return f"int {name}(void)\n{{\n\t{body}\n}}\n"
+
+
+@pytest.fixture
+def repos(tmp_path, monkeypatch):
+    source = tmp_path / "source"
+    target = tmp_path / "target"
+    for repo in (source, target):
+        repo.mkdir()
+        _git(repo, "init", "-q", "-b", "master")
+    for path in _FILES:
+        name = os.path.basename(path)[:-2]
+        _write(source, path, _function(name, "return 0;"))
+        if path != "lib/dup.c":
+            _write(target, path, "/* target */\n" + _function(name, "return 0;"))
+    _git(source, "add", "-A")
+    _git(source, "commit", "-q", "-m", "base")
+    for path in _FILES:
+        _write(source, path, _function(os.path.basename(path)[:-2], "return -EINVAL;"))
+    _git(source, "add", "-A")
+    _git(source, "commit", "-q", "-m", "fix")
+    _git(target, "add", "-A")
+    _git(target, "commit", "-q", "-m", "target")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "_mystique_env_initialized", True)
+    monkeypatch.setattr(main, "_mystique_logfile", None)
+    real_find = main._git_find_file_in_target
+    # lib/dup.c 在目标仓库中落到 lib/a.c，两者必须串行迁移
+    monkeypatch.setattr(
+        main,
+        "_git_find_file_in_target",
+        lambda repo, ref, path: "lib/a.c" if path == "lib/dup.c" else real_find(repo, ref, path),
+    )
+    monkeypatch.setattr(main, "_normalize_patched_formatting", lambda code, *args: code)
+    monkeypatch.setattr(main, "restore_target_signature_modifiers", lambda code, *args: code)
+    return source, target, tmp_path / "out"
+
+
+class _FakePatchbp:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.active_targets = set()
+        self.overlaps = []
+
+    def __call__(self, pre_file, post_file, target_file, language, *, outcome, **kwargs):
+        with open(target_file) as f:
+            target_code = f.read()
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            if target_code in self.active_targets:
+                self.overlaps.append(target_code)
+            self.active_targets.add(target_code)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+            self.active_targets.discard(target_code)
+        outcome.successful_target_names = ["fn"]
+        return target_code.replace("return 0;", "return -EINVAL;")
+
+
+def _run(repos, monkeypatch, workers):
+    source, target, out = repos
+    fake = _FakePatchbp()
+    monkeypatch.setattr(main, "patchbp", fake)
+    monkeypatch.setattr(config, "FILE_WORKERS", workers)
+    results = main.main_from_repo(
+        str(source),
+        str(target),
+        "HEAD",
+        "master",
+        signatures=["fn"],
+        output=str(out / str(workers)),
+        skip_cherry_pick=True,
+        patch_text_override="",
+    )
+    with open(results[0]["backported_patch_path"]) as f:
+        combined = f.read()
+    return fake, results, combined
+
+
+def test_concurrent_files_merge_in_commit_order(repos, monkeypatch):
+    _, serial_results, serial_patch = _run(repos, monkeypatch, 1)
+    fake, results, combined = _run(repos, monkeypatch, 4)
+
+    order = [item["source_file"] for item in serial_results]
+    assert order == sorted(_FILES)
+    assert [item["source_file"] for item in results] == order
+    assert combined == serial_patch
+    assert [line for line in combined.splitlines() if line.startswith("diff --git")] == [
+        f"diff --git a/{path} b/{path}" for path in ("drivers/c.c", "drivers/d.c", "lib/a.c", "lib/b.c", "lib/a.c")
+    ]
+
+    assert fake.peak > 1
+    assert fake.overlaps == []
+    for item in results:
+        assert {"patchbp_seconds", "total_seconds"} <= set(item["profile"])
+
+
+def test_single_worker_runs_sequentially(repos, monkeypatch):
+    fake, results, _ = _run(repos, monkeypatch, 1)
+    assert fake.peak == 1
+    assert len(results) == len(_FILES)
+
+
+def test_map_in_order_bounds_workers():
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def work(item):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.02 * (5 - item))
+        with lock:
+            state["running"] -= 1
+        return item * 10
+
+    assert main._map_in_order(work, [0, 1, 2, 3, 4], 2) == [0, 10, 20, 30, 40]
+    assert state["peak"] == 2
@@ -0,0 +1,173 @@
+"""Tests for the per-tree include-graph / scoped ctags cache of target_compat_resolver."""
+import os
+import re
+import subprocess
+
+import pytest
+
+import config
+import target_compat_resolver as resolver
+import target_scope_cache
+
+_DEFINE_RE = re.compile(r"^#define\s+(\w+)", re.MULTILINE)
+
+
+def _git(repo, *args):
+    subprocess.run(
+        ["git", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+        env={
+            "GIT_AUTHOR_NAME": "tester",
+            "GIT_AUTHOR_EMAIL": "tester@example.com",
+            "GIT_COMMITTER_NAME": "tester",
+            "GIT_COMMITTER_EMAIL": "tester@example.com",
+            "HOME": str(repo),
+            "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+        },
+    )
+
+
+def _write(repo, path, text):
+    target = repo / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def ctags_calls(monkeypatch):
+    """Stand-in for ctags -R: collects #define macros below the given paths."""
+    calls = []
+
+    def fake_ctags(target_repo_path, scopes):
+        calls.append(list(scopes))
+        locations = []
+        for scope in scopes:
+            full = os.path.join(target_repo_path, scope)
+            files = [full] if os.path.isfile(full) else [
+                os.path.join(root, name) for root, _, names in os.walk(full) for name in names
+            ]
+            for path in files:
+                rel = os.path.relpath(path, target_repo_path).replace(os.sep, "/")
+                if rel.startswith(".git/"):
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    text = f.read()
+                for match in _DEFINE_RE.finditer(text):
+                    line = text.count("\n", 0, match.start()) + 1
+                    locations.append(resolver.SymbolLocation(match.group(1), rel, line, "d"))
+        return locations
+
+    monkeypatch.setattr(resolver, "_run_ctags_uncached", fake_ctags)
+    return calls
+
+
+@pytest.fixture
+def parse_calls(monkeypatch):
+    calls = []
+    real_parse = resolver._parse_include_edges
+
+    def counting_parse(target_repo_path, source_path):
+        calls.append(source_path)
+        return real_parse(target_repo_path, source_path)
+
+    monkeypatch.setattr(resolver, "_parse_include_edges", counting_parse)
+    return calls
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "TARGET_SCOPE_CACHE_DB", str(tmp_path / "scope.sqlite"))
+    target_scope_cache.clear_memory_cache()
+    repo = tmp_path / "kernel"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "master")
+    _write(repo, "drivers/net/phy/phy.c", '#include <linux/phy.h>\n#include "phy_local.h"\n#define PHY_C 1\n')
+    _write(repo, "drivers/net/phy/phy_local.h", "#define PHY_LOCAL 1\n")
+    _write(repo, "drivers/net/core.c", "#define NET_CORE 1\n")
+    _write(repo, "include/linux/phy.h", "#include <linux/mdio.h>\n#define PHY_MAX_ADDR 32\n")
+    _write(repo, "include/linux/mdio.h", "#define MDIO_DEVAD_NONE (-1)\n")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-q", "-m", "base")
+    yield repo
+    target_scope_cache.clear_memory_cache()
+
+
+def _symbols(repo, scopes):
+    return {loc.symbol for loc in resolver._run_ctags(str(repo), scopes)}
+
+
+def test_repeated_checks_are_served_from_memory(repo, ctags_calls, parse_calls):
+    first = resolver._select_symbol_scopes(str(repo), "+#include <linux/phy.h>\n", "drivers/net/phy/phy.c")
+    assert "include/linux/mdio.h" in first
+    symbols = _symbols(repo, first)
+    assert {"PHY_C", "PHY_LOCAL", "NET_CORE", "PHY_MAX_ADDR", "MDIO_DEVAD_NONE"} <= symbols
+    assert len(ctags_calls) == 1 and parse_calls
+
+    ctags_calls.clear()
+    parse_calls.clear()
+    again = resolver._select_symbol_scopes(str(repo), "+#include <linux/phy.h>\n", "drivers/net/phy/phy.c")
+    assert again == first
+    assert _symbols(repo, again) == symbols
+    assert ctags_calls == [] and parse_calls == []
+
+
+def test_new_tree_only_recomputes_changed_scopes(repo, ctags_calls, parse_calls):
+    scopes = ["drivers/net/phy", "include/linux/phy.h", "include/linux/mdio.h"]
+    resolver._collect_reachable_include_files(str(repo), "drivers/net/phy/phy.c", [])
+    _symbols(repo, scopes)
+
+    _write(repo, "include/linux/mdio.h", "#define MDIO_DEVAD_ANY (-2)\n")
+    _write(repo, "include/linux/phy.h", "#define PHY_MAX_ADDR 32\n")
+    _git(repo, "commit", "-q", "-am", "rename macro")
+    ctags_calls.clear()
+    parse_calls.clear()
+
+    symbols = _symbols(repo, scopes)
+    assert "MDIO_DEVAD_ANY" in symbols and "MDIO_DEVAD_NONE" not in symbols
+    assert ctags_calls == [["include/linux/phy.h", "include/linux/mdio.h"]]
+
+    reachable = resolver._collect_reachable_include_files(str(repo), "drivers/net/phy/phy.c", [])
+    assert "include/linux/mdio.h" not in reachable
+    assert parse_calls == ["include/linux/phy.h"]
+
+
+def test_worktree_changes_are_never_cached(repo, ctags_calls, parse_calls):
+    scopes = ["drivers/net/phy"]
+    assert "PHY_LOCAL" in _symbols(repo, scopes)
+
+    _write(repo, "drivers/net/phy/phy_local.h", "#define PHY_LOCAL_V2 1\n")
+    ctags_calls.clear()
+    symbols = _symbols(repo, scopes)
+    assert "PHY_LOCAL_V2" in symbols and "PHY_LOCAL" not in symbols and "PHY_C" in symbols
+    # 只对改动文件补跑 ctags，其余结果来自缓存
+    assert ctags_calls == [["drivers/net/phy/phy_local.h"]]
+
+    _git(repo, "checkout", "--", "drivers/net/phy/phy_local.h")
+    assert "PHY_LOCAL" in _symbols(repo, scopes)
+
+    _write(repo, "include/linux/phy.h", "#define PHY_MAX_ADDR 32\n")
+    assert "include/linux/mdio.h" not in resolver._collect_reachable_include_files(
+        str(repo), None, ["linux/phy.h"]
+    )
+
+
+def test_cache_is_persisted_across_processes(repo, ctags_calls, parse_calls):
+    scopes = ["drivers/net/phy", "include/linux/phy.h"]
+    expected = _symbols(repo, scopes)
+    resolver._collect_reachable_include_files(str(repo), "drivers/net/phy/phy.c", [])
+
+    target_scope_cache.clear_memory_cache()
+    ctags_calls.clear()
+    parse_calls.clear()
+    assert _symbols(repo, scopes) == expected
+    resolver._collect_reachable_include_files(str(repo), "drivers/net/phy/phy.c", [])
+    assert ctags_calls == [] and parse_calls == []
+
+
+def test_non_git_target_runs_ctags_directly(tmp_path, ctags_calls, monkeypatch):
+    monkeypatch.setattr(config, "TARGET_SCOPE_CACHE_DB", "")
+    _write(tmp_path, "include/a.h", "#define A 1\n")
+    assert _symbols(tmp_path, ["include"]) == {"A"}
+    assert _symbols(tmp_path, ["include"]) == {"A"}
+    assert len(ctags_calls) == 2
@@ -104,3 +104,49 @@ class TestRecursiveParentFind:
     def test_stops_at_root(self):
         result = utils.recursive_parent_find("/", "nonexistent", [])
         assert result is None
+
+
+class TestExportJoernGraph:
+    def _record_exports(self, monkeypatch):
+        exported = []
+        monkeypatch.setattr(utils.joern_server, "get_pool", lambda: None)
+        monkeypatch.setattr(utils.joern_cache, "export_with_cache", lambda code_dir, *args: exported.append(code_dir))
+
+        class _NoFork:
+            @staticmethod
+            def multiprocess(*args, **kwargs):
+                raise AssertionError("worker 线程中不应 fork 进程池")
+
+        return exported, _NoFork
+
+    def test_worker_thread_uses_threads_instead_of_process_pool(self, monkeypatch):
+        import threading
+
+        exported, no_fork = self._record_exports(monkeypatch)
+        monkeypatch.setattr(utils, "cpu_heater", no_fork)
+        errors = []
+
+        def run():
+            try:
+                utils.export_joern_graph("pre", "post", "target", False, None, multiprocess=True)
+            except Exception as exc:  # noqa: BLE001
+                errors.append(exc)
+
+        worker = threading.Thread(target=run)
+        worker.start()
+        worker.join()
+        assert errors == []
+        assert sorted(exported) == ["post/code", "pre/code", "target/code"]
+
+    def test_main_thread_keeps_process_pool(self, monkeypatch):
+        calls = []
+
+        class _Heater:
+            @staticmethod
+            def multiprocess(func, args_list, **kwargs):
+                calls.append(len(args_list))
+
+        self._record_exports(monkeypatch)
+        monkeypatch.setattr(utils, "cpu_heater", _Heater)
+        utils.export_joern_graph("pre", "post", "target", False, None, multiprocess=True)
+        assert calls == [3]
@@ -0,0 +1,365 @@
+"""按 git tree SHA 持久化仓库路径索引，用 basename trigram 索引和重命名历史回答相似路径查询"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import posixpath
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+
+from .fuzzy_index import TrigramIndex
+from .symbol_index_cache import resolve_tree_sha
+
+logger = logging.getLogger(__name__)
+
+ENV_CACHE_DB = "CVEKIT_REPO_PATH_INDEX_DB"
+
+# 每个仓库保留的 tree 索引上限，超出后按 last_used_at 淘汰
+MAX_TREES_PER_REPO = 8
+# 进程内保留的 trigram 索引数量
+MAX_MEMORY_INDEXES = 4
+# 沿重命名链追踪的最大跳数（a -> b -> c）
+MAX_RENAME_HOPS = 4
+# 重命名历史只回溯这一时间范围，避免在路径从未存在过时遍历整个内核历史
+RENAME_HISTORY_SINCE = "1 year ago"
+
+_memory_indexes: "OrderedDict[tuple[str, str], _PathNameIndex]" = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def default_cache_db_path() -> Path:
+    raw_path = os.environ.get(ENV_CACHE_DB, "").strip()
+    if raw_path:
+        return Path(raw_path).expanduser()
+    return Path("~/.cvekit/.cache/repo-path-index.sqlite").expanduser()
+
+
+class _PathNameIndex:
+    """basename -> 路径列表，以及 basename 上的 trigram 索引"""
+
+    def __init__(self, paths: list[str]):
+        self.paths = frozenset(paths)
+        self.by_name: dict[str, list[str]] = {}
+        for path in sorted(paths):
+            self.by_name.setdefault(posixpath.basename(path), []).append(path)
+        self.names = TrigramIndex(self.by_name)
+
+    def nearest(self, filename: str, original_path: str, top_n: int) -> list[str]:
+        # 每个 basename 至少对应一个路径，取 top_n 个 basename 足够凑满 top_n 个路径
+        ranked = []
+        for name, distance in self.names.nearest(filename, k=top_n):
+            for path in self.by_name[name]:
+                ranked.append((distance, -_common_dir_depth(path, original_path), path))
+        ranked.sort()
+        return [path for _, _, path in ranked[:top_n]]
+
+
+def similar_paths(
+    repo_path: str,
+    ref: str,
+    missing_path: str,
+    top_n: int = 5,
+    db_path: str | os.PathLike[str] | None = None,
+) -> list[str]:
+    """Return paths in ref's tree that likely replace missing_path.
+
+    At most top_n paths are returned. Rename targets found in git history come
+    first; the rest are the paths whose basename is closest to missing_path's
+    basename by Levenshtein distance, ties preferring paths sharing more
+    leading directories with missing_path.
+    """
+    repo_realpath = _repo_realpath(repo_path)
+    tree_sha = resolve_tree_sha(repo_realpath, ref)
+    index = _load_index(repo_realpath, tree_sha, db_path)
+
+    candidates = []
+    if "/" in missing_path:
+        candidates.extend(
+            rename_targets(repo_realpath, ref, missing_path, db_path=db_path, _tree_sha=tree_sha, _index=index)
+        )
+    filename = posixpath.basename(missing_path)
+    for path in index.nearest(filename, missing_path, top_n):
+        if path not in candidates:
+            candidates.append(path)
+    return candidates[:top_n]
+
+
+def rename_targets(
+    repo_path: str,
+    ref: str,
+    missing_path: str,
+    db_path: str | os.PathLike[str] | None = None,
+    *,
+    _tree_sha: str | None = None,
+    _index: _PathNameIndex | None = None,
+) -> list[str]:
+    """Follow git rename history of missing_path up to ref; return targets present in ref's tree."""
+    repo_realpath = _repo_realpath(repo_path)
+    tree_sha = _tree_sha or resolve_tree_sha(repo_realpath, ref)
+    index = _index or _load_index(repo_realpath, tree_sha, db_path)
+    db_file = Path(db_path).expanduser() if db_path else default_cache_db_path()
+
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        row = conn.execute(
+            "SELECT targets FROM path_renames WHERE repo_realpath = ? AND tree_sha = ? AND old_path = ?",
+            (repo_realpath, tree_sha, missing_path),
+        ).fetchone()
+    if row is not None:
+        return json.loads(row[0])
+
+    targets = []
+    pending = [missing_path]
+    seen = {missing_path}
+    for _ in range(MAX_RENAME_HOPS):
+        next_pending = []
+        for old_path in pending:
+            for new_path in _git_renamed_to(repo_realpath, ref, old_path):
+                if new_path in seen:
+                    continue
+                seen.add(new_path)
+                if new_path in index.paths:
+                    targets.append(new_path)
+                else:
+                    next_pending.append(new_path)
+        if not next_pending:
+            break
+        pending = next_pending
+
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        conn.execute(
+            "INSERT OR REPLACE INTO path_renames (repo_realpath, tree_sha, old_path, targets) VALUES (?, ?, ?, ?)",
+            (repo_realpath, tree_sha, missing_path, json.dumps(targets)),
+        )
+        conn.commit()
+    if targets:
+        logger.debug("path rename history repo=%s %s -> %s", repo_realpath, missing_path, targets)
+    return targets
+
+
+def _load_index(
+    repo_realpath: str,
+    tree_sha: str,
+    db_path: str | os.PathLike[str] | None,
+) -> _PathNameIndex:
+    key = (repo_realpath, tree_sha)
+    with _memory_lock:
+        index = _memory_indexes.get(key)
+        if index is not None:
+            _memory_indexes.move_to_end(key)
+            return index
+
+    started_at = time.perf_counter()
+    paths, status = _ensure_tree_paths(repo_realpath, tree_sha, db_path)
+    index = _PathNameIndex(paths)
+    logger.info(
+        "path index %s repo=%s tree=%s files=%d elapsed=%.3fs",
+        status,
+        repo_realpath,
+        tree_sha,
+        len(paths),
+        time.perf_counter() - started_at,
+    )
+    with _memory_lock:
+        _memory_indexes[key] = index
+        while len(_memory_indexes) > MAX_MEMORY_INDEXES:
+            _memory_indexes.popitem(last=False)
+    return index
+
+
+def _ensure_tree_paths(
+    repo_realpath: str,
+    tree_sha: str,
+    db_path: str | os.PathLike[str] | None,
+) -> tuple[list[str], str]:
+    db_file = Path(db_path).expanduser() if db_path else default_cache_db_path()
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        indexed = conn.execute(
+            "SELECT 1 FROM path_tree_index WHERE repo_realpath = ? AND tree_sha = ?",
+            (repo_realpath, tree_sha),
+        ).fetchone()
+        if indexed:
+            conn.execute(
+                "UPDATE path_tree_index SET last_used_at = ? WHERE repo_realpath = ? AND tree_sha = ?",
+                (_now(), repo_realpath, tree_sha),
+            )
+            conn.commit()
+            rows = conn.execute(
+                "SELECT path FROM path_tree_files WHERE repo_realpath = ? AND tree_sha = ?",
+                (repo_realpath, tree_sha),
+            ).fetchall()
+            return [row[0] for row in rows], "hit"
+
+    paths = _git_ls_tree_paths(repo_realpath, tree_sha)
+    now = _now()
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        conn.execute("BEGIN")
+        conn.execute(
+            "DELETE FROM path_tree_files WHERE repo_realpath = ? AND tree_sha = ?",
+            (repo_realpath, tree_sha),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO path_tree_files (repo_realpath, tree_sha, path) VALUES (?, ?, ?)",
+            [(repo_realpath, tree_sha, path) for path in paths],
+        )
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO path_tree_index (
+                repo_realpath,
+                tree_sha,
+                built_at,
+                last_used_at,
+                file_count
+            ) VALUES (?, ?, ?, ?, ?)
+            """,
+            (repo_realpath, tree_sha, now, now, len(paths)),
+        )
+        _evict_old_trees(conn, repo_realpath)
+        conn.commit()
+    return paths, "built"
+
+
+def _repo_realpath(repo_path: str) -> str:
+    return os.path.realpath(os.path.abspath(os.path.expanduser(repo_path)))
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _common_dir_depth(path: str, other: str) -> int:
+    depth = 0
+    for left, right in zip(path.split("/")[:-1], other.split("/")[:-1]):
+        if left != right:
+            break
+        depth += 1
+    return depth
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS path_tree_index (
+            repo_realpath TEXT NOT NULL,
+            tree_sha TEXT NOT NULL,
+            built_at TEXT NOT NULL,
+            last_used_at TEXT,
+            file_count INTEGER,
+            PRIMARY KEY (repo_realpath, tree_sha)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS path_tree_files (
+            repo_realpath TEXT NOT NULL,
+            tree_sha TEXT NOT NULL,
+            path TEXT NOT NULL,
+            PRIMARY KEY (repo_realpath, tree_sha, path)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS path_renames (
+            repo_realpath TEXT NOT NULL,
+            tree_sha TEXT NOT NULL,
+            old_path TEXT NOT NULL,
+            targets TEXT NOT NULL,
+            PRIMARY KEY (repo_realpath, tree_sha, old_path)
+        )
+        """
+    )
+
+
+def _evict_old_trees(conn: sqlite3.Connection, repo_realpath: str) -> None:
+    stale = conn.execute(
+        """
+        SELECT tree_sha
+        FROM path_tree_index
+        WHERE repo_realpath = ?
+        ORDER BY last_used_at DESC
+        LIMIT -1 OFFSET ?
+        """,
+        (repo_realpath, MAX_TREES_PER_REPO),
+    ).fetchall()
+    for (tree_sha,) in stale:
+        for table in ("path_tree_files", "path_renames", "path_tree_index"):
+            conn.execute(
+                f"DELETE FROM {table} WHERE repo_realpath = ? AND tree_sha = ?",
+                (repo_realpath, tree_sha),
+            )
+
+
+def _git_ls_tree_paths(repo_path: str, tree_sha: str) -> list[str]:
+    process = subprocess.run(
+        ["git", "-C", repo_path, "ls-tree", "-r", "-z", "--name-only", "--full-tree", tree_sha],
+        check=False,
+        capture_output=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(
+            process.stderr.decode("utf-8", errors="replace").strip()
+            or f"git ls-tree exited with {process.returncode}"
+        )
+    return [
+        path.decode("utf-8", errors="surrogateescape")
+        for path in process.stdout.split(b"\x00")
+        if path
+    ]
+
+
+def _git_renamed_to(repo_path: str, ref: str, old_path: str) -> list[str]:
+    """Return the new names of old_path in the last commit up to ref that removed it."""
+    process = subprocess.run(
+        [
+            "git", "-C", repo_path, "log", "-n", "1", "--no-merges", "--format=%H",
+            f"--since={RENAME_HISTORY_SINCE}", ref, "--", old_path,
+        ],
+        check=False,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    commit = process.stdout.strip()
+    if process.returncode != 0 or not commit:
+        return []
+    process = subprocess.run(
+        [
+            "git", "-C", repo_path, "diff-tree", "-r", "-z", "-M", "--root",
+            "--no-commit-id", "--name-status", "--diff-filter=R", commit,
+        ],
+        check=False,
+        capture_output=True,
+    )
+    if process.returncode != 0:
+        return []
+    fields = [
+        field.decode("utf-8", errors="surrogateescape")
+        for field in process.stdout.split(b"\x00")
+        if field
+    ]
+    # -z 输出格式：R<score> NUL old NUL new NUL ...
+    renamed = []
+    for offset in range(0, len(fields) - 2, 3):
+        status, source, destination = fields[offset:offset + 3]
+        if status.startswith("R") and source == old_path:
+            renamed.append(destination)
+    return renamed
@@ -0,0 +1,579 @@
+"""按 git tree SHA 持久化 ctags 符号索引，支持跨进程复用，并基于 git diff 增量更新"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import subprocess
+import tarfile
+import tempfile
+import time
+from collections.abc import Mapping
+from contextlib import closing
+from pathlib import Path
+from typing import Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+ENV_CACHE_DB = "CVEKIT_SYMBOL_INDEX_DB"
+
+# 与 ctags --languages=C,C++ 的默认扩展名映射保持一致
+CTAGS_SOURCE_SUFFIXES = (
+    ".c", ".h",
+    ".c++", ".cc", ".cp", ".cpp", ".cxx",
+    ".h++", ".hh", ".hp", ".hpp", ".hxx", ".inl",
+    ".C", ".H", ".CPP", ".CXX",
+)
+# 每个仓库保留的 tree 索引上限，超出后按 last_used_at 淘汰
+MAX_TREES_PER_REPO = 8
+# git archive / ls-tree 单次传入的路径数量上限，避免命令行过长
+_PATHSPEC_CHUNK = 500
+
+
+def default_cache_db_path() -> Path:
+    raw_path = os.environ.get(ENV_CACHE_DB, "").strip()
+    if raw_path:
+        return Path(raw_path).expanduser()
+    return Path("~/.cvekit/.cache/symbol-index.sqlite").expanduser()
+
+
+def resolve_tree_sha(repo_path: str, ref: str) -> str:
+    process = subprocess.run(
+        ["git", "-C", repo_path, "rev-parse", "--verify", f"{ref}^{{tree}}"],
+        check=False,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    if process.returncode != 0:
+        raise ValueError(process.stderr.strip() or f"cannot resolve tree for ref {ref}")
+    return process.stdout.strip()
+
+
+def ensure_symbol_index(
+    *,
+    repo_path: str,
+    tree_sha: str,
+    db_path: str | os.PathLike[str] | None = None,
+) -> str:
+    """Ensure ctags symbols for every C/C++ file in tree_sha are indexed.
+
+    Returns one of: ``hit``, ``built``, ``incremental``.
+    """
+    repo_realpath = _repo_realpath(repo_path)
+    db_file = Path(db_path).expanduser() if db_path else default_cache_db_path()
+    started_at = time.perf_counter()
+
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        if _tree_is_indexed(conn, repo_realpath, tree_sha):
+            _touch_tree(conn, repo_realpath, tree_sha)
+            conn.commit()
+            return "hit"
+        base_tree = _latest_indexed_tree(conn, repo_realpath)
+
+    changed_paths = None
+    if base_tree:
+        changed_paths = _git_diff_name_only(repo_realpath, base_tree, tree_sha)
+    if changed_paths is not None:
+        changed_paths = [path for path in changed_paths if _is_source_path(path)]
+    if changed_paths is None:
+        entries = _git_ls_tree_sources(repo_realpath, tree_sha)
+        status = "built"
+    else:
+        entries = _git_ls_tree_sources(repo_realpath, tree_sha, changed_paths) if changed_paths else {}
+        status = "incremental"
+
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        known_blobs = _known_blobs(conn, repo_realpath, set(entries.values()))
+    # 同一 blob 只需解析一次：相同内容的多个路径只导出第一个
+    pending: dict[str, str] = {}
+    seen_blobs = set(known_blobs)
+    for path, blob in sorted(entries.items()):
+        if blob not in seen_blobs:
+            seen_blobs.add(blob)
+            pending[path] = blob
+    tags = _ctags_for_paths(repo_realpath, tree_sha, pending)
+
+    now = _now()
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        conn.execute("BEGIN")
+        conn.execute(
+            "DELETE FROM symbol_tree_files WHERE repo_realpath = ? AND tree_sha = ?",
+            (repo_realpath, tree_sha),
+        )
+        if status == "incremental":
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS symbol_changed_paths (path TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM symbol_changed_paths")
+            conn.executemany(
+                "INSERT OR IGNORE INTO symbol_changed_paths (path) VALUES (?)",
+                [(path,) for path in changed_paths],
+            )
+            conn.execute(
+                """
+                INSERT INTO symbol_tree_files (repo_realpath, tree_sha, path, blob_sha)
+                SELECT repo_realpath, ?, path, blob_sha
+                FROM symbol_tree_files
+                WHERE repo_realpath = ?
+                  AND tree_sha = ?
+                  AND path NOT IN (SELECT path FROM symbol_changed_paths)
+                """,
+                (tree_sha, repo_realpath, base_tree),
+            )
+        conn.executemany(
+            "INSERT OR REPLACE INTO symbol_tree_files (repo_realpath, tree_sha, path, blob_sha) VALUES (?, ?, ?, ?)",
+            [(repo_realpath, tree_sha, path, blob) for path, blob in entries.items()],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO symbol_blobs (repo_realpath, blob_sha) VALUES (?, ?)",
+            [(repo_realpath, blob) for blob in set(pending.values())],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO symbol_blob_tags (repo_realpath, blob_sha, symbol, lineno) VALUES (?, ?, ?, ?)",
+            [
+                (repo_realpath, pending[path], symbol, lineno)
+                for symbol, path, lineno in tags
+                if path in pending
+            ],
+        )
+        file_count = conn.execute(
+            "SELECT COUNT(*) FROM symbol_tree_files WHERE repo_realpath = ? AND tree_sha = ?",
+            (repo_realpath, tree_sha),
+        ).fetchone()[0]
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO symbol_tree_index (
+                repo_realpath,
+                tree_sha,
+                built_at,
+                last_used_at,
+                file_count,
+                status
+            ) VALUES (?, ?, ?, ?, ?, 'complete')
+            """,
+            (repo_realpath, tree_sha, now, now, file_count),
+        )
+        _evict_old_trees(conn, repo_realpath)
+        conn.commit()
+
+    logger.info(
+        "symbol index %s repo=%s tree=%s base_tree=%s changed=%s ctags_files=%d tags=%d files=%d elapsed=%.3fs",
+        status,
+        repo_realpath,
+        tree_sha,
+        base_tree or "",
+        "all" if changed_paths is None else len(changed_paths),
+        len(pending),
+        len(tags),
+        file_count,
+        time.perf_counter() - started_at,
+    )
+    return status
+
+
+def load_symbol_locations(
+    *,
+    repo_path: str,
+    tree_sha: str,
+    symbol: str,
+    db_path: str | os.PathLike[str] | None = None,
+) -> list[tuple[str, int]]:
+    repo_realpath = _repo_realpath(repo_path)
+    db_file = Path(db_path).expanduser() if db_path else default_cache_db_path()
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        rows = conn.execute(
+            """
+            SELECT f.path, t.lineno
+            FROM symbol_blob_tags AS t
+            JOIN symbol_tree_files AS f
+              ON f.repo_realpath = t.repo_realpath
+             AND f.blob_sha = t.blob_sha
+            WHERE t.repo_realpath = ?
+              AND t.symbol = ?
+              AND f.tree_sha = ?
+            ORDER BY f.path, t.lineno
+            """,
+            (repo_realpath, symbol, tree_sha),
+        ).fetchall()
+    return [(str(path), int(lineno)) for path, lineno in rows]
+
+
+def load_symbol_names(
+    *,
+    repo_path: str,
+    tree_sha: str,
+    db_path: str | os.PathLike[str] | None = None,
+) -> list[str]:
+    repo_realpath = _repo_realpath(repo_path)
+    db_file = Path(db_path).expanduser() if db_path else default_cache_db_path()
+    with closing(_connect(db_file)) as conn:
+        _ensure_schema(conn)
+        rows = conn.execute(
+            """
+            SELECT DISTINCT t.symbol
+            FROM symbol_tree_files AS f
+            JOIN symbol_blob_tags AS t
+              ON t.repo_realpath = f.repo_realpath
+             AND t.blob_sha = f.blob_sha
+            WHERE f.repo_realpath = ?
+              AND f.tree_sha = ?
+            ORDER BY t.symbol
+            """,
+            (repo_realpath, tree_sha),
+        ).fetchall()
+    return [str(row[0]) for row in rows]
+
+
+class SymbolIndexView(Mapping):
+    """只读 symbol_map 视图：symbol -> [(file, lineno)]，按需查询磁盘索引并在内存中缓存。"""
+
+    def __init__(
+        self,
+        repo_path: str,
+        tree_sha: str,
+        db_path: str | os.PathLike[str] | None = None,
+    ):
+        self.repo_path = repo_path
+        self.tree_sha = tree_sha
+        self.db_path = db_path
+        self._locations: dict[str, list[tuple[str, int]]] = {}
+        self._names: list[str] | None = None
+
+    def __getitem__(self, symbol: str) -> list[tuple[str, int]]:
+        if symbol not in self._locations:
+            self._locations[symbol] = load_symbol_locations(
+                repo_path=self.repo_path,
+                tree_sha=self.tree_sha,
+                symbol=symbol,
+                db_path=self.db_path,
+            )
+        locations = self._locations[symbol]
+        if not locations:
+            raise KeyError(symbol)
+        return locations
+
+    def __contains__(self, symbol) -> bool:
+        try:
+            self[symbol]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names())
+
+    def __len__(self) -> int:
+        return len(self.names())
+
+    def names(self) -> list[str]:
+        if self._names is None:
+            self._names = load_symbol_names(
+                repo_path=self.repo_path,
+                tree_sha=self.tree_sha,
+                db_path=self.db_path,
+            )
+        return self._names
+
+
+def _repo_realpath(repo_path: str) -> str:
+    return os.path.realpath(os.path.abspath(os.path.expanduser(repo_path)))
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS symbol_tree_index (
+            repo_realpath TEXT NOT NULL,
+            tree_sha TEXT NOT NULL,
+            built_at TEXT NOT NULL,
+            last_used_at TEXT,
+            file_count INTEGER,
+            status TEXT NOT NULL DEFAULT 'complete',
+            PRIMARY KEY (repo_realpath, tree_sha)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS symbol_tree_files (
+            repo_realpath TEXT NOT NULL,
+            tree_sha TEXT NOT NULL,
+            path TEXT NOT NULL,
+            blob_sha TEXT NOT NULL,
+            PRIMARY KEY (repo_realpath, tree_sha, path)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_symbol_tree_files_blob
+        ON symbol_tree_files (repo_realpath, blob_sha, tree_sha)
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS symbol_blobs (
+            repo_realpath TEXT NOT NULL,
+            blob_sha TEXT NOT NULL,
+            PRIMARY KEY (repo_realpath, blob_sha)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS symbol_blob_tags (
+            repo_realpath TEXT NOT NULL,
+            blob_sha TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            lineno INTEGER NOT NULL,
+            PRIMARY KEY (repo_realpath, blob_sha, symbol, lineno)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_symbol_blob_tags_symbol
+        ON symbol_blob_tags (repo_realpath, symbol)
+        """
+    )
+
+
+def _tree_is_indexed(conn: sqlite3.Connection, repo_realpath: str, tree_sha: str) -> bool:
+    row = conn.execute(
+        """
+        SELECT 1
+        FROM symbol_tree_index
+        WHERE repo_realpath = ?
+          AND tree_sha = ?
+          AND status = 'complete'
+        """,
+        (repo_realpath, tree_sha),
+    ).fetchone()
+    return row is not None
+
+
+def _latest_indexed_tree(conn: sqlite3.Connection, repo_realpath: str) -> str | None:
+    row = conn.execute(
+        """
+        SELECT tree_sha
+        FROM symbol_tree_index
+        WHERE repo_realpath = ?
+          AND status = 'complete'
+        ORDER BY last_used_at DESC
+        LIMIT 1
+        """,
+        (repo_realpath,),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _touch_tree(conn: sqlite3.Connection, repo_realpath: str, tree_sha: str) -> None:
+    conn.execute(
+        "UPDATE symbol_tree_index SET last_used_at = ? WHERE repo_realpath = ? AND tree_sha = ?",
+        (_now(), repo_realpath, tree_sha),
+    )
+
+
+def _known_blobs(conn: sqlite3.Connection, repo_realpath: str, blobs: set[str]) -> set[str]:
+    if not blobs:
+        return set()
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS symbol_lookup_blobs (blob_sha TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM symbol_lookup_blobs")
+    conn.executemany("INSERT OR IGNORE INTO symbol_lookup_blobs (blob_sha) VALUES (?)", [(b,) for b in blobs])
+    rows = conn.execute(
+        """
+        SELECT b.blob_sha
+        FROM symbol_blobs AS b
+        JOIN symbol_lookup_blobs AS l ON l.blob_sha = b.blob_sha
+        WHERE b.repo_realpath = ?
+        """,
+        (repo_realpath,),
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def _evict_old_trees(conn: sqlite3.Connection, repo_realpath: str) -> None:
+    stale = conn.execute(
+        """
+        SELECT tree_sha
+        FROM symbol_tree_index
+        WHERE repo_realpath = ?
+        ORDER BY last_used_at DESC
+        LIMIT -1 OFFSET ?
+        """,
+        (repo_realpath, MAX_TREES_PER_REPO),
+    ).fetchall()
+    if not stale:
+        return
+    for (tree_sha,) in stale:
+        conn.execute(
+            "DELETE FROM symbol_tree_files WHERE repo_realpath = ? AND tree_sha = ?",
+            (repo_realpath, tree_sha),
+        )
+        conn.execute(
+            "DELETE FROM symbol_tree_index WHERE repo_realpath = ? AND tree_sha = ?",
+            (repo_realpath, tree_sha),
+        )
+    orphan_filter = """
+        repo_realpath = ?
+        AND blob_sha NOT IN (
+            SELECT blob_sha FROM symbol_tree_files WHERE repo_realpath = ?
+        )
+    """
+    conn.execute(f"DELETE FROM symbol_blob_tags WHERE {orphan_filter}", (repo_realpath, repo_realpath))
+    conn.execute(f"DELETE FROM symbol_blobs WHERE {orphan_filter}", (repo_realpath, repo_realpath))
+
+
+def _is_source_path(path: str) -> bool:
+    return path.endswith(CTAGS_SOURCE_SUFFIXES)
+
+
+def _chunks(items: list[str], size: int) -> Iterable[list[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _git_diff_name_only(repo_path: str, old_tree: str, new_tree: str) -> list[str] | None:
+    process = subprocess.run(
+        ["git", "-C", repo_path, "diff", "--name-only", "--no-renames", "-z", old_tree, new_tree],
+        check=False,
+        capture_output=True,
+    )
+    if process.returncode != 0:
+        logger.warning(
+            "symbol index diff failed repo=%s old=%s new=%s: %s",
+            repo_path,
+            old_tree,
+            new_tree,
+            process.stderr.decode("utf-8", errors="replace").strip(),
+        )
+        return None
+    return [
+        path.decode("utf-8", errors="surrogateescape")
+        for path in process.stdout.split(b"\x00")
+        if path
+    ]
+
+
+def _git_ls_tree_sources(
+    repo_path: str,
+    tree_sha: str,
+    paths: list[str] | None = None,
+) -> dict[str, str]:
+    entries: dict[str, str] = {}
+    batches = [None] if paths is None else list(_chunks(list(paths), _PATHSPEC_CHUNK))
+    for batch in batches:
+        command = ["git", "-C", repo_path, "ls-tree", "-r", "-z", "--full-tree", tree_sha]
+        if batch is not None:
+            command.extend(["--", *batch])
+        process = subprocess.run(command, check=False, capture_output=True)
+        if process.returncode != 0:
+            raise RuntimeError(
+                process.stderr.decode("utf-8", errors="replace").strip()
+                or f"git ls-tree exited with {process.returncode}"
+            )
+        for record in process.stdout.split(b"\x00"):
+            if not record or b"\t" not in record:
+                continue
+            meta, raw_path = record.split(b"\t", 1)
+            parts = meta.split()
+            if len(parts) != 3 or parts[1] != b"blob":
+                continue
+            path = raw_path.decode("utf-8", errors="surrogateescape")
+            if _is_source_path(path):
+                entries[path] = parts[2].decode("ascii")
+    return entries
+
+
+def _export_paths(repo_path: str, tree_sha: str, paths: list[str], dest_dir: str) -> None:
+    extract_kwargs = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+    for batch in _chunks(paths, _PATHSPEC_CHUNK):
+        with subprocess.Popen(
+            ["git", "-C", repo_path, "archive", "--format=tar", tree_sha, "--", *batch],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        ) as process:
+            with tarfile.open(fileobj=process.stdout, mode="r|") as archive:
+                archive.extractall(dest_dir, **extract_kwargs)
+            stderr_output = process.stderr.read()
+        if process.returncode != 0:
+            raise RuntimeError(
+                stderr_output.decode("utf-8", errors="replace").strip()
+                or f"git archive exited with {process.returncode}"
+            )
+
+
+def _ctags_for_paths(repo_path: str, tree_sha: str, entries: dict[str, str]) -> list[tuple[str, str, int]]:
+    """Export the given tree paths to a scratch directory and run ctags over them."""
+    if not entries:
+        return []
+    with tempfile.TemporaryDirectory(prefix="cvekit-symbol-index-") as work_dir:
+        _export_paths(repo_path, tree_sha, sorted(entries), work_dir)
+        return _run_ctags(work_dir)
+
+
+def _run_ctags(work_dir: str) -> list[tuple[str, str, int]]:
+    with tempfile.NamedTemporaryFile(prefix="ctags-", suffix=".tags", delete=False) as f:
+        tags_path = f.name
+    try:
+        ctags = subprocess.run(
+            [
+                "ctags",
+                "--excmd=number",
+                "-R",
+                "--languages=C,C++",
+                "--c-kinds=+p",  # 包含函数原型
+                "--c++-kinds=+p",
+                "--extras=+q",  # 包含限定符
+                "-f",
+                tags_path,
+                ".",
+            ],
+            stdout=subprocess.PIPE,
+            cwd=work_dir,
+            stdin=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if ctags.returncode != 0:
+            stderr = (ctags.stderr or "").strip()
+            if stderr:
+                logger.warning("symbol index ctags exited with %s: %s", ctags.returncode, stderr[:500])
+        if not os.path.exists(tags_path) or os.path.getsize(tags_path) == 0:
+            raise subprocess.CalledProcessError(
+                ctags.returncode, ctags.args, output=ctags.stdout, stderr=ctags.stderr
+            )
+
+        tags: list[tuple[str, str, int]] = []
+        with open(tags_path, "rb") as f:
+            for line in f:
+                text = line.decode("utf-8", errors="ignore")
+                if not text or text.startswith("!_TAG_"):
+                    continue
+                try:
+                    symbol, file, lineno = text.strip().split(';"')[0].split("\t")
+                    tags.append((symbol, os.path.normpath(file), int(lineno)))
+                except ValueError:
+                    continue
+        return tags
+    finally:
+        try:
+            if os.path.exists(tags_path):
+                os.unlink(tags_path)
+        except OSError:
+            pass
@@ -0,0 +1,319 @@
+"""批量计算 git describe --tags --always：一次拓扑遍历定位最近 tag，再按 tag 分组统计距离"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import subprocess
+import time
+from collections import Counter, defaultdict
+from typing import Iterable, NamedTuple
+
+from . import git_subject_index_cache
+
+logger = logging.getLogger(__name__)
+
+# 未命中缓存的 commit 少于该值时直接交给 git describe。eval/bench_tag_describe.py 测得：合并密集的历史中
+# git describe 每个 commit 约 4ms，拓扑遍历约 1s 且基本不随批量增长，交点在 200~250 个 commit
+MIN_WALK_BATCH = 256
+
+
+class _Tag(NamedTuple):
+    name: str
+    annotated: bool
+    tagger_date: int
+    commit_date: int
+
+
+def describe_commits(
+    repo_path: str,
+    commit_ids: Iterable[str],
+    *,
+    use_disk_cache: bool = True,
+    db_path: str | os.PathLike[str] | None = None,
+) -> dict[str, str]:
+    """Return ``git describe --tags --always`` output for full commit ids.
+
+    Commits git does not know are left out of the result, so callers can fall
+    back to their own handling for them.
+    """
+    started_at = time.perf_counter()
+    shas = list(dict.fromkeys(commit_id.strip() for commit_id in commit_ids if commit_id and commit_id.strip()))
+    if not shas:
+        return {}
+    tags, fingerprint = _list_tags(repo_path)
+
+    cached: dict[str, str] = {}
+    if use_disk_cache:
+        try:
+            cached = git_subject_index_cache.load_commit_describes(
+                repo_path=repo_path, tags_fingerprint=fingerprint, commit_ids=shas, db_path=db_path,
+            )
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("tag describe disk cache unavailable repo=%s: %s", repo_path, exc)
+            use_disk_cache = False
+
+    missing = [sha for sha in shas if sha not in cached]
+    resolved: dict[str, str] = {}
+    if missing:
+        if len(missing) < MIN_WALK_BATCH:
+            resolved = _describe_with_git(repo_path, missing)
+        else:
+            resolved = _describe_by_walk(repo_path, missing, tags)
+        if use_disk_cache and resolved:
+            try:
+                git_subject_index_cache.store_commit_describes(
+                    repo_path=repo_path, tags_fingerprint=fingerprint, describes=resolved, db_path=db_path,
+                )
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning("tag describe disk cache store failed repo=%s: %s", repo_path, exc)
+
+    logger.info(
+        "tag describe repo=%s commits=%d cached=%d resolved=%d tags=%d elapsed=%.3fs",
+        repo_path,
+        len(shas),
+        len(cached),
+        len(resolved),
+        len(tags),
+        time.perf_counter() - started_at,
+    )
+    return {sha: cached.get(sha) or resolved[sha] for sha in shas if sha in cached or sha in resolved}
+
+
+def _run_git(repo_path: str, *args: str, input_text: str | None = None) -> str:
+    process = subprocess.run(
+        ["git", "-C", repo_path, *args],
+        input=input_text,
+        check=False,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip() or f"git {args[0]} exited with {process.returncode}")
+    return process.stdout
+
+
+def _list_tags(repo_path: str) -> tuple[dict[str, _Tag], str]:
+    """Map each tagged commit to the tag git describe would print for it."""
+    output = _run_git(
+        repo_path,
+        "for-each-ref",
+        "--format=%(objectname)%00%(objecttype)%00%(*objectname)%00%(*objecttype)%00%(refname:strip=2)"
+        "%00%(creatordate:unix)%00%(committerdate:unix)%00%(*committerdate:unix)",
+        "refs/tags",
+    )
+    tags: dict[str, _Tag] = {}
+    for line in output.splitlines():
+        parts = line.split("\x00")
+        if len(parts) != 8:
+            continue
+        object_id, object_type, peeled_id, peeled_type, name, tagger_date, commit_date, peeled_commit_date = parts
+        annotated = object_type == "tag"
+        if (peeled_type if annotated else object_type) != "commit":
+            continue
+        commit_id = peeled_id if annotated else object_id
+        tag = _Tag(name, annotated, int(tagger_date or 0), int((peeled_commit_date if annotated else commit_date) or 0))
+        current = tags.get(commit_id)
+        # 与 git describe 一致：同一 commit 上附注 tag 优先，多个附注 tag 取最新的，其余保留字典序第一个
+        if (
+            current is None
+            or tag.annotated > current.annotated
+            or (tag.annotated and current.annotated and tag.tagger_date > current.tagger_date)
+        ):
+            tags[commit_id] = tag
+    return tags, hashlib.sha1(output.encode("utf-8")).hexdigest()
+
+
+def _describe_with_git(repo_path: str, commit_ids: list[str]) -> dict[str, str]:
+    try:
+        lines = _run_git(repo_path, "describe", "--tags", "--always", *commit_ids).splitlines()
+    except RuntimeError as exc:
+        logger.warning("tag describe git describe failed repo=%s: %s", repo_path, exc)
+        return {}
+    if len(lines) != len(commit_ids):
+        return {}
+    return {commit_id: line.strip() for commit_id, line in zip(commit_ids, lines)}
+
+
+def _describe_by_walk(repo_path: str, commit_ids: list[str], tags: dict[str, _Tag]) -> dict[str, str]:
+    candidates = _candidate_tags(repo_path, commit_ids, tags)
+    abbrevs = _abbreviations(repo_path, list(candidates))
+
+    members_by_tag: dict[str, list[str]] = defaultdict(list)
+    for commit_id, tag_commits in candidates.items():
+        if commit_id not in tags:
+            for tag_commit in tag_commits:
+                members_by_tag[tag_commit].append(commit_id)
+    depths: dict[tuple[str, str], int] = {}
+    for tag_commit, members in members_by_tag.items():
+        for commit_id, depth in _distances_from_tag(repo_path, tag_commit, members).items():
+            depths[commit_id, tag_commit] = depth
+
+    describes: dict[str, str] = {}
+    for commit_id, tag_commits in candidates.items():
+        if commit_id not in abbrevs:
+            continue
+        if commit_id in tags:
+            describes[commit_id] = tags[commit_id].name
+        elif not tag_commits:
+            describes[commit_id] = abbrevs[commit_id]
+        else:
+            # git describe 取距离最小的候选，距离相同时取日期遍历中先遇到（提交时间更新）的 tag
+            tag_commit = min(
+                tag_commits,
+                key=lambda candidate: (depths[commit_id, candidate], -tags[candidate].commit_date),
+            )
+            describes[commit_id] = (
+                f"{tags[tag_commit].name}-{depths[commit_id, tag_commit]}-g{abbrevs[commit_id]}"
+            )
+    return describes
+
+
+def _candidate_tags(repo_path: str, commit_ids: list[str], tags: dict[str, _Tag]) -> dict[str, tuple[str, ...]]:
+    """One topo-ordered walk assigning every commit its nearest-tag candidates.
+
+    A commit's candidates are the tags in its ancestry that are not
+    ancestors of another tag in its ancestry: any such ancestor tag is
+    strictly farther away, so git describe could never pick it. On linear
+    history and on mainline merges of topic branches this leaves exactly one
+    candidate; single-parent commits share their parent's tuple. The walk
+    stops below the nearest tag shared by all requested commits.
+    """
+    wanted = set(commit_ids)
+    found: dict[str, tuple[str, ...]] = {}
+    candidates_of: dict[str, tuple[str, ...]] = {}
+    tag_bits: dict[str, int] = {}
+    tags_below: dict[str, int] = {}
+    boundary = _walk_boundary(repo_path, commit_ids, tags)
+    process = subprocess.Popen(
+        ["git", "-C", repo_path, "rev-list", "--topo-order", "--reverse", "--parents", "--ignore-missing", "--stdin"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    process.stdin.write("\n".join([*commit_ids, *(f"^{parent}" for parent in boundary)]) + "\n")
+    process.stdin.close()
+    for line in process.stdout:
+        commit_id, *parents = line.split()
+        if len(parents) == 1:
+            inherited = candidates_of.get(parents[0], ())
+        else:
+            union = dict.fromkeys(
+                tag_commit for parent in parents for tag_commit in candidates_of.get(parent, ())
+            )
+            inherited = tuple(
+                tag_commit
+                for tag_commit in union
+                if not any(tag_bits[tag_commit] & tags_below[other] for other in union)
+            )
+        if commit_id in tags:
+            below = 0
+            for tag_commit in inherited:
+                below |= tag_bits[tag_commit] | tags_below[tag_commit]
+            tag_bits[commit_id] = 1 << len(tag_bits)
+            tags_below[commit_id] = below
+            inherited = (commit_id,)
+        candidates_of[commit_id] = inherited
+        if commit_id in wanted:
+            found[commit_id] = inherited
+    stderr = process.stderr.read()
+    if process.wait() != 0:
+        raise RuntimeError(stderr.strip() or f"git rev-list exited with {process.returncode}")
+    return found
+
+
+def _walk_boundary(repo_path: str, commit_ids: list[str], tags: dict[str, _Tag]) -> list[str]:
+    """Parents of a tag that every requested commit contains, to cut the walk below it.
+
+    Any tag below such a tag is an ancestor of a tag in every commit's
+    ancestry, so it can never be a candidate; the walk only needs to reach the
+    shared tag itself. The nearest tag of the oldest commit is tried and kept
+    only if ``--ancestry-path`` shows every other commit descends from it
+    (``merge-base --octopus`` costs about as much per commit as git describe).
+    """
+    try:
+        dated = _run_git(
+            repo_path, "log", "--no-walk", "--stdin", "--format=%ct %H", input_text="\n".join(commit_ids) + "\n",
+        ).split()
+        oldest = min(zip(map(int, dated[::2]), dated[1::2]))[1] if dated else ""
+        name = _run_git(repo_path, "describe", "--tags", "--abbrev=0", oldest).strip() if oldest else ""
+        tag_commit = next((commit_id for commit_id, tag in tags.items() if tag.name == name), None)
+        if tag_commit is None:
+            return []
+        descendants = set(
+            _run_git(
+                repo_path,
+                "rev-list",
+                "--ancestry-path",
+                "--stdin",
+                input_text="\n".join(commit_ids) + f"\n^{tag_commit}\n",
+            ).split()
+        )
+        if any(commit_id != tag_commit and commit_id not in descendants for commit_id in commit_ids):
+            return []
+        return _run_git(repo_path, "rev-parse", f"{tag_commit}^@").split()
+    except RuntimeError:
+        return []
+
+
+def _distances_from_tag(repo_path: str, tag_commit: str, commit_ids: list[str]) -> dict[str, int]:
+    """Count, for each commit, its ancestors not reachable from the tag.
+
+    The commits sharing a tag are walked together; every commit in that
+    region carries a bitset of its region ancestors, released once all of
+    its children have been visited.
+    """
+    output = _run_git(
+        repo_path,
+        "rev-list",
+        "--topo-order",
+        "--reverse",
+        "--parents",
+        "--stdin",
+        input_text="\n".join(commit_ids) + f"\n^{tag_commit}\n",
+    )
+    rows = [line.split() for line in output.splitlines() if line.strip()]
+    region = {row[0] for row in rows}
+    children = Counter(parent for row in rows for parent in row[1:] if parent in region)
+    wanted = set(commit_ids)
+    ancestors: dict[str, int] = {}
+    distances: dict[str, int] = {}
+    for index, (commit_id, *parents) in enumerate(rows):
+        mask = 1 << index
+        for parent in parents:
+            if parent not in region:
+                continue
+            mask |= ancestors[parent]
+            children[parent] -= 1
+            if not children[parent]:
+                del ancestors[parent]
+        if children[commit_id]:
+            ancestors[commit_id] = mask
+        if commit_id in wanted:
+            distances[commit_id] = mask.bit_count()
+    return distances
+
+
+def _abbreviations(repo_path: str, commit_ids: list[str]) -> dict[str, str]:
+    if not commit_ids:
+        return {}
+    output = _run_git(
+        repo_path,
+        "log",
+        "--no-walk=unsorted",
+        "--stdin",
+        "--format=%H %h",
+        input_text="\n".join(commit_ids) + "\n",
+    )
+    abbrevs: dict[str, str] = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) == 2:
+            abbrevs[parts[0]] = parts[1]
+    return abbrevs
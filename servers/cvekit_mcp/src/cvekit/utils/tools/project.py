@@ -22,11 +22,11 @@ from collections import OrderedDict
 from types import SimpleNamespace
 from typing import Any, List, Tuple
 
-import Levenshtein
 from git import Repo
 from git.exc import GitCommandError
 from langchain_core.tools import StructuredTool, tool
 
+from .. import fuzzy_index, git_object_reader, repo_path_index, symbol_index_cache
 from . import utils
 from .logger import logger
 
@@ -213,6 +213,8 @@ class Project:
         self.poc_succeeded = False
         self.symbol_map = {}
         self.source_symbol_map = {}
+        # key=ref, value=(symbol_map[ref], TrigramIndex)
+        self.symbol_fuzzy_index = {}
         self.now_hunk = ""
         self.now_hunk_num = 0
         self.hunk_log_info = {}
@@ -807,9 +809,11 @@ class Project:
 
     def _prepare(self, ref: str, use_target_repo: bool = True) -> None:
         """
-        Prepares the project by generating a symbol map using ctags.
-        
-        优化：只扫描 C/C++ 源文件，大幅减少扫描时间。
+        Prepares the project by loading the ctags symbol index of ref.
+
+        符号索引按 git tree SHA 持久化在磁盘上（见 symbol_index_cache），
+        直接从 git 对象导出 C/C++ 源文件运行 ctags，无需 checkout；
+        新 tree 基于已索引 tree 的 git diff 增量更新，跨进程复用。
 
         Raises:
             subprocess.CalledProcessError: If the ctags command fails.
@@ -817,65 +821,14 @@ class Project:
         symbol_map = self.symbol_map if use_target_repo else self.source_symbol_map
         repo_dir = self.target_dir if use_target_repo else self.dir
 
-        # 优化：只扫描 C/C++ 源文件，避免扫描文档、配置文件等
-        # 对于 Linux 内核等大型项目，这可以节省大量时间
-        with tempfile.NamedTemporaryFile(prefix="ctags-", suffix=".tags", delete=False) as f:
-            tags_path = f.name
-        try:
-            ctags = subprocess.run(
-                [
-                    "ctags",
-                    "--excmd=number",
-                    "-R",
-                    "--languages=C,C++",
-                    "--c-kinds=+p",  # 包含函数原型
-                    "--c++-kinds=+p",
-                    "--extras=+q",  # 包含限定符
-                    "-f",
-                    tags_path,
-                    ".",
-                ],
-                stdout=subprocess.PIPE,
-                cwd=repo_dir,
-                stdin=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
-            if ctags.returncode != 0:
-                stderr = (ctags.stderr or "").strip()
-                if stderr:
-                    logger.warning(f"[_prepare] ctags 退出码 {ctags.returncode}: {stderr[:500]}")
-                # 若 tags 文件不可用，仍然视为失败
-                if not os.path.exists(tags_path) or os.path.getsize(tags_path) == 0:
-                    raise subprocess.CalledProcessError(
-                        ctags.returncode, ctags.args, output=ctags.stdout, stderr=ctags.stderr
-                    )
-
-            if not os.path.exists(tags_path) or os.path.getsize(tags_path) == 0:
-                raise subprocess.CalledProcessError(
-                    ctags.returncode, ctags.args, output=ctags.stdout, stderr=ctags.stderr
-                )
-
-            symbol_map[ref] = {}
-            with open(tags_path, "rb") as f:
-                for line in f.readlines():
-                    if text := line.decode("utf-8", errors="ignore"):
-                        if text.startswith("!_TAG_"):
-                            continue
-                        try:
-                            symbol, file, lineno = text.strip().split(';"')[0].split("\t")
-                            lineno = int(lineno)
-                            if symbol not in symbol_map[ref]:
-                                symbol_map[ref][symbol] = []
-                            symbol_map[ref][symbol].append((file, lineno))
-                        except:
-                            continue
-        finally:
-            try:
-                if os.path.exists(tags_path):
-                    os.unlink(tags_path)
-            except Exception:
-                pass
+        started_at = time.perf_counter()
+        tree_sha = symbol_index_cache.resolve_tree_sha(repo_dir, ref)
+        status = symbol_index_cache.ensure_symbol_index(repo_path=repo_dir, tree_sha=tree_sha)
+        symbol_map[ref] = symbol_index_cache.SymbolIndexView(repo_dir, tree_sha)
+        logger.debug(
+            f"[_prepare] symbol index {status}: ref={ref}, tree={tree_sha[:12]}, "
+            f"elapsed={time.perf_counter() - started_at:.2f}s"
+        )
 
     def _viewcode(
         self, ref: str, path: str, startline: int, endline: int, strict_ref: bool = False
@@ -924,27 +877,15 @@ class Project:
         Do not fallback to workspace files to avoid leaking untracked/local-only content
         into ref-based lookup decisions.
         """
-        try:
-            file_obj = self.target_repo.tree(ref) / path
-            if hasattr(file_obj, "type") and file_obj.type != "blob":
-                return None
-            return file_obj.data_stream.read().decode("utf-8", errors="ignore")
-        except Exception:
-            pass
-        return None
+        reader = git_object_reader.get_reader(self.target_repo.working_dir)
+        return reader.read_text(ref, path, errors="ignore")
 
     def _read_source_file_content(self, ref: str, path: str) -> str | None:
         """
         Read file content strictly from the source git tree at the given ref.
         """
-        try:
-            file_obj = self.repo.tree(ref) / path
-            if hasattr(file_obj, "type") and file_obj.type != "blob":
-                return None
-            return file_obj.data_stream.read().decode("utf-8", errors="ignore")
-        except Exception:
-            pass
-        return None
+        reader = git_object_reader.get_reader(self.repo.working_dir)
+        return reader.read_text(ref, path, errors="ignore")
 
     def _locate_symbol(
         self,
@@ -963,7 +904,6 @@ class Project:
         Returns:
             List[Tuple[str, int]] | None: File path and code lines.
         """
-        # XXX: Analyzing ctags file everytime locate symbol is time-consuming.
         if use_target_repo:
             ref = self._resolve_target_ref(ref, strict=strict_ref)
             symbol_map = self.symbol_map
@@ -972,7 +912,6 @@ class Project:
             symbol_map = self.source_symbol_map
 
         if ref not in symbol_map:
-            self._checkout(ref, use_target_repo=use_target_repo)
             self._prepare(ref, use_target_repo=use_target_repo)
 
         if symbol in symbol_map[ref]:
@@ -1024,20 +963,27 @@ class Project:
         Returns:
             List[Tuple[str, int]] : File path and code lines for the most similar symbol.
         """
-        # XXX: Analyzing ctags file everytime locate symbol is time-consuming.
         symbols = self.symbol_map.get(ref, {})
-        most_similar = None
-        smallest_distance = float("inf")
-
-        for symbol_i in symbols.keys():
-            # 计算 Levenshtein 距离
-            distance = Levenshtein.distance(symbol, symbol_i)
-            if distance < smallest_distance:
-                smallest_distance = distance
-                most_similar = symbol_i
+        nearest = self._symbol_fuzzy_index(ref, symbols).nearest(symbol, k=1)
+        most_similar = nearest[0][0] if nearest else None
 
         return symbols.get(most_similar), most_similar
 
+    def _symbol_fuzzy_index(self, ref: str, symbols) -> fuzzy_index.TrigramIndex:
+        """
+        按 ref 缓存符号名的 trigram 索引，symbol_map[ref] 被替换时重建。
+        """
+        cached = self.symbol_fuzzy_index.get(ref)
+        if cached is None or cached[0] is not symbols:
+            started_at = time.perf_counter()
+            cached = (symbols, fuzzy_index.TrigramIndex(symbols.keys()))
+            self.symbol_fuzzy_index[ref] = cached
+            logger.debug(
+                f"[_symbol_fuzzy_index] built trigram index: ref={ref}, symbols={len(cached[1])}, "
+                f"elapsed={time.perf_counter() - started_at:.2f}s"
+            )
+        return cached[1]
+
     def _git_history(self) -> str:
         """
         XXX: TBD
@@ -1362,7 +1308,9 @@ class Project:
         else:
             # 在目标仓库目录中查找相似文件
             filename = path.split("/")[-1] if path else ""
-            similar_files = utils.find_most_similar_files(filename, self.target_dir)
+            similar_files = utils.find_most_similar_files(
+                filename, self.target_dir, ref=ref, original_path=path
+            )
             for similar_file in similar_files:
                 content = self._read_target_file_content(ref, similar_file)
                 if content is None:
@@ -1447,65 +1395,17 @@ class Project:
         # locate file by git diff (在目标仓库中查找)
         if is_cross_repo:
             # 跨仓库场景：不能在目标仓库中比较源仓库的 commit
-            # 只在目标仓库中查找文件重命名历史（从 target_release 往回查找，限制为最近1年）
+            # 只在目标仓库中沿重命名历史查找（从 target_release 往回，结果按 tree 缓存）
             logger.debug(f"[_apply_file_move_handling] 跨仓库场景，在目标仓库中查找文件重命名: {self.target_dir}")
+            file_diff = None
             try:
-                # 在目标仓库中使用 git log 查找文件重命名历史
-                # 优化：限制查询范围为最近1年，并限制提交数量，找到第一个匹配就停止
-                # 参数顺序：选项 -> commit范围 -> 路径限制
-                # 从 target_release 往回查找，但限制为最近1年和最多500个提交
-                log_args = [
-                    "--oneline",
-                    "--follow",
-                    "--diff-filter=R",
-                    "--name-status",
-                    "--since=1 year ago",  # 只查询最近1年的历史
-                    "-n", "500",  # 最多查询500个提交，避免查询过多历史
-                    f"{self.target_release}",  # 从 target_release 往回查找历史
-                    "--",
-                    missing_file_path,
-                ]
-                rename_log = self.target_repo.git.log(log_args)
-                if rename_log:
-                    # git log --name-status 的输出格式可能是：
-                    # commit_hash
-                    # R100    old_path    new_path
-                    # 或者
-                    # commit_hash\tR100\told_path\tnew_path
-                    lines = rename_log.strip().split('\n')
-                    if lines:
-                        # 查找包含 R (重命名) 的行
-                        for line in lines:
-                            if line.startswith('R') or '\tR' in line:
-                                # 解析重命名行
-                                parts = line.split('\t')
-                                if 'R' in parts:
-                                    # 找到 R 的位置
-                                    r_index = parts.index('R') if 'R' in parts else None
-                                    if r_index is not None and len(parts) > r_index + 2:
-                                        # 格式可能是: "R100\told_path\tnew_path" 或 "R\told_path\tnew_path"
-                                        old_path_idx = r_index + 1
-                                        new_path_idx = r_index + 2
-                                        if len(parts) > new_path_idx:
-                                            old_path = parts[old_path_idx].strip()
-                                            new_path = parts[new_path_idx].strip()
-                                            # 检查是否匹配我们要查找的文件
-                                            if old_path == missing_file_path or missing_file_path in old_path:
-                                                file_paths.append(new_path)
-                                                logger.debug(
-                                                    f"在目标仓库中找到文件重命名: {missing_file_path} -> {new_path}"
-                                                )
-                                                file_diff = f"R100\t{old_path}\t{new_path}"  # 模拟 diff 格式
-                                                break
-                        if not file_paths:
-                            file_diff = None
-                    else:
-                        file_diff = None
-                else:
-                    file_diff = None
+                file_paths = repo_path_index.rename_targets(
+                    self.target_dir, self.target_release, missing_file_path
+                )
+                for new_path in file_paths:
+                    logger.debug(f"在目标仓库中找到文件重命名: {missing_file_path} -> {new_path}")
             except Exception as e:
                 logger.debug(f"[_apply_file_move_handling] 在目标仓库中查找文件重命名失败: {e}")
-                file_diff = None
         else:
             # 同一仓库场景：可以在目标仓库中比较两个 commit
             diff_args = [
@@ -1545,7 +1445,10 @@ class Project:
                         f"No {missing_file_path} and no {symbol_name} in the repo."
                     )
                     file_paths = utils.find_most_similar_files(
-                        missing_file_path.split("/")[-1], self.target_dir
+                        missing_file_path.split("/")[-1],
+                        self.target_dir,
+                        ref=self._resolve_target_ref(ref),
+                        original_path=missing_file_path,
                     )
                 else:
                     logger.debug(f"Find {symbol_name} in {symbol_locations}.")
@@ -1553,7 +1456,10 @@ class Project:
             except:
                 logger.debug("Can not find a symbol in given patch.")
                 file_paths = utils.find_most_similar_files(
-                    missing_file_path.split("/")[-1], self.target_dir
+                    missing_file_path.split("/")[-1],
+                    self.target_dir,
+                    ref=self._resolve_target_ref(ref),
+                    original_path=missing_file_path,
                 )
 
         # try to apply patch to the target files
@@ -14,10 +14,11 @@ Modifications for CVEKit MCP backport workflow:
 import os
 import re
 import traceback
-from typing import Generator, List, Tuple
+from typing import Generator, List, Optional, Tuple
 
 import Levenshtein
 
+from .. import repo_path_index
 from .logger import logger
 
 blacklist = [
@@ -85,18 +86,37 @@ def validate_unified_diff_patch(patch: str) -> Tuple[bool, str, str]:
     return True, "", normalized_patch
 
 
-def find_most_similar_files(target_filename: str, search_directory: str) -> List[str]:
+def find_most_similar_files(
+    target_filename: str,
+    search_directory: str,
+    ref: Optional[str] = None,
+    original_path: Optional[str] = None,
+) -> List[str]:
     """
     Find the five file paths that are most similar to non-existent files.
 
+    When ref is given, the query is answered from the cached path index of ref's
+    git tree, with rename targets of original_path ranked first; otherwise (or if
+    the index cannot be used) the search directory is walked.
+
     Args:
         target_filename (str): The target file's name which we want to find out.
         search_directory (str): Directory name which we need to find in.
+        ref (str, optional): Git revision of search_directory to search in.
+        original_path (str, optional): Repository path of the missing file, used for rename history.
 
     Returns:
         List[str]: List of the five most similar file.
     """
     top_n = 5
+    if ref:
+        try:
+            return repo_path_index.similar_paths(
+                search_directory, ref, original_path or target_filename, top_n=top_n
+            )
+        except Exception as e:
+            logger.debug(f"[find_most_similar_files] path index unavailable, walk {search_directory}: {e}")
+
     similarity_list = []
 
     # Walk through all subdirectories and files in the search directory
@@ -118,12 +138,119 @@ def find_most_similar_files(target_filename: str, search_directory: str) -> List
     return top_similar_files
 
 
+# A pattern line is an anchor when its stripped text (or, failing that, one of
+# its identifiers) occurs at most this many times in the target.
+# Lines such as "}" or "return 0;" match everywhere and would not prune anything.
+_ANCHOR_MAX_OCCURRENCES = 8
+_ANCHOR_MIN_CHARS = 3
+_ANCHOR_IDENT_RE = re.compile(r"[A-Za-z_]\w{3,}")
+# Anchored results worse than this (distance / pattern chars) are confirmed by a full scan.
+_ANCHOR_CONFIRM_REL_DIST = 0.35
+
+
+def _occurrence_lines(text: str, needle: str, limit: int) -> Optional[List[int]]:
+    """Return the 0-based line numbers where needle occurs, or None after more than limit hits."""
+    found = []
+    line = 0
+    last = 0
+    pos = text.find(needle)
+    while pos != -1:
+        if len(found) >= limit:
+            return None
+        line += text.count("\n", last, pos)
+        last = pos
+        found.append(line)
+        pos = text.find(needle, pos + 1)
+    return found
+
+
+def _anchor_pairs(pattern: List[str], main: List[str]) -> List[Tuple[int, int]]:
+    """Return (pattern index, main index) pairs of distinctive lines shared by both.
+
+    Occurrences are located with str.find on the joined target, so the cost per
+    anchor candidate is a C-level scan instead of a Python loop over every line.
+    """
+    text = "\n".join(main)
+    if text.count("\n") != len(main) - 1:
+        # Lines with embedded newlines would break the line arithmetic below.
+        return []
+
+    pairs = []
+    for k, line in enumerate(pattern):
+        key = line.strip()
+        if len(key) < _ANCHOR_MIN_CHARS:
+            continue
+        # Substring hits inside longer lines are filtered below, so allow some headroom.
+        found = _occurrence_lines(text, key, _ANCHOR_MAX_OCCURRENCES * 4)
+        if not found:
+            continue
+        exact = sorted({m for m in found if main[m].strip() == key})
+        if len(exact) <= _ANCHOR_MAX_OCCURRENCES:
+            pairs.extend((k, m) for m in exact)
+    if pairs:
+        return pairs
+
+    # No line survived verbatim: fall back to rare identifiers shared with the pattern.
+    for k, line in enumerate(pattern):
+        for ident in set(_ANCHOR_IDENT_RE.findall(line)):
+            found = _occurrence_lines(text, ident, _ANCHOR_MAX_OCCURRENCES)
+            if found:
+                pairs.extend((k, m) for m in sorted(set(found)))
+    return pairs
+
+
+def _anchor_window_starts(pattern: List[str], main: List[str], p_len: int) -> Optional[List[int]]:
+    """Return the 0-based window starts around anchors, or None when a full scan is needed."""
+    window_count = len(main) - p_len + 1
+    if window_count <= 0 or p_len <= 0:
+        return None
+    pairs = _anchor_pairs(pattern, main)
+    if not pairs:
+        return None
+    slack = max(5, p_len // 2)
+    starts = set()
+    for k, m in pairs:
+        aligned = m - k
+        starts.update(range(max(0, aligned - slack), min(window_count, aligned + slack + 1)))
+    if len(starts) * 2 >= window_count:
+        return None
+    return sorted(starts)
+
+
+def _score_windows(
+    pattern_text: str,
+    main: List[str],
+    p_len: int,
+    starts,
+    dline_flag: bool,
+) -> Tuple[int, int]:
+    """Score windows in ascending order; ties keep the earliest start like the full scan."""
+    min_distance = float("inf")
+    best_start_index = 1
+    for i in starts:
+        if dline_flag and (main[i].startswith("+") or main[i].startswith("-")):
+            continue
+        # Anything above the current minimum cannot win, so let Levenshtein stop early.
+        cutoff = None if min_distance == float("inf") else min_distance
+        distance = Levenshtein.distance(
+            "\n".join(main[i : i + p_len]), pattern_text, score_cutoff=cutoff
+        )
+        if distance < min_distance:
+            min_distance = distance
+            best_start_index = i + 1
+    return best_start_index, min_distance
+
+
 def find_most_similar_block(
     pattern: List[str], main: List[str], p_len: int, dline_flag: bool = False
 ) -> Tuple[int, int]:
     """
     Finds the most similar block of lines in the main list compared to the pattern list using Levenshtein distance.
 
+    Only windows around anchor lines (distinctive lines or identifiers shared with the pattern)
+    are scored; without anchors, or when the anchored match is poor, every window is scanned.
+    Set CVEKIT_SIMILAR_BLOCK_PRUNE=0 to always scan every window.
+
     Args:
         pattern (List[str]): The list of code lines to match.
         main (List[str]): The list of lines to search within.
@@ -134,18 +261,18 @@ def find_most_similar_block(
         Tuple[int, int]: A tuple containing the starting index of the most similar block in the main list (1-based index)
                          and the minimum Levenshtein distance.
     """
-    min_distance = float("inf")
-    best_start_index = 1
-
-    for i in range(len(main) - p_len + 1):
-        distance = Levenshtein.distance(
-            "\n".join(main[i : i + p_len]), "\n".join(pattern)
+    pattern_text = "\n".join(pattern)
+    starts = None
+    if os.getenv("CVEKIT_SIMILAR_BLOCK_PRUNE", "1") != "0":
+        starts = _anchor_window_starts(pattern, main, p_len)
+    if starts is not None:
+        best_start_index, min_distance = _score_windows(pattern_text, main, p_len, starts, dline_flag)
+        if min_distance > len(pattern_text) * _ANCHOR_CONFIRM_REL_DIST:
+            starts = None
+    if starts is None:
+        best_start_index, min_distance = _score_windows(
+            pattern_text, main, p_len, range(len(main) - p_len + 1), dline_flag
         )
-        if distance < min_distance and not (
-            dline_flag and (main[i].startswith("+") or main[i].startswith("-"))
-        ):
-            min_distance = distance
-            best_start_index = i + 1
 
     # try to fix offset, align the pattern with the most similar block
     if not dline_flag:
@@ -0,0 +1,500 @@
+"""流水线 span 追踪：记录各阶段、git/ctags/Joern/格式化等子进程和 LLM 调用的耗时，导出 Chrome trace
+
+默认关闭。设置 CVEKIT_TRACE=<path> 后开启，进程退出时把 trace 写到该路径（路径中的 {pid}
+替换为进程号），可直接用 chrome://tracing 或 ui.perfetto.dev 打开。常驻 worker 每执行完一个
+命令就调用 flush()，把该命令的事件写到 <path>.<序号> 并清空缓冲，worker 被强制结束也不会丢失
+已完成命令的 trace。内存中的事件数超过 CVEKIT_TRACE_MAX_EVENTS 后丢弃新事件并记录丢弃数。
+关闭时 span() 返回共享的空对象，调用点只多一次全局开关判断。
+
+- span(name, **attrs)：with 语句包住的阶段，同一线程内按调用关系嵌套
+- traced(name)：函数装饰器形式的 span
+- start_span(name, **attrs)：生命周期不在一个 with 块里的 span（子进程、LLM 回调），导出为 async 事件
+- 开启后给 subprocess.Popen 挂钩，GitPython 等直接使用 Popen 的调用也会记录
+- langchain_callbacks()：传给 ChatOpenAI(callbacks=...)，记录每次模型调用及 token 数
+"""
+from __future__ import annotations
+
+import atexit
+import functools
+import itertools
+import json
+import logging
+import os
+import shlex
+import subprocess
+import threading
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+ENV_TRACE = "CVEKIT_TRACE"
+# 内存中最多保留的事件数，超出后丢弃新事件，0 表示不限制
+MAX_EVENTS = int(os.environ.get("CVEKIT_TRACE_MAX_EVENTS", "200000"))
+
+# argv 属性只保留前若干个参数，避免 patch 内容、长路径列表把 trace 撑大
+_ARGV_MAX_ITEMS = 12
+_ARGV_MAX_CHARS = 300
+
+_enabled = False
+_trace_path: str | None = None
+_lock = threading.Lock()
+_events: list[dict] = []
+_dropped = 0
+_flush_seq = itertools.count(1)
+_flushed = False
+_local = threading.local()
+_ids = itertools.count(1)
+_origin_ns = time.perf_counter_ns()
+_subprocess_hooked = False
+_atexit_registered = False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def add(self, **counters) -> None:
+        pass
+
+    def end(self, **attrs) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """一个计时区间；attrs 写入 Chrome trace 的 args，数值型 *_tokens 属性在汇总表中累加"""
+
+    __slots__ = ("name", "cat", "attrs", "detached", "id", "parent", "tid", "start_ns", "_ended")
+
+    def __init__(self, name: str, cat: str, attrs: dict, detached: bool):
+        stack = _stack()
+        self.name = name
+        self.cat = cat
+        self.attrs = attrs
+        self.detached = detached
+        self.id = next(_ids)
+        self.parent = stack[-1].id if stack else None
+        self.tid = threading.get_ident()
+        self.start_ns = time.perf_counter_ns()
+        self._ended = False
+
+    def __enter__(self):
+        _stack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.end()
+        return False
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def add(self, **counters) -> None:
+        for key, value in counters.items():
+            self.attrs[key] = self.attrs.get(key, 0) + value
+
+    def end(self, **attrs) -> None:
+        if self._ended:
+            return
+        self._ended = True
+        self.attrs.update(attrs)
+        event = {
+            "name": self.name,
+            "cat": self.cat,
+            "id": self.id,
+            "parent": self.parent,
+            "tid": self.tid,
+            "start_ns": self.start_ns,
+            "end_ns": time.perf_counter_ns(),
+            "detached": self.detached,
+            "attrs": self.attrs,
+        }
+        _record(event)
+
+
+def _record(event: dict) -> None:
+    global _dropped
+    with _lock:
+        if MAX_EVENTS <= 0 or len(_events) < MAX_EVENTS:
+            _events.append(event)
+            return
+        _dropped += 1
+        first_drop = _dropped == 1
+    if first_drop:
+        logger.warning("trace 事件数达到上限 %d，之后的事件将被丢弃", MAX_EVENTS)
+
+
+def _stack() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(path: str | None = None) -> None:
+    """开启追踪；给出 path 时进程退出前导出 Chrome trace"""
+    global _enabled, _trace_path, _atexit_registered
+    _install_subprocess_hook()
+    if path:
+        _trace_path = path
+        if not _atexit_registered:
+            atexit.register(_export_at_exit)
+            _atexit_registered = True
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def reset() -> list[dict]:
+    """清空已记录的事件（含丢弃计数）并返回它们"""
+    global _dropped
+    with _lock:
+        events = list(_events)
+        _events.clear()
+        _dropped = 0
+    return events
+
+
+def dropped() -> int:
+    """因超出 MAX_EVENTS 而丢弃的事件数"""
+    with _lock:
+        return _dropped
+
+
+def flush() -> str | None:
+    """把已记录的事件写到 <trace 路径>.<序号> 并清空缓冲，供常驻进程在每个命令结束后调用。
+
+    未开启追踪、没有配置导出路径或没有事件时不写文件，返回 None。
+    """
+    global _dropped, _flushed
+    if not _enabled or not _trace_path:
+        return None
+    # 先取走缓冲再写文件，写文件期间其他线程新记录的事件留给下一次
+    with _lock:
+        if not _events:
+            return None
+        flushed_events, dropped_count = list(_events), _dropped
+        _events.clear()
+        _dropped = 0
+    _flushed = True
+    root, ext = os.path.splitext(_trace_path)
+    path = f"{root}.{next(_flush_seq)}{ext}"
+    try:
+        return _write_trace(path, _chrome_trace(flushed_events, dropped_count))
+    except OSError as e:
+        logger.warning("写入 trace 失败: %s", e)
+        return None
+
+
+def mark() -> int:
+    """当前事件位置，配合 events/summarize 的 since 参数只看之后记录的 span"""
+    with _lock:
+        return len(_events)
+
+
+def events(since: int = 0) -> list[dict]:
+    with _lock:
+        return list(_events[since:])
+
+
+def span(name: str, cat: str = "cvekit", **attrs):
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, cat, attrs, detached=False)
+
+
+def start_span(name: str, cat: str = "cvekit", **attrs):
+    """返回需要手动 end() 的 span，可以在别的线程或回调中结束"""
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, cat, attrs, detached=True)
+
+
+def traced(name: str | None = None, cat: str = "cvekit"):
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(span_name, cat, {}, detached=False):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _to_us(ns: int) -> float:
+    return (ns - _origin_ns) / 1000.0
+
+
+def _json_safe(attrs: dict) -> dict:
+    return {
+        key: value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        for key, value in attrs.items()
+    }
+
+
+def chrome_trace(since: int = 0) -> dict:
+    """转换为 Chrome trace event format：嵌套 span 用 X 事件，独立 span 用 b/e async 事件"""
+    return _chrome_trace(events(since), dropped())
+
+
+def _chrome_trace(recorded: list[dict], dropped_count: int) -> dict:
+    pid = os.getpid()
+    trace_events = []
+    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+    tids = set()
+    for event in recorded:
+        tids.add(event["tid"])
+        args = _json_safe(event["attrs"])
+        if event["parent"] is not None:
+            args["parent_span"] = event["parent"]
+        start_us = _to_us(event["start_ns"])
+        end_us = _to_us(event["end_ns"])
+        if event["detached"]:
+            common = {"name": event["name"], "cat": event["cat"], "id": event["id"], "pid": pid, "tid": event["tid"]}
+            trace_events.append({**common, "ph": "b", "ts": start_us, "args": args})
+            trace_events.append({**common, "ph": "e", "ts": end_us})
+        else:
+            trace_events.append({
+                "name": event["name"],
+                "cat": event["cat"],
+                "ph": "X",
+                "ts": start_us,
+                "dur": end_us - start_us,
+                "pid": pid,
+                "tid": event["tid"],
+                "args": args,
+            })
+    for tid in sorted(tids):
+        trace_events.append({
+            "name": "thread_name",
+            "ph": "M",
+            "pid": pid,
+            "tid": tid,
+            "args": {"name": thread_names.get(tid, str(tid))},
+        })
+    trace = {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+    if dropped_count:
+        trace["otherData"] = {"dropped_events": dropped_count}
+    return trace
+
+
+def export_chrome_trace(path: str, since: int = 0) -> str:
+    return _write_trace(path, chrome_trace(since))
+
+
+def _write_trace(path: str, trace: dict) -> str:
+    path = path.replace("{pid}", str(os.getpid()))
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(trace, f)
+    return path
+
+
+def _export_at_exit() -> None:
+    if not _trace_path:
+        return
+    if _flushed and not events():
+        # 常驻 worker 已逐个命令 flush，剩余为空时不再写一个空文件
+        return
+    try:
+        path = export_chrome_trace(_trace_path)
+        logger.info("trace 已写入: %s", path)
+    except OSError as e:
+        logger.warning("写入 trace 失败: %s", e)
+
+
+def summarize(since: int = 0) -> list[dict]:
+    """按 span 名汇总次数、总耗时、平均/最大耗时和 token 数，按总耗时降序"""
+    rows: dict[str, dict] = {}
+    for event in events(since):
+        seconds = (event["end_ns"] - event["start_ns"]) / 1e9
+        row = rows.setdefault(event["name"], {
+            "name": event["name"],
+            "count": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+            "errors": 0,
+            "tokens": 0,
+        })
+        row["count"] += 1
+        row["total_seconds"] += seconds
+        row["max_seconds"] = max(row["max_seconds"], seconds)
+        attrs = event["attrs"]
+        if "error" in attrs or attrs.get("returncode") not in (None, 0):
+            row["errors"] += 1
+        row["tokens"] += int(attrs.get("total_tokens", 0) or 0)
+    for row in rows.values():
+        row["mean_seconds"] = row["total_seconds"] / row["count"]
+    return sorted(rows.values(), key=lambda row: row["total_seconds"], reverse=True)
+
+
+def format_summary(rows: list[dict]) -> str:
+    headers = ("span", "count", "total", "mean", "max", "errors", "tokens")
+    table = [headers] + [
+        (
+            row["name"],
+            str(row["count"]),
+            f"{row['total_seconds']:.3f}s",
+            f"{row['mean_seconds'] * 1000:.1f}ms",
+            f"{row['max_seconds'] * 1000:.1f}ms",
+            str(row["errors"]),
+            str(row["tokens"]),
+        )
+        for row in rows
+    ]
+    widths = [max(len(line[col]) for line in table) for col in range(len(headers))]
+    lines = []
+    for index, line in enumerate(table):
+        cells = [line[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(line[1:], widths[1:])]
+        lines.append("  ".join(cells).rstrip())
+        if index == 0:
+            lines.append("  ".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def _describe_argv(args) -> tuple[str, str]:
+    """返回 (span 名, argv 摘要)；git 带上子命令，区分 cat-file/log/apply 等"""
+    if isinstance(args, (str, bytes, os.PathLike)):
+        argv = os.fsdecode(args).split()
+    else:
+        argv = [os.fsdecode(arg) if isinstance(arg, (bytes, os.PathLike)) else str(arg) for arg in args]
+    tool = os.path.basename(argv[0]) if argv else "?"
+    if tool == "git":
+        rest = iter(argv[1:])
+        for arg in rest:
+            if arg in ("-C", "-c", "--git-dir", "--work-tree"):
+                next(rest, None)
+            elif not arg.startswith("-"):
+                tool = f"git {arg}"
+                break
+    summary = shlex.join(argv[:_ARGV_MAX_ITEMS])
+    if len(argv) > _ARGV_MAX_ITEMS:
+        summary += f" ... (+{len(argv) - _ARGV_MAX_ITEMS} args)"
+    if len(summary) > _ARGV_MAX_CHARS:
+        summary = summary[:_ARGV_MAX_CHARS] + "..."
+    return f"subprocess:{tool}", summary
+
+
+def _install_subprocess_hook() -> None:
+    """在进程创建和退出状态回收处记录 span，覆盖 subprocess.run 和直接使用 Popen 的库"""
+    global _subprocess_hooked
+    popen = subprocess.Popen
+    if _subprocess_hooked or not hasattr(popen, "_handle_exitstatus"):
+        return
+    execute_child = popen._execute_child
+    handle_exitstatus = popen._handle_exitstatus
+
+    def _traced_execute_child(self, args, *rest, **kwargs):
+        if not _enabled:
+            return execute_child(self, args, *rest, **kwargs)
+        name, argv = _describe_argv(args)
+        trace_span = start_span(name, cat="subprocess", argv=argv)
+        try:
+            execute_child(self, args, *rest, **kwargs)
+        except BaseException as e:
+            trace_span.end(error=type(e).__name__)
+            raise
+        trace_span.set(pid=self.pid)
+        self._cvekit_trace_span = trace_span
+
+    def _traced_handle_exitstatus(self, *args, **kwargs):
+        handle_exitstatus(self, *args, **kwargs)
+        trace_span = self.__dict__.pop("_cvekit_trace_span", None)
+        if trace_span is not None:
+            trace_span.end(returncode=self.returncode)
+
+    popen._execute_child = _traced_execute_child
+    popen._handle_exitstatus = _traced_handle_exitstatus
+    _subprocess_hooked = True
+
+
+def _token_usage(response) -> dict[str, int]:
+    llm_output = getattr(response, "llm_output", None) or {}
+    usage = llm_output.get("token_usage") or {}
+    if usage:
+        return {
+            "prompt_tokens": int(usage.get("prompt_tokens", 0) or 0),
+            "completion_tokens": int(usage.get("completion_tokens", 0) or 0),
+            "total_tokens": int(usage.get("total_tokens", 0) or 0),
+        }
+    totals = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    for generations in getattr(response, "generations", None) or []:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            totals["prompt_tokens"] += int(metadata.get("input_tokens", 0) or 0)
+            totals["completion_tokens"] += int(metadata.get("output_tokens", 0) or 0)
+            totals["total_tokens"] += int(metadata.get("total_tokens", 0) or 0)
+    return totals
+
+
+_callback_handler = None
+
+
+def langchain_callbacks() -> list | None:
+    """返回可传给 ChatOpenAI(callbacks=...) 的回调列表；未开启追踪时返回 None"""
+    global _callback_handler
+    if not _enabled:
+        return None
+    if _callback_handler is None:
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        class _TracingCallbackHandler(BaseCallbackHandler):
+            def __init__(self):
+                self._spans: dict[Any, Any] = {}
+
+            def _start(self, serialized, run_id, metadata, **attrs):
+                kwargs = (serialized or {}).get("kwargs") or {}
+                model = kwargs.get("model_name") or kwargs.get("model") or (metadata or {}).get("ls_model_name")
+                self._spans[run_id] = start_span("llm", cat="llm", model=model, **attrs)
+
+            def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+                self._start(serialized, run_id, metadata, messages=sum(len(batch) for batch in messages))
+
+            def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+                self._start(serialized, run_id, metadata, prompts=len(prompts))
+
+            def on_llm_end(self, response, *, run_id, **kwargs):
+                trace_span = self._spans.pop(run_id, None)
+                if trace_span is not None:
+                    trace_span.end(**_token_usage(response))
+
+            def on_llm_error(self, error, *, run_id, **kwargs):
+                trace_span = self._spans.pop(run_id, None)
+                if trace_span is not None:
+                    trace_span.end(error=type(error).__name__)
+
+        _callback_handler = _TracingCallbackHandler()
+    return [_callback_handler]
+
+
+if os.environ.get(ENV_TRACE, "").strip():
+    enable(os.environ[ENV_TRACE].strip())
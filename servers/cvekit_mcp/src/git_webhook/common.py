@@ -9,9 +9,9 @@ from config import (
     logger,
     DEFAULT_BACKPORT_ENGINE,
 )
+from task_store import submit_task
 
-# 简单的单机消息队列：任务队列 & 结果队列
-TASK_QUEUE: "Queue[Dict[str, Any]]" = Queue()
+# 任务持久化在 task_store 的 SQLite 任务库中；结果事件使用单机内存队列
 RESULT_QUEUE: "Queue[Dict[str, Any]]" = Queue()
 
 def extract_cve_id(text: str) -> Optional[str]:
@@ -510,13 +510,19 @@ def _handle_comment_commands(
             "action": "branches-analysis",
         }
         try:
-            TASK_QUEUE.put(task)
-            logger.info("已将分支分析任务入队，CVE-ID: %s, action=branches-analysis", cve_id)
+            task_id, coalesced = submit_task(task)
+            logger.info(
+                "已将分支分析任务入队，CVE-ID: %s, action=branches-analysis, task_id=%s, coalesced=%s",
+                cve_id,
+                task_id,
+                coalesced,
+            )
         except Exception as e:
             logger.exception("分支分析任务入队失败: %s", e)
             return jsonify({"msg": "enqueue task failed", "detail": str(e)}), 500
 
-        if allow_reply_comment:
+        # 重复投递/重复指令合并到已有任务时，不再重复回复确认评论
+        if allow_reply_comment and not coalesced:
             try:
                 if platform == "gitcode":
                     # 延迟导入，避免在 common 与 gitcode_client 之间形成循环依赖
@@ -532,7 +538,15 @@ def _handle_comment_commands(
                 # reply_issue_comment 内部已记录日志，这里避免影响 WebHook 返回
                 pass
 
-        return jsonify({"msg": "accepted", "cve_id": cve_id, "action": "branches-analysis"}), 202
+        return jsonify(
+            {
+                "msg": "accepted",
+                "cve_id": cve_id,
+                "action": "branches-analysis",
+                "task_id": task_id,
+                "coalesced": coalesced,
+            }
+        ), 202
 
     # ---------- 2. 解析 /create_pr 指令 ----------
     try:
@@ -619,21 +633,23 @@ def _handle_comment_commands(
         task["signer_email"] = signer_email
 
     try:
-        TASK_QUEUE.put(task)
+        task_id, coalesced = submit_task(task)
         logger.info(
-            "已将 pipeline 任务入队，CVE-ID: %s, branches=%s, signer_name=%s, signer_email=%s, backport_engine=%s",
+            "已将 pipeline 任务入队，CVE-ID: %s, branches=%s, signer_name=%s, signer_email=%s, backport_engine=%s, task_id=%s, coalesced=%s",
             cve_id,
             ",".join(branches) if branches else "",
             signer_name or "",
             signer_email or "",
             backport_engine,
+            task_id,
+            coalesced,
         )
     except Exception as e:
         logger.exception("pipeline 任务入队失败: %s", e)
         return jsonify({"msg": "enqueue task failed", "detail": str(e)}), 500
 
-    # 2) 立即在 Issue 下回复一条确认评论（失败不影响 WebHook 返回）
-    if allow_reply_comment:
+    # 2) 立即在 Issue 下回复一条确认评论（失败不影响 WebHook 返回；合并到已有任务时不重复回复）
+    if allow_reply_comment and not coalesced:
         try:
             if platform == "gitcode":
                 from gitcode_client import reply_gitcode_issue_comment
@@ -648,7 +664,13 @@ def _handle_comment_commands(
             pass
 
     # 3) 立即返回成功响应，后续分析和结果回写由后台 Worker 完成
-    resp_data: Dict[str, Any] = {"msg": "accepted", "cve_id": cve_id, "action": "pipeline"}
+    resp_data: Dict[str, Any] = {
+        "msg": "accepted",
+        "cve_id": cve_id,
+        "action": "pipeline",
+        "task_id": task_id,
+        "coalesced": coalesced,
+    }
     if branches:
         resp_data["branches"] = branches
     if signer_name:
@@ -35,6 +35,17 @@ GITEE_API_BASE = os.environ.get("GITEE_API_BASE", "https://gitee.com/api/v5")
 # 分支分析结果缓存文件，与 cvekit.utils.cache 中保持一致
 BRANCHES_ANALYSIS_CACHE_FILE = os.path.expanduser("~/.cve_analyzer_cache/branches_analysis_cache.json")
 
+# ---- 任务调度配置 ----
+# 持久化任务库（SQLite）：服务重启后未完成的任务继续执行，迁移任务结果可继续查询
+TASK_STORE_DB = os.environ.get("TASK_STORE_DB", os.path.expanduser("~/.cvekit/webhook-tasks.sqlite"))
+# 同一仓库（clone/target 目录）上同时运行的任务数上限，避免多个任务争用同一工作区
+TASK_REPO_CONCURRENCY = int(os.environ.get("TASK_REPO_CONCURRENCY", "1"))
+# 失败任务（仅限未产生任何结果事件的失败，如后端不可达）的最大尝试次数与退避基数（秒）
+TASK_MAX_ATTEMPTS = int(os.environ.get("TASK_MAX_ATTEMPTS", "3"))
+TASK_RETRY_BASE_SECONDS = float(os.environ.get("TASK_RETRY_BASE_SECONDS", "30"))
+# 已完成任务在库中保留的天数
+TASK_RETENTION_DAYS = float(os.environ.get("TASK_RETENTION_DAYS", "30"))
+
 # ---- PR 迁移相关配置 ----
 MIGRATE_WEBHOOK_TOKEN = os.environ.get("MIGRATE_WEBHOOK_TOKEN", "")
 DEFAULT_CLONE_DIR = os.environ.get("DEFAULT_CLONE_DIR", "")
@@ -28,8 +28,8 @@ from common import (
     extract_cve_id,
     _handle_comment_commands,
     build_guide_comment_body,
-    TASK_QUEUE,
 )
+from task_store import submit_task
 from worker import _start_workers
 from gitee_client import _handle_issue_created_webhook
 from gitcode_client import handle_gitcode_issue_created_webhook
@@ -208,7 +208,7 @@ def migrate_pr():
     except MigrateError:
         target_path = clone_dir.rstrip("/")
 
-    # 4. 构建任务并入 TASK_QUEUE，由现有 Worker 统一调度
+    # 4. 构建任务并写入持久化任务库，由现有 Worker 统一调度
     task = {
         "task_id": task_id,
         "cve_id": "",  # pr-migration 不依赖 cve_id
@@ -228,10 +228,10 @@ def migrate_pr():
     }
 
     try:
-        TASK_QUEUE.put(task)
+        task_id, coalesced = submit_task(task)
         logger.info(
-            "迁移任务已入队: task_id=%s, commit=%s, engine=%s, project_dir=%s, target_path=%s",
-            task_id, commit_id[:12], backport_engine, project_dir, target_path,
+            "迁移任务已入队: task_id=%s, commit=%s, engine=%s, project_dir=%s, target_path=%s, coalesced=%s",
+            task_id, commit_id[:12], backport_engine, project_dir, target_path, coalesced,
         )
     except Exception as e:
         logger.exception("迁移任务入队失败: %s", e)
@@ -251,6 +251,7 @@ def migrate_pr():
             "clone_dir": clone_dir,
             "backport_engine": backport_engine,
             "status": "pending",
+            "coalesced": coalesced,
         },
     }), 202
 
@@ -274,5 +275,5 @@ if __name__ == "__main__":
 
     # 固定监听 6002 端口
     port = 6000
-    logger.info("启动 CVE WebHook 服务（带内存消息队列），监听端口 %d ...", port)
+    logger.info("启动 CVE WebHook 服务（带持久化任务队列），监听端口 %d ...", port)
     app.run(host="0.0.0.0", port=port)
\ No newline at end of file
@@ -1,23 +1,33 @@
-import threading
 from typing import Dict, Any, Optional
 
+from task_store import get_task_store
 
-# 任务结果存储（task_id -> result dict）
-_migrate_results: Dict[str, Dict[str, Any]] = {}
-_results_lock = threading.Lock()
+
+# 任务结果持久化在任务库中（task_id -> result dict），服务重启后仍可查询
 
 
 def store_result(task_id: str, result: Dict[str, Any]):
     """存储任务结果供查询。"""
-    with _results_lock:
-        _migrate_results[task_id] = result
-        if len(_migrate_results) > 1000:
-            keys = list(_migrate_results.keys())[:-500]
-            for k in keys:
-                _migrate_results.pop(k, None)
+    get_task_store().set_result(task_id, result)
 
 
 def get_task_result(task_id: str) -> Optional[Dict[str, Any]]:
-    """根据 task_id 查询任务结果。"""
-    with _results_lock:
-        return _migrate_results.get(task_id)
+    """根据 task_id 查询任务结果；任务尚未结束时返回当前排队/运行状态。"""
+    record = get_task_store().get(task_id)
+    if record is None:
+        return None
+    if record.result is not None:
+        return record.result
+    task = record.task
+    return {
+        "task_id": record.task_id,
+        "status": record.status,
+        "source_pr_url": task.get("source_pr_url"),
+        "commit_id": task.get("commit_id"),
+        "target_repo_url": task.get("target_repo_url"),
+        "target_branch": task.get("target_branch"),
+        "attempts": record.attempts,
+        "error_type": None,
+        "error_message": record.last_error,
+        "conflict_files": [],
+    }
@@ -0,0 +1,459 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import (
+    logger,
+    DEFAULT_BACKPORT_ENGINE,
+    MYSTIQUE_PIPELINE_TARGET_PATH,
+    TASK_STORE_DB,
+    TASK_REPO_CONCURRENCY,
+    TASK_MAX_ATTEMPTS,
+    TASK_RETRY_BASE_SECONDS,
+    TASK_RETENTION_DAYS,
+)
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_SUCCESS = "success"
+STATUS_FAILED = "failed"
+ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+# 默认优先级（数值越大越先执行）：分支分析是交互式查询，耗时短，优先于创建 PR 的全流程
+ACTION_PRIORITIES = {
+    "branches-analysis": 10,
+    "pr-migration": 5,
+    "pipeline": 0,
+    "patch-apply-pr-creation": 0,
+}
+# 退避时间上限（秒）
+MAX_RETRY_DELAY_SECONDS = 30 * 60
+# 服务重启时，已产生结果事件的运行中任务记录的失败原因
+INTERRUPTED_ERROR = "服务重启时任务已产生结果事件，为避免重复创建 PR/评论不再重新执行（interrupted）"
+
+
+class RetryableTaskError(RuntimeError):
+    """任务失败且未产生任何结果事件（例如 A2A 后端不可达），可以安全地重新执行。"""
+
+
+@dataclass
+class TaskRecord:
+    task_id: str
+    action: str
+    cve_id: str
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    repo_key: str
+    task: Dict[str, Any]
+    result: Optional[Dict[str, Any]]
+    last_error: Optional[str]
+    created_at: float
+    updated_at: float
+
+
+def requester_key_for(task: Dict[str, Any]) -> List[str]:
+    """任务的请求方：WebHook 所在平台、仓库、Issue 编号以及签名人。
+
+    结果评论只会写回任务自身 payload 对应的 Issue，因此只有同一 Issue、同一签名人的
+    重复投递/重复指令才能合并，其他 Issue 的相同请求必须单独执行并各自得到回复。
+    """
+    payload = task.get("payload") or {}
+    # 与结果 Worker 相同的判断方式：GitCode 的 WebHook 带 object_kind/event_type
+    platform = "gitcode" if (payload.get("object_kind") or payload.get("event_type")) else "gitee"
+    project = payload.get("project") or payload.get("repository") or {}
+    issue = payload.get("issue") or payload.get("object_attributes") or {}
+    issue_number = issue.get("iid") or issue.get("number") or str(payload.get("per_iid") or "").lstrip("#")
+    return [
+        platform if payload else "",
+        project.get("path_with_namespace") or project.get("full_name") or "",
+        str(issue_number or ""),
+        task.get("signer_name") or "",
+        (task.get("signer_email") or "").lower(),
+    ]
+
+
+def dedup_key_for(task: Dict[str, Any]) -> str:
+    """同一请求方的相同 (action, cve_id, branches) 任务视为重复；pr-migration 按 commit 与目标分支区分。"""
+    action = task.get("action") or "pipeline"
+    if action == "pr-migration":
+        parts = [
+            action,
+            task.get("commit_id") or "",
+            task.get("source_pr_url") or "",
+            task.get("target_repo_url") or "",
+            task.get("target_branch") or "",
+        ]
+    else:
+        parts = [
+            action,
+            (task.get("cve_id") or "").upper(),
+            ",".join(sorted(task.get("branches") or [])),
+            task.get("backport_engine") or DEFAULT_BACKPORT_ENGINE,
+        ]
+    parts.extend(requester_key_for(task))
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def repo_key_for(task: Dict[str, Any]) -> str:
+    """任务实际操作的仓库目录，用于限制同一仓库上的并发任务数。"""
+    if task.get("target_path"):
+        return task["target_path"]
+    if task.get("action") == "pipeline" and task.get("backport_engine") == "mystique" and MYSTIQUE_PIPELINE_TARGET_PATH:
+        return MYSTIQUE_PIPELINE_TARGET_PATH
+    return task.get("clone_dir") or "default"
+
+
+class TaskStore:
+    """基于 SQLite 的持久化任务库：去重入队、按优先级与仓库并发上限领取、失败退避重试。"""
+
+    def __init__(
+        self,
+        db_path: str = TASK_STORE_DB,
+        *,
+        repo_concurrency: int = TASK_REPO_CONCURRENCY,
+        max_attempts: int = TASK_MAX_ATTEMPTS,
+        retry_base_seconds: float = TASK_RETRY_BASE_SECONDS,
+    ):
+        self.db_path = db_path
+        self.repo_concurrency = max(1, repo_concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self._wakeup = threading.Condition()
+        with closing(self._connect()) as conn:
+            self._ensure_schema(conn)
+
+    # ---- 入队 ----
+
+    def submit(self, task: Dict[str, Any], priority: Optional[int] = None) -> Tuple[str, bool]:
+        """持久化任务，返回 (task_id, coalesced)。已有相同的排队/运行中任务时直接返回其 task_id。"""
+        action = task.get("action") or "pipeline"
+        dedup_key = dedup_key_for(task)
+        if priority is None:
+            priority = task.get("priority", ACTION_PRIORITIES.get(action, 0))
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT task_id FROM webhook_task WHERE dedup_key = ? AND status IN (?, ?) LIMIT 1",
+                (dedup_key, *ACTIVE_STATUSES),
+            ).fetchone()
+            if row is not None:
+                conn.commit()
+                logger.info("任务与已排队/运行中的任务重复，合并到 task_id=%s, action=%s", row[0], action)
+                return row[0], True
+            task_id = task.get("task_id") or str(uuid.uuid4())
+            stored = dict(task, task_id=task_id)
+            conn.execute(
+                """
+                INSERT INTO webhook_task (
+                    task_id, dedup_key, action, cve_id, repo_key, priority, status,
+                    attempts, max_attempts, next_run_at, task, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?, ?, ?, ?)
+                """,
+                (
+                    task_id,
+                    dedup_key,
+                    action,
+                    task.get("cve_id") or "",
+                    repo_key_for(task),
+                    int(priority),
+                    STATUS_PENDING,
+                    self.max_attempts,
+                    now,
+                    json.dumps(stored, ensure_ascii=False),
+                    now,
+                    now,
+                ),
+            )
+            conn.commit()
+        self._notify()
+        return task_id, False
+
+    # ---- 领取与完成 ----
+
+    def claim(self, worker: str) -> Optional[TaskRecord]:
+        """领取一个到期的任务：优先级高者优先，同优先级先入先出，跳过已达并发上限的仓库。"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """
+                SELECT t.task_id
+                FROM webhook_task AS t
+                WHERE t.status = ?
+                  AND t.next_run_at <= ?
+                  AND (
+                      SELECT COUNT(*) FROM webhook_task AS r
+                      WHERE r.status = ? AND r.repo_key = t.repo_key
+                  ) < ?
+                ORDER BY t.priority DESC, t.created_at ASC
+                LIMIT 1
+                """,
+                (STATUS_PENDING, now, STATUS_RUNNING, self.repo_concurrency),
+            ).fetchone()
+            if row is None:
+                conn.commit()
+                return None
+            conn.execute(
+                """
+                UPDATE webhook_task
+                SET status = ?, attempts = attempts + 1, worker = ?, started_at = ?, updated_at = ?
+                WHERE task_id = ?
+                """,
+                (STATUS_RUNNING, worker, now, now, row[0]),
+            )
+            conn.commit()
+            return self._get(conn, row[0])
+
+    def complete(self, task_id: str, result: Optional[Dict[str, Any]] = None) -> None:
+        self._finish(task_id, STATUS_SUCCESS, result=result)
+
+    def fail(self, task_id: str, error: str, *, retryable: bool = False) -> bool:
+        """记录失败；可重试且未用完次数时按指数退避重新排队。返回是否会重试。"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM webhook_task WHERE task_id = ?",
+                (task_id,),
+            ).fetchone()
+            if row is None:
+                return False
+            attempts, max_attempts = row
+            if retryable and attempts < max_attempts:
+                delay = min(self.retry_base_seconds * (2 ** (attempts - 1)), MAX_RETRY_DELAY_SECONDS)
+                now = time.time()
+                conn.execute(
+                    """
+                    UPDATE webhook_task
+                    SET status = ?, next_run_at = ?, last_error = ?, worker = NULL, updated_at = ?
+                    WHERE task_id = ?
+                    """,
+                    (STATUS_PENDING, now + delay, error, now, task_id),
+                )
+                conn.commit()
+                logger.warning(
+                    "任务失败，%.0f 秒后重试（第 %d/%d 次）: task_id=%s, error=%s",
+                    delay, attempts, max_attempts, task_id, error,
+                )
+                self._notify()
+                return True
+        self._finish(task_id, STATUS_FAILED, error=error)
+        return False
+
+    def set_result(self, task_id: str, result: Dict[str, Any]) -> None:
+        """写入任务结果（供查询接口使用），不改变任务状态。"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE webhook_task SET result = ?, updated_at = ? WHERE task_id = ?",
+                (json.dumps(result, ensure_ascii=False), time.time(), task_id),
+            )
+            conn.commit()
+
+    def mark_events_seen(self, task_id: str) -> None:
+        """记录任务已产生结果事件（可能已创建 PR 或写过评论），此后不能再重新执行。"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE webhook_task SET events_seen = 1, updated_at = ? WHERE task_id = ? AND events_seen = 0",
+                (time.time(), task_id),
+            )
+            conn.commit()
+
+    def recover_interrupted(self) -> int:
+        """服务重启时处理上次进程中运行到一半的任务，返回重新排队的任务数。
+
+        尚未产生结果事件的任务放回队列；已产生事件的任务可能已经创建 PR 或写过评论，
+        重新执行会造成重复，标记为失败（中断）。
+        """
+        now = time.time()
+        with closing(self._connect()) as conn:
+            interrupted = conn.execute(
+                """
+                UPDATE webhook_task
+                SET status = ?, last_error = ?, worker = NULL, finished_at = ?, updated_at = ?
+                WHERE status = ? AND events_seen = 1
+                """,
+                (STATUS_FAILED, INTERRUPTED_ERROR, now, now, STATUS_RUNNING),
+            ).rowcount
+            count = conn.execute(
+                "UPDATE webhook_task SET status = ?, worker = NULL, next_run_at = ?, updated_at = ? WHERE status = ?",
+                (STATUS_PENDING, now, now, STATUS_RUNNING),
+            ).rowcount
+            conn.execute(
+                "DELETE FROM webhook_task WHERE status IN (?, ?) AND updated_at < ?",
+                (STATUS_SUCCESS, STATUS_FAILED, now - TASK_RETENTION_DAYS * 86400),
+            )
+            conn.commit()
+        if interrupted:
+            logger.warning("%d 个中断的任务已产生结果事件，不再重新执行，标记为失败。", interrupted)
+        if count:
+            logger.info("已恢复 %d 个中断的任务，重新排队执行。", count)
+        return count
+
+    # ---- 查询 ----
+
+    def get(self, task_id: str) -> Optional[TaskRecord]:
+        with closing(self._connect()) as conn:
+            return self._get(conn, task_id)
+
+    def list_tasks(self, status: Optional[str] = None, limit: int = 100) -> List[TaskRecord]:
+        with closing(self._connect()) as conn:
+            if status:
+                rows = conn.execute(
+                    "SELECT task_id FROM webhook_task WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                    (status, limit),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT task_id FROM webhook_task ORDER BY created_at DESC LIMIT ?",
+                    (limit,),
+                ).fetchall()
+            return [self._get(conn, row[0]) for row in rows]
+
+    def wait_for_work(self, timeout: float) -> None:
+        with self._wakeup:
+            self._wakeup.wait(timeout)
+
+    # ---- 内部实现 ----
+
+    def _finish(
+        self,
+        task_id: str,
+        status: str,
+        *,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                UPDATE webhook_task
+                SET status = ?,
+                    result = COALESCE(?, result),
+                    last_error = COALESCE(?, last_error),
+                    finished_at = ?,
+                    updated_at = ?
+                WHERE task_id = ?
+                """,
+                (
+                    status,
+                    json.dumps(result, ensure_ascii=False) if result is not None else None,
+                    error,
+                    now,
+                    now,
+                    task_id,
+                ),
+            )
+            conn.commit()
+        # 仓库并发名额已释放，唤醒等待中的 Worker
+        self._notify()
+
+    def _notify(self) -> None:
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def _get(self, conn: sqlite3.Connection, task_id: str) -> Optional[TaskRecord]:
+        row = conn.execute(
+            """
+            SELECT task_id, action, cve_id, status, priority, attempts, max_attempts, repo_key,
+                   task, result, last_error, created_at, updated_at
+            FROM webhook_task WHERE task_id = ?
+            """,
+            (task_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return TaskRecord(
+            task_id=row[0],
+            action=row[1],
+            cve_id=row[2],
+            status=row[3],
+            priority=row[4],
+            attempts=row[5],
+            max_attempts=row[6],
+            repo_key=row[7],
+            task=json.loads(row[8]),
+            result=json.loads(row[9]) if row[9] else None,
+            last_error=row[10],
+            created_at=row[11],
+            updated_at=row[12],
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def _ensure_schema(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS webhook_task (
+                task_id TEXT PRIMARY KEY,
+                dedup_key TEXT NOT NULL,
+                action TEXT NOT NULL,
+                cve_id TEXT NOT NULL DEFAULT '',
+                repo_key TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                next_run_at REAL NOT NULL,
+                worker TEXT,
+                task TEXT NOT NULL,
+                result TEXT,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                events_seen INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        # 旧版本创建的任务库没有 events_seen 列
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(webhook_task)")}
+        if "events_seen" not in columns:
+            conn.execute("ALTER TABLE webhook_task ADD COLUMN events_seen INTEGER NOT NULL DEFAULT 0")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_webhook_task_dedup ON webhook_task (dedup_key, status)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_webhook_task_queue ON webhook_task (status, priority, created_at)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_webhook_task_repo ON webhook_task (status, repo_key)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_webhook_task_cve ON webhook_task (cve_id, action)"
+        )
+        conn.commit()
+
+
+_store: Optional[TaskStore] = None
+_store_lock = threading.Lock()
+
+
+def get_task_store() -> TaskStore:
+    """进程内共享的任务库实例。"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TaskStore()
+        return _store
+
+
+def submit_task(task: Dict[str, Any]) -> Tuple[str, bool]:
+    """将任务写入持久化任务库，返回 (task_id, coalesced)。"""
+    return get_task_store().submit(task)
@@ -20,7 +20,6 @@ from config import (
     MYSTIQUE_PIPELINE_TARGET_PATH,
 )
 from common import (
-    TASK_QUEUE,
     RESULT_QUEUE,
     _format_branches_table,
     _format_final_summary_table,
@@ -33,6 +32,10 @@ from a2a_handlers import (
 from gitee_client import _post_issue_comment
 from gitcode_client import _post_gitcode_issue_comment
 from migrate_worker import store_result
+from task_store import RetryableTaskError, get_task_store
+
+# 没有可领取的任务时，Worker 最长等待多久重新检查一次（秒），用于拾取到期的重试任务
+TASK_POLL_SECONDS = 5.0
 
 
 def run_app_client(
@@ -51,6 +54,7 @@ def run_app_client(
     target_path: str | None = None,
     clone_dir: str | None = None,
     backport_engine: str = DEFAULT_BACKPORT_ENGINE,
+    task_id: str | None = None,
 ) -> None:
     """
     调用本地 app_client.py 脚本，支持三种 action：
@@ -67,7 +71,8 @@ def run_app_client(
               --target-repo-url https://gitee.com/... --target-branch master \\
               --message "cherry-pick: ..."
 
-    在 APP_WORK_DIR 目录下、使用虚拟环境执行。
+    在 APP_WORK_DIR 目录下、使用虚拟环境执行。传入 task_id 时，收到第一个结果事件后
+    在任务库中记录，服务重启时据此避免重复执行已产生副作用的任务。
     """
 
     # pr-migration 不需要 cve_id，其标识符为 commit_id
@@ -139,6 +144,8 @@ def run_app_client(
     # 注意：此函数会被 Worker 线程同步调用（阻塞直到任务执行完成）
     # 这里不再依赖 cvekit 的缓存文件，而是实时解析 app_client.py 的日志输出，
     # 并将关键信息推送到 RESULT_QUEUE，由结果 Worker 负责写入 Issue 评论。
+    # 已处理的 A2A 结果事件数；为 0 时失败说明后端尚未开始处理，可以安全重试
+    events_seen = 0
     try:
         log_dir = os.path.dirname(APP_CLIENT_LOG)
         if log_dir:
@@ -196,6 +203,13 @@ def run_app_client(
                 kind = result_obj.get("kind")
                 logger.debug("收到 A2A 结果事件: kind=%s, contextId=%s", kind, result_obj.get("contextId"))
 
+                if kind in ("status-update", "artifact-update"):
+                    events_seen += 1
+                    if events_seen == 1 and task_id:
+                        try:
+                            get_task_store().mark_events_seen(task_id)
+                        except Exception as e:
+                            logger.warning("记录任务结果事件失败: task_id=%s, error=%s", task_id, e)
                 if kind == "status-update":
                     reported_task_error = _handle_status_update_event(
                         result_obj=result_obj,
@@ -215,22 +229,11 @@ def run_app_client(
             # 等待子进程结束
             returncode = process.wait()
 
-        if returncode != 0:
-            logger.warning("app_client.py 退出码非零: %s, CVE-ID: %s", returncode, cve_id)
-            # 将错误信息放入结果队列，结果 Worker 会写入 Issue 评论
-            RESULT_QUEUE.put(
-                {
-                    "event": "error",
-                    "cve_id": cve_id,
-                    "payload": payload,
-                    "error": f"app_client.py 退出码非零: {returncode}",
-                    "action": action,
-                }
-            )
-        else:
-            logger.info("app_client.py 执行完成，CVE-ID: %s", cve_id)
     except Exception as e:
         logger.exception("调用 app_client.py 失败: %s", e)
+        if events_seen == 0:
+            # 后端尚未产生任何结果，交给任务调度重试，最终失败时由任务 Worker 统一写评论
+            raise RetryableTaskError(str(e)) from e
         # 将异常也发送到结果队列
         RESULT_QUEUE.put(
             {
@@ -243,17 +246,47 @@ def run_app_client(
         )
         raise
 
+    if returncode != 0:
+        logger.warning("app_client.py 退出码非零: %s, CVE-ID: %s", returncode, cve_id)
+        error = f"app_client.py 退出码非零: {returncode}"
+        if events_seen == 0:
+            raise RetryableTaskError(error)
+        # 将错误信息放入结果队列，结果 Worker 会写入 Issue 评论
+        RESULT_QUEUE.put(
+            {
+                "event": "error",
+                "cve_id": cve_id,
+                "payload": payload,
+                "error": error,
+                "action": action,
+            }
+        )
+        raise RuntimeError(error)
+    logger.info("app_client.py 执行完成，CVE-ID: %s", cve_id)
+
 
 def _task_worker_loop(worker_id: int) -> None:
     """
     任务 Worker：
-      - 从 TASK_QUEUE 中取出任务
+      - 从持久化任务库中领取任务（按优先级，遵守同一仓库的并发上限）
       - 同步执行 app_client.py
       - 将执行过程中解析出的结果事件写入 RESULT_QUEUE
+      - 未产生任何结果事件的失败按指数退避重试
     """
     logger.info("任务 Worker-%d 启动。", worker_id)
+    store = get_task_store()
     while True:
-        task = TASK_QUEUE.get()
+        try:
+            record = store.claim(f"worker-{worker_id}")
+        except Exception as e:
+            logger.exception("Worker-%d 领取任务失败: %s", worker_id, e)
+            store.wait_for_work(TASK_POLL_SECONDS)
+            continue
+        if record is None:
+            store.wait_for_work(TASK_POLL_SECONDS)
+            continue
+
+        task = record.task
         try:
             cve_id = task.get("cve_id") or ""
             payload = task.get("payload") or {}
@@ -270,17 +303,19 @@ def _task_worker_loop(worker_id: int) -> None:
             target_path = task.get("target_path") or None
             clone_dir = task.get("clone_dir") or None
             backport_engine = task.get("backport_engine") or DEFAULT_BACKPORT_ENGINE
-            task_id = task.get("task_id") or None
+            task_id = record.task_id
 
             logger.info(
-                "Worker-%d 开始处理任务，CVE-ID: %s, action=%s, branches=%s, signer_name=%s, signer_email=%s, task_id=%s",
+                "Worker-%d 开始处理任务，CVE-ID: %s, action=%s, branches=%s, signer_name=%s, signer_email=%s, task_id=%s, attempt=%d/%d",
                 worker_id,
                 cve_id or (commit_id or "")[:12],
                 action,
                 ",".join(branches) if branches else "",
                 signer_name or "",
                 signer_email or "",
-                task_id or "",
+                task_id,
+                record.attempts,
+                record.max_attempts,
             )
 
             # 执行 app_client，同步等待完成（结果由 run_app_client 内部写入 RESULT_QUEUE）
@@ -301,20 +336,8 @@ def _task_worker_loop(worker_id: int) -> None:
                     target_path=target_path,
                     clone_dir=clone_dir,
                     backport_engine=backport_engine,
+                    task_id=task_id,
                 )
-                # pr-migration 完成后存储结果供查询接口使用
-                if action == "pr-migration" and task_id:
-                    store_result(task_id, {
-                        "task_id": task_id,
-                        "status": "success",
-                        "source_pr_url": source_pr_url,
-                        "commit_id": commit_id,
-                        "target_repo_url": target_repo_url,
-                        "target_branch": target_branch,
-                        "error_type": None,
-                        "error_message": None,
-                        "conflict_files": [],
-                    })
             except Exception as e:
                 logger.exception(
                     "Worker-%d 执行 app_client 失败，CVE-ID: %s，action=%s，error=%s",
@@ -323,7 +346,22 @@ def _task_worker_loop(worker_id: int) -> None:
                     action,
                     e,
                 )
-                if action == "pr-migration" and task_id:
+                retryable = isinstance(e, RetryableTaskError)
+                if store.fail(task_id, str(e), retryable=retryable):
+                    continue
+                if retryable and action != "pr-migration":
+                    # 重试次数用尽，此前未写过错误评论，这里统一写一次
+                    RESULT_QUEUE.put(
+                        {
+                            "event": "error",
+                            "cve_id": cve_id,
+                            "payload": payload,
+                            "error": str(e),
+                            "action": action,
+                        }
+                    )
+                # pr-migration 失败后存储结果供查询接口使用
+                if action == "pr-migration":
                     store_result(task_id, {
                         "task_id": task_id,
                         "status": "failed",
@@ -336,11 +374,29 @@ def _task_worker_loop(worker_id: int) -> None:
                         "conflict_files": [],
                     })
                 continue
+
+            # pr-migration 完成后存储结果供查询接口使用
+            result = None
+            if action == "pr-migration":
+                result = {
+                    "task_id": task_id,
+                    "status": "success",
+                    "source_pr_url": source_pr_url,
+                    "commit_id": commit_id,
+                    "target_repo_url": target_repo_url,
+                    "target_branch": target_branch,
+                    "error_type": None,
+                    "error_message": None,
+                    "conflict_files": [],
+                }
+            store.complete(task_id, result)
             logger.info("Worker-%d 已完成任务执行，CVE-ID: %s, action=%s", worker_id, cve_id or (commit_id or "")[:12], action)
         except Exception as e:
             logger.exception("Worker-%d 处理任务时发生未捕获异常: %s", worker_id, e)
-        finally:
-            TASK_QUEUE.task_done()
+            try:
+                store.fail(record.task_id, str(e))
+            except Exception:
+                pass
 
 
 def _result_worker_loop(worker_id: int) -> None:
@@ -613,6 +669,9 @@ def _start_workers() -> None:
     task_workers = int(os.environ.get("TASK_WORKERS", "2"))
     result_workers = int(os.environ.get("RESULT_WORKERS", "1"))
 
+    # 上次进程退出时仍在运行、且尚未产生结果事件的任务重新排队
+    get_task_store().recover_interrupted()
+
     for i in range(task_workers):
         t = threading.Thread(
             target=_task_worker_loop,
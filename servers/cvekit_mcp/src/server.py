@@ -12,6 +12,7 @@ logger = logging.getLogger(__name__)
 base_dir = os.path.dirname(__file__)
 os.environ["PYTHONPATH"] = base_dir
 
+from cvekit import cli_worker
 from cvekit.utils.locales import i18n, update_docstring
 from cvekit.utils.cache import BRANCHES_ANALYSIS_CACHE, _get_cache_key, get_cached_data, save_cache, delete_cache_key
 
@@ -33,6 +34,7 @@ parser.add_argument('--llm-base-url', help=i18n('LLM API基础地址(可选，
 parser.add_argument('--llm-model-name', help=i18n('LLM模型名称(可选，覆盖默认配置)'))
 parser.add_argument('--backport-engine', choices=['portgpt', 'mystique'], default='portgpt', help=i18n('自动回移植引擎：portgpt 或 mystique'))
 parser.add_argument('--format-mode', choices=['full', 'changed'], default=None, help=i18n('Mystique 格式调整模式：full 或 changed'))
+parser.add_argument('--cvekit-exec', choices=['worker', 'subprocess'], default=os.environ.get('CVEKIT_EXEC_MODE', 'worker'), help=i18n('cvekit 执行方式：worker 复用常驻进程，subprocess 每次调用启动 cvekit 子进程'))
 parser.add_argument('--branches-to-analyze', default="OLK-6.6,OLK-5.10,openEuler-1.0-LTS", help=i18n('用于分析的分支列表，逗号分隔'))
 parser.add_argument('--test-analyze-branches', help=i18n('测试模式：直接调用analyze_branches函数，传入JSON文件路径'))
 parser.add_argument('--test-apply-patch',help=i18n("""测试模式：直接调用apply_patch函数，传入JSON文件路径"""))
@@ -144,14 +146,21 @@ def run_cvekit(action: str, params: dict) -> dict:
 
         logger.info(f"[DEBUG-RUN-CVEKIT] CMD: {' '.join(cmd)}")
 
-        result = subprocess.run(
-            cmd,
-            check=True,
-            env = env,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
+        result = None
+        if args.cvekit_exec == 'worker':
+            # 常驻 worker 中执行，保留已导入的模块和进程内缓存；worker 不可用时返回 None
+            result = cli_worker.get_pool().run(cmd[1:], env=env)
+            if result is not None and result.returncode != 0:
+                raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+        if result is None:
+            result = subprocess.run(
+                cmd,
+                check=True,
+                env = env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
         
         # 尝试解析JSON输出
         # 如果输出中包含日志信息，尝试从最后提取JSON
@@ -2,6 +2,7 @@ import json
 import sys
 from argparse import Namespace
 from pathlib import Path
+from contextlib import contextmanager
 from types import SimpleNamespace
 from unittest import mock
 
@@ -1545,3 +1546,323 @@ class TestPatchContainsDefconfig:
     def test_empty_path(self):
         """空路径应返回 False。"""
         assert backport_batch._patch_contains_defconfig("") is False
+
+
+def _git(cwd: Path, *args: str) -> str:
+    import subprocess
+
+    return subprocess.run(
+        ["git", "-C", str(cwd), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={
+            "GIT_AUTHOR_NAME": "tester",
+            "GIT_AUTHOR_EMAIL": "tester@example.com",
+            "GIT_COMMITTER_NAME": "tester",
+            "GIT_COMMITTER_EMAIL": "tester@example.com",
+            "HOME": str(cwd),
+            "PATH": "/usr/bin:/bin:/usr/local/bin",
+        },
+    ).stdout.strip()
+
+
+def test_resolve_backport_batch_jobs_accepts_cli_or_config():
+    assert backport_batch._resolve_backport_batch_jobs(Namespace(), {}) == 1
+    assert backport_batch._resolve_backport_batch_jobs(Namespace(jobs=4), {"jobs": 2}) == 4
+    assert backport_batch._resolve_backport_batch_jobs(Namespace(jobs=None), {"jobs": 2}) == 2
+    with pytest.raises(ValueError, match="jobs"):
+        backport_batch._resolve_backport_batch_jobs(Namespace(jobs=-1), {})
+
+
+def test_execute_backport_batch_items_with_jobs_uses_prefetched_status_in_order(monkeypatch):
+    args = Namespace(stop_at_first_conflict=True, jobs=3)
+    sorted_items = [
+        {
+            "commit": f"c{index}",
+            "input_commit": f"c{index}",
+            "commit_title": f"title {index}",
+            "item_config": {"patch_path": f"/tmp/{index}.patch"},
+        }
+        for index in range(4)
+    ]
+
+    class FakePool:
+        root_dir = "/tmp/fake-worktrees"
+
+        def __init__(self, target_path, base_ref, size):
+            assert base_ref == "tip-sha"
+            assert size == 3
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        @contextmanager
+        def acquire(self):
+            yield "/tmp/fake-worktrees/worker"
+
+    def fake_status(**kwargs):
+        commit_id = kwargs["fields"]["commit_id"]
+        assert kwargs["worktree"] == backport_batch._TargetWorktree(
+            path="/tmp/fake-worktrees/worker",
+            ref="tip-sha",
+        )
+        return {"fixed_commit": commit_id, "profile": {"conflict_check_seconds": 1.0}}
+
+    processed_calls = []
+
+    def fake_process(**kwargs):
+        status = kwargs["prefetched_status"]
+        processed_calls.append(status["fixed_commit"])
+        return {
+            "skip": False,
+            "did_backport": False,
+            "report_item": {
+                "commit": status["fixed_commit"],
+                "has_conflict": status["fixed_commit"] == "c1",
+            },
+            "profile": status["profile"],
+        }
+
+    fake_repo = mock.MagicMock()
+    fake_repo.commit.return_value.hexsha = "tip-sha"
+    monkeypatch.setattr(backport_batch.git, "Repo", mock.MagicMock(return_value=fake_repo))
+    monkeypatch.setattr(backport_batch, "_TargetWorktreePool", FakePool)
+    monkeypatch.setattr(backport_batch, "_resolve_backport_batch_item_status", fake_status)
+    monkeypatch.setattr(backport_batch, "_process_backport_batch_item", fake_process)
+
+    results, report_items = backport_batch._execute_backport_batch_items(
+        sorted_items=sorted_items,
+        sort_errors=[],
+        is_report_config=False,
+        base_config={"target_branch": "default-branch"},
+        base_project_dir="/tmp/project",
+        base_target_path="/tmp/target",
+        default_target_branch="default-branch",
+        linux_subject_allowlist=frozenset(),
+        filtered_subject_index_cache=backport_batch.FilteredSubjectIndexCache(),
+        target_title_allowlist=frozenset(),
+        target_title_index_cache=backport_batch.FilteredTitleIndexCache(),
+        prepared_patch_batch_token="test-batch-token",
+        args=args,
+    )
+
+    assert results == []
+    assert processed_calls == ["c0", "c1"]
+    assert [item["commit"] for item in report_items] == ["c0", "c1", "c2", "c3"]
+    assert [item.get("status") for item in report_items[2:]] == ["pending", "pending"]
+
+
+def test_resolve_merge_and_conflict_status_in_worktree_keeps_target_checkout(tmp_path):
+    source = tmp_path / "source"
+    target = tmp_path / "target"
+    source.mkdir()
+    _git(source, "init", "-q", "-b", "master")
+    (source / "file.txt").write_text("base\n", encoding="utf-8")
+    _git(source, "add", "file.txt")
+    _git(source, "commit", "-q", "-m", "base")
+    _git(tmp_path, "clone", "-q", str(source), str(target))
+    (source / "file.txt").write_text("base\nfix\n", encoding="utf-8")
+    _git(source, "commit", "-q", "-am", "fix something")
+    fix_sha = _git(source, "rev-parse", "HEAD")
+    patch_path = tmp_path / "fix.patch"
+    patch_path.write_text(_git(source, "format-patch", "-1", "--stdout", fix_sha) + "\n", encoding="utf-8")
+    target_head = _git(target, "rev-parse", "HEAD")
+
+    with backport_batch._TargetWorktreePool(str(target), target_head, 1) as pool:
+        with pool.acquire() as worktree_path:
+            status = backport_batch._resolve_merge_and_conflict_status(
+                is_report_config=False,
+                force_recheck=False,
+                base_target_path=str(target),
+                target_branch="master",
+                fixed_commit=fix_sha,
+                patch_path=str(patch_path),
+                base_project_dir=str(source),
+                is_merge_commit=False,
+                commit_title="fix something",
+                target_title_allowlist=frozenset(),
+                title_index_cache=backport_batch.FilteredTitleIndexCache(),
+                target_title_index_ref_sha="",
+                tag="fix",
+                commit_id=fix_sha,
+                merged_in_target=None,
+                merged_check_error=None,
+                has_conflict=None,
+                conflict_check_method=None,
+                conflict_check_error=None,
+                args=Namespace(no_cache=True),
+                worktree=backport_batch._TargetWorktree(path=worktree_path, ref=target_head),
+            )
+        worktree_root = pool.root_dir
+
+    merged_in_target, _, has_conflict, conflict_check_method, _, profile = status
+    assert merged_in_target is False
+    assert has_conflict is False
+    assert conflict_check_method == "merge-tree"
+    assert profile["conflict_check_seconds"] >= 0.0
+    assert _git(target, "rev-parse", "HEAD") == target_head
+    assert _git(target, "status", "--porcelain") == ""
+    assert not Path(worktree_root).exists()
+    assert _git(target, "worktree", "list", "--porcelain").count("worktree ") == 1
+
+
+def _conflicting_repos(tmp_path):
+    source = tmp_path / "source"
+    target = tmp_path / "target"
+    source.mkdir()
+    _git(source, "init", "-q", "-b", "master")
+    (source / "a.c").write_text("1\n2\n3\n", encoding="utf-8")
+    (source / "b.c").write_text("x\n", encoding="utf-8")
+    _git(source, "add", "-A")
+    _git(source, "commit", "-q", "-m", "base")
+    _git(tmp_path, "clone", "-q", str(source), str(target))
+    (target / "a.c").write_text("1\ntarget\n3\n", encoding="utf-8")
+    _git(target, "commit", "-q", "-am", "target change")
+    (source / "b.c").write_text("y\n", encoding="utf-8")
+    _git(source, "commit", "-q", "-am", "clean fix")
+    clean_sha = _git(source, "rev-parse", "HEAD")
+    (source / "a.c").write_text("1\nsource\n3\n", encoding="utf-8")
+    _git(source, "commit", "-q", "-am", "conflicting fix")
+    conflict_sha = _git(source, "rev-parse", "HEAD")
+    patch_path = tmp_path / "fix.patch"
+    patch_path.write_text(_git(source, "format-patch", "-1", "--stdout", conflict_sha) + "\n", encoding="utf-8")
+    return source, target, clean_sha, conflict_sha, patch_path
+
+
+@pytest.mark.parametrize("merge_base_option", [True, False])
+def test_check_conflict_with_merge_tree_reports_paths_without_touching_worktree(
+    tmp_path, monkeypatch, merge_base_option
+):
+    source, target, clean_sha, conflict_sha, patch_path = _conflicting_repos(tmp_path)
+    write_tree, has_merge_base = backport_batch._merge_tree_capabilities()
+    if not write_tree or (merge_base_option and not has_merge_base):
+        pytest.skip("git merge-tree --write-tree/--merge-base not supported")
+    monkeypatch.setattr(backport_batch, "_merge_tree_capabilities", lambda: (True, merge_base_option))
+    monkeypatch.setattr(
+        backport_batch,
+        "_ensure_clean_and_checkout",
+        mock.Mock(side_effect=AssertionError("merge-tree must not touch the worktree")),
+    )
+    (target / "untracked.txt").write_text("keep\n", encoding="utf-8")
+    target_head = _git(target, "rev-parse", "HEAD")
+
+    has_conflict, method, error, seconds = backport_batch._check_conflict_with_apply_or_cherrypick(
+        str(target), "master", conflict_sha, str(patch_path), str(source),
+    )
+    assert (has_conflict, method) == (True, "merge-tree")
+    assert error.startswith("merge-tree conflict: a.c")
+    assert "CONFLICT (content)" in error
+    assert seconds >= 0.0
+
+    has_conflict, method, error, _ = backport_batch._check_conflict_with_apply_or_cherrypick(
+        str(target), "master", clean_sha, str(patch_path), str(source),
+    )
+    assert (has_conflict, method, error) == (False, "merge-tree", None)
+    assert _git(target, "rev-parse", "HEAD") == target_head
+    assert _git(target, "status", "--porcelain") == "?? untracked.txt"
+
+
+def test_check_conflict_cherry_pick_backend_is_opt_in(tmp_path):
+    source, target, _, conflict_sha, patch_path = _conflicting_repos(tmp_path)
+    target_head = _git(target, "rev-parse", "HEAD")
+
+    has_conflict, method, error, _ = backport_batch._check_conflict_with_apply_or_cherrypick(
+        str(target), "master", conflict_sha, str(patch_path), str(source),
+        backend=backport_batch._resolve_conflict_check_backend(Namespace(conflict_check="cherry-pick")),
+    )
+    assert (has_conflict, method) == (True, "cherry-pick")
+    assert "cherry-pick error" in error
+    assert _git(target, "rev-parse", "HEAD") == target_head
+    assert backport_batch._resolve_conflict_check_backend(Namespace()) == "merge-tree"
+    with pytest.raises(ValueError, match="conflict_check"):
+        backport_batch._resolve_conflict_check_backend(Namespace(conflict_check="rebase"))
+
+
+def _commit_subject(repo: Path, name: str, subject: str) -> str:
+    (repo / name).write_text(subject + "\n", encoding="utf-8")
+    _git(repo, "add", name)
+    _git(repo, "commit", "-q", "-m", subject)
+    return _git(repo, "rev-parse", "HEAD")
+
+
+def test_git_subject_index_cache_answers_reachability_without_git(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    first = _commit_subject(repo, "a", "First subject")
+    _git(repo, "checkout", "-q", "-b", "side")
+    side = _commit_subject(repo, "b", "Side subject")
+    _git(repo, "checkout", "-q", "main")
+    second = _commit_subject(repo, "c", "Second subject")
+    db_path = tmp_path / "backport-index.sqlite"
+    for ref_name, ref_sha, kind in (
+        ("main", second, git_subject_index_cache.INDEX_KIND_TARGET_SUBJECT),
+        ("side", side, git_subject_index_cache.INDEX_KIND_TARGET_SUBJECT),
+        ("main", second, git_subject_index_cache.INDEX_KIND_SOURCE_SUBJECT_NO_MERGES),
+    ):
+        git_subject_index_cache.ensure_subject_index(
+            repo_path=str(repo), ref_name=ref_name, ref_sha=ref_sha, index_kind=kind, db_path=db_path,
+        )
+
+    def no_git(*args, **kwargs):
+        raise AssertionError(f"unexpected git call: {args}")
+
+    monkeypatch.setattr(git_subject_index_cache.subprocess, "run", no_git)
+    subjects = ["First subject", "Side subject", "Second subject"]
+    results = git_subject_index_cache.load_subject_matches_bulk(
+        repo_path=str(repo),
+        lookups=[
+            git_subject_index_cache.SubjectLookup("main", second, git_subject_index_cache.INDEX_KIND_TARGET_SUBJECT, subjects),
+            git_subject_index_cache.SubjectLookup("side", side, git_subject_index_cache.INDEX_KIND_TARGET_SUBJECT, subjects),
+            git_subject_index_cache.SubjectLookup(
+                "main", second, git_subject_index_cache.INDEX_KIND_SOURCE_SUBJECT_NO_MERGES, subjects,
+            ),
+            git_subject_index_cache.SubjectLookup("main", "stale", git_subject_index_cache.INDEX_KIND_TARGET_SUBJECT, subjects),
+        ],
+        db_path=db_path,
+    )
+
+    main_matches = {"First subject": (first,), "Side subject": (), "Second subject": (second,)}
+    assert results[0] == main_matches
+    assert results[1] == {"First subject": (first,), "Side subject": (side,), "Second subject": ()}
+    assert results[2] == main_matches
+    assert results[3] is None
+
+
+def test_git_subject_index_cache_moves_reachability_with_ref(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    first = _commit_subject(repo, "a", "First subject")
+    second = _commit_subject(repo, "b", "Second subject")
+    db_path = tmp_path / "backport-index.sqlite"
+    kind = git_subject_index_cache.INDEX_KIND_TARGET_SUBJECT
+
+    def lookup(ref_sha: str):
+        return git_subject_index_cache.load_subject_matches(
+            repo_path=str(repo),
+            ref_name="main",
+            ref_sha=ref_sha,
+            subjects=["First subject", "Second subject", "Third subject"],
+            index_kind=kind,
+            db_path=db_path,
+        )
+
+    git_subject_index_cache.ensure_subject_index(
+        repo_path=str(repo), ref_name="main", ref_sha=second, index_kind=kind, db_path=db_path,
+    )
+    assert git_subject_index_cache.ensure_subject_index(
+        repo_path=str(repo), ref_name="main", ref_sha=first, index_kind=kind, db_path=db_path,
+    ) == "hit"
+    assert lookup(first) == {"First subject": (first,), "Second subject": (), "Third subject": ()}
+
+    _git(repo, "reset", "-q", "--hard", first)
+    third = _commit_subject(repo, "c", "Third subject")
+    assert git_subject_index_cache.ensure_subject_index(
+        repo_path=str(repo), ref_name="main", ref_sha=third, index_kind=kind, db_path=db_path,
+    ) == "incremental"
+    assert lookup(third) == {"First subject": (first,), "Second subject": (), "Third subject": (third,)}
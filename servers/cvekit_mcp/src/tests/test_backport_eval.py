@@ -0,0 +1,231 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+
+EVAL_ROOT = Path(__file__).resolve().parents[2] / "eval"
+if str(EVAL_ROOT) not in sys.path:
+    sys.path.insert(0, str(EVAL_ROOT))
+
+import backport_eval  # noqa: E402
+
+
+def _git(repo, *args):
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": "t",
+        "GIT_AUTHOR_EMAIL": "t@example.com",
+        "GIT_COMMITTER_NAME": "t",
+        "GIT_COMMITTER_EMAIL": "t@example.com",
+    }
+    return subprocess.run(
+        ["git", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    ).stdout.strip()
+
+
+def _init_repo(path, content="base\n"):
+    path.mkdir(parents=True, exist_ok=True)
+    _git(path, "init", "-q", "-b", "main")
+    (path / "file.txt").write_text(content, encoding="utf-8")
+    _git(path, "add", "file.txt")
+    _git(path, "commit", "-q", "-m", "base")
+    return _git(path, "rev-parse", "HEAD")
+
+
+def _config(tmp_path, **overrides):
+    values = dict(
+        eval_name="t",
+        source_repo=tmp_path / "source",
+        source_branch="main",
+        source_excel=None,
+        preprocessed_source_excel=None,
+        target_repo=tmp_path / "target",
+        manual_patch_dir=None,
+        manual_input_mode="pr_range",
+        pr_url="",
+        first_pr_commit="",
+        last_pr_commit="",
+        pr_baseline="",
+        temp_branch="eval/backport-eval-t",
+        cvekit=tmp_path / "cvekit" / "cvekit",
+        cvekit_workdir=tmp_path / "cvekit",
+        output_dir=tmp_path,
+        log_root=tmp_path / "logs",
+        recovery_file=tmp_path / "recovery.json",
+        lock_file=tmp_path / "eval.lock",
+        api_key="",
+        llm_provider="openai",
+        llm_base_url="",
+        llm_model_name="model-a",
+        signer_name="dev",
+        signer_email="dev@example.com",
+        case_limit=0,
+        workers=1,
+        worktree_root=None,
+        case_cache_dir=tmp_path / "cache",
+        cvekit_version="v1",
+    )
+    values.update(overrides)
+    return backport_eval.Config(**values)
+
+
+def _case(source_commit="a" * 40, **overrides):
+    values = dict(
+        source=backport_eval.SourceCommit(
+            describe_index=1,
+            excel_rows=[2],
+            target_commits=[],
+            source_commit=source_commit,
+            source_title="fix",
+            git_describe="v6.6-1",
+        ),
+        manual_pr_index=1,
+        manual_commit="b" * 40,
+        case_baseline="c" * 40,
+        expected_behavior="mystique_patch",
+    )
+    values.update(overrides)
+    return backport_eval.EvalCase(**values)
+
+
+@pytest.mark.parametrize(
+    "config_change, case_change",
+    [
+        ({"cvekit_version": "v2"}, {}),
+        ({"llm_provider": "other"}, {}),
+        ({"llm_model_name": "model-b"}, {}),
+        ({}, {"source_commit": "d" * 40}),
+        ({}, {"case_baseline": "d" * 40}),
+        ({}, {"manual_commit": "d" * 40}),
+        ({}, {"expected_behavior": "direct_apply"}),
+    ],
+)
+def test_case_cache_key_covers_result_inputs(tmp_path, config_change, case_change):
+    base = backport_eval.case_cache_path(_config(tmp_path), _case())
+    changed = backport_eval.case_cache_path(_config(tmp_path, **config_change), _case(**case_change))
+    assert changed != base
+
+
+def test_case_cache_key_ignores_run_layout(tmp_path):
+    base = backport_eval.case_cache_path(_config(tmp_path), _case())
+    # 同一 case 换 worker/worktree/签名人/Excel 行号时结果不变，应命中同一缓存
+    other_run = _config(
+        tmp_path,
+        target_repo=tmp_path / "worktrees" / "worker_02",
+        temp_branch="eval/other-w02",
+        workers=4,
+        signer_name="someone",
+    )
+    case = _case()
+    case.source.excel_rows = [7]
+    assert backport_eval.case_cache_path(other_run, case) == base
+    assert backport_eval.case_cache_path(_config(tmp_path, case_cache_dir=None), case) is None
+
+
+def test_cached_case_round_trip_and_malformed_entries(tmp_path):
+    config = _config(tmp_path)
+    case = _case()
+    row = {**backport_eval.case_row_fields(case), "decision": "mystique_patch"}
+    backport_eval.store_cached_case(config, case, row, {"file": "x.c"})
+
+    case.source.excel_rows = [9]
+    cached_row, detail = backport_eval.load_cached_case(config, case)
+    assert cached_row["decision"] == "mystique_patch"
+    assert cached_row["source_excel_rows"] == "9"
+    assert detail == {"file": "x.c"}
+
+    path = backport_eval.case_cache_path(config, case)
+    for content in ('{"detail": null}', '["row"]', '{"row": "oops"}', "{not json"):
+        path.write_text(content, encoding="utf-8")
+        assert backport_eval.load_cached_case(config, case) is None
+
+    # 失败的结果不写缓存
+    failed = _case(source_commit="e" * 40)
+    backport_eval.store_cached_case(config, failed, {"decision": "failed"}, None)
+    assert not backport_eval.case_cache_path(config, failed).exists()
+
+
+def test_parallel_results_merge_in_case_order(tmp_path, monkeypatch):
+    busy = set()
+    lock = threading.Lock()
+    # case 1 最慢，case 3 最快，完成顺序与评测顺序相反
+    delays = {1: 0.3, 2: 0.15, 3: 0.0}
+
+    def fake_evaluate_case(config, index, total, case, case_dir):
+        with lock:
+            assert config.target_repo not in busy, "worktree shared by two cases"
+            busy.add(config.target_repo)
+        time.sleep(delays[index])
+        with lock:
+            busy.discard(config.target_repo)
+        return {"source_commit": case.source.source_commit, "worker": str(config.target_repo)}, None
+
+    monkeypatch.setattr(backport_eval, "evaluate_case", fake_evaluate_case)
+    base = _config(tmp_path)
+    workers = [replace(base, target_repo=tmp_path / f"w{n}") for n in range(3)]
+    pending = [(n, _case(source_commit=str(n) * 40), tmp_path / f"case{n}") for n in (1, 2, 3)]
+
+    completion = []
+    results = [None] * len(pending)
+    for (index, case, _), (row, _) in backport_eval.iter_case_results(workers, pending, len(pending)):
+        assert row["source_commit"] == case.source.source_commit
+        completion.append(index)
+        results[index - 1] = row
+    assert completion == [3, 2, 1]
+    assert [row["source_commit"] for row in results] == ["1" * 40, "2" * 40, "3" * 40]
+
+
+def test_worker_worktrees_are_removed_on_restore(tmp_path):
+    head = _init_repo(tmp_path / "target")
+    config = _config(tmp_path, pr_baseline=head)
+    state = {"target_repo": str(config.target_repo), "branch": "main", "head": head}
+    workers = backport_eval.create_worker_worktrees(config, tmp_path / "worktrees", 2, state)
+    assert all((worker.target_repo / "file.txt").exists() for worker in workers)
+    assert backport_eval.read_json(config.recovery_file)["worker_branches"] == [
+        "eval/backport-eval-t-w01",
+        "eval/backport-eval-t-w02",
+    ]
+
+    backport_eval.restore_target(config, state)
+    assert not any(worker.target_repo.exists() for worker in workers)
+    assert _git(config.target_repo, "branch", "--list", "eval/*") == ""
+    assert _git(config.target_repo, "worktree", "list").count("\n") == 0
+    assert not config.recovery_file.exists()
+
+
+def test_source_commits_are_fetched_before_workers_start(tmp_path):
+    _init_repo(tmp_path / "target")
+    _init_repo(tmp_path / "source", content="source\n")
+    source_commit = _git(tmp_path / "source", "rev-parse", "HEAD")
+    config = _config(tmp_path)
+
+    backport_eval.prefetch_source_commits(config, [_case(source_commit=source_commit)])
+    assert _git(config.target_repo, "rev-parse", f"{source_commit}^{{commit}}") == source_commit
+    assert _git(config.target_repo, "remote", "get-url", "upstream") == str((tmp_path / "source").resolve())
+    # 已存在的提交不再重复 fetch，也不改动已有 remote
+    backport_eval.prefetch_source_commits(config, [_case(source_commit=source_commit)])
+
+
+def test_cvekit_version_tracks_untracked_files(tmp_path):
+    workdir = tmp_path / "cvekit"
+    head = _init_repo(workdir)
+    config = _config(tmp_path, cvekit_version="")
+    assert backport_eval.resolve_cvekit_version(config) == head
+
+    (workdir / "new_module.py").write_text("x = 1\n", encoding="utf-8")
+    first = backport_eval.resolve_cvekit_version(config)
+    assert first.startswith(f"{head}+dirty.")
+    (workdir / "new_module.py").write_text("x = 2\n", encoding="utf-8")
+    assert backport_eval.resolve_cvekit_version(config) not in (head, first)
+
+    assert backport_eval.resolve_cvekit_version(_config(tmp_path, cvekit_version="pinned")) == "pinned"
@@ -0,0 +1,152 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import git
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cvekit.utils import branch_containment, branches
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(cwd), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={
+            "GIT_AUTHOR_NAME": "tester",
+            "GIT_AUTHOR_EMAIL": "tester@example.com",
+            "GIT_COMMITTER_NAME": "tester",
+            "GIT_COMMITTER_EMAIL": "tester@example.com",
+            "HOME": str(cwd),
+            "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+        },
+    ).stdout.strip()
+
+
+def _commit(repo: Path, name: str, message: str) -> str:
+    (repo / name).write_text(message + "\n", encoding="utf-8")
+    _git(repo, "add", name)
+    _git(repo, "commit", "-q", "-m", message)
+    return _git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setenv(branch_containment.ENV_CACHE_DB, str(tmp_path / "containment.sqlite"))
+    repo = tmp_path / "kernel"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "master")
+    _commit(repo, "base", "base")
+    _git(repo, "branch", "stable-old")
+    _git(repo, "branch", "stable-new")
+    fix = _commit(repo, "fix", "upstream fix")
+    _git(repo, "checkout", "-q", "stable-new")
+    _commit(repo, "fix", f"backport fix\n\ncommit {fix} upstream.")
+    _git(repo, "checkout", "-q", "master")
+    return repo, fix
+
+
+def test_branches_containing_matches_ancestry_and_message_references(repo):
+    path, fix = repo
+    refs = branch_containment.resolve_branch_refs(str(path), ["master", "stable-old", "stable-new", "missing"])
+
+    assert [ref.name for ref in refs] == ["master", "stable-old", "stable-new"]
+    assert refs[0].ref == "refs/heads/master"
+    assert branch_containment.branches_containing(str(path), fix, refs) == ["master", "stable-new"]
+    # 缩写 hash 与不在仓库中的 hash 也能按消息引用命中
+    assert branch_containment.branches_containing(str(path), fix[:12], refs) == ["master", "stable-new"]
+    assert branch_containment.branches_containing(str(path), "f" * 40, refs) == []
+
+
+def test_results_are_cached_per_commit_and_tip(repo, monkeypatch):
+    path, fix = repo
+    refs = branch_containment.resolve_branch_refs(str(path), ["master", "stable-old", "stable-new"])
+    assert branch_containment.branches_containing(str(path), fix, refs) == ["master", "stable-new"]
+
+    def no_git(*args, **kwargs):
+        raise AssertionError(f"unexpected git call: {args}")
+
+    monkeypatch.setattr(branch_containment.subprocess, "run", no_git)
+    monkeypatch.setattr(branch_containment.subprocess, "Popen", no_git)
+    assert branch_containment.branches_containing(str(path), fix, refs) == ["master", "stable-new"]
+
+
+def test_message_index_is_extended_incrementally_when_a_tip_moves(repo, monkeypatch):
+    path, fix = repo
+    names = ["stable-old", "stable-new"]
+    refs = branch_containment.resolve_branch_refs(str(path), names)
+    assert branch_containment.branches_containing(str(path), fix, refs) == ["stable-new"]
+
+    _git(path, "checkout", "-q", "stable-old")
+    _commit(path, "fix", f"backport fix\n\n[ Upstream commit {fix} ]")
+    scanned = []
+    real_scan = branch_containment._scan_message_references
+
+    def recording_scan(repo_path, tips, exclude):
+        scanned.append((tuple(tips), tuple(exclude)))
+        return real_scan(repo_path, tips, exclude)
+
+    monkeypatch.setattr(branch_containment, "_scan_message_references", recording_scan)
+    refs = branch_containment.resolve_branch_refs(str(path), names)
+    assert branch_containment.branches_containing(str(path), fix, refs) == ["stable-old", "stable-new"]
+    # 只遍历新 tip 相对已索引 tip 的增量历史
+    assert len(scanned) == 1
+    assert scanned[0][0] == (refs[0].sha,)
+    assert scanned[0][1]
+
+
+def test_abbreviated_message_references_are_indexed(repo, tmp_path):
+    path, fix = repo
+    _git(path, "checkout", "-q", "stable-old")
+    _commit(path, "fix", f"backport fix\n\ncommit {fix[:12]} upstream.")
+    _git(path, "checkout", "-q", "master")
+    refs = branch_containment.resolve_branch_refs(str(path), ["stable-old", "stable-new"])
+
+    assert branch_containment.branches_containing(str(path), fix, refs) == ["stable-old", "stable-new"]
+    assert branch_containment.branches_containing(str(path), fix[:16], refs) == ["stable-old", "stable-new"]
+    # 短于 12 位的十六进制串不算引用
+    _git(path, "checkout", "-q", "stable-old")
+    _commit(path, "other", f"unrelated\n\nsee {fix[:11]}")
+    _git(path, "checkout", "-q", "master")
+    refs = branch_containment.resolve_branch_refs(str(path), ["stable-old"])
+    mentions = branch_containment._scan_message_references(str(path), [refs[0].sha], [])
+    assert [referenced for referenced, _ in mentions] == [fix[:12]]
+
+
+def test_index_built_before_abbreviations_is_rebuilt(repo):
+    path, fix = repo
+    db_file = branch_containment.default_cache_db_path()
+    _git(path, "checkout", "-q", "stable-old")
+    _commit(path, "fix", f"backport fix\n\ncommit {fix[:12]} upstream.")
+    _git(path, "checkout", "-q", "master")
+    refs = branch_containment.resolve_branch_refs(str(path), ["stable-old"])
+    assert branch_containment.branches_containing(str(path), fix, refs) == ["stable-old"]
+
+    # 模拟旧版本留下的索引：只认完整 hash，并缓存了未命中结果
+    with branch_containment.closing(branch_containment._connect(db_file)) as conn:
+        conn.execute("DELETE FROM message_reference")
+        conn.execute("UPDATE containment_result SET contained = 0, method = ''")
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+    assert branch_containment.branches_containing(str(path), fix, refs) == ["stable-old"]
+
+
+def test_get_branches_containing_commit_falls_back_to_per_branch_queries(repo, monkeypatch):
+    path, fix = repo
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(branch_containment, "branches_containing", broken)
+    result = branches.get_branches_containing_commit(
+        git.Repo(str(path)), fix, ["master", "stable-old", "stable-new"]
+    )
+    assert result == ["master", "stable-new"]
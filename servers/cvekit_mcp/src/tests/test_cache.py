@@ -0,0 +1,122 @@
+import json
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cvekit.utils import branches, cache
+from cvekit.utils.locales import i18n
+
+
+@pytest.fixture
+def cache_files(tmp_path, monkeypatch):
+    analysis = str(tmp_path / "branches_analysis_cache.json")
+    monkeypatch.setattr(cache, "BRANCHES_ANALYSIS_CACHE", analysis)
+    monkeypatch.setattr(branches, "BRANCHES_ANALYSIS_CACHE", analysis)
+    monkeypatch.setitem(cache._SECONDARY_INDEXERS, analysis, cache._index_branch_analysis)
+    return tmp_path, analysis
+
+
+def _analysis_item(cve_id, branch, affected):
+    return {i18n("补丁ID"): cve_id, i18n("目标分支"): branch, i18n("是否受影响"): affected}
+
+
+def test_save_get_delete_roundtrip(cache_files):
+    tmp_path, _ = cache_files
+    issue_cache = str(tmp_path / "issue_cache.json")
+
+    cache.save_cache(issue_cache, "k", {"value": [1, 2]})
+    assert cache.get_cached_data(issue_cache, "k") == {"value": [1, 2]}
+    assert cache.load_cache(issue_cache)["k"]["data"] == {"value": [1, 2]}
+
+    cache.delete_cache_key(issue_cache, "k")
+    assert cache.get_cached_data(issue_cache, "k") is None
+    # 数据写入同目录的 SQLite 数据库，而不是 JSON 文件
+    assert (tmp_path / cache.CACHE_DB_NAME).exists()
+    assert not (tmp_path / "issue_cache.json").exists()
+    with sqlite3.connect(tmp_path / cache.CACHE_DB_NAME) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_ttl_is_applied_in_sql(cache_files):
+    tmp_path, _ = cache_files
+    issue_cache = str(tmp_path / "issue_cache.json")
+    cache.save_cache(issue_cache, "old", "stale")
+    with sqlite3.connect(tmp_path / cache.CACHE_DB_NAME) as conn:
+        conn.execute("UPDATE cache_entry SET created_at = ?", (time.time() - 2 * 3600,))
+
+    assert cache.get_cached_data(issue_cache, "old", max_age_hours=1) is None
+    assert cache.get_cached_data(issue_cache, "old", max_age_hours=3) == "stale"
+    assert "old" not in cache.load_cache(issue_cache, max_age_hours=1)
+
+
+def test_legacy_json_file_is_migrated_once(cache_files):
+    tmp_path, analysis = cache_files
+    fresh = datetime.now().isoformat()
+    expired = (datetime.now() - timedelta(hours=48)).isoformat()
+    Path(analysis).write_text(
+        json.dumps(
+            {
+                "fresh": {"data": [_analysis_item("CVE-2024-0001", "OLK-5.10", i18n("已修复"))], "timestamp": fresh},
+                "expired": {"data": [], "timestamp": expired},
+            },
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+
+    assert cache.get_cached_data(analysis, "fresh")[0][i18n("补丁ID")] == "CVE-2024-0001"
+    assert cache.get_cached_data(analysis, "expired") is None
+    assert cache.get_cached_data(analysis, "expired", max_age_hours=72) == []
+    assert not Path(analysis).exists()
+    assert Path(analysis + ".migrated").exists()
+    # 迁移的条目同样进入二级索引
+    assert branches.check_analyse_cache_result("CVE-2024-0001", "OLK-5.10")
+
+
+def test_secondary_index_by_cve_and_branch(cache_files):
+    _, analysis = cache_files
+    cache.save_cache(
+        analysis,
+        "a",
+        [
+            _analysis_item("CVE-2024-0001", "OLK-5.10", i18n("已修复")),
+            _analysis_item("CVE-2024-0001", "OLK-6.6", i18n("受影响")),
+        ],
+    )
+    cache.save_cache(analysis, "b", [_analysis_item("CVE-2024-0002", "OLK-6.6", i18n("不受影响"))])
+
+    assert len(cache.find_cached_items(analysis, "CVE-2024-0001", "OLK-5.10")) == 1
+    assert branches.check_analyse_cache_result("CVE-2024-0001", "OLK-5.10")
+    assert not branches.check_analyse_cache_result("CVE-2024-0001", "OLK-6.6")
+    assert branches.check_analyse_cache_result("CVE-2024-0002", "OLK-6.6")
+
+    # 覆盖写入与删除都会同步更新索引
+    cache.save_cache(analysis, "a", [_analysis_item("CVE-2024-0001", "OLK-6.6", i18n("已修复"))])
+    assert not branches.check_analyse_cache_result("CVE-2024-0001", "OLK-5.10")
+    assert branches.check_analyse_cache_result("CVE-2024-0001", "OLK-6.6")
+    cache.delete_cache_key(analysis, "b")
+    assert cache.find_cached_items(analysis, "CVE-2024-0002", "OLK-6.6") == []
+
+
+def test_cached_decorator_signature_unchanged(cache_files):
+    tmp_path, _ = cache_files
+    calls = []
+
+    @cache.cached(str(tmp_path / "COMMITS_CACHE.json"), load_transform=lambda value: tuple(value))
+    def compute(x, use_cache=True):
+        calls.append(x)
+        return [x, x]
+
+    assert compute(1) == [1, 1]
+    assert compute(1) == (1, 1)
+    assert compute(1, use_cache=False) == [1, 1]
+    assert calls == [1, 1]
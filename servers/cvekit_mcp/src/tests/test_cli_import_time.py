@@ -0,0 +1,94 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# 轻量 action 在 handler 中 _lazy_import 的名字；空元组表示只导入 cli 本身（--help）
+_LIGHT_ACTIONS = {
+    "help": (),
+    "parse-issue": ("parse_gitee_issue_url",),
+    "get-commits": ("get_vulnerability_commits",),
+    "setup-env": ("setup_repository",),
+    "analyze-branches": (
+        "parse_gitee_issue_url",
+        "get_vulnerability_commits",
+        "setup_repository",
+        "process_branches",
+    ),
+    "apply-patch": ("apply_patch",),
+    "create-pr": ("create_pr", "cleanup_package"),
+}
+
+# LLM/agent、批量回合、Excel 等子系统，轻量 action 不应加载
+_HEAVY_MODULES = (
+    "langchain_core",
+    "openai",
+    "openpyxl",
+    "cvekit.utils.tools.project",
+    "cvekit.utils.backporting",
+    "cvekit.utils.backport_batch",
+    "cvekit.utils.agent",
+    "cvekit.utils.package.patch_crawler",
+)
+
+# 各 action 的 cvekit 导入耗时上限（秒），慢机器上可用环境变量放宽
+_BUDGET_SECONDS = float(os.getenv("CVEKIT_IMPORT_BUDGET_SECONDS", "0.8"))
+
+_PROBE = """
+import json, sys
+from cvekit import cli
+cli._lazy_import(*sys.argv[1:])
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def _import_profile(names):
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE, *names],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    modules = set(json.loads(proc.stdout))
+    # 从第一个 cvekit 模块开始累加顶层导入（缩进为 0 的行）的 cumulative 耗时，
+    # 解释器启动阶段的 site/encodings 不计入
+    total_us = 0
+    started = False
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        started = started or name.strip().startswith("cvekit")
+        if started and not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    return total_us / 1e6, modules
+
+
+@pytest.mark.parametrize("action", sorted(_LIGHT_ACTIONS))
+def test_light_actions_skip_heavy_subsystems(action):
+    seconds, modules = _import_profile(_LIGHT_ACTIONS[action])
+    loaded = [name for name in _HEAVY_MODULES if name in modules]
+    assert loaded == [], f"{action} 加载了重量级模块: {loaded}"
+    assert seconds < _BUDGET_SECONDS, f"{action} 导入耗时 {seconds:.3f}s 超过 {_BUDGET_SECONDS}s"
+
+
+def test_lazy_names_resolve_and_stay_patchable(monkeypatch):
+    from cvekit import cli
+
+    for name in cli._LAZY_IMPORTS:
+        assert getattr(cli, name) is not None
+    sentinel = object()
+    monkeypatch.setattr(cli, "apply_patch", sentinel)
+    cli._lazy_import("apply_patch")
+    assert cli.apply_patch is sentinel
@@ -0,0 +1,268 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cvekit import cli_worker
+
+# 模拟 cvekit.cli.main：打印 JSON、修改进程状态、按参数决定退出码
+_FAKE_CLI = '''
+import json
+import logging
+import os
+import sys
+
+calls = 0
+
+
+def main():
+    global calls
+    calls += 1
+    argv = sys.argv[1:]
+    state = {
+        "calls": calls,
+        "pid": os.getpid(),
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "leaked_env": os.environ.get("FAKE_CLI_LEAK"),
+        "handlers": len(logging.getLogger().handlers),
+        "stdin": sys.stdin.read(),
+    }
+    os.environ["FAKE_CLI_LEAK"] = "leaked"
+    os.chdir("/")
+    logging.getLogger().addHandler(logging.StreamHandler())
+    os.system("echo stray output from a child process")
+    if "--fail" in argv:
+        print("partial output")
+        raise RuntimeError("boom")
+    print(json.dumps(state))
+    print("diagnostic", file=sys.stderr)
+    if "--exit" in argv:
+        sys.exit(int(argv[argv.index("--exit") + 1]))
+    if "--crash" in argv:
+        os.write(2, b"Fatal Python error: simulated\\n")
+        os._exit(134)
+'''
+
+
+@pytest.fixture
+def worker_env(tmp_path):
+    (tmp_path / "fake_cli.py").write_text(_FAKE_CLI, encoding="utf-8")
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join([str(tmp_path), str(PROJECT_ROOT)])
+    env.pop("FAKE_CLI_LEAK", None)
+    return env
+
+
+def test_worker_keeps_modules_warm_and_isolates_calls(worker_env, tmp_path):
+    worker = cli_worker.CvekitWorker("fake_cli:main", env=worker_env)
+    try:
+        first = worker.run(["--action=parse-issue", "--json"], env=worker_env, cwd=str(tmp_path))
+        second = worker.run(["--action=get-commits"], env=worker_env, cwd=str(tmp_path))
+    finally:
+        worker.close()
+
+    # 子进程写到 fd 1/2 的输出追加在本次调用的 stderr 后面，不混进 stdout
+    assert first.returncode == 0
+    assert first.stderr == "diagnostic\nstray output from a child process\n"
+    assert second.stderr == "diagnostic\nstray output from a child process\n"
+    first_state = json.loads(first.stdout)
+    second_state = json.loads(second.stdout)
+    assert first_state["argv"] == ["--action=parse-issue", "--json"]
+    assert (first_state["calls"], second_state["calls"]) == (1, 2)
+    assert first_state["pid"] == second_state["pid"]
+    # 上一次调用修改的环境变量、工作目录和 logging handler 不会带到下一次
+    assert second_state["cwd"] == str(tmp_path)
+    assert second_state["leaked_env"] is None
+    assert second_state["handlers"] == first_state["handlers"]
+    assert second_state["stdin"] == ""
+
+
+def test_worker_reports_exit_codes_like_a_subprocess(worker_env):
+    worker = cli_worker.CvekitWorker("fake_cli:main", env=worker_env)
+    try:
+        exited = worker.run(["--exit", "3"], env=worker_env)
+        failed = worker.run(["--fail"], env=worker_env)
+        after = worker.run([], env=worker_env)
+    finally:
+        worker.close()
+
+    assert exited.returncode == 3
+    assert failed.returncode == 1
+    assert failed.stdout == "partial output\n"
+    assert "RuntimeError: boom" in failed.stderr
+    assert after.returncode == 0 and json.loads(after.stdout)["calls"] == 3
+
+
+def test_pool_recycles_workers(worker_env):
+    pool = cli_worker.CvekitWorkerPool("fake_cli:main", max_idle=1, max_calls=2, max_rss_bytes=0)
+    try:
+        pids = [json.loads(pool.run([], env=worker_env).stdout)["pid"] for _ in range(5)]
+    finally:
+        pool.close()
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+
+    pool = cli_worker.CvekitWorkerPool("fake_cli:main", max_idle=1, max_calls=0, max_rss_bytes=1)
+    try:
+        pids = [json.loads(pool.run([], env=worker_env).stdout)["pid"] for _ in range(2)]
+    finally:
+        pool.close()
+    assert pids[0] != pids[1]
+
+
+def test_pool_reports_worker_stderr_when_worker_dies(worker_env):
+    pool = cli_worker.CvekitWorkerPool("fake_cli:main")
+    try:
+        crashed = pool.run(["--crash"], env=worker_env)
+        after = pool.run([], env=worker_env)
+    finally:
+        pool.close()
+    assert crashed.returncode == 1
+    assert "cvekit worker exited during call" in crashed.stderr
+    assert "code 134" in crashed.stderr
+    assert "Fatal Python error: simulated" in crashed.stderr
+    assert "stray output from a child process" in crashed.stderr
+    assert after.returncode == 0 and json.loads(after.stdout)["calls"] == 1
+
+
+def test_worker_flushes_trace_after_each_call(worker_env, tmp_path):
+    (tmp_path / "traced_cli.py").write_text(
+        "import sys\n"
+        "from cvekit.utils import tracing\n"
+        "def main():\n"
+        "    with tracing.span('action', argv=' '.join(sys.argv[1:])):\n"
+        "        pass\n",
+        encoding="utf-8",
+    )
+    worker_env["CVEKIT_TRACE"] = str(tmp_path / "trace.json")
+    worker = cli_worker.CvekitWorker("traced_cli:main", env=worker_env)
+    try:
+        worker.run(["first"], env=worker_env)
+        worker.run(["second"], env=worker_env)
+        traces = [json.loads((tmp_path / f"trace.{n}.json").read_text(encoding="utf-8")) for n in (1, 2)]
+    finally:
+        worker.close()
+    # 每个命令单独落盘，worker 内不累积之前命令的事件
+    assert [
+        [event["args"]["argv"] for event in trace["traceEvents"] if event["name"] == "action"]
+        for trace in traces
+    ] == [["first"], ["second"]]
+
+
+MYSTIQUE_SRC = PROJECT_ROOT / "cvekit" / "utils" / "mystique" / "src"
+
+
+def test_mystique_settings_do_not_leak_between_calls(worker_env, tmp_path):
+    # 与 cli.handle_mystique 一致：未传的参数为 None
+    (tmp_path / "mystique_cli.py").write_text(
+        "import argparse\n"
+        "import sys\n"
+        f"sys.path.insert(0, {str(MYSTIQUE_SRC)!r})\n"
+        "import config\n"
+        "def main():\n"
+        "    parser = argparse.ArgumentParser()\n"
+        "    for flag in ('--api-key', '--llm-provider', '--llm-base-url', '--llm-model-name', '--format-mode'):\n"
+        "        parser.add_argument(flag)\n"
+        "    args = parser.parse_args(sys.argv[1:])\n"
+        "    config.configure_llm(provider=args.llm_provider, api_key=args.api_key,\n"
+        "                         base_url=args.llm_base_url, model_name=args.llm_model_name)\n"
+        "    config.configure_format_normalization(args.format_mode)\n"
+        "    print(config.LLM_API_KEY, config.LLM_PROVIDER, config.LLM_API_URL, config.LLM_MODEL,\n"
+        "          config.FORMAT_NORMALIZATION_MODE)\n",
+        encoding="utf-8",
+    )
+    for name in ("LLM_API_KEY", "GPT_API_KEY", "API_KEY", "LLM_API_URL", "BASE_URL", "LLM_MODEL", "MODEL_NAME"):
+        worker_env.pop(name, None)
+    worker_env.update(LLM_PROVIDER="minimax", MYSTIQUE_FORMAT_MODE="changed")
+    worker = cli_worker.CvekitWorker("mystique_cli:main", env=worker_env)
+    try:
+        first = worker.run(
+            [
+                "--api-key=callerA-secret",
+                "--llm-provider=openai",
+                "--llm-base-url=http://a.example",
+                "--llm-model-name=model-a",
+                "--format-mode=full",
+            ],
+            env=worker_env,
+        )
+        second = worker.run([], env={**worker_env, "API_KEY": "env-key"})
+    finally:
+        worker.close()
+    assert first.stdout.split() == [
+        "callerA-secret", "openai", "http://a.example/chat/completions", "model-a", "full_function",
+    ]
+    # 第二次调用没有传参，回到本次调用环境变量给出的默认值
+    assert second.stdout.split() == [
+        "env-key", "minimax", "https://api.openai.com/v1/chat/completions", "MiniMax-M2.7-highspeed",
+        "changed_regions",
+    ]
+
+
+def test_mystique_logging_is_initialised_for_each_call(worker_env, tmp_path):
+    pytest.importorskip("scubatrace")
+    joern_home = tmp_path / "joern-cli"
+    joern_home.mkdir()
+    (joern_home / "joern").write_text("#!/bin/sh\n", encoding="utf-8")
+    (joern_home / "joern").chmod(0o755)
+    (tmp_path / "mystique_log_cli.py").write_text(
+        "import logging\n"
+        "import sys\n"
+        f"sys.path.insert(0, {str(MYSTIQUE_SRC)!r})\n"
+        "import main as mystique_main\n"
+        "def main():\n"
+        "    cve_id, timestamp = sys.argv[1:]\n"
+        "    logfile = mystique_main._init_mystique_env(cve_id=cve_id, timestamp=timestamp)\n"
+        "    logging.info('message for %s', cve_id)\n"
+        "    print(logfile)\n",
+        encoding="utf-8",
+    )
+    worker_env.update(HOME=str(tmp_path), JOERN_PATH=str(joern_home))
+    worker = cli_worker.CvekitWorker("mystique_log_cli:main", env=worker_env)
+    try:
+        first = worker.run(["CVE-2024-0001", "20240101_000000"], env=worker_env)
+        second = worker.run(["CVE-2024-0002", "20240102_000000"], env=worker_env)
+    finally:
+        worker.close()
+    logfiles = [Path(result.stdout.strip()) for result in (first, second)]
+    # 第一次调用装上的 handler 在调用结束后被 worker 移除，第二次调用写自己的日志文件
+    assert [path.name for path in logfiles] == [
+        "backport_CVE-2024-0001_20240101_000000.log",
+        "backport_CVE-2024-0002_20240102_000000.log",
+    ]
+    assert "message for CVE-2024-0001" in logfiles[0].read_text(encoding="utf-8")
+    assert "message for CVE-2024-0002" in logfiles[1].read_text(encoding="utf-8")
+    assert "message for CVE-2024-0002" in second.stderr
+    assert "CVE-2024-0002" not in logfiles[0].read_text(encoding="utf-8")
+
+def test_pool_falls_back_when_worker_cannot_start(worker_env):
+    pool = cli_worker.CvekitWorkerPool("missing_module:main")
+    assert pool.run(["--action=parse-issue"], env=worker_env) is None
+    assert pool.disabled
+    assert pool.run(["--action=parse-issue"], env=worker_env) is None
+
+
+def test_worker_matches_cold_cli_argument_errors(worker_env):
+    argv = ["--action=get-commits", "--json"]
+    cold = subprocess.run(
+        [sys.executable, "-c", "import sys; sys.argv[0] = 'cvekit'; from cvekit.cli import main; main()", *argv],
+        capture_output=True,
+        text=True,
+        env=worker_env,
+    )
+    worker = cli_worker.CvekitWorker(env=worker_env)
+    try:
+        warm = worker.run(argv, env=worker_env)
+    finally:
+        worker.close()
+    assert cold.returncode == warm.returncode == 2
+    assert warm.stderr == cold.stderr
+    assert warm.stdout == cold.stdout
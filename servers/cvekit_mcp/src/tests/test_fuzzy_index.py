@@ -0,0 +1,55 @@
+import random
+import string
+import sys
+from pathlib import Path
+
+import Levenshtein
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cvekit.utils.fuzzy_index import TrigramIndex
+
+
+def _brute_force(items, query, k):
+    ranked = sorted(
+        ((Levenshtein.distance(query, item), idx) for idx, item in enumerate(items)),
+    )
+    return [(items[idx], distance) for distance, idx in ranked[:k]]
+
+
+def test_trigram_index_matches_brute_force_on_random_symbols():
+    rng = random.Random(1234)
+    alphabet = string.ascii_lowercase[:6] + "_"
+    items = list(dict.fromkeys(
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 14)))
+        for _ in range(600)
+    ))
+    index = TrigramIndex(items)
+
+    for _ in range(200):
+        query = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 16)))
+        for k in (1, 3):
+            assert index.nearest(query, k=k) == _brute_force(items, query, k)
+
+
+def test_trigram_index_finds_kernel_style_typo():
+    index = TrigramIndex([
+        "spin_lock_irqsave",
+        "spin_unlock_irqrestore",
+        "mutex_lock",
+        "kmalloc_array",
+    ])
+
+    assert index.nearest("spin_lock_irqsav") == [("spin_lock_irqsave", 1)]
+    assert index.nearest("kmaloc_array", k=2)[0] == ("kmalloc_array", 1)
+
+
+def test_trigram_index_respects_max_distance_and_empty_inputs():
+    index = TrigramIndex(["alpha", "beta"])
+
+    assert index.nearest("zzzzzzzz", max_distance=2) == []
+    assert index.nearest("alpha", k=0) == []
+    assert TrigramIndex([]).nearest("alpha") == []
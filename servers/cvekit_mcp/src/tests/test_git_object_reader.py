@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cvekit.utils import git_object_reader
+
+
+def _git(cwd: Path, *args: str, env_extra: dict | None = None) -> str:
+    env = {
+        "GIT_AUTHOR_NAME": "tester",
+        "GIT_AUTHOR_EMAIL": "tester@example.com",
+        "GIT_COMMITTER_NAME": "tester",
+        "GIT_COMMITTER_EMAIL": "tester@example.com",
+        "HOME": str(cwd),
+        "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+    }
+    env.update(env_extra or {})
+    return subprocess.run(
+        ["git", "-C", str(cwd), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    ).stdout.strip()
+
+
+def _make_repo(tmp_path: Path) -> tuple[Path, str]:
+    repo = tmp_path / "repo"
+    (repo / "dir").mkdir(parents=True)
+    (repo / "dir" / "a file.c").write_text("int alpha;\n", encoding="utf-8")
+    _git(repo, "init", "-q")
+    _git(repo, "add", "-A")
+    _git(
+        repo,
+        "commit",
+        "-q",
+        "-m",
+        "Add alpha\n\nBody line",
+        env_extra={"GIT_COMMITTER_DATE": "2019-02-27T23:30:00-0800"},
+    )
+    return repo, _git(repo, "rev-parse", "HEAD")
+
+
+def test_reader_reads_blobs_and_reports_missing_objects(tmp_path):
+    repo, head = _make_repo(tmp_path)
+    reader = git_object_reader.GitObjectReader(str(repo))
+    try:
+        assert reader.read_text("HEAD", "dir/a file.c") == "int alpha;\n"
+        assert reader.read_blob(head, "dir/missing.c") is None
+        assert reader.read_blob("HEAD", "dir") is None
+        assert reader.read("no-such-ref") is None
+        assert reader.resolve("HEAD") == (head, "commit")
+    finally:
+        reader.close()
+
+
+def test_reader_parses_commit_headers(tmp_path):
+    repo, head = _make_repo(tmp_path)
+    reader = git_object_reader.GitObjectReader(str(repo))
+    try:
+        commit = reader.read_commit("HEAD")
+    finally:
+        reader.close()
+
+    assert commit.sha == head
+    assert commit.parents == ()
+    assert commit.subject == "Add alpha"
+    assert commit.committer == "tester <tester@example.com>"
+    assert commit.committer_date() == _git(repo, "log", "-1", "--date=short", "--format=%cd", head)
+
+
+def test_shared_reader_is_thread_safe(tmp_path):
+    repo, head = _make_repo(tmp_path)
+    reader = git_object_reader.get_reader(str(repo))
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda i: (reader.read_text(head, "dir/a file.c"), reader.read_commit(head).subject),
+                range(64),
+            ))
+        assert git_object_reader.get_reader(str(repo)) is reader
+    finally:
+        git_object_reader.close_all()
+
+    assert set(results) == {("int alpha;\n", "Add alpha")}
@@ -0,0 +1,109 @@
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cvekit.utils import llm_cache
+
+
+@pytest.fixture
+def cache_db(tmp_path, monkeypatch):
+    db_path = tmp_path / "llm-response.sqlite"
+    monkeypatch.setenv(llm_cache.ENV_CACHE_ENABLED, "1")
+    monkeypatch.setenv(llm_cache.ENV_CACHE_DB, str(db_path))
+    llm_cache.reset_counters()
+    return db_path
+
+
+def test_fingerprint_normalizes_prompt_but_keeps_request_parameters():
+    base = dict(model="m", temperature=0, prompt="int f(void)\r\n{\n\treturn 0;   \n}\n\n", system_message="sys")
+    key = llm_cache.fingerprint(**base)
+
+    assert key == llm_cache.fingerprint(**{**base, "prompt": "int f(void)\n{\n\treturn 0;\n}"})
+    assert key != llm_cache.fingerprint(**{**base, "prompt": "int f(void)\n{\n    return 0;\n}"})
+    assert key != llm_cache.fingerprint(**{**base, "model": "other"})
+    assert key != llm_cache.fingerprint(**{**base, "temperature": 0.2})
+    assert key != llm_cache.fingerprint(**{**base, "system_message": "other"})
+
+
+def test_fingerprint_covers_tool_schema():
+    from langchain_core.tools import tool
+
+    @tool
+    def compile_check(code: str) -> str:
+        """Check code."""
+        return ""
+
+    @tool
+    def compile_check_v2(code: str, language: str = "C") -> str:
+        """Check code."""
+        return ""
+
+    compile_check_v2.name = "compile_check"
+    plain = llm_cache.fingerprint(model="m", temperature=0, prompt="p")
+    with_tool = llm_cache.fingerprint(model="m", temperature=0, prompt="p", tools=[compile_check])
+    assert plain != with_tool
+    assert with_tool != llm_cache.fingerprint(model="m", temperature=0, prompt="p", tools=[compile_check_v2])
+
+
+def test_lookup_store_and_counters(cache_db):
+    key = llm_cache.fingerprint(model="m", temperature=0, prompt="p")
+
+    assert llm_cache.lookup(key) is None
+    llm_cache.store(key, "answer", model="m")
+    assert llm_cache.lookup(key) == "answer"
+
+    assert llm_cache.counters() == {"llm_cache_hits": 1, "llm_cache_misses": 1}
+    started = llm_cache.counters()
+    llm_cache.lookup(key)
+    assert llm_cache.counters_since(started) == {"llm_cache_hits": 1, "llm_cache_misses": 0}
+
+
+def test_expired_entries_miss_and_are_evicted(cache_db, monkeypatch):
+    monkeypatch.setenv(llm_cache.ENV_CACHE_TTL_SECONDS, "60")
+    llm_cache.store("old", "stale")
+    with sqlite3.connect(cache_db) as conn:
+        conn.execute("UPDATE llm_response SET created_at = ?", (time.time() - 120,))
+
+    assert llm_cache.lookup("old") is None
+    with sqlite3.connect(cache_db) as conn:
+        assert llm_cache.evict(conn) == 1
+
+
+def test_size_eviction_drops_least_recently_used(cache_db):
+    for index, key in enumerate(("a", "b", "c")):
+        llm_cache.store(key, "x" * 100)
+        with sqlite3.connect(cache_db) as conn:
+            conn.execute("UPDATE llm_response SET last_used_at = ? WHERE cache_key = ?", (index, key))
+    with sqlite3.connect(cache_db) as conn:
+        conn.execute("UPDATE llm_response SET last_used_at = 10 WHERE cache_key = 'a'")
+        assert llm_cache.evict(conn, ttl_seconds=0, max_bytes=250) == 1
+        remaining = {row[0] for row in conn.execute("SELECT cache_key FROM llm_response")}
+    assert remaining == {"a", "c"}
+
+
+def test_temperature_policy(cache_db, monkeypatch):
+    assert llm_cache.should_cache(0)
+    assert not llm_cache.should_cache(0.5)
+    monkeypatch.setenv(llm_cache.ENV_CACHE_MAX_TEMPERATURE, "0.5")
+    assert llm_cache.should_cache(0.5)
+    monkeypatch.setenv(llm_cache.ENV_CACHE_ENABLED, "0")
+    assert not llm_cache.should_cache(0)
+    assert llm_cache.langchain_cache(0) is None
+
+
+def test_langchain_cache_replays_chat_model_response(cache_db):
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    model = FakeListChatModel(responses=["first", "second"], cache=llm_cache.langchain_cache(0))
+    assert model.invoke("hello").content == "first"
+    assert model.invoke("hello").content == "first"
+    assert model.invoke("other").content == "second"
+    assert llm_cache.counters() == {"llm_cache_hits": 1, "llm_cache_misses": 2}
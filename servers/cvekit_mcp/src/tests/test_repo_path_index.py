@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cvekit.utils import repo_path_index
+from cvekit.utils.tools import utils
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(cwd), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={
+            "GIT_AUTHOR_NAME": "tester",
+            "GIT_AUTHOR_EMAIL": "tester@example.com",
+            "GIT_COMMITTER_NAME": "tester",
+            "GIT_COMMITTER_EMAIL": "tester@example.com",
+            "HOME": str(cwd),
+            "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+        },
+    ).stdout.strip()
+
+
+def _write(repo: Path, path: str, text: str) -> None:
+    target = repo / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setenv(repo_path_index.ENV_CACHE_DB, str(tmp_path / "path-index.sqlite"))
+    monkeypatch.setattr(repo_path_index, "_memory_indexes", type(repo_path_index._memory_indexes)())
+    repo = tmp_path / "kernel"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "master")
+    _write(repo, "drivers/net/phy/phy_core.c", "int phy_core(void)\n{\n\treturn 0;\n}\n" * 20)
+    _write(repo, "drivers/net/phy/phy_device.c", "int phy_device(void);\n")
+    _write(repo, "drivers/usb/core/hub.c", "int hub(void);\n")
+    _write(repo, "fs/smb/server/smb2pdu.c", "int smb2(void);\n")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-q", "-m", "base")
+    return repo
+
+
+def test_similar_paths_ranks_by_basename_then_shared_directories(repo):
+    _write(repo, "arch/x86/phy_core.c", "int other(void);\n")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-q", "-m", "same basename elsewhere")
+
+    result = repo_path_index.similar_paths(str(repo), "HEAD", "drivers/net/phy/phy_cor.c", top_n=3)
+    assert result == ["drivers/net/phy/phy_core.c", "arch/x86/phy_core.c", "drivers/net/phy/phy_device.c"]
+
+
+def test_index_is_persisted_per_tree(repo, monkeypatch):
+    repo_path_index.similar_paths(str(repo), "HEAD", "hub.c")
+    monkeypatch.setattr(repo_path_index, "_memory_indexes", type(repo_path_index._memory_indexes)())
+
+    def no_ls_tree(*args, **kwargs):
+        raise AssertionError("path index should be loaded from sqlite")
+
+    monkeypatch.setattr(repo_path_index, "_git_ls_tree_paths", no_ls_tree)
+    assert repo_path_index.similar_paths(str(repo), "HEAD", "hub.c", top_n=1) == ["drivers/usb/core/hub.c"]
+
+
+def test_rename_history_is_a_first_class_candidate(repo):
+    _git(repo, "mv", "fs/smb/server", "fs/ksmbd")
+    _git(repo, "commit", "-q", "-m", "move ksmbd")
+    _git(repo, "mv", "fs/ksmbd/smb2pdu.c", "fs/ksmbd/smb2_pdu.c")
+    _git(repo, "commit", "-q", "-m", "rename pdu")
+
+    assert repo_path_index.rename_targets(str(repo), "HEAD", "fs/smb/server/smb2pdu.c") == ["fs/ksmbd/smb2_pdu.c"]
+    files = utils.find_most_similar_files(
+        "smb2pdu.c", str(repo), ref="HEAD", original_path="fs/smb/server/smb2pdu.c"
+    )
+    # 重命名目标排在最前，且不会在相似文件中重复出现
+    assert files[0] == "fs/ksmbd/smb2_pdu.c"
+    assert files.count("fs/ksmbd/smb2_pdu.c") == 1
+    assert len(files) == 4
+
+
+def test_rename_targets_count_towards_top_n(repo):
+    _git(repo, "mv", "drivers/usb/core/hub.c", "drivers/usb/core/usb_hub_core.c")
+    _git(repo, "commit", "-q", "-m", "rename hub")
+
+    files = utils.find_most_similar_files("hub.c", str(repo), ref="HEAD", original_path="drivers/usb/core/hub.c")
+    assert files[0] == "drivers/usb/core/usb_hub_core.c"
+    assert len(files) == 4
+    assert repo_path_index.similar_paths(str(repo), "HEAD", "drivers/usb/core/hub.c", top_n=2) == files[:2]
+    assert repo_path_index.similar_paths(str(repo), "HEAD", "drivers/usb/core/hub.c", top_n=1) == files[:1]
+
+
+def test_find_most_similar_files_walks_directory_without_ref(tmp_path):
+    _write(tmp_path, "a/hub.c", "")
+    _write(tmp_path, "b/other.c", "")
+    assert utils.find_most_similar_files("hub.c", str(tmp_path))[0] == os.path.join("a", "hub.c")
+    # ref 无法解析时回退到目录遍历
+    assert utils.find_most_similar_files("hub.c", str(tmp_path), ref="HEAD")[0] == os.path.join("a", "hub.c")
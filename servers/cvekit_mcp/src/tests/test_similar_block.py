@@ -0,0 +1,83 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cvekit.utils.tools import utils
+
+
+def _kernel_like_file(rng: random.Random, functions: int = 120) -> list[str]:
+    lines = ["#include <linux/kernel.h>", ""]
+    for f in range(functions):
+        lines += [f"static int dev_op_{f}(struct device *dev, int arg)", "{", "\tint ret;", ""]
+        for s in range(rng.randint(3, 12)):
+            lines += [
+                f"\tret = helper_{f}_{s}(dev, arg + {s});",
+                "\tif (ret)",
+                "\t\treturn ret;",
+            ]
+        lines += ["\treturn 0;", "}", ""]
+    return lines
+
+
+def _full_scan(pattern, main, p_len, dline_flag=False, monkeypatch=None):
+    monkeypatch.setenv("CVEKIT_SIMILAR_BLOCK_PRUNE", "0")
+    try:
+        return utils.find_most_similar_block(pattern, main, p_len, dline_flag)
+    finally:
+        monkeypatch.delenv("CVEKIT_SIMILAR_BLOCK_PRUNE")
+
+
+def test_anchor_pruned_locator_matches_full_scan(monkeypatch):
+    rng = random.Random(7)
+    main = _kernel_like_file(rng)
+    for _ in range(60):
+        start = rng.randrange(0, len(main) - 12)
+        pattern = list(main[start : start + rng.randint(3, 10)])
+        # 模拟补丁上下文与目标文件之间的缩进差异和少量改动
+        for idx in rng.sample(range(len(pattern)), k=min(2, len(pattern))):
+            pattern[idx] = pattern[idx].replace("\t", "    ").replace("arg", "val", rng.randint(0, 1))
+
+        expected = _full_scan(pattern, main, len(pattern), monkeypatch=monkeypatch)
+        assert utils.find_most_similar_block(pattern, main, len(pattern)) == expected
+
+
+def test_only_windows_around_anchors_are_scored(monkeypatch):
+    main = _kernel_like_file(random.Random(3))
+    start = main.index("\tret = helper_90_1(dev, arg + 1);") - 1
+    pattern = main[start : start + 5]
+    scored = []
+    real_distance = utils.Levenshtein.distance
+
+    def counting_distance(*args, **kwargs):
+        scored.append(args[0])
+        return real_distance(*args, **kwargs)
+
+    monkeypatch.setattr(utils.Levenshtein, "distance", counting_distance)
+    assert utils.find_most_similar_block(pattern, main, len(pattern)) == (start + 1, 0)
+    assert 0 < len(scored) < len(main) // 10
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        ["}", "", "}"],  # 只有常见行，没有可用锚点
+        ["completely unrelated text", "nothing shared here"],  # 锚点缺失时回退全量扫描
+    ],
+)
+def test_falls_back_to_full_scan_without_anchors(pattern, monkeypatch):
+    main = _kernel_like_file(random.Random(5), functions=20)
+    expected = _full_scan(pattern, main, len(pattern), monkeypatch=monkeypatch)
+    assert utils.find_most_similar_block(pattern, main, len(pattern)) == expected
+
+
+def test_dline_flag_and_short_main_keep_contract(monkeypatch):
+    revised = [" a = 1;", "-b = foo_bar(x);", " b = foo_bar(x);", " c = 3;"]
+    assert utils.find_most_similar_block(["b = foo_bar(x);"], revised, 1, True) == (3, 1)
+    assert utils.find_most_similar_block(["x", "y", "z"], ["x"], 3) == (1, float("inf"))
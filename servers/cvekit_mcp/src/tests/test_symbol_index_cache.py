@@ -0,0 +1,147 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cvekit.utils import symbol_index_cache
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(cwd), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={
+            "GIT_AUTHOR_NAME": "tester",
+            "GIT_AUTHOR_EMAIL": "tester@example.com",
+            "GIT_COMMITTER_NAME": "tester",
+            "GIT_COMMITTER_EMAIL": "tester@example.com",
+            "HOME": str(cwd),
+            "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+        },
+    ).stdout.strip()
+
+
+def _commit_files(repo: Path, files: dict[str, str], message: str) -> str:
+    for path, content in files.items():
+        target = repo / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content, encoding="utf-8")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", message)
+    return _git(repo, "rev-parse", "HEAD^{tree}")
+
+
+@pytest.fixture
+def fake_ctags(monkeypatch):
+    """Stand-in for ctags: tags every `int name(` definition, records scanned files."""
+    scanned: list[list[str]] = []
+
+    def run_ctags(work_dir: str):
+        tags = []
+        files = []
+        for root, _, names in os.walk(work_dir):
+            for name in names:
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, work_dir)
+                files.append(rel_path)
+                with open(full_path, encoding="utf-8") as f:
+                    for lineno, line in enumerate(f, start=1):
+                        match = re.match(r"int (\w+)\(", line)
+                        if match:
+                            tags.append((match.group(1), rel_path, lineno))
+        scanned.append(sorted(files))
+        return tags
+
+    monkeypatch.setattr(symbol_index_cache, "_run_ctags", run_ctags)
+    return scanned
+
+
+def test_symbol_index_builds_once_and_serves_lookups(tmp_path, fake_ctags):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    tree = _commit_files(
+        repo,
+        {
+            "kernel/a.c": "int alpha(void)\n{\n}\nint beta(void)\n",
+            "include/a.h": "int alpha(void);\n",
+            "README": "int not_indexed(void)\n",
+        },
+        "init",
+    )
+    db_path = tmp_path / "symbols.sqlite"
+
+    assert symbol_index_cache.ensure_symbol_index(repo_path=str(repo), tree_sha=tree, db_path=db_path) == "built"
+    assert symbol_index_cache.ensure_symbol_index(repo_path=str(repo), tree_sha=tree, db_path=db_path) == "hit"
+
+    assert fake_ctags == [["include/a.h", "kernel/a.c"]]
+    view = symbol_index_cache.SymbolIndexView(str(repo), tree, db_path=db_path)
+    assert view["alpha"] == [("include/a.h", 1), ("kernel/a.c", 1)]
+    assert "beta" in view
+    assert "not_indexed" not in view
+    assert view.get("missing") is None
+    assert sorted(view.keys()) == ["alpha", "beta"]
+
+
+def test_symbol_index_updates_incrementally_from_git_diff(tmp_path, fake_ctags):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    old_tree = _commit_files(
+        repo,
+        {"kernel/a.c": "int alpha(void)\n", "kernel/b.c": "int gamma(void)\n"},
+        "init",
+    )
+    db_path = tmp_path / "symbols.sqlite"
+    symbol_index_cache.ensure_symbol_index(repo_path=str(repo), tree_sha=old_tree, db_path=db_path)
+    (repo / "kernel/b.c").unlink()
+    new_tree = _commit_files(repo, {"kernel/a.c": "\nint alpha_renamed(void)\n"}, "change")
+
+    status = symbol_index_cache.ensure_symbol_index(repo_path=str(repo), tree_sha=new_tree, db_path=db_path)
+
+    assert status == "incremental"
+    assert fake_ctags[-1] == ["kernel/a.c"]
+    new_view = symbol_index_cache.SymbolIndexView(str(repo), new_tree, db_path=db_path)
+    old_view = symbol_index_cache.SymbolIndexView(str(repo), old_tree, db_path=db_path)
+    assert new_view["alpha_renamed"] == [("kernel/a.c", 2)]
+    assert "alpha" not in new_view
+    assert "gamma" not in new_view
+    assert old_view["alpha"] == [("kernel/a.c", 1)]
+    assert old_view["gamma"] == [("kernel/b.c", 1)]
+
+
+def test_symbol_index_reuses_tags_for_known_blobs(tmp_path, fake_ctags):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    first_tree = _commit_files(repo, {"a.c": "int alpha(void)\n"}, "init")
+    db_path = tmp_path / "symbols.sqlite"
+    symbol_index_cache.ensure_symbol_index(repo_path=str(repo), tree_sha=first_tree, db_path=db_path)
+    second_tree = _commit_files(repo, {"copy/a.c": "int alpha(void)\n"}, "copy")
+
+    symbol_index_cache.ensure_symbol_index(repo_path=str(repo), tree_sha=second_tree, db_path=db_path)
+
+    assert len(fake_ctags) == 1
+    view = symbol_index_cache.SymbolIndexView(str(repo), second_tree, db_path=db_path)
+    assert view["alpha"] == [("a.c", 1), ("copy/a.c", 1)]
+
+
+def test_resolve_tree_sha_rejects_unknown_ref(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    tree = _commit_files(repo, {"a.c": "int alpha(void)\n"}, "init")
+
+    assert symbol_index_cache.resolve_tree_sha(str(repo), "HEAD") == tree
+    with pytest.raises(ValueError):
+        symbol_index_cache.resolve_tree_sha(str(repo), "no-such-ref")
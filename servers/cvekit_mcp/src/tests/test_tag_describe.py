@@ -0,0 +1,163 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cvekit.utils import backport_sort, git_subject_index_cache, tag_describe
+
+
+def _git(cwd: Path, *args: str, date: int = 1_700_000_000) -> str:
+    return subprocess.run(
+        ["git", "-C", str(cwd), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={
+            "GIT_AUTHOR_NAME": "tester",
+            "GIT_AUTHOR_EMAIL": "tester@example.com",
+            "GIT_COMMITTER_NAME": "tester",
+            "GIT_COMMITTER_EMAIL": "tester@example.com",
+            "GIT_AUTHOR_DATE": f"{date} +0000",
+            "GIT_COMMITTER_DATE": f"{date} +0000",
+            "HOME": str(cwd),
+            "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+        },
+    ).stdout.strip()
+
+
+class _History:
+    def __init__(self, path: Path):
+        self.path = path
+        self.clock = 1_700_000_000
+        self.commits: dict[str, str] = {}
+
+    def git(self, *args: str) -> str:
+        self.clock += 60
+        return _git(self.path, *args, date=self.clock)
+
+    def commit(self, name: str) -> str:
+        (self.path / name).write_text(name + "\n", encoding="utf-8")
+        self.git("add", name)
+        self.git("commit", "-q", "-m", name)
+        self.commits[name] = self.git("rev-parse", "HEAD")
+        return self.commits[name]
+
+    def merge(self, branch: str, name: str) -> str:
+        self.git("merge", "-q", "--no-ff", "-m", name, branch)
+        self.commits[name] = self.git("rev-parse", "HEAD")
+        return self.commits[name]
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    monkeypatch.setenv(git_subject_index_cache.ENV_CACHE_DB, str(tmp_path / "backport-index.sqlite"))
+    monkeypatch.setattr(tag_describe, "MIN_WALK_BATCH", 0)
+    repo = tmp_path / "linux"
+    repo.mkdir()
+    history = _History(repo)
+    history.git("init", "-q", "-b", "master")
+    history.commit("root")
+    history.commit("before-tags")
+    history.git("tag", "v1.0")
+    history.git("tag", "-a", "-m", "v1.0 release", "v1.0-annotated")
+    history.commit("topic-base")
+    history.git("branch", "topic")
+    history.commit("main-1")
+    history.git("tag", "-a", "-m", "rc", "v2.0-rc1")
+    history.commit("main-2")
+    history.git("checkout", "-q", "topic")
+    history.commit("topic-1")
+    history.commit("topic-2")
+    history.git("tag", "topic-tag")
+    history.commit("topic-3")
+    history.git("checkout", "-q", "master")
+    history.merge("topic", "merge-topic")
+    history.commit("main-3")
+    history.git("tag", "v2.0")
+    history.git("checkout", "-q", "-b", "stable", "v2.0-rc1")
+    history.commit("stable-1")
+    history.git("checkout", "-q", "master")
+    history.merge("stable", "merge-stable")
+    history.commit("main-4")
+    return history
+
+
+def test_walk_matches_git_describe(history):
+    expected = {
+        commit_id: _git(history.path, "describe", "--tags", "--always", commit_id)
+        for commit_id in history.commits.values()
+    }
+    assert expected[history.commits["before-tags"]] == "v1.0-annotated"
+    assert expected[history.commits["root"]] == history.git("rev-parse", "--short", history.commits["root"])
+
+    assert tag_describe.describe_commits(str(history.path), list(history.commits.values())) == expected
+
+
+def test_results_are_cached_per_tag_set(history, monkeypatch):
+    commit_ids = list(history.commits.values())
+    first = tag_describe.describe_commits(str(history.path), commit_ids)
+
+    walks = []
+    real_walk = tag_describe._describe_by_walk
+    monkeypatch.setattr(
+        tag_describe, "_describe_by_walk", lambda *args: walks.append(args[1]) or real_walk(*args)
+    )
+    assert tag_describe.describe_commits(str(history.path), commit_ids) == first
+    assert walks == []
+
+    history.git("tag", "v2.1", history.commits["main-4"])
+    again = tag_describe.describe_commits(str(history.path), commit_ids)
+    assert walks == [commit_ids]
+    assert again[history.commits["main-4"]] == "v2.1"
+    assert again[history.commits["topic-1"]] == first[history.commits["topic-1"]]
+
+
+def test_unknown_commits_are_omitted(history):
+    known = history.commits["main-2"]
+    result = tag_describe.describe_commits(str(history.path), [known, "f" * 40], use_disk_cache=False)
+    assert result == {known: _git(history.path, "describe", "--tags", "--always", known)}
+
+
+def test_sort_uses_batch_resolver(history, monkeypatch):
+    names = ["main-4", "topic-2", "main-1", "stable-1"]
+    calls = []
+    real_describe = tag_describe.describe_commits
+    monkeypatch.setattr(
+        tag_describe, "describe_commits", lambda *args, **kwargs: calls.append(args[1]) or real_describe(*args, **kwargs)
+    )
+
+    sorted_items, errors = backport_sort.sort_commit_items_by_describe(
+        [history.commits[name] for name in names],
+        str(history.path),
+    )
+    assert errors == []
+    assert len(calls) == 1
+    assert [item["git_describe"] for item in sorted_items] == sorted(
+        (_git(history.path, "describe", "--tags", "--always", history.commits[name]) for name in names),
+        key=backport_sort.parse_describe_order,
+    )
+
+
+def test_walk_stops_below_shared_tag(history, monkeypatch):
+    names = ["main-1", "main-2", "stable-1", "merge-topic", "merge-stable", "main-4"]
+    commit_ids = [history.commits[name] for name in names]
+    boundaries = []
+    real_boundary = tag_describe._walk_boundary
+    monkeypatch.setattr(
+        tag_describe, "_walk_boundary", lambda *args: boundaries.append(real_boundary(*args)) or boundaries[-1]
+    )
+
+    result = tag_describe.describe_commits(str(history.path), commit_ids, use_disk_cache=False)
+    # 所有 commit 都包含 v2.0-rc1（main-1），遍历在它的父提交处截断；merge-topic 带进来的
+    # topic 分支不在 v2.0-rc1 的祖先中，仍会被遍历
+    assert boundaries == [[history.commits["topic-base"]]]
+    assert result == {
+        commit_id: _git(history.path, "describe", "--tags", "--always", commit_id) for commit_id in commit_ids
+    }
@@ -0,0 +1,212 @@
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cvekit.utils import tracing
+
+
+@pytest.fixture
+def enabled_tracing():
+    was_enabled = tracing.is_enabled()
+    tracing.reset()
+    tracing.enable()
+    try:
+        yield tracing
+    finally:
+        if not was_enabled:
+            tracing.disable()
+        tracing.reset()
+
+
+def _by_name(events):
+    return {event["name"]: event for event in events}
+
+
+def test_disabled_tracing_records_nothing():
+    if tracing.is_enabled():
+        pytest.skip("CVEKIT_TRACE 已在环境中开启")
+    mark = tracing.mark()
+    with tracing.span("stage", commit="abc") as span:
+        span.set(status="ok")
+        span.add(total_tokens=3)
+    tracing.start_span("detached").end()
+    assert tracing.traced("decorated")(lambda value: value * 2)(21) == 42
+    assert tracing.span("stage") is tracing.span("other")
+    assert tracing.langchain_callbacks() is None
+    assert tracing.events(mark) == []
+
+
+def test_nested_spans_and_subprocesses(enabled_tracing, tmp_path):
+    @tracing.traced("decorated")
+    def work():
+        subprocess.run(["git", "-C", str(tmp_path), "init", "-q"], check=True)
+        subprocess.run([sys.executable, "-c", "raise SystemExit(3)"])
+
+    with tracing.span("outer", commit="abc") as outer:
+        work()
+        with pytest.raises(ValueError):
+            with tracing.span("failing"):
+                raise ValueError("boom")
+        outer.add(total_tokens=5)
+        outer.add(total_tokens=2)
+
+    events = _by_name(tracing.events())
+    outer_event = events["outer"]
+    assert outer_event["attrs"] == {"commit": "abc", "total_tokens": 7}
+    assert events["decorated"]["parent"] == outer_event["id"]
+    assert events["failing"]["attrs"]["error"] == "ValueError"
+
+    git_event = events["subprocess:git init"]
+    assert git_event["detached"] and git_event["parent"] == events["decorated"]["id"]
+    assert git_event["attrs"]["returncode"] == 0
+    assert git_event["attrs"]["argv"].startswith("git -C ")
+    python_event = events[f"subprocess:{os.path.basename(sys.executable)}"]
+    assert python_event["attrs"]["returncode"] == 3
+
+
+def test_spans_on_worker_threads_are_independent(enabled_tracing):
+    def worker():
+        with tracing.span("thread-stage"):
+            pass
+
+    with tracing.span("main-stage"):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    events = _by_name(tracing.events())
+    assert events["thread-stage"]["parent"] is None
+    assert events["thread-stage"]["tid"] != events["main-stage"]["tid"]
+
+
+def test_chrome_trace_export_and_summary(enabled_tracing, tmp_path):
+    with tracing.span("stage"):
+        subprocess.run(["git", "--version"], capture_output=True, check=True)
+    with tracing.span("stage"):
+        pass
+    path = tracing.export_chrome_trace(str(tmp_path / "trace-{pid}.json"))
+    assert path == str(tmp_path / f"trace-{os.getpid()}.json")
+
+    trace = json.loads(Path(path).read_text(encoding="utf-8"))
+    phases = [(event["name"], event["ph"]) for event in trace["traceEvents"]]
+    assert phases.count(("stage", "X")) == 2
+    assert ("subprocess:git", "b") in phases and ("subprocess:git", "e") in phases
+    assert ("thread_name", "M") in phases
+    complete = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert all(event["dur"] >= 0 and event["pid"] == os.getpid() for event in complete)
+
+    rows = {row["name"]: row for row in tracing.summarize()}
+    assert rows["stage"]["count"] == 2
+    assert rows["subprocess:git"]["errors"] == 0
+    table = tracing.format_summary(tracing.summarize())
+    assert table.splitlines()[0].split() == ["span", "count", "total", "mean", "max", "errors", "tokens"]
+    assert "subprocess:git" in table
+
+
+def test_summary_since_mark_only_counts_later_spans(enabled_tracing):
+    with tracing.span("before"):
+        pass
+    mark = tracing.mark()
+    with tracing.span("after"):
+        pass
+    assert [row["name"] for row in tracing.summarize(since=mark)] == ["after"]
+
+
+def test_langchain_callback_records_token_usage(enabled_tracing):
+    pytest.importorskip("langchain_core")
+    from langchain_core.messages import AIMessage, HumanMessage
+    from langchain_core.outputs import ChatGeneration, LLMResult
+
+    (handler,) = tracing.langchain_callbacks()
+    run_id = uuid4()
+    handler.on_chat_model_start(
+        {"kwargs": {"model_name": "gpt-test"}},
+        [[HumanMessage(content="hi")]],
+        run_id=run_id,
+    )
+    handler.on_llm_end(
+        LLMResult(
+            generations=[[ChatGeneration(message=AIMessage(content="ok"))]],
+            llm_output={"token_usage": {"prompt_tokens": 11, "completion_tokens": 4, "total_tokens": 15}},
+        ),
+        run_id=run_id,
+    )
+    failed_run = uuid4()
+    handler.on_llm_start({}, ["prompt"], run_id=failed_run)
+    handler.on_llm_error(TimeoutError("slow"), run_id=failed_run)
+
+    llm_events = [event for event in tracing.events() if event["name"] == "llm"]
+    assert llm_events[0]["attrs"] == {
+        "model": "gpt-test",
+        "messages": 1,
+        "prompt_tokens": 11,
+        "completion_tokens": 4,
+        "total_tokens": 15,
+    }
+    assert llm_events[1]["attrs"]["error"] == "TimeoutError"
+    row = next(row for row in tracing.summarize() if row["name"] == "llm")
+    assert (row["count"], row["errors"], row["tokens"]) == (2, 1, 15)
+
+
+def test_trace_env_writes_file_at_exit(tmp_path):
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    env["CVEKIT_TRACE"] = str(tmp_path / "trace.json")
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import subprocess\n"
+            "from cvekit.utils import tracing\n"
+            "with tracing.span('script'):\n"
+            "    subprocess.run(['git', '--version'], capture_output=True)\n",
+        ],
+        env=env,
+        check=True,
+    )
+    trace = json.loads((tmp_path / "trace.json").read_text(encoding="utf-8"))
+    names = {event["name"] for event in trace["traceEvents"]}
+    assert {"script", "subprocess:git"} <= names
+
+
+def test_flush_writes_each_batch_and_clears_buffer(enabled_tracing, tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "_trace_path", str(tmp_path / "trace-{pid}.json"))
+    monkeypatch.setattr(tracing, "_flush_seq", itertools.count(1))
+    with tracing.span("first-action"):
+        pass
+    first = tracing.flush()
+    assert tracing.events() == []
+    assert tracing.flush() is None
+    with tracing.span("second-action"):
+        pass
+    second = tracing.flush()
+
+    assert first == str(tmp_path / f"trace-{os.getpid()}.1.json")
+    assert second == str(tmp_path / f"trace-{os.getpid()}.2.json")
+    for path, name in ((first, "first-action"), (second, "second-action")):
+        trace = json.loads(Path(path).read_text(encoding="utf-8"))
+        assert [event["name"] for event in trace["traceEvents"] if event["ph"] == "X"] == [name]
+
+
+def test_event_buffer_is_capped(enabled_tracing, monkeypatch):
+    monkeypatch.setattr(tracing, "MAX_EVENTS", 3)
+    for index in range(5):
+        with tracing.span(f"stage-{index}"):
+            pass
+    assert [event["name"] for event in tracing.events()] == ["stage-0", "stage-1", "stage-2"]
+    assert tracing.dropped() == 2
+    assert tracing.chrome_trace()["otherData"] == {"dropped_events": 2}
+    tracing.reset()
+    assert tracing.dropped() == 0
@@ -0,0 +1,183 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+WEBHOOK_ROOT = PROJECT_ROOT / "git_webhook"
+
+
+def _import_webhook_modules():
+    # git_webhook 使用扁平模块名（config 等），与 mystique 的 config 模块同名，导入时临时替换
+    saved_config = sys.modules.pop("config", None)
+    sys.path.insert(0, str(WEBHOOK_ROOT))
+    try:
+        import migrate_worker
+        import task_store
+    finally:
+        sys.path.remove(str(WEBHOOK_ROOT))
+        sys.modules.pop("config", None)
+        if saved_config is not None:
+            sys.modules["config"] = saved_config
+    return task_store, migrate_worker
+
+
+task_store, migrate_worker = _import_webhook_modules()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return task_store.TaskStore(
+        str(tmp_path / "tasks.sqlite"),
+        repo_concurrency=1,
+        max_attempts=2,
+        retry_base_seconds=0,
+    )
+
+
+def _pipeline(cve_id, branches, **extra):
+    return {"cve_id": cve_id, "payload": {}, "action": "pipeline", "branches": branches, **extra}
+
+
+def test_identical_tasks_are_coalesced_while_active(store):
+    first, coalesced = store.submit(_pipeline("CVE-2025-1", ["OLK-6.6", "OLK-5.10"]))
+    assert not coalesced
+    again, coalesced = store.submit(_pipeline("cve-2025-1", ["OLK-5.10", "OLK-6.6"]))
+    assert (again, coalesced) == (first, True)
+    other, coalesced = store.submit(_pipeline("CVE-2025-1", ["OLK-6.6"]))
+    assert other != first and not coalesced
+
+    # 运行中的任务同样合并
+    assert store.claim("w1").task_id == first
+    assert store.submit(_pipeline("CVE-2025-1", ["OLK-6.6", "OLK-5.10"])) == (first, True)
+    # 已结束的任务不再合并，新的指令会重新执行
+    store.complete(first)
+    assert store.submit(_pipeline("CVE-2025-1", ["OLK-6.6", "OLK-5.10"]))[1] is False
+
+
+def _issue_payload(repo, number):
+    return {"repository": {"full_name": repo}, "issue": {"number": number}}
+
+
+def test_requests_from_different_issues_are_not_coalesced(store):
+    first, coalesced = store.submit({
+        "cve_id": "CVE-2025-1",
+        "payload": _issue_payload("src-openeuler/kernel", "I1"),
+        "action": "branches-analysis",
+    })
+    assert not coalesced
+    # 同一 Issue 的重复投递合并
+    assert store.submit({
+        "cve_id": "CVE-2025-1",
+        "payload": _issue_payload("src-openeuler/kernel", "I1"),
+        "action": "branches-analysis",
+    }) == (first, True)
+    # 其他 Issue / 其他仓库的相同请求各自执行，结果写回各自的 Issue
+    other_issue, coalesced = store.submit({
+        "cve_id": "CVE-2025-1",
+        "payload": _issue_payload("src-openeuler/kernel", "I2"),
+        "action": "branches-analysis",
+    })
+    assert other_issue != first and not coalesced
+    other_repo, coalesced = store.submit({
+        "cve_id": "CVE-2025-1",
+        "payload": _issue_payload("openeuler/kernel", "I1"),
+        "action": "branches-analysis",
+    })
+    assert other_repo not in (first, other_issue) and not coalesced
+    assert store.get(other_issue).task["payload"]["issue"]["number"] == "I2"
+
+    # 同一 Issue 下不同签名人的 /create_pr 也不合并
+    payload = _issue_payload("src-openeuler/kernel", "I1")
+    signed, _ = store.submit(_pipeline("CVE-2025-1", ["OLK-6.6"], payload=payload, signer_email="a@x.com"))
+    resigned, coalesced = store.submit(_pipeline("CVE-2025-1", ["OLK-6.6"], payload=payload, signer_email="b@x.com"))
+    assert resigned != signed and not coalesced
+
+
+def test_priority_and_per_repo_concurrency(store):
+    pipeline_id, _ = store.submit(_pipeline("CVE-2025-1", ["OLK-6.6"]))
+    analysis_id, _ = store.submit({"cve_id": "CVE-2025-2", "payload": {}, "action": "branches-analysis"})
+    migrate_id, _ = store.submit({
+        "action": "pr-migration",
+        "commit_id": "a" * 40,
+        "target_path": "/repos/other",
+    })
+
+    # 分支分析优先级最高；同一仓库（default）上只能同时运行一个任务
+    assert store.claim("w1").task_id == analysis_id
+    assert store.claim("w2").task_id == migrate_id
+    assert store.claim("w3") is None
+    store.complete(analysis_id)
+    assert store.claim("w3").task_id == pipeline_id
+
+
+def test_retry_with_backoff_then_fail(store):
+    task_id, _ = store.submit(_pipeline("CVE-2025-1", ["OLK-6.6"]))
+    store.claim("w1")
+    assert store.fail(task_id, "backend unreachable", retryable=True) is True
+    record = store.get(task_id)
+    assert record.status == task_store.STATUS_PENDING
+    assert record.last_error == "backend unreachable"
+
+    assert store.claim("w1").attempts == 2
+    assert store.fail(task_id, "backend unreachable", retryable=True) is False
+    assert store.get(task_id).status == task_store.STATUS_FAILED
+
+
+def test_backoff_delays_next_claim(tmp_path):
+    store = task_store.TaskStore(str(tmp_path / "tasks.sqlite"), max_attempts=3, retry_base_seconds=60)
+    task_id, _ = store.submit(_pipeline("CVE-2025-1", ["OLK-6.6"]))
+    store.claim("w1")
+    store.fail(task_id, "timeout", retryable=True)
+    assert store.claim("w1") is None
+
+
+def test_tasks_and_results_survive_restart(tmp_path):
+    db_path = str(tmp_path / "tasks.sqlite")
+    store = task_store.TaskStore(db_path)
+    running_id, _ = store.submit(_pipeline("CVE-2025-1", ["OLK-6.6"]))
+    done_id, _ = store.submit({"action": "pr-migration", "commit_id": "b" * 40, "target_path": "/repos/x"})
+    store.claim("w1")
+    store.claim("w2")
+    store.complete(done_id, {"task_id": done_id, "status": "success"})
+
+    restarted = task_store.TaskStore(db_path)
+    assert restarted.recover_interrupted() == 1
+    assert restarted.get(running_id).status == task_store.STATUS_PENDING
+    assert restarted.get(done_id).result == {"task_id": done_id, "status": "success"}
+    assert restarted.claim("w1").task_id == running_id
+
+
+def test_restart_fails_tasks_that_already_emitted_events(tmp_path):
+    db_path = str(tmp_path / "tasks.sqlite")
+    store = task_store.TaskStore(db_path)
+    quiet_id, _ = store.submit(_pipeline("CVE-2025-1", ["OLK-6.6"]))
+    started_id, _ = store.submit(_pipeline("CVE-2025-2", ["OLK-6.6"], clone_dir="/repos/z"))
+    store.claim("w1")
+    store.claim("w2")
+    store.mark_events_seen(started_id)
+
+    restarted = task_store.TaskStore(db_path)
+    assert restarted.recover_interrupted() == 1
+    assert restarted.get(quiet_id).status == task_store.STATUS_PENDING
+    interrupted = restarted.get(started_id)
+    assert interrupted.status == task_store.STATUS_FAILED
+    assert interrupted.last_error == task_store.INTERRUPTED_ERROR
+    assert restarted.claim("w1").task_id == quiet_id
+    assert restarted.claim("w2") is None
+
+
+def test_migrate_worker_reports_pending_status(tmp_path, monkeypatch):
+    store = task_store.TaskStore(str(tmp_path / "tasks.sqlite"))
+    monkeypatch.setattr(task_store, "_store", store)
+    task_id, _ = task_store.submit_task({
+        "action": "pr-migration",
+        "commit_id": "c" * 40,
+        "source_pr_url": "https://gitee.com/o/r/pulls/1",
+        "target_path": "/repos/y",
+    })
+    assert migrate_worker.get_task_result(task_id)["status"] == "pending"
+    migrate_worker.store_result(task_id, {"task_id": task_id, "status": "success"})
+    assert migrate_worker.get_task_result(task_id) == {"task_id": task_id, "status": "success"}
+    assert migrate_worker.get_task_result("missing") is None